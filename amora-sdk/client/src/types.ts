@@ -145,10 +145,42 @@ export interface CommandMessage {
   commandId: string;
   /** Command parameters */
   params?: any;
+  /** Ask the device to include a CommandTrace in the response data */
+  trace?: boolean;
   /** Timestamp */
   timestamp: number;
 }
 
+/**
+ * Timing span recorded by the device while handling a command
+ */
+export interface TraceSpan {
+  /** Stage name (parse, handler, mpd, publish) */
+  name: string;
+  /** Start, relative to when the device received the command */
+  start_ms: number;
+  /** Duration */
+  duration_ms: number;
+}
+
+/**
+ * Device-side timing trace, found in ResponseMessage.data.trace
+ */
+export interface CommandTrace {
+  /** Command ID */
+  command_id: string;
+  /** When the device received the command (seconds since epoch) */
+  received_at: number;
+  /** Command timestamp as sent (seconds since epoch) */
+  sent_at?: number;
+  /** Time between sending and receipt; includes clock offset between the hosts */
+  network_ms?: number;
+  /** Time spent on the device up to building the response */
+  total_ms: number;
+  /** Recorded spans */
+  spans: TraceSpan[];
+}
+
 /**
  * Response message
  */
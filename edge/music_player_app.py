@@ -26,24 +26,46 @@ logger = logging.getLogger(__name__)
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../sdk')))
 
 # Import SDK components
-from amora_sdk.device.player import MusicPlayer
+from amora_sdk.device.player import MusicPlayer, LibraryWatcher, Prefetcher, SystemProbe
 from amora_sdk.device.broker.manager import BrokerManager
 from amora_sdk.device.broker.config import BrokerConfig, ConnectionOptions, QoS
-from amora_sdk.device.broker.messages import CommandMessage, ResponseMessage
+from amora_sdk.device.broker.messages import (
+    CommandMessage, BatchCommandMessage, ResponseMessage, batch_response, chunk_responses
+)
+from amora_sdk import memory, metrics
 
 # Global variables
 player = None
 broker = None
+library_watcher = None
+prefetcher = None
+system_probe = None
+metrics_server = None
+memory_budget = None
 running = False
 update_thread = None
 last_status = None
 last_full_update_time = 0
 last_position_update_time = 0
+last_metrics_publish_time = 0
+
+# Player methods exposed as commands through the generic handler
+PLAYER_COMMANDS = [
+    "play", "pause", "stop", "next", "previous",
+    "set_volume", "get_volume", "get_status", "get_playlists",
+    "set_repeat", "set_random",
+    "create_playlist", "delete_playlist",
+    "update_database"
+]
+
+# Player methods that can run in a batch: the generic ones and those with their own handler
+BATCH_COMMANDS = PLAYER_COMMANDS + ["play_playlist", "get_playlist_songs"]
 
 # Configuration
 update_interval = 1.0  # seconds
 position_update_interval = 1.0  # seconds
 full_update_interval = 5.0  # seconds
+metrics_publish_interval = 0.0  # seconds, 0 disables
 enable_status_updates = True
 
 
@@ -79,11 +101,13 @@ def create_broker_config() -> BrokerConfig:
     Returns:
         BrokerConfig instance
     """
+    device_id = "amora-player-001"
     return BrokerConfig(
         broker_url="localhost",
         port=1883,
-        client_id=f"amora-device-{int(time.time())}",
-        device_id="amora-player-001",
+        # Stable across restarts, so the broker can resume the persistent session
+        client_id=f"amora-device-{device_id}",
+        device_id=device_id,
         topic_prefix="amora/devices",
         connection_options=ConnectionOptions(
             use_tls=False,
@@ -119,10 +143,83 @@ def load_config(config_path: Optional[str] = None) -> Dict[str, Any]:
             "update_interval": 1.0,
             "position_update_interval": 1.0,
             "full_update_interval": 5.0
+        },
+        "library_watcher": {
+            "enabled": True,
+            "debounce": 1.0,
+            "max_delay": 10.0
+        },
+        "prefetch": {
+            "enabled": True,
+            "count": 2,
+            "byte_budget": 64 * 1024 * 1024,
+            "mode": "auto"
+        },
+        "system_probe": {
+            "ttl": 30.0
+        },
+        "metrics": {
+            "enabled": False,
+            "port": 9100,
+            "publish_interval": 60.0
         }
     }
 
 
+def start_library_watcher(config: Dict[str, Any]) -> bool:
+    """
+    Start watching the music directory for targeted database updates.
+    
+    Args:
+        config: Library watcher configuration
+        
+    Returns:
+        True if started successfully, False otherwise
+    """
+    global player, library_watcher
+    
+    if not config.get("enabled", True):
+        logger.info("Library watcher is disabled in configuration")
+        return False
+    
+    if not os.path.isdir(player.music_dir):
+        logger.warning(f"Music directory {player.music_dir} not found, library watcher not started")
+        return False
+    
+    library_watcher = LibraryWatcher(
+        player,
+        player.music_dir,
+        debounce=config.get("debounce", 1.0),
+        max_delay=config.get("max_delay", 10.0)
+    )
+    return library_watcher.start()
+
+
+def start_prefetcher(config: Dict[str, Any]) -> bool:
+    """
+    Start warming upcoming tracks to avoid gaps on slow storage.
+    
+    Args:
+        config: Prefetch configuration
+        
+    Returns:
+        True if started successfully, False otherwise
+    """
+    global player, prefetcher
+    
+    if not config.get("enabled", True):
+        logger.info("Prefetcher is disabled in configuration")
+        return False
+    
+    prefetcher = Prefetcher(
+        player,
+        count=config.get("count", 2),
+        byte_budget=config.get("byte_budget", 64 * 1024 * 1024),
+        mode=config.get("mode", "auto")
+    )
+    return prefetcher.start()
+
+
 def update_player_state() -> bool:
     """
     Update the player state.
@@ -186,8 +283,8 @@ def check_and_update_status() -> None:
             send_update = True
             send_full_update = True
         
-        # Check if volume changed
-        elif current_status.get("volume") != last_status.get("volume"):
+        # Check if volume changed, except in a ramp, which publishes its start and end
+        elif current_status.get("volume") != last_status.get("volume") and not player.ramping:
             send_update = True
         
         # Check if repeat or random changed
@@ -222,6 +319,91 @@ def check_and_update_status() -> None:
     last_status = current_status
 
 
+def start_metrics(config: Dict[str, Any]) -> bool:
+    """
+    Enable SDK metrics and serve them for Prometheus.
+    
+    Args:
+        config: Metrics configuration
+        
+    Returns:
+        True if started successfully, False otherwise
+    """
+    global broker, metrics_server, metrics_publish_interval
+    
+    if not config.get("enabled", False):
+        return False
+    
+    metrics.enable({"device_id": broker.config.device_id})
+    metrics_publish_interval = config.get("publish_interval", 60.0)
+    
+    if config.get("port"):
+        metrics_server = metrics.MetricsServer(port=config["port"])
+        return metrics_server.start()
+    return True
+
+
+def start_memory_budget(config: Dict[str, Any]) -> bool:
+    """
+    Enable memory-budget mode.
+    
+    Must run before any thread is started, since the malloc arena limit
+    only applies to arenas created afterwards.
+    
+    Args:
+        config: Memory configuration
+        
+    Returns:
+        True if enabled, False otherwise
+    """
+    global memory_budget
+    
+    if not config.get("budget_mode", False):
+        return False
+    
+    memory_budget = memory.MemoryBudget(
+        arena_max=config.get("arena_max", 2),
+        trim_interval=config.get("trim_interval", 300.0),
+        trace=config.get("tracemalloc", False),
+        trace_frames=config.get("frames", 1)
+    )
+    memory_budget.start()
+    return True
+
+
+def handle_memory_report(command_msg: CommandMessage) -> ResponseMessage:
+    """
+    Handle memory_report with RSS, garbage collector and tracemalloc figures.
+    
+    Args:
+        command_msg: Command message
+        
+    Returns:
+        Response message
+    """
+    params = command_msg.params or {}
+    limit = params.get("limit", 10)
+    group_by = params.get("group_by", "lineno")
+    if memory_budget:
+        report = memory_budget.report(limit, group_by)
+    else:
+        report = memory.memory_report(limit, group_by)
+    return ResponseMessage(command_id=command_msg.command_id, result=True, data=report)
+
+
+def publish_metrics_if_due() -> None:
+    """Publish a metrics snapshot on the metrics topic every publish interval."""
+    global broker, last_metrics_publish_time
+    
+    if not metrics.is_enabled() or not metrics_publish_interval:
+        return
+    
+    current_time = time.time()
+    if current_time - last_metrics_publish_time >= metrics_publish_interval:
+        broker.publish_metrics()
+        last_metrics_publish_time = current_time
+
+
 def status_update_loop() -> None:
     """Main status update loop."""
     global running
@@ -229,6 +411,9 @@ def status_update_loop() -> None:
     while running:
         try:
             check_and_update_status()
+            publish_metrics_if_due()
+            if memory_budget:
+                memory_budget.trim_if_due()
         except Exception as e:
             logger.error(f"Error in status update loop: {e}")
         
@@ -319,6 +504,219 @@ def create_command_handler(command: str):
     return handler
 
 
+def handle_get_playlist_songs(command_msg: CommandMessage):
+    """
+    Handle get_playlist_songs, streaming the result when a chunk size is given.
+    
+    With a "chunk_size" parameter the songs are sent as a sequence of chunked
+    responses correlated by command_id; otherwise a single response is sent.
+    "offset", "limit" and "fields" are passed through to the player.
+    
+    Args:
+        command_msg: Command message
+        
+    Returns:
+        Response message, or an iterator of chunked response messages
+    """
+    params = dict(command_msg.params or {})
+    chunk_size = params.pop("chunk_size", None)
+    
+    if not chunk_size:
+        return create_command_handler("get_playlist_songs")(command_msg)
+    
+    chunks = player.iter_playlist_songs(
+        params.get("playlist_name"),
+        chunk_size=int(chunk_size),
+        fields=params.get("fields")
+    )
+    return chunk_responses(command_msg.command_id, chunks, key="songs")
+
+
+def handle_batch(command_msg: BatchCommandMessage) -> ResponseMessage:
+    """
+    Handle a batch of player commands with one state update.
+    
+    The player sends consecutive simple commands (play, set_volume, ...) to
+    MPD as one command list, and the state is published once for the whole
+    batch instead of once per command.
+    
+    Args:
+        command_msg: Batch command message
+        
+    Returns:
+        Combined response message
+    """
+    commands = command_msg.sub_commands()
+    if not commands:
+        return ResponseMessage(command_id=command_msg.command_id, result=False, message="Batch has no commands")
+    
+    unsupported = [c.command for c in commands if c.command not in BATCH_COMMANDS]
+    if unsupported:
+        return ResponseMessage(
+            command_id=command_msg.command_id,
+            result=False,
+            message=f"Commands cannot be batched: {', '.join(unsupported)}"
+        )
+    
+    try:
+        results = player.run_batch(
+            [(c.command, c.params or {}) for c in commands],
+            stop_on_error=command_msg.stop_on_error
+        )
+    except Exception as e:
+        logger.error(f"Error executing batch: {e}")
+        return ResponseMessage(
+            command_id=command_msg.command_id,
+            result=False,
+            message=f"Error executing command: {str(e)}"
+        )
+    
+    responses = []
+    for sub_command, result in zip(commands, results):
+        if result.get("skipped"):
+            message = "Skipped after an earlier failure"
+        elif result["result"]:
+            message = f"Command {sub_command.command} executed"
+        else:
+            message = f"Error executing command: {result.get('error')}"
+        responses.append(ResponseMessage(
+            command_id=sub_command.command_id,
+            result=result["result"],
+            message=message,
+            data={"result": result.get("data")} if result["result"] else None
+        ))
+    
+    # One state update for the whole batch
+    update_player_state()
+    
+    return batch_response(command_msg.command_id, commands, responses)
+
+
+def handle_ramp_volume(command_msg: CommandMessage) -> ResponseMessage:
+    """
+    Handle ramp_volume, publishing the state when the ramp starts and ends.
+    
+    The player steps the volume itself, so a fade is one command instead
+    of a set_volume per step, and the state is not published in between.
+    
+    Args:
+        command_msg: Command message with "target", "duration" and optionally "curve"
+        
+    Returns:
+        Response message
+    """
+    params = command_msg.params or {}
+    try:
+        result = player.ramp_volume(
+            params["target"],
+            params.get("duration", 0),
+            curve=params.get("curve", "linear"),
+            on_complete=lambda volume: update_player_state()
+        )
+    except (KeyError, TypeError, ValueError) as e:
+        return ResponseMessage(
+            command_id=command_msg.command_id,
+            result=False,
+            message=f"Invalid parameters for ramp_volume: {e}"
+        )
+    
+    update_player_state()
+    return ResponseMessage(
+        command_id=command_msg.command_id,
+        result=result,
+        message="Command ramp_volume executed" if result else "Failed to start volume ramp",
+        data={"result": result}
+    )
+
+
+def prepare_play_playlist(command_msg: CommandMessage):
+    """
+    Stage a scheduled play_playlist: load the queue now, start playback at the target time.
+    
+    Args:
+        command_msg: Command message with an execute_at time
+    
+    Returns:
+        Function starting playback and returning the response message
+    """
+    playlist_name = (command_msg.params or {}).get("playlist_name")
+    if not player.stage_playlist(playlist_name):
+        raise RuntimeError(f"Failed to stage playlist {playlist_name}")
+    
+    # Runs in the scheduler thread: playback starts on a connection of its own, and
+    # the status loop publishes the new state, since the player's connection is not
+    # thread-safe
+    def fire() -> ResponseMessage:
+        client = player.open_connection()
+        try:
+            result = client is not None and player.play_from_start(client=client)
+        finally:
+            if client is not None:
+                try:
+                    client.close()
+                    client.disconnect()
+                except Exception:
+                    pass
+        return ResponseMessage(
+            command_id=command_msg.command_id,
+            result=result,
+            message="Command play_playlist executed" if result else "Failed to start playback",
+            data={"result": result}
+        )
+    
+    return fire
+
+
+def handle_get_audio_devices(command_msg: CommandMessage) -> ResponseMessage:
+    """
+    Handle get_audio_devices from the system probe cache.
+    
+    Args:
+        command_msg: Command message
+        
+    Returns:
+        Response message
+    """
+    return ResponseMessage(
+        command_id=command_msg.command_id,
+        result=True,
+        data={"devices": system_probe.get_audio_devices()}
+    )
+
+
+def handle_get_system_status(command_msg: CommandMessage) -> ResponseMessage:
+    """
+    Handle get_system_status from the system probe cache.
+    
+    Args:
+        command_msg: Command message
+        
+    Returns:
+        Response message
+    """
+    mpd_running, mpd_status = system_probe.get_mpd_status()
+    return ResponseMessage(
+        command_id=command_msg.command_id,
+        result=True,
+        data={
+            "mpd_running": mpd_running,
+            "mpd_status": mpd_status,
+            "audio_devices": len(system_probe.get_audio_devices())
+        }
+    )
+
+
+def on_system_change(kind: str, value: Any) -> None:
+    """
+    Log audio device and MPD service changes reported by the system probe.
+    
+    Args:
+        kind: Probe kind
+        value: New value
+    """
+    logger.info(f"System change detected ({kind}): {value}")
+
+
 def on_command_received(command_msg: CommandMessage) -> None:
     """
     Handle received command.
@@ -326,7 +724,7 @@ def on_command_received(command_msg: CommandMessage) -> None:
     Args:
         command_msg: Command message
     """
-    logger.debug(f"Command received: {command_msg.command}")
+    logger.debug("Command received: %s", command_msg.command)
     # The actual command execution is handled by the registered command handlers
 
 
@@ -335,16 +733,29 @@ def register_command_handlers() -> None:
     global broker
     
     # Register handlers for standard player commands
-    standard_commands = [
-        "play", "pause", "stop", "next", "previous", 
-        "set_volume", "get_volume", "get_status", "get_playlists",
-        "play_playlist", "set_repeat", "set_random", 
-        "create_playlist", "delete_playlist", "get_playlist_songs",
-        "update_database"
-    ]
-    
-    for command in standard_commands:
+    for command in PLAYER_COMMANDS:
         broker.register_command_handler(command, create_command_handler(command))
+    
+    # Volume ramps run on the player and publish only their start and end
+    broker.register_command_handler("ramp_volume", handle_ramp_volume)
+    
+    # Scheduled playlist starts load the queue on arrival
+    broker.register_command_handler(
+        "play_playlist", create_command_handler("play_playlist"), prepare=prepare_play_playlist
+    )
+
+    # Batches of player commands run as MPD command lists
+    broker.register_command_handler("batch", handle_batch)
+    
+    # Long playlists can be streamed in chunks
+    broker.register_command_handler("get_playlist_songs", handle_get_playlist_songs)
+    
+    # System information is served from the probe cache
+    broker.register_command_handler("get_audio_devices", handle_get_audio_devices)
+    broker.register_command_handler("get_system_status", handle_get_system_status)
+    
+    # Memory diagnostics for soak runs
+    broker.register_command_handler("memory_report", handle_memory_report)
 
 
 def initialize(config: Dict[str, Any]) -> bool:
@@ -357,7 +768,7 @@ def initialize(config: Dict[str, Any]) -> bool:
     Returns:
         True if initialization was successful, False otherwise
     """
-    global player, broker, update_interval, position_update_interval, full_update_interval, enable_status_updates
+    global player, broker, system_probe, update_interval, position_update_interval, full_update_interval, enable_status_updates
     
     # Update configuration
     update_interval = config.get("status_updater", {}).get("update_interval", 1.0)
@@ -365,6 +776,9 @@ def initialize(config: Dict[str, Any]) -> bool:
     full_update_interval = config.get("status_updater", {}).get("full_update_interval", 5.0)
     enable_status_updates = config.get("status_updater", {}).get("enabled", True)
     
+    # Bound allocator growth before the first thread starts
+    start_memory_budget(config.get("memory", {}))
+    
     try:
         # Create player
         player_config = create_player_config()
@@ -375,6 +789,10 @@ def initialize(config: Dict[str, Any]) -> bool:
             logger.error("Failed to connect to player")
             return False
         
+        # Cache device and service probes instead of spawning processes per request
+        system_probe = SystemProbe(ttl=config.get("system_probe", {}).get("ttl", 30.0))
+        system_probe.add_listener(on_system_change)
+        
         # Create broker
         broker_config = create_broker_config()
         broker = BrokerManager(broker_config)
@@ -391,10 +809,26 @@ def initialize(config: Dict[str, Any]) -> bool:
             player.disconnect()
             return False
         
+        # Performance metrics
+        start_metrics(config.get("metrics", {}))
+        
         # Start status updates if enabled
         if enable_status_updates:
             start_status_updates()
         
+        # Pick up new music without full-library rescans
+        start_library_watcher(config.get("library_watcher", {}))
+        
+        # Warm upcoming tracks
+        start_prefetcher(config.get("prefetch", {}))
+        
+        # Watch for audio device hot-plug
+        system_probe.start()
+        
+        # Startup objects live for the whole run; keep the collector off them
+        if memory_budget:
+            memory_budget.freeze()
+        
         return True
     except Exception as e:
         logger.error(f"Error initializing application: {e}")
@@ -403,11 +837,31 @@ def initialize(config: Dict[str, Any]) -> bool:
 
 def cleanup() -> None:
     """Clean up resources."""
-    global player, broker
+    global player, broker, library_watcher, prefetcher, system_probe, metrics_server, memory_budget
     
     # Stop status updates
     stop_status_updates()
     
+    # Stop the metrics server
+    if metrics_server:
+        metrics_server.stop()
+        metrics_server = None
+    
+    # Stop the system probe
+    if system_probe:
+        system_probe.stop()
+        system_probe = None
+    
+    # Stop the prefetcher
+    if prefetcher:
+        prefetcher.stop()
+        prefetcher = None
+    
+    # Stop the library watcher
+    if library_watcher:
+        library_watcher.stop()
+        library_watcher = None
+    
     # Disconnect from broker
     if broker:
         broker.disconnect()
@@ -416,6 +870,11 @@ def cleanup() -> None:
     if player:
         player.disconnect()
     
+    # Stop memory tracing
+    if memory_budget:
+        memory_budget.stop()
+        memory_budget = None
+    
     logger.info("Application stopped")
 
 
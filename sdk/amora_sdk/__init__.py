@@ -1,8 +1,14 @@
 """
 AmoraSDK - SDK for controlling AmoraOS player device.
+
+The controller package is not imported here, so devices do not load it (or
+its optional dependencies); controllers import ``amora_sdk.controller``.
 """
 
 from . import device
+from . import memory
+from . import metrics
+from . import tracing
 
 __version__ = "0.1.0"
-__all__ = ["device"]
+__all__ = ["device", "memory", "metrics", "tracing"]
@@ -0,0 +1,19 @@
+"""
+AmoraSDK Controller module for sending commands to Amora OS devices.
+
+This module provides the controller side of the broker protocol: an RPC
+client that sends commands over MQTT and resolves a future per command with
+the device's response, a columnar store of the fleet's device states, a
+dispatcher fanning commands out to many devices, and a clock offset
+estimator for commands scheduled with execute_at.
+"""
+
+from .rpc import RPCClient, CommandTimeoutError
+from .fleet import FleetStateStore, NUMPY_AVAILABLE
+from .fanout import FanOut, FanOutDispatcher, FanOutSummary
+from .clock import ClockOffsetEstimator
+
+__all__ = [
+    "RPCClient", "CommandTimeoutError", "FleetStateStore", "NUMPY_AVAILABLE",
+    "FanOut", "FanOutDispatcher", "FanOutSummary", "ClockOffsetEstimator"
+]
@@ -0,0 +1,164 @@
+"""
+Clock offset estimation for controllers.
+
+Commands with an ``execute_at`` time carry it in the controller's clock;
+each device converts it with its offset to the controller, so that devices
+whose clocks disagree still act at the same instant. ``ClockOffsetEstimator``
+measures the offsets with ``time_sync`` probes over the command
+request/response path, as NTP does:
+
+    offset = ((received - sent) + (replied - answered)) / 2
+    round trip = (answered - sent) - (replied - received)
+
+where ``sent`` and ``answered`` are controller clock times and ``received``
+and ``replied`` device clock times. The estimate is the offset of the
+probe with the shortest round trip among the last few, since queueing
+delays lengthen round trips and skew their offsets. Every probe carries
+the current estimate, which the device adopts.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, wait
+from typing import Callable, Deque, Dict, Iterable, Optional, Tuple
+
+from ..device.broker.messages import TIME_SYNC_COMMAND
+from .rpc import RPCClient
+
+logger = logging.getLogger(__name__)
+
+
+class ClockOffsetEstimator:
+    """
+    Per-device clock offsets measured through an RPCClient.
+
+    Offsets are device clock minus controller clock, in seconds; a device
+    runs a command due at controller time T at its own time T + offset.
+    """
+
+    def __init__(self, rpc: RPCClient, window: int = 8, clock: Callable[[], float] = time.time):
+        """
+        Initialize the estimator.
+
+        Args:
+            rpc: Connected RPC client
+            window: Probes kept per device
+            clock: Controller wall clock, the clock execute_at times refer to
+        """
+        self.rpc = rpc
+        self.window = window
+        self.clock = clock
+        # Per device: (round trip, offset) of the latest probes
+        self._samples: Dict[str, Deque[Tuple[float, float]]] = {}
+        self._lock = threading.Lock()
+
+    def add_sample(self, device_id: str, sent: float, received: float, replied: float, answered: float) -> float:
+        """
+        Record one probe.
+
+        Args:
+            device_id: Device ID
+            sent: Controller clock time the probe was sent
+            received: Device clock time the probe was received
+            replied: Device clock time the response was built
+            answered: Controller clock time the response arrived
+
+        Returns:
+            The device's offset estimate
+        """
+        offset = ((received - sent) + (replied - answered)) / 2
+        round_trip = max(0.0, (answered - sent) - (replied - received))
+        with self._lock:
+            samples = self._samples.setdefault(device_id, deque(maxlen=self.window))
+            samples.append((round_trip, offset))
+            return min(samples)[1]
+
+    def offset(self, device_id: str) -> Optional[float]:
+        """
+        Get a device's offset estimate.
+
+        Args:
+            device_id: Device ID
+
+        Returns:
+            Device clock minus controller clock in seconds, or None if never probed
+        """
+        with self._lock:
+            samples = self._samples.get(device_id)
+            return min(samples)[1] if samples else None
+
+    def error_bound(self, device_id: str) -> Optional[float]:
+        """
+        Get the largest error of a device's offset estimate: half the round trip it came from.
+
+        Args:
+            device_id: Device ID
+
+        Returns:
+            Error bound in seconds, or None if never probed
+        """
+        with self._lock:
+            samples = self._samples.get(device_id)
+            return min(samples)[0] / 2 if samples else None
+
+    def probe(self, device_id: str, timeout: Optional[float] = None) -> Future:
+        """
+        Send one time_sync probe carrying the current estimate.
+
+        Args:
+            device_id: Device ID
+            timeout: Seconds to wait for the response, defaults to the RPC client's default timeout
+
+        Returns:
+            Future resolved with the updated offset estimate
+        """
+        params = {}
+        offset = self.offset(device_id)
+        if offset is not None:
+            params["offset"] = offset
+
+        result: Future = Future()
+        sent = self.clock()
+        response_future = self.rpc.send_command(device_id, TIME_SYNC_COMMAND, params, timeout)
+
+        def on_response(future: Future) -> None:
+            answered = self.clock()
+            try:
+                data = future.result().data
+                estimate = self.add_sample(device_id, sent, data["received"], data["sent"], answered)
+            except (KeyError, TypeError):
+                result.set_exception(ValueError(f"Invalid time_sync response from {device_id}"))
+            except Exception as e:
+                result.set_exception(e)
+            else:
+                result.set_result(estimate)
+
+        response_future.add_done_callback(on_response)
+        return result
+
+    def synchronise(self, device_ids: Iterable[str], probes: int = 4,
+                    timeout: Optional[float] = None) -> Dict[str, Optional[float]]:
+        """
+        Probe devices a few times each and leave them with the final estimate.
+
+        The devices are probed in parallel, one probe at a time per device,
+        with one more probe at the end to hand over the final estimate.
+
+        Args:
+            device_ids: Device IDs
+            probes: Probes per device
+            timeout: Seconds to wait for each probe
+
+        Returns:
+            Offset estimate per device, None for devices that did not answer
+        """
+        device_ids = list(device_ids)
+        for _ in range(probes + 1):
+            futures = [self.probe(device_id, timeout) for device_id in device_ids]
+            wait(futures)
+            failed = [device_id for device_id, future in zip(device_ids, futures) if future.exception()]
+            if failed:
+                logger.warning("Clock probes failed for %d devices", len(failed))
+        return {device_id: self.offset(device_id) for device_id in device_ids}
@@ -0,0 +1,267 @@
+"""
+Command fan-out for controllers.
+
+``FanOutDispatcher`` sends one command to many devices, chosen by an
+explicit list or by a filter over a ``FleetStateStore``, and aggregates
+their responses into a ``FanOutSummary``. A fan-out is either:
+
+* per device: the command is published to each device's command topic by
+  a pacing thread at a configurable rate, so a large fleet is reached in
+  seconds without flooding the broker, or
+* per group: the command is published once to a group topic that the
+  devices subscribe to (see ``BrokerManager.join_group``).
+
+Either way the responses are matched through the ``RPCClient`` pending
+table, and each device's outcome is known when its response arrives or its
+timeout passes.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional
+
+from ..device.broker.messages import CommandMessage, ResponseMessage
+from .fleet import FleetStateStore
+from .rpc import CommandTimeoutError, RPCClient
+from .. import metrics
+
+logger = logging.getLogger(__name__)
+
+FANOUT_SECONDS = metrics.histogram("amora_fanout_seconds", "Time from the start of a fan-out until every device is settled")
+
+
+@dataclass
+class FanOutSummary:
+    """Outcome of a command sent to many devices."""
+    command: str
+    command_id: str
+    total: int = 0
+    succeeded: List[str] = field(default_factory=list)
+    failed: Dict[str, str] = field(default_factory=dict)  # device ID -> error message
+    timed_out: List[str] = field(default_factory=list)
+    not_sent: List[str] = field(default_factory=list)  # cancelled, or the publish failed
+    seconds: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert the summary to counts, for logging and responses.
+
+        Returns:
+            Dictionary with the command, the count per outcome and the duration
+        """
+        return {
+            "command": self.command,
+            "command_id": self.command_id,
+            "total": self.total,
+            "succeeded": len(self.succeeded),
+            "failed": len(self.failed),
+            "timed_out": len(self.timed_out),
+            "not_sent": len(self.not_sent),
+            "seconds": round(self.seconds, 3)
+        }
+
+
+class FanOut:
+    """
+    A command being sent to many devices.
+
+    ``futures`` holds one future per device, added as the command is sent;
+    ``result()`` waits for the summary once every device is settled.
+    """
+
+    def __init__(self, command_msg: CommandMessage, device_ids: List[str]):
+        self.command_msg = command_msg
+        self.device_ids = device_ids
+        self.futures: Dict[str, Future] = {}
+        self.summary = FanOutSummary(command_msg.command, command_msg.command_id, total=len(device_ids))
+        self._done: Future = Future()
+        self._remaining = len(device_ids)
+        self._skipped = 0
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+        self._started = time.perf_counter()
+        if not device_ids:
+            self._done.set_result(self.summary)
+
+    @property
+    def sent(self) -> int:
+        """Number of devices the command has been sent to so far."""
+        return len(self.futures) - self._skipped
+
+    def done(self) -> bool:
+        """Whether every device is settled."""
+        return self._done.done()
+
+    def result(self, timeout: Optional[float] = None) -> FanOutSummary:
+        """
+        Wait until every device is settled.
+
+        Args:
+            timeout: Seconds to wait, None to wait until then
+
+        Returns:
+            The summary of the fan-out
+        """
+        return self._done.result(timeout)
+
+    def add_done_callback(self, callback) -> None:
+        """Call a function with the summary's future once every device is settled."""
+        self._done.add_done_callback(callback)
+
+    def cancel(self) -> None:
+        """Stop sending the command and stop waiting for the responses outstanding."""
+        self._cancelled.set()
+        for future in list(self.futures.values()):
+            future.cancel()
+
+    def _track(self, device_id: str, future: Future) -> None:
+        """Record a device's future and settle it in the summary when done."""
+        self.futures[device_id] = future
+        future.add_done_callback(lambda f: self._settle(device_id, f))
+
+    def _settle(self, device_id: str, future: Future) -> None:
+        """Record a device's outcome, completing the fan-out with the last one."""
+        with self._lock:
+            summary = self.summary
+            if future.cancelled():
+                summary.not_sent.append(device_id)
+            elif isinstance(future.exception(), CommandTimeoutError):
+                summary.timed_out.append(device_id)
+            elif future.exception() is not None:
+                summary.not_sent.append(device_id)
+            elif isinstance(future.result(), ResponseMessage) and not future.result().result:
+                summary.failed[device_id] = future.result().message
+            else:
+                summary.succeeded.append(device_id)
+            self._remaining -= 1
+            if self._remaining:
+                return
+            summary.seconds = time.perf_counter() - self._started
+        FANOUT_SECONDS.observe(summary.seconds, command=summary.command)
+        logger.info("Command %s (ID: %s) fanned out: %s", summary.command, summary.command_id, summary.to_dict())
+        self._done.set_result(summary)
+
+    def _skip(self, device_ids: Iterable[str]) -> None:
+        """Settle devices the command was never sent to."""
+        for device_id in device_ids:
+            self._skipped += 1
+            future: Future = Future()
+            future.cancel()
+            self._track(device_id, future)
+
+
+class FanOutDispatcher:
+    """
+    Sends commands to many devices through an RPCClient.
+
+    Each per-device fan-out is paced by its own thread; any number of
+    fan-outs can run at once and share the RPCClient's pending table and
+    timer thread.
+    """
+
+    def __init__(self, rpc: RPCClient, fleet: Optional[FleetStateStore] = None, rate: float = 1000.0):
+        """
+        Initialize the dispatcher.
+
+        Args:
+            rpc: Connected RPC client
+            fleet: Fleet state store the devices can be selected from
+            rate: Commands published per second per fan-out, 0 for no limit
+        """
+        self.rpc = rpc
+        self.fleet = fleet
+        self.rate = rate
+
+    def select(self, devices: Optional[Iterable[str]] = None, where: Optional[Dict[str, Any]] = None) -> List[str]:
+        """
+        Choose the devices of a fan-out.
+
+        Args:
+            devices: Device IDs
+            where: Filter over the fleet state store (see FleetStateStore.mask), e.g.
+                {"state": "play", "online": True}; combined with devices, only the
+                listed devices that match
+
+        Returns:
+            Device IDs, without duplicates
+        """
+        if where is not None or devices is None:
+            if self.fleet is None:
+                raise ValueError("Selecting devices by a filter needs a fleet state store")
+            selected = self.fleet.device_ids(**(where or {}))
+            if devices is not None:
+                wanted = set(devices)
+                selected = [device_id for device_id in selected if device_id in wanted]
+            return selected
+        return list(dict.fromkeys(devices))
+
+    def dispatch(self, command_msg: CommandMessage, devices: Optional[Iterable[str]] = None,
+                 where: Optional[Dict[str, Any]] = None, timeout: Optional[float] = None,
+                 rate: Optional[float] = None) -> FanOut:
+        """
+        Send a command to each device on its own command topic, at a limited rate.
+
+        Returns at once; the command is published by a pacing thread. Every
+        device gets the same command message, answered under one command_id.
+
+        Args:
+            command_msg: Command message
+            devices: Device IDs, or None for every device in the fleet state store
+            where: Filter over the fleet state store (see select)
+            timeout: Seconds each device has to answer after its command is sent,
+                defaults to the RPC client's default timeout
+            rate: Commands published per second, defaults to the dispatcher's rate
+
+        Returns:
+            The fan-out, resolved with a FanOutSummary once every device is settled
+        """
+        fan_out = FanOut(command_msg, self.select(devices, where))
+        rate = self.rate if rate is None else rate
+        if fan_out.device_ids:
+            threading.Thread(target=self._pace, args=(fan_out, timeout, rate),
+                             name=f"fanout-{command_msg.command_id[:8]}", daemon=True).start()
+        return fan_out
+
+    def dispatch_group(self, group: str, command_msg: CommandMessage, devices: Optional[Iterable[str]] = None,
+                       where: Optional[Dict[str, Any]] = None, timeout: Optional[float] = None) -> FanOut:
+        """
+        Send a command to a group with one publish.
+
+        The selected devices are the members whose responses are awaited; the
+        group's actual membership is up to the devices.
+
+        Args:
+            group: Group name
+            command_msg: Command message
+            devices: Device IDs of the members, or None for every device in the fleet state store
+            where: Filter over the fleet state store (see select)
+            timeout: Seconds the members have to answer, defaults to the RPC client's default timeout
+
+        Returns:
+            The fan-out, resolved with a FanOutSummary once every member is settled
+        """
+        fan_out = FanOut(command_msg, self.select(devices, where))
+        if fan_out.device_ids:
+            for device_id, future in self.rpc.send_group(group, command_msg, fan_out.device_ids, timeout).items():
+                fan_out._track(device_id, future)
+        return fan_out
+
+    def _pace(self, fan_out: FanOut, timeout: Optional[float], rate: float) -> None:
+        """Publish a fan-out's command to each device, keeping under the rate."""
+        start = time.monotonic()
+        for index, device_id in enumerate(fan_out.device_ids):
+            if fan_out._cancelled.is_set():
+                fan_out._skip(fan_out.device_ids[index:])
+                return
+            if rate > 0:
+                # Sleep only when a whole millisecond ahead, so fast rates go out in small bursts
+                ahead = start + index / rate - time.monotonic()
+                if ahead >= 0.001:
+                    time.sleep(ahead)
+            future = self.rpc.send(device_id, fan_out.command_msg, timeout, fan_out=True)
+            fan_out._track(device_id, future)
+            if fan_out._cancelled.is_set():
+                future.cancel()
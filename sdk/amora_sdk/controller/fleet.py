@@ -0,0 +1,396 @@
+"""
+Fleet state store for controllers.
+
+``FleetStateStore`` keeps the last state and connection status of every
+device in NumPy columns, one array per field indexed by device, instead of
+one ``StateMessage`` per device. Filters and aggregates over the fleet
+("how many devices are playing", "which online devices have not reported
+for a minute") are then vectorised array operations, and memory grows by a
+few bytes per device rather than a few hundred.
+
+NumPy is an optional dependency; without it the store cannot be created.
+"""
+
+import json
+import logging
+import math
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    logging.getLogger(__name__).debug("NumPy not available. The fleet state store will be disabled.")
+    NUMPY_AVAILABLE = False
+
+from ..device.broker.client import MQTTClient
+from ..device.broker.config import QoS
+from ..device.broker.messages import StateMessage
+from ..device.broker.topics import TopicType
+
+logger = logging.getLogger(__name__)
+
+# Player states by code in the state column; unknown states are stored as 0
+PLAYER_STATES = ("unknown", "stop", "play", "pause", "disconnected", "error")
+_STATE_CODES = {name: code for code, name in enumerate(PLAYER_STATES)}
+
+_STATE_TOPIC = TopicType.STATE.value
+_CONNECTION_TOPIC = TopicType.CONNECTION.value
+
+# Columns: name -> (NumPy dtype, value for devices that have not reported it)
+COLUMNS = {
+    "state": ("u1", 0),
+    "volume": ("i1", -1),
+    "position": ("f4", math.nan),
+    "duration": ("f4", math.nan),
+    "repeat": ("?", False),
+    "random": ("?", False),
+    "online": ("?", False),
+    "last_seen": ("f8", math.nan),
+}
+
+
+def _number(value: Any) -> float:
+    """
+    Convert a numeric message field to a float.
+
+    Args:
+        value: Field value
+
+    Returns:
+        The value as a float, NaN for None
+
+    Raises:
+        TypeError: If the value is not a number
+    """
+    if value is None:
+        return math.nan
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise TypeError(f"expected a number, got {value!r}")
+    return float(value)
+
+
+class FleetStateStore:
+    """
+    Columnar store of the latest state of every device in a fleet.
+
+    Rows are assigned to devices in the order they are first seen and never
+    move, so ``device_ids`` maps a row back to its device. Updates and
+    queries are serialised by a lock; queries run in one vectorised pass.
+    """
+
+    def __init__(self, topic_prefix: str = "amora/devices", capacity: int = 1024,
+                 clock: Callable[[], float] = time.time):
+        """
+        Initialize the store.
+
+        Args:
+            topic_prefix: Prefix of the device topics ingested
+            capacity: Initial number of rows, doubled whenever it runs out
+            clock: Clock for last-seen times of messages without a timestamp, replaceable in tests
+        """
+        if not NUMPY_AVAILABLE:
+            raise ImportError("NumPy not available. Cannot create fleet state store.")
+
+        self.topic_prefix = topic_prefix
+        self.clock = clock
+        self._prefix = topic_prefix + "/"
+        self._rows: Dict[str, int] = {}
+        self._device_ids: List[str] = []
+        self._columns: Dict[str, "np.ndarray"] = {
+            name: np.full(max(1, capacity), fill, dtype=dtype) for name, (dtype, fill) in COLUMNS.items()
+        }
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._device_ids)
+
+    @property
+    def memory_bytes(self) -> int:
+        """Bytes allocated to the columns."""
+        return sum(column.nbytes for column in self._columns.values())
+
+    def _row(self, device_id: str) -> int:
+        """Get the row of a device, adding one if it is new. Call with the lock held."""
+        row = self._rows.get(device_id)
+        if row is None:
+            row = len(self._device_ids)
+            capacity = len(self._columns["state"])
+            if row == capacity:
+                for name, (dtype, fill) in COLUMNS.items():
+                    column = np.full(capacity * 2, fill, dtype=dtype)
+                    column[:capacity] = self._columns[name]
+                    self._columns[name] = column
+            self._rows[device_id] = row
+            self._device_ids.append(device_id)
+        return row
+
+    # Ingest
+
+    def subscribe(self, mqtt_client: MQTTClient, qos: QoS = QoS.AT_LEAST_ONCE) -> None:
+        """
+        Ingest the state and connection messages of every device received by an MQTT client.
+
+        Args:
+            mqtt_client: MQTT client
+            qos: Quality of Service level of the subscriptions
+        """
+        for kind in (_STATE_TOPIC, _CONNECTION_TOPIC):
+            mqtt_client.subscribe(f"{self.topic_prefix}/+/{kind}", qos, self._on_message)
+
+    def _on_message(self, topic: str, payload: bytes, properties: Dict[str, Any]) -> None:
+        self.ingest(topic, payload)
+
+    def ingest(self, topic: str, payload: Union[str, bytes]) -> bool:
+        """
+        Ingest a state or connection message received on a device topic.
+
+        Args:
+            topic: Topic the message was received on
+            payload: Message payload
+
+        Returns:
+            True if the message was stored, False if it is not a valid state or connection message
+        """
+        return self.ingest_many([(topic, payload)]) == 1
+
+    def ingest_many(self, messages: Iterable[Tuple[str, Union[str, bytes]]]) -> int:
+        """
+        Ingest several messages, taking the lock once.
+
+        The lock is held while the payloads are parsed, so queries wait for
+        the whole batch; keep batches to what arrives between queries.
+        Malformed messages are logged and skipped without affecting the rest
+        of the batch.
+
+        Args:
+            messages: (topic, payload) pairs
+
+        Returns:
+            Number of messages stored
+        """
+        stored = 0
+        prefix_length = len(self._prefix)
+        with self._lock:
+            for topic, payload in messages:
+                if not topic.startswith(self._prefix):
+                    continue
+                device_id, _, kind = topic[prefix_length:].partition("/")
+                if kind != _STATE_TOPIC and kind != _CONNECTION_TOPIC:
+                    continue
+                try:
+                    data = json.loads(payload)
+                except ValueError:
+                    logger.error("Invalid %s message received on topic %s", kind, topic)
+                    continue
+                if not isinstance(data, dict):
+                    continue
+                try:
+                    if kind == _STATE_TOPIC:
+                        self._update_state(device_id, data, None)
+                    else:
+                        self._update_connection(device_id, data.get("status"), data.get("timestamp"))
+                except (TypeError, ValueError) as e:
+                    logger.error("Invalid %s message received on topic %s: %s", kind, topic, e)
+                    continue
+                stored += 1
+        return stored
+
+    def update_state(self, device_id: str, state: Union[StateMessage, Dict[str, Any]],
+                     timestamp: Optional[float] = None) -> None:
+        """
+        Store the state of a device.
+
+        Args:
+            device_id: Device ID
+            state: State message or dictionary
+            timestamp: Time the state was reported, defaults to the message timestamp
+
+        Raises:
+            TypeError, ValueError: If a field of the state has the wrong type
+        """
+        if isinstance(state, StateMessage):
+            state = state.to_dict()
+        with self._lock:
+            self._update_state(device_id, state, timestamp)
+
+    def _update_state(self, device_id: str, state: Dict[str, Any], timestamp: Optional[float]) -> None:
+        # Convert every field before writing any, so a malformed state leaves the row untouched
+        song = state.get("current_song") or {}
+        if not isinstance(song, dict):
+            raise TypeError("current_song is not an object")
+        volume = state.get("volume")
+        if volume is not None:
+            volume = min(100, max(-1, int(_number(volume))))
+        position = _number(song.get("position"))
+        duration = _number(song.get("duration"))
+        last_seen = _number(timestamp or state.get("timestamp") or self.clock())
+        player_state = state.get("state")
+        code = _STATE_CODES.get(player_state, 0) if isinstance(player_state, str) else 0
+
+        row = self._row(device_id)
+        columns = self._columns
+        columns["state"][row] = code
+        if volume is not None:
+            columns["volume"][row] = volume
+        columns["position"][row] = position
+        columns["duration"][row] = duration
+        columns["repeat"][row] = bool(state.get("repeat"))
+        columns["random"][row] = bool(state.get("random"))
+        columns["last_seen"][row] = last_seen
+
+    def update_connection(self, device_id: str, status: str, timestamp: Optional[float] = None) -> None:
+        """
+        Store the connection status of a device.
+
+        Args:
+            device_id: Device ID
+            status: "online" or "offline"
+            timestamp: Time the status was reported
+        """
+        with self._lock:
+            self._update_connection(device_id, status, timestamp)
+
+    def _update_connection(self, device_id: str, status: Optional[str], timestamp: Optional[float]) -> None:
+        online = status == "online"
+        last_seen = _number(timestamp or self.clock()) if online else None
+        row = self._row(device_id)
+        self._columns["online"][row] = online
+        if online:
+            self._columns["last_seen"][row] = last_seen
+
+    # Queries
+
+    def _mask(self, state: Union[str, Sequence[str], None] = None, online: Optional[bool] = None,
+              min_volume: Optional[int] = None, max_volume: Optional[int] = None,
+              seen_within: Optional[float] = None) -> "np.ndarray":
+        """Build the row mask of a filter. Call with the lock held."""
+        size = len(self._device_ids)
+        columns = self._columns
+        mask = np.ones(size, dtype=bool)
+        if state is not None:
+            if isinstance(state, str):
+                mask &= columns["state"][:size] == _STATE_CODES.get(state, 0)
+            else:
+                mask &= np.isin(columns["state"][:size], [_STATE_CODES.get(name, 0) for name in state])
+        if online is not None:
+            mask &= columns["online"][:size] == online
+        if min_volume is not None:
+            mask &= columns["volume"][:size] >= min_volume
+        if max_volume is not None:
+            volume = columns["volume"][:size]
+            mask &= (volume <= max_volume) & (volume >= 0)
+        if seen_within is not None:
+            # Never seen (NaN) compares False
+            mask &= columns["last_seen"][:size] >= self.clock() - seen_within
+        return mask
+
+    def mask(self, state: Union[str, Sequence[str], None] = None, online: Optional[bool] = None,
+             min_volume: Optional[int] = None, max_volume: Optional[int] = None,
+             seen_within: Optional[float] = None) -> "np.ndarray":
+        """
+        Get the rows matching a filter; every given condition must hold.
+
+        Args:
+            state: Player state, or any of several states
+            online: Connection status
+            min_volume: Minimum volume
+            max_volume: Maximum volume (devices that never reported a volume do not match)
+            seen_within: Seconds since the device last reported
+
+        Returns:
+            Boolean array with one entry per row
+        """
+        with self._lock:
+            return self._mask(state=state, online=online, min_volume=min_volume, max_volume=max_volume,
+                              seen_within=seen_within)
+
+    def count(self, **filters) -> int:
+        """
+        Count the devices matching a filter.
+
+        Args:
+            **filters: Filter, as for mask()
+
+        Returns:
+            Number of matching devices
+        """
+        return int(np.count_nonzero(self.mask(**filters)))
+
+    def device_ids(self, **filters) -> List[str]:
+        """
+        List the devices matching a filter.
+
+        Args:
+            **filters: Filter, as for mask()
+
+        Returns:
+            Device IDs, in the order they were first seen
+        """
+        with self._lock:
+            rows = np.flatnonzero(self._mask(**filters))
+            return [self._device_ids[row] for row in rows.tolist()]
+
+    def state_counts(self, **filters) -> Dict[str, int]:
+        """
+        Count the devices matching a filter by player state.
+
+        Args:
+            **filters: Filter, as for mask()
+
+        Returns:
+            Number of devices per player state
+        """
+        with self._lock:
+            size = len(self._device_ids)
+            states = self._columns["state"][:size][self._mask(**filters)]
+            counts = np.bincount(states, minlength=len(PLAYER_STATES))
+        return {name: int(count) for name, count in zip(PLAYER_STATES, counts.tolist())}
+
+    def volume_stats(self, **filters) -> Dict[str, Any]:
+        """
+        Summarise the volume of the devices matching a filter.
+
+        Args:
+            **filters: Filter, as for mask()
+
+        Returns:
+            Count, mean, minimum and maximum volume of the devices that reported one
+        """
+        with self._lock:
+            size = len(self._device_ids)
+            volume = self._columns["volume"][:size]
+            volumes = volume[self._mask(**filters) & (volume >= 0)]
+        if not len(volumes):
+            return {"count": 0, "mean": None, "min": None, "max": None}
+        return {
+            "count": int(len(volumes)),
+            "mean": round(float(volumes.mean()), 2),
+            "min": int(volumes.min()),
+            "max": int(volumes.max())
+        }
+
+    def get(self, device_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the stored state of one device.
+
+        Args:
+            device_id: Device ID
+
+        Returns:
+            Field values, with None for fields the device has not reported, or None for unknown devices
+        """
+        with self._lock:
+            row = self._rows.get(device_id)
+            if row is None:
+                return None
+            values = {name: self._columns[name][row].item() for name in COLUMNS}
+        values["state"] = PLAYER_STATES[values["state"]]
+        if values["volume"] < 0:
+            values["volume"] = None
+        for name in ("position", "duration", "last_seen"):
+            if math.isnan(values[name]):
+                values[name] = None
+        return values
@@ -0,0 +1,455 @@
+"""
+Command RPC for controllers.
+
+``RPCClient`` sends commands to devices over one MQTT connection and returns
+a ``concurrent.futures.Future`` per command, resolved with the device's
+response. Any number of commands can be in flight: they are kept in a
+pending table keyed by ``command_id``, and per-command timeouts are kept in
+a heap served by a single timer thread, so no thread is used per request.
+
+With MQTT 5 (``ConnectionOptions.mqtt5``) each command carries a response
+topic private to the controller and its ``command_id`` as correlation data,
+and expires at the broker when its timeout passes, so the controller only
+receives its own responses. Without MQTT 5 the controller subscribes to the
+responses topic of every device and matches responses by ``command_id``.
+
+The same command can also be pending for several devices, under one key per
+device: sent to each device (``send(..., fan_out=True)``, see
+``FanOutDispatcher``) or published once to a group topic (``send_group``).
+"""
+
+import asyncio
+import heapq
+import logging
+import math
+import threading
+import time
+import uuid
+from concurrent.futures import Future, InvalidStateError
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from ..device.broker.client import MQTTClient
+from ..device.broker.config import BrokerConfig
+from ..device.broker.messages import BatchCommandMessage, CommandMessage, ResponseMessage, parse_message
+from ..device.broker.topics import TopicType, group_command_topic
+from .. import metrics
+
+logger = logging.getLogger(__name__)
+
+RPC_SECONDS = metrics.histogram("amora_rpc_seconds", "Command round trip time seen by the controller")
+RPC_TOTAL = metrics.counter("amora_rpc_total", "Commands sent by the controller, by outcome")
+
+# Topic prefix of the controllers' MQTT 5 response topics
+CONTROLLER_TOPIC_PREFIX = "amora/controllers"
+
+
+class CommandTimeoutError(TimeoutError):
+    """Raised by a command's future when the device did not answer in time."""
+
+    def __init__(self, device_id: str, command: str, command_id: str, timeout: float):
+        super().__init__(f"Command {command} (ID: {command_id}) to {device_id} timed out after {timeout:g}s")
+        self.device_id = device_id
+        self.command = command
+        self.command_id = command_id
+        self.timeout = timeout
+
+
+class _PendingCommand:
+    """A command awaiting its response."""
+
+    __slots__ = ("future", "device_id", "command", "command_id", "deadline", "timeout", "sent_at", "parts")
+
+    def __init__(self, future: Future, device_id: str, command_msg: CommandMessage, timeout: float, stream: bool):
+        self.future = future
+        self.device_id = device_id
+        self.command = command_msg.command
+        self.command_id = command_msg.command_id
+        self.timeout = timeout
+        self.deadline = time.monotonic() + timeout
+        self.sent_at = time.perf_counter()
+        self.parts: Optional[List[ResponseMessage]] = [] if stream else None
+
+
+class RPCClient:
+    """
+    Controller-side command client with awaitable responses.
+
+    The futures are ``concurrent.futures.Future`` objects: block on them with
+    ``result()``, or await them in asyncio with ``request()`` or
+    ``asyncio.wrap_future``. They are resolved in the MQTT network thread
+    or the timer thread, so done callbacks should be short.
+    """
+
+    def __init__(self, config: BrokerConfig, mqtt_client: Optional[MQTTClient] = None,
+                 default_timeout: float = 10.0, response_topic: Optional[str] = None,
+                 device_responses: Optional[bool] = None):
+        """
+        Initialize the RPC client.
+
+        Args:
+            config: Broker configuration; device_id is not used
+            mqtt_client: MQTT client to use instead of creating one from the configuration
+            default_timeout: Seconds to wait for a response when send_command is given no timeout
+            response_topic: MQTT 5 response topic, defaults to amora/controllers/<client ID>/responses
+            device_responses: Also match responses on the devices' responses topics, for devices
+                that do not answer on the response topic. Defaults to True without MQTT 5 only.
+        """
+        self.config = config
+        self.default_timeout = default_timeout
+        self.mqtt5 = config.connection_options.mqtt5
+        self.client_id = config.client_id or f"controller-{uuid.uuid4().hex[:8]}"
+        self.response_topic = response_topic or f"{CONTROLLER_TOPIC_PREFIX}/{self.client_id}/responses"
+
+        self.mqtt_client = mqtt_client or MQTTClient(
+            client_id=self.client_id,
+            broker_url=config.broker_url,
+            port=config.port,
+            options=config.connection_options
+        )
+
+        # Pending commands by key, and their deadlines as a heap of (deadline, key). The key is the
+        # command_id, or "<device_id>/<command_id>" for a command sent to several devices.
+        # Answered commands stay in the heap until their deadline passes or the heap is compacted.
+        self._pending: Dict[str, _PendingCommand] = {}
+        self._deadlines: List[Tuple[float, str]] = []
+        self._condition = threading.Condition()
+        self._timer_thread: Optional[threading.Thread] = None
+        self._running = False
+
+        # Subscriptions are registered once; the MQTT client restores them on reconnect
+        self._device_topic_prefix = f"{config.topic_prefix}/"
+        self._device_responses = False
+        if self.mqtt5:
+            self.mqtt_client.subscribe(self.response_topic, config.default_qos, self._on_response)
+        if device_responses if device_responses is not None else not self.mqtt5:
+            self._subscribe_device_responses()
+
+    def _subscribe_device_responses(self) -> None:
+        """Subscribe to the responses topic of every device, once."""
+        if not self._device_responses:
+            self._device_responses = True
+            self.mqtt_client.subscribe(f"{self._device_topic_prefix}+/{TopicType.RESPONSES.value}",
+                                       self.config.default_qos, self._on_response)
+
+    @property
+    def pending_count(self) -> int:
+        """Number of commands awaiting a response."""
+        return len(self._pending)
+
+    def connect(self) -> bool:
+        """
+        Connect to the MQTT broker.
+
+        Returns:
+            True if connection was successful, False otherwise
+        """
+        self._start_timer()
+        return self.mqtt_client.connect()
+
+    def disconnect(self) -> None:
+        """Disconnect from the MQTT broker, cancelling every pending command."""
+        with self._condition:
+            self._running = False
+            pending = list(self._pending.values())
+            self._pending.clear()
+            self._deadlines.clear()
+            self._condition.notify()
+        if self._timer_thread:
+            self._timer_thread.join(timeout=2.0)
+            self._timer_thread = None
+        for command in pending:
+            command.future.cancel()
+        self.mqtt_client.disconnect()
+
+    def send_command(self, device_id: str, command: str, params: Optional[Dict[str, Any]] = None,
+                     timeout: Optional[float] = None, stream: bool = False) -> Future:
+        """
+        Send a command to a device.
+
+        Args:
+            device_id: Device ID
+            command: Command name
+            params: Command parameters
+            timeout: Seconds to wait for the response, defaults to default_timeout
+            stream: Collect a streamed response (see chunk_responses) until its last part
+
+        Returns:
+            Future resolved with the ResponseMessage, or the list of parts of a streamed
+            response; it fails with CommandTimeoutError if the device does not answer in
+            time, and with ConnectionError if the command cannot be published
+        """
+        return self.send(device_id, CommandMessage(command=command, params=params), timeout, stream)
+
+    def send_batch(self, device_id: str, commands: List[Dict[str, Any]], stop_on_error: bool = True,
+                   timeout: Optional[float] = None) -> Future:
+        """
+        Send a batch of commands to a device, answered with one combined response.
+
+        Args:
+            device_id: Device ID
+            commands: Sub-commands, each a dictionary with "command" and optional "params"
+            stop_on_error: Skip the sub-commands after the first failure
+            timeout: Seconds to wait for the response, defaults to default_timeout
+
+        Returns:
+            Future resolved with the combined ResponseMessage
+        """
+        return self.send(device_id, BatchCommandMessage(commands=commands, stop_on_error=stop_on_error), timeout)
+
+    async def request(self, device_id: str, command: str, params: Optional[Dict[str, Any]] = None,
+                      timeout: Optional[float] = None, stream: bool = False) -> Any:
+        """
+        Send a command to a device and wait for its response in asyncio.
+
+        Args:
+            device_id: Device ID
+            command: Command name
+            params: Command parameters
+            timeout: Seconds to wait for the response, defaults to default_timeout
+            stream: Collect a streamed response until its last part
+
+        Returns:
+            The ResponseMessage, or the list of parts of a streamed response
+        """
+        return await asyncio.wrap_future(self.send_command(device_id, command, params, timeout, stream))
+
+    def send(self, device_id: str, command_msg: CommandMessage, timeout: Optional[float] = None,
+             stream: bool = False, fan_out: bool = False) -> Future:
+        """
+        Send a command message to a device.
+
+        Args:
+            device_id: Device ID
+            command_msg: Command message, with a command_id unique among pending commands
+            timeout: Seconds to wait for the response, defaults to default_timeout; for
+                a command with an execute_at time, counted from that time
+            stream: Collect a streamed response until its last part
+            fan_out: Track the response by device and command_id, so that the same
+                command message can be pending for several devices at once
+
+        Returns:
+            Future resolved with the response (see send_command)
+        """
+        timeout = self._timeout(command_msg, timeout)
+        key = f"{device_id}/{command_msg.command_id}" if fan_out else command_msg.command_id
+        futures = self._register(command_msg, {key: device_id}, timeout, stream)
+        if futures[key].done():
+            return futures[key]
+
+        properties = None
+        if self.mqtt5:
+            properties = {
+                "response_topic": self.response_topic,
+                "correlation_data": key.encode("utf-8"),
+                "message_expiry_interval": max(1, math.ceil(timeout))
+            }
+        self._publish(f"{self.config.topic_prefix}/{device_id}/{TopicType.COMMANDS.value}",
+                      command_msg, futures, properties)
+        return futures[key]
+
+    def send_group(self, group: str, command_msg: CommandMessage, device_ids: Iterable[str],
+                   timeout: Optional[float] = None) -> Dict[str, Future]:
+        """
+        Send a command message to a group with one publish, and wait for each member's response.
+
+        Members answer on their own responses topics, which the client subscribes
+        to on first use, since a shared MQTT 5 response topic could not tell their
+        responses apart.
+
+        Args:
+            group: Group name
+            command_msg: Command message, with a command_id unique among pending commands
+            device_ids: Members of the group whose responses are expected
+            timeout: Seconds to wait for the responses, defaults to default_timeout
+
+        Returns:
+            Future per device ID, resolved with its ResponseMessage (see send_command)
+        """
+        timeout = self._timeout(command_msg, timeout)
+        topic = group_command_topic(group, self.config.group_prefix)
+        self._subscribe_device_responses()
+        keys = {f"{device_id}/{command_msg.command_id}": device_id for device_id in device_ids}
+        futures = self._register(command_msg, keys, timeout, False)
+
+        if not all(future.done() for future in futures.values()):
+            properties = {"message_expiry_interval": max(1, math.ceil(timeout))} if self.mqtt5 else None
+            self._publish(topic, command_msg, futures, properties)
+        return {keys[key]: future for key, future in futures.items()}
+
+    def _timeout(self, command_msg: CommandMessage, timeout: Optional[float]) -> float:
+        """Get a command's timeout, counted from when a scheduled command is due to run."""
+        timeout = self.default_timeout if timeout is None else timeout
+        if command_msg.execute_at is not None:
+            # Scheduled commands are answered once they have run
+            timeout += max(0.0, command_msg.execute_at - time.time())
+        return timeout
+
+    def _register(self, command_msg: CommandMessage, keys: Dict[str, str], timeout: float,
+                  stream: bool) -> Dict[str, Future]:
+        """
+        Add a command to the pending table once per key.
+
+        Args:
+            command_msg: Command message
+            keys: Device ID by pending key
+            timeout: Seconds to wait for the responses
+            stream: Collect streamed responses
+
+        Returns:
+            Future by pending key; keys already pending get a failed future
+        """
+        futures: Dict[str, Future] = {}
+        added: List[Tuple[str, _PendingCommand]] = []
+        with self._condition:
+            for key, device_id in keys.items():
+                future: Future = Future()
+                futures[key] = future
+                if key in self._pending:
+                    future.set_exception(ValueError(f"Command ID {command_msg.command_id} is already pending"))
+                    continue
+                pending = _PendingCommand(future, device_id, command_msg, timeout, stream)
+                self._pending[key] = pending
+                heapq.heappush(self._deadlines, (pending.deadline, key))
+                added.append((key, pending))
+            if added and self._deadlines[0][1] == added[0][0]:
+                self._condition.notify()
+            self._compact_deadlines()
+        self._start_timer()
+        for key, pending in added:
+            pending.future.add_done_callback(
+                lambda f, key=key, pending=pending: f.cancelled() and self._forget(key, pending))
+        return futures
+
+    def _publish(self, topic: str, command_msg: CommandMessage, futures: Dict[str, Future],
+                 properties: Optional[Dict[str, Any]]) -> None:
+        """
+        Publish a registered command, failing its futures if it cannot be published.
+
+        Args:
+            topic: Command topic
+            command_msg: Command message
+            futures: Future by pending key, from _register
+            properties: MQTT 5 publish properties
+        """
+        published = self.mqtt_client.publish(
+            topic=topic,
+            payload=command_msg.to_json(),
+            qos=self.config.default_qos,
+            retain=False,
+            properties=properties
+        )
+        if published:
+            return
+        for key, future in futures.items():
+            with self._condition:
+                pending = self._pending.get(key)
+            if pending is not None and pending.future is future and self._forget(key, pending):
+                RPC_TOTAL.inc(command=pending.command, result="error")
+                self._resolve(future, exception=ConnectionError(
+                    f"Cannot send command {command_msg.command} to {pending.device_id}"))
+
+    def _forget(self, key: str, pending: _PendingCommand) -> bool:
+        """
+        Remove a command from the pending table.
+
+        Args:
+            key: Pending key
+            pending: The pending entry expected under this key
+
+        Returns:
+            True if it was still pending, False if it had been answered or expired
+        """
+        with self._condition:
+            if self._pending.get(key) is pending:
+                del self._pending[key]
+                return True
+            return False
+
+    def _compact_deadlines(self) -> None:
+        """Drop the deadlines of answered commands once they outnumber the pending ones."""
+        if len(self._deadlines) > 2 * len(self._pending) + 1024:
+            self._deadlines = [(pending.deadline, key) for key, pending in self._pending.items()]
+            heapq.heapify(self._deadlines)
+
+    def _on_response(self, topic: str, payload: bytes, properties: Dict[str, Any]) -> None:
+        """
+        Callback for responses, resolving the future of the pending command.
+
+        Args:
+            topic: Topic the message was received on
+            payload: Message payload
+            properties: Message properties
+        """
+        response = parse_message(payload, 'response')
+        if not isinstance(response, ResponseMessage):
+            logger.error("Invalid response message received on topic %s", topic)
+            return
+
+        correlation_data = properties.get("correlation_data")
+        key = correlation_data.decode("utf-8", "replace") if correlation_data else response.command_id
+
+        with self._condition:
+            pending = self._pending.get(key)
+            if pending is None and not correlation_data and topic.startswith(self._device_topic_prefix):
+                # A command sent to several devices, answered on the device's responses topic
+                key = f"{topic[len(self._device_topic_prefix):].partition('/')[0]}/{key}"
+                pending = self._pending.get(key)
+            if pending is None:
+                # Late (after a timeout), duplicated, or another controller's command
+                logger.debug("No pending command for response %s", key)
+                return
+            if pending.parts is not None:
+                pending.parts.append(response)
+                if isinstance(response.data, dict) and not response.data.get("last", True):
+                    return
+            del self._pending[key]
+
+        RPC_SECONDS.observe(time.perf_counter() - pending.sent_at, command=pending.command)
+        RPC_TOTAL.inc(command=pending.command, result="response")
+        self._resolve(pending.future, result=pending.parts if pending.parts is not None else response)
+
+    def _start_timer(self) -> None:
+        """Start the timer thread failing the commands whose deadline passed."""
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+            self._timer_thread = threading.Thread(target=self._expire_loop, name="rpc-timeouts", daemon=True)
+            self._timer_thread.start()
+
+    def _expire_loop(self) -> None:
+        """Wait for the earliest deadline and fail the commands that reach it unanswered."""
+        while True:
+            expired: List[_PendingCommand] = []
+            with self._condition:
+                while self._running:
+                    now = time.monotonic()
+                    while self._deadlines and self._deadlines[0][0] <= now:
+                        deadline, key = heapq.heappop(self._deadlines)
+                        pending = self._pending.get(key)
+                        if pending is not None and pending.deadline == deadline:
+                            del self._pending[key]
+                            expired.append(pending)
+                    if expired:
+                        break
+                    self._condition.wait(self._deadlines[0][0] - now if self._deadlines else None)
+                else:
+                    return
+
+            for pending in expired:
+                logger.warning("Command %s (ID: %s) to %s timed out",
+                               pending.command, pending.command_id, pending.device_id)
+                RPC_TOTAL.inc(command=pending.command, result="timeout")
+                self._resolve(pending.future, exception=CommandTimeoutError(
+                    pending.device_id, pending.command, pending.command_id, pending.timeout))
+
+    @staticmethod
+    def _resolve(future: Future, result: Any = None, exception: Optional[BaseException] = None) -> None:
+        """Set a future's outcome unless the caller cancelled it."""
+        try:
+            if exception is not None:
+                future.set_exception(exception)
+            else:
+                future.set_result(result)
+        except InvalidStateError:
+            pass
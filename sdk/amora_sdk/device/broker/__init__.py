@@ -9,20 +9,34 @@ the device ID namespace.
 
 from .manager import BrokerManager
 from .client import MQTTClient
-from .topics import TopicManager
-from .config import BrokerConfig, ConnectionOptions, QoS
-from .messages import Message, StateMessage, CommandMessage, ResponseMessage, ConnectionMessage
+from .topics import TopicManager, group_command_topic
+from .config import BrokerConfig, ConnectionOptions, QoS, ReconnectPolicy
+from .dedup import CommandDedupCache
+from .scheduler import CommandScheduler
+from .messages import (
+    Message, StateMessage, CommandMessage, BatchCommandMessage, ResponseMessage, ConnectionMessage,
+    MetricsMessage, TIME_SYNC_COMMAND, batch_response, chunk_responses
+)
 
 __all__ = [
     'BrokerManager',
     'MQTTClient',
     'TopicManager',
+    'group_command_topic',
     'BrokerConfig',
     'ConnectionOptions',
     'QoS',
+    'ReconnectPolicy',
+    'CommandDedupCache',
+    'CommandScheduler',
     'Message',
     'StateMessage',
     'CommandMessage',
+    'BatchCommandMessage',
     'ResponseMessage',
-    'ConnectionMessage'
+    'ConnectionMessage',
+    'MetricsMessage',
+    'TIME_SYNC_COMMAND',
+    'batch_response',
+    'chunk_responses'
 ]
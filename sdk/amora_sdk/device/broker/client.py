@@ -5,12 +5,14 @@ MQTT client wrapper for the Broker module.
 import json
 import logging
 import time
-import ssl
+import sys
 import threading
-from typing import Dict, Any, Optional, Callable, List, Union
+from typing import Dict, Any, Optional, Callable, List, Set, Union
 
 try:
     import paho.mqtt.client as mqtt
+    from paho.mqtt.packettypes import PacketTypes
+    from paho.mqtt.properties import Properties
     MQTT_AVAILABLE = True
 except ImportError:
     logging.getLogger(__name__).warning("Paho MQTT client not available. MQTT functionality will be disabled.")
@@ -22,10 +24,27 @@ except ImportError:
             """Dummy Client class for type hints."""
             pass
 
-from .config import ConnectionOptions, QoS
+from .config import ConnectionOptions, QoS, ReconnectPolicy
+from .tls import ResumableTLSContext, get_tls_context
+from ... import metrics
 
 logger = logging.getLogger(__name__)
 
+PUBLISH_SECONDS = metrics.histogram("amora_mqtt_publish_seconds", "Time to hand a message to the MQTT client")
+PUBLISHED_TOTAL = metrics.counter("amora_mqtt_published_total", "MQTT publishes, by result")
+PUBLISHED_BYTES = metrics.counter("amora_mqtt_published_bytes_total", "MQTT payload bytes published")
+CONNECT_SECONDS = metrics.histogram("amora_mqtt_connect_seconds", "Time from connecting to the broker's CONNACK")
+
+# MQTT 5 publish properties supported by publish(), by their paho names
+PUBLISH_PROPERTIES = {
+    "response_topic": "ResponseTopic",
+    "correlation_data": "CorrelationData",
+    "message_expiry_interval": "MessageExpiryInterval",
+}
+
+# Session expiry requested on MQTT 5 persistent sessions, like an MQTT 3.1.1 persistent session
+SESSION_NEVER_EXPIRES = 0xFFFFFFFF
+
 
 class MQTTClient:
     """
@@ -33,9 +52,20 @@ class MQTTClient:
     
     This class provides a wrapper around the Paho MQTT client with additional
     functionality for connection management, reconnection, and error handling.
+    
+    Subscriptions are kept in a registry (topic filter -> QoS, plus the
+    callbacks in on_message_callbacks) that outlives connections. With a
+    persistent session the broker keeps the subscriptions across drops, so
+    on reconnect they are only sent again, all in one SUBSCRIBE packet, when
+    the broker reports that it has no session for the client.
+    
+    With ``ConnectionOptions.mqtt5`` the client speaks MQTT 5, so publishes
+    can carry a response topic, correlation data and an expiry interval,
+    and received messages report them in their properties.
     """
     
-    def __init__(self, client_id: str, broker_url: str, port: int, options: ConnectionOptions):
+    def __init__(self, client_id: str, broker_url: str, port: int, options: ConnectionOptions,
+                 client: Optional[Any] = None):
         """
         Initialize the MQTT client.
         
@@ -44,8 +74,10 @@ class MQTTClient:
             broker_url: MQTT broker URL
             port: MQTT broker port
             options: Connection options
+            client: Paho-compatible client to use instead of creating one
+                (e.g. an in-process broker client for tests and benchmarks)
         """
-        if not MQTT_AVAILABLE:
+        if not MQTT_AVAILABLE and client is None:
             raise ImportError("Paho MQTT client not available. Cannot create MQTT client.")
         
         self.client_id = client_id
@@ -53,10 +85,29 @@ class MQTTClient:
         self.port = port
         self.options = options
         
-        self.client = mqtt.Client(client_id=client_id, clean_session=options.clean_session)
+        clean_session = options.clean_session
+        if not clean_session and not client_id:
+            logger.warning("Persistent MQTT sessions need a client ID; using a clean session")
+            clean_session = True
+        self.clean_session = clean_session
+        
+        # Reconnects are scheduled by the reconnect policy rather than paho's own
+        # fixed doubling, which would bring a whole fleet back in lockstep
+        if client is not None:
+            self.client = client
+        elif options.mqtt5:
+            # MQTT 5 has no clean session flag; clean start is passed on connect
+            self.client = mqtt.Client(client_id=client_id, protocol=mqtt.MQTTv5,
+                                      reconnect_on_failure=not options.reconnect_on_failure)
+        else:
+            self.client = mqtt.Client(client_id=client_id, clean_session=clean_session,
+                                      reconnect_on_failure=not options.reconnect_on_failure)
         self.connected = False
+        self.session_present = False
         self.reconnect_timer = None
-        self.reconnect_delay = 1  # Initial reconnect delay in seconds
+        self.reconnect_policy = (options.reconnect_policy or ReconnectPolicy(max_delay=options.max_reconnect_delay)).copy()
+        self.reconnect_delay = 0.0  # Delay of the last scheduled reconnect in seconds
+        self.connect_started: Optional[float] = None
         
         # Set up callbacks
         self.client.on_connect = self._on_connect
@@ -70,7 +121,13 @@ class MQTTClient:
         self.on_disconnect_callbacks: List[Callable[[], None]] = []
         self.on_message_callbacks: Dict[str, List[Callable[[str, bytes, Dict[str, Any]], None]]] = {}
         
+        # Subscription registry: topic filter -> QoS, sent again when the broker has no session
+        self.subscriptions: Dict[str, QoS] = {}
+        # Topics unsubscribed while disconnected, which a resumed session still holds
+        self._pending_unsubscribes: Set[str] = set()
+        
         # Configure TLS if needed
+        self.tls_context: Optional[ResumableTLSContext] = None
         if options.use_tls:
             self._configure_tls()
         
@@ -79,32 +136,37 @@ class MQTTClient:
             self.client.username_pw_set(options.username, options.password)
     
     def _configure_tls(self) -> None:
-        """Configure TLS for the MQTT client."""
-        if self.options.cert_file and self.options.key_file:
-            # Client certificate authentication
-            self.client.tls_set(
-                ca_certs=self.options.ca_file,
-                certfile=self.options.cert_file,
-                keyfile=self.options.key_file,
-                cert_reqs=ssl.CERT_REQUIRED,
-                tls_version=ssl.PROTOCOL_TLS,
-                ciphers=None
-            )
-        elif self.options.ca_file:
-            # Server certificate verification only
-            self.client.tls_set(
-                ca_certs=self.options.ca_file,
-                cert_reqs=ssl.CERT_REQUIRED,
-                tls_version=ssl.PROTOCOL_TLS,
-                ciphers=None
-            )
-        else:
-            # Default TLS configuration
-            self.client.tls_set(
-                cert_reqs=ssl.CERT_REQUIRED,
-                tls_version=ssl.PROTOCOL_TLS,
-                ciphers=None
-            )
+        """
+        Configure TLS for the MQTT client.
+        
+        The SSL context is shared by every client using the same CA,
+        certificate and key; the client only keeps its own TLS session,
+        which it offers on reconnect to skip the full handshake.
+        """
+        context = get_tls_context(
+            ca_file=self.options.ca_file,
+            cert_file=self.options.cert_file,
+            key_file=self.options.key_file
+        )
+        self.tls_context = ResumableTLSContext(context, resume=self.options.tls_session_resumption)
+        self.client.tls_set_context(self.tls_context)
+    
+    def _save_tls_session(self) -> str:
+        """
+        Keep the TLS session of the current connection for the next reconnect.
+        
+        Returns:
+            "off" without TLS, otherwise "resumed" or "full" for the handshake of this connection
+        """
+        if self.tls_context is None:
+            return "off"
+        try:
+            sock = self.client.socket()
+            self.tls_context.save_session(sock)
+            return "resumed" if getattr(sock, "session_reused", False) else "full"
+        except Exception as e:
+            logger.debug("Cannot save TLS session: %s", e)
+            return "full"
     
     def connect(self) -> bool:
         """
@@ -115,11 +177,21 @@ class MQTTClient:
         """
         try:
             logger.info(f"Connecting to MQTT broker at {self.broker_url}:{self.port}")
-            self.client.connect(
-                self.broker_url,
-                self.port,
-                keepalive=self.options.keep_alive
-            )
+            self.connect_started = time.perf_counter()
+            if self.options.mqtt5:
+                self.client.connect(
+                    self.broker_url,
+                    self.port,
+                    keepalive=self.options.keep_alive,
+                    clean_start=self.clean_session,
+                    properties=self._connect_properties()
+                )
+            else:
+                self.client.connect(
+                    self.broker_url,
+                    self.port,
+                    keepalive=self.options.keep_alive
+                )
             self.client.loop_start()
             return True
         except Exception as e:
@@ -128,6 +200,37 @@ class MQTTClient:
                 self._schedule_reconnect()
             return False
     
+    def _connect_properties(self) -> Optional["Properties"]:
+        """
+        Build the MQTT 5 CONNECT properties.
+        
+        Returns:
+            Properties keeping a persistent session after disconnects, None for a clean session
+        """
+        if self.clean_session or not MQTT_AVAILABLE:
+            return None
+        properties = Properties(PacketTypes.CONNECT)
+        properties.SessionExpiryInterval = SESSION_NEVER_EXPIRES
+        return properties
+    
+    def _publish_properties(self, properties: Optional[Dict[str, Any]]) -> Optional["Properties"]:
+        """
+        Build MQTT 5 PUBLISH properties.
+        
+        Args:
+            properties: Property values by name in PUBLISH_PROPERTIES
+            
+        Returns:
+            paho properties, or None without MQTT 5 or properties
+        """
+        if not properties or not self.options.mqtt5 or not MQTT_AVAILABLE:
+            return None
+        publish_properties = Properties(PacketTypes.PUBLISH)
+        for key, value in properties.items():
+            if value is not None:
+                setattr(publish_properties, PUBLISH_PROPERTIES[key], value)
+        return publish_properties
+    
     def disconnect(self) -> None:
         """Disconnect from the MQTT broker."""
         if self.reconnect_timer:
@@ -142,7 +245,8 @@ class MQTTClient:
             logger.error(f"Error disconnecting from MQTT broker: {e}")
     
     def publish(self, topic: str, payload: Union[str, Dict[str, Any], bytes],
-                qos: QoS = QoS.AT_LEAST_ONCE, retain: bool = False) -> bool:
+                qos: QoS = QoS.AT_LEAST_ONCE, retain: bool = False,
+                properties: Optional[Dict[str, Any]] = None) -> bool:
         """
         Publish a message to a topic.
         
@@ -151,6 +255,8 @@ class MQTTClient:
             payload: Message payload
             qos: Quality of Service level
             retain: Whether to retain the message
+            properties: MQTT 5 properties ("response_topic", "correlation_data",
+                "message_expiry_interval"), ignored without MQTT 5
             
         Returns:
             True if publish was successful, False otherwise
@@ -168,10 +274,19 @@ class MQTTClient:
             if isinstance(payload, str):
                 payload = payload.encode('utf-8')
             
-            result = self.client.publish(topic, payload, qos.value, retain)
-            return result.rc == mqtt.MQTT_ERR_SUCCESS
+            with PUBLISH_SECONDS.time():
+                if properties:
+                    result = self.client.publish(topic, payload, qos.value, retain,
+                                                 properties=self._publish_properties(properties))
+                else:
+                    result = self.client.publish(topic, payload, qos.value, retain)
+            success = result.rc == mqtt.MQTT_ERR_SUCCESS
+            PUBLISHED_TOTAL.inc(result=success)
+            PUBLISHED_BYTES.inc(len(payload))
+            return success
         except Exception as e:
             logger.error(f"Error publishing to topic {topic}: {e}")
+            PUBLISHED_TOTAL.inc(result="error")
             return False
     
     def subscribe(self, topic: str, qos: QoS = QoS.AT_LEAST_ONCE,
@@ -179,23 +294,30 @@ class MQTTClient:
         """
         Subscribe to a topic.
         
+        The subscription is added to the registry, so subscribing again with
+        the same callback does not register it twice. While disconnected the
+        subscription is only registered and is sent on connect.
+        
         Args:
             topic: Topic to subscribe to
             qos: Quality of Service level
             callback: Callback function for messages on this topic
             
         Returns:
-            True if subscription was successful, False otherwise
+            True if subscription was successful (or registered while disconnected), False otherwise
         """
-        if not self.connected:
-            logger.warning("Cannot subscribe: not connected to MQTT broker")
-            return False
-        
         try:
+            topic = sys.intern(topic)
+            self.subscriptions[topic] = qos
+            self._pending_unsubscribes.discard(topic)
             if callback:
-                if topic not in self.on_message_callbacks:
-                    self.on_message_callbacks[topic] = []
-                self.on_message_callbacks[topic].append(callback)
+                callbacks = self.on_message_callbacks.setdefault(topic, [])
+                if callback not in callbacks:
+                    callbacks.append(callback)
+            
+            if not self.connected:
+                logger.debug("Subscription to %s registered, sent on connect", topic)
+                return True
             
             result = self.client.subscribe(topic, qos.value)
             return result[0] == mqtt.MQTT_ERR_SUCCESS
@@ -207,20 +329,26 @@ class MQTTClient:
         """
         Unsubscribe from a topic.
         
+        The subscription and its callbacks are removed from the registry at
+        once. While disconnected the UNSUBSCRIBE is sent on connect, if the
+        broker resumed the session that still holds the subscription.
+        
         Args:
             topic: Topic to unsubscribe from
             
         Returns:
-            True if unsubscription was successful, False otherwise
+            True if unsubscription was successful (or registered while disconnected), False otherwise
         """
+        self.subscriptions.pop(topic, None)
+        self.on_message_callbacks.pop(topic, None)
+        
         if not self.connected:
-            logger.warning("Cannot unsubscribe: not connected to MQTT broker")
-            return False
+            logger.debug("Unsubscription from %s registered, sent on connect", topic)
+            self._pending_unsubscribes.add(topic)
+            return True
         
         try:
             result = self.client.unsubscribe(topic)
-            if topic in self.on_message_callbacks:
-                del self.on_message_callbacks[topic]
             return result[0] == mqtt.MQTT_ERR_SUCCESS
         except Exception as e:
             logger.error(f"Error unsubscribing from topic {topic}: {e}")
@@ -269,7 +397,7 @@ class MQTTClient:
         """
         self.on_disconnect_callbacks.append(callback)
     
-    def _on_connect(self, client, userdata, flags, rc) -> None:
+    def _on_connect(self, client, userdata, flags, rc, properties=None) -> None:
         """
         Callback for when the client connects to the broker.
         
@@ -278,11 +406,24 @@ class MQTTClient:
             userdata: User data
             flags: Connection flags
             rc: Result code
+            properties: CONNACK properties (MQTT 5)
         """
         if rc == 0:
             self.connected = True
-            self.reconnect_delay = 1  # Reset reconnect delay
-            logger.info("Connected to MQTT broker")
+            self.reconnect_policy.reset()
+            handshake = self._save_tls_session()
+            if self.connect_started is not None:
+                CONNECT_SECONDS.observe(time.perf_counter() - self.connect_started, tls=handshake)
+                self.connect_started = None
+            self.session_present = bool(flags.get("session present")) if isinstance(flags, dict) else False
+            logger.info("Connected to MQTT broker (session present: %s)", self.session_present)
+            
+            # A resumed session still holds the subscriptions, including those dropped while offline
+            if not self.session_present:
+                self._resubscribe()
+            else:
+                self._send_pending_unsubscribes()
+            self._pending_unsubscribes.clear()
             
             # Call user callbacks
             for callback in self.on_connect_callbacks:
@@ -301,11 +442,37 @@ class MQTTClient:
                 except Exception as e:
                     logger.error(f"Error in on_connect callback: {e}")
             
-            # Schedule reconnect if enabled
+            # Schedule reconnect if enabled, backing off further if the server is overloaded
             if self.options.reconnect_on_failure:
-                self._schedule_reconnect()
+                self._schedule_reconnect(server_busy=ReconnectPolicy.is_server_busy(rc))
+    
+    def _send_pending_unsubscribes(self) -> None:
+        """Send an UNSUBSCRIBE for each topic unsubscribed while disconnected."""
+        for topic in self._pending_unsubscribes:
+            try:
+                self.client.unsubscribe(topic)
+            except Exception as e:
+                logger.error(f"Error unsubscribing from topic {topic}: {e}")
+    
+    def _resubscribe(self) -> bool:
+        """
+        Send every registered subscription in one SUBSCRIBE packet.
+        
+        Returns:
+            True if the subscriptions were sent, False otherwise
+        """
+        if not self.subscriptions:
+            return True
+        
+        try:
+            result = self.client.subscribe([(topic, qos.value) for topic, qos in self.subscriptions.items()])
+            logger.info("Subscribed to %d topic(s)", len(self.subscriptions))
+            return result[0] == mqtt.MQTT_ERR_SUCCESS
+        except Exception as e:
+            logger.error(f"Error subscribing to topics: {e}")
+            return False
     
-    def _on_disconnect(self, client, userdata, rc) -> None:
+    def _on_disconnect(self, client, userdata, rc, properties=None) -> None:
         """
         Callback for when the client disconnects from the broker.
         
@@ -313,6 +480,7 @@ class MQTTClient:
             client: MQTT client instance
             userdata: User data
             rc: Result code
+            properties: DISCONNECT properties (MQTT 5)
         """
         self.connected = False
         
@@ -341,13 +509,23 @@ class MQTTClient:
             userdata: User data
             msg: Message
         """
-        logger.debug(f"Received message on topic {msg.topic}")
+        logger.debug("Received message on topic %s", msg.topic)
+        
+        properties = {"qos": msg.qos, "retain": msg.retain}
+        
+        # MQTT 5 request/response properties, by their names in PUBLISH_PROPERTIES
+        message_properties = getattr(msg, "properties", None)
+        if message_properties is not None:
+            for key, name in PUBLISH_PROPERTIES.items():
+                value = getattr(message_properties, name, None)
+                if value is not None:
+                    properties[key] = value
         
         # Call topic-specific callbacks
         if msg.topic in self.on_message_callbacks:
             for callback in self.on_message_callbacks[msg.topic]:
                 try:
-                    callback(msg.topic, msg.payload, {"qos": msg.qos, "retain": msg.retain})
+                    callback(msg.topic, msg.payload, properties)
                 except Exception as e:
                     logger.error(f"Error in on_message callback for topic {msg.topic}: {e}")
         
@@ -357,7 +535,7 @@ class MQTTClient:
                 if self._topic_matches_subscription(topic, msg.topic):
                     for callback in callbacks:
                         try:
-                            callback(msg.topic, msg.payload, {"qos": msg.qos, "retain": msg.retain})
+                            callback(msg.topic, msg.payload, properties)
                         except Exception as e:
                             logger.error(f"Error in on_message callback for wildcard topic {topic}: {e}")
     
@@ -370,9 +548,9 @@ class MQTTClient:
             userdata: User data
             mid: Message ID
         """
-        logger.debug(f"Message {mid} published")
+        logger.debug("Message %s published", mid)
     
-    def _on_subscribe(self, client, userdata, mid, granted_qos) -> None:
+    def _on_subscribe(self, client, userdata, mid, granted_qos, properties=None) -> None:
         """
         Callback for when a subscription is made.
         
@@ -380,32 +558,44 @@ class MQTTClient:
             client: MQTT client instance
             userdata: User data
             mid: Message ID
-            granted_qos: Granted QoS levels
+            granted_qos: Granted QoS levels (reason codes with MQTT 5)
+            properties: SUBACK properties (MQTT 5)
         """
-        logger.debug(f"Subscription {mid} made with QoS {granted_qos}")
+        logger.debug("Subscription %s made with QoS %s", mid, granted_qos)
     
-    def _schedule_reconnect(self) -> None:
-        """Schedule a reconnection attempt."""
-        if self.reconnect_timer:
-            self.reconnect_timer.cancel()
+    def _schedule_reconnect(self, server_busy: bool = False) -> None:
+        """
+        Schedule a reconnection attempt after the reconnect policy's next delay.
+        
+        A refused connection is reported both as a failed connect and as a
+        disconnect, so an attempt already pending is kept.
+        
+        Args:
+            server_busy: Whether the server refused the connection because it is busy
+        """
+        if self.reconnect_timer and self.reconnect_timer.is_alive():
+            return
         
-        logger.info(f"Scheduling reconnect in {self.reconnect_delay} seconds")
+        self.reconnect_delay = self.reconnect_policy.next_delay(server_busy)
+        logger.info(f"Scheduling reconnect in {self.reconnect_delay:.1f} seconds")
         self.reconnect_timer = threading.Timer(self.reconnect_delay, self._reconnect)
         self.reconnect_timer.daemon = True
         self.reconnect_timer.start()
-        
-        # Exponential backoff with max delay
-        self.reconnect_delay = min(self.reconnect_delay * 2, self.options.max_reconnect_delay)
     
     def _reconnect(self) -> None:
         """Attempt to reconnect to the MQTT broker."""
+        self.reconnect_timer = None
         if not self.connected:
             try:
                 logger.info(f"Attempting to reconnect to MQTT broker at {self.broker_url}:{self.port}")
+                # The network thread exits on connection loss; restart it around the reconnect
+                self.client.loop_stop()
+                self.connect_started = time.perf_counter()
                 self.client.reconnect()
+                self.client.loop_start()
             except Exception as e:
                 logger.error(f"Failed to reconnect to MQTT broker: {e}")
-                self._schedule_reconnect()
+                self._schedule_reconnect(server_busy=ReconnectPolicy.is_server_busy(e))
     
     def _topic_matches_subscription(self, subscription: str, topic: str) -> bool:
         """
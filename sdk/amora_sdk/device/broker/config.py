@@ -2,10 +2,19 @@
 Configuration models for the Broker module.
 """
 
+import random
 from enum import Enum
-from typing import Optional, Dict, Any, Callable
+from typing import Optional, Dict, Any, Callable, List, Union
 from dataclasses import dataclass, field
 
+# CONNACK codes that mean the server is up but refusing load: 3 is "server
+# unavailable" in MQTT 3.1.1; 0x88 server unavailable, 0x89 server busy,
+# 0x97 quota exceeded and 0x9F connection rate exceeded are MQTT 5 reason codes
+SERVER_BUSY_CODES = frozenset({3, 0x88, 0x89, 0x97, 0x9F})
+
+# Error text that IoT Hub and brokers use when throttling connections
+SERVER_BUSY_MARKERS = ("server busy", "server unavailable", "broker unavailable", "throttl", "quota")
+
 
 class QoS(Enum):
     """MQTT Quality of Service levels."""
@@ -14,6 +23,90 @@ class QoS(Enum):
     EXACTLY_ONCE = 2
 
 
+@dataclass
+class ReconnectPolicy:
+    """
+    Reconnect delays for a fleet of devices.
+    
+    Delays use decorrelated jitter: each delay is drawn between base_delay
+    and three times the previous one, capped at max_delay. The first attempt
+    after a connection loss waits a random offset of up to initial_spread
+    seconds, so devices dropped together by a broker restart do not all come
+    back in the same second. When the server reports that it is busy, the
+    next delay is at least busy_delay, plus jitter.
+    
+    A policy holds the state of one connection; use copy() to give each
+    client its own.
+    """
+    base_delay: float = 1.0
+    max_delay: float = 300.0
+    initial_spread: float = 20.0
+    busy_delay: float = 15.0
+    seed: Optional[int] = None
+    attempts: int = field(default=0, init=False)
+    _previous: float = field(default=0.0, init=False, repr=False)
+    _rng: random.Random = field(default=None, init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        self._rng = random.Random(self.seed)
+        self.reset()
+    
+    def copy(self) -> 'ReconnectPolicy':
+        """
+        Create a policy with the same settings and fresh state.
+        
+        Returns:
+            ReconnectPolicy instance
+        """
+        return ReconnectPolicy(self.base_delay, self.max_delay, self.initial_spread, self.busy_delay, self.seed)
+    
+    def reset(self) -> None:
+        """Reset the backoff after a successful connection."""
+        self.attempts = 0
+        self._previous = self.base_delay
+    
+    def next_delay(self, server_busy: bool = False) -> float:
+        """
+        Get the delay before the next reconnect attempt.
+        
+        Args:
+            server_busy: Whether the server refused the last attempt because it is busy
+            
+        Returns:
+            Delay in seconds
+        """
+        self.attempts += 1
+        if self.attempts == 1 and not server_busy:
+            delay = self._rng.uniform(0, self.initial_spread)
+        else:
+            delay = min(self.max_delay, self._rng.uniform(self.base_delay, self._previous * 3))
+            if server_busy:
+                delay = max(delay, min(self.max_delay, self._rng.uniform(self.busy_delay, self.busy_delay * 2)))
+            self._previous = max(delay, self.base_delay)
+        return delay
+    
+    @staticmethod
+    def is_server_busy(reason: Union[int, str, BaseException, None]) -> bool:
+        """
+        Check whether a CONNACK code or connection error means the server is busy.
+        
+        Args:
+            reason: CONNACK return or reason code, error message or exception
+            
+        Returns:
+            True if the server is overloaded or throttling connections, False otherwise
+        """
+        if reason is None:
+            return False
+        if isinstance(reason, int):
+            return reason in SERVER_BUSY_CODES
+        if not isinstance(reason, str) and hasattr(reason, "value") and isinstance(reason.value, int):
+            # paho ReasonCodes
+            return reason.value in SERVER_BUSY_CODES
+        text = str(reason).lower()
+        return any(marker in text for marker in SERVER_BUSY_MARKERS)
+
+
 @dataclass
 class ConnectionOptions:
     """MQTT connection options."""
@@ -21,12 +114,15 @@ class ConnectionOptions:
     cert_file: Optional[str] = None
     key_file: Optional[str] = None
     ca_file: Optional[str] = None
+    tls_session_resumption: bool = True  # offer the last TLS session on reconnect
     username: Optional[str] = None
     password: Optional[str] = None
     keep_alive: int = 60
-    clean_session: bool = True
+    clean_session: bool = False  # persistent session: the broker keeps subscriptions across drops
+    mqtt5: bool = False  # MQTT 5: commands can name a response topic and correlation data
     reconnect_on_failure: bool = True
     max_reconnect_delay: int = 300  # seconds
+    reconnect_policy: Optional[ReconnectPolicy] = None  # defaults to one capped at max_reconnect_delay
 
 
 @dataclass
@@ -37,8 +133,15 @@ class BrokerConfig:
     client_id: str = ""
     device_id: str = ""
     topic_prefix: str = "amora/devices"
+    groups: List[str] = field(default_factory=list)  # groups whose command topics the device subscribes to
+    group_prefix: str = "amora/groups"
     connection_options: ConnectionOptions = field(default_factory=ConnectionOptions)
     default_qos: QoS = QoS.AT_LEAST_ONCE
+    trace_commands: bool = False
+    dedup_ttl: float = 600.0  # seconds a command_id is remembered, 0 disables deduplication
+    dedup_max_entries: int = 1024
+    dedup_max_bytes: int = 1024 * 1024  # total size of the cached responses
+    max_schedule_ahead: float = 3600.0  # seconds; commands scheduled further ahead are refused
     raw_config: Dict[str, Any] = field(default_factory=dict)
 
     @classmethod
@@ -60,12 +163,15 @@ class BrokerConfig:
             cert_file=broker_config.get('cert_file'),
             key_file=broker_config.get('key_file'),
             ca_file=broker_config.get('ca_file'),
+            tls_session_resumption=broker_config.get('tls_session_resumption', True),
             username=broker_config.get('username'),
             password=broker_config.get('password'),
             keep_alive=broker_config.get('keep_alive', 60),
-            clean_session=broker_config.get('clean_session', True),
+            clean_session=broker_config.get('clean_session', False),
+            mqtt5=broker_config.get('mqtt5', False),
             reconnect_on_failure=broker_config.get('reconnect_on_failure', True),
-            max_reconnect_delay=broker_config.get('max_reconnect_delay', 300)
+            max_reconnect_delay=broker_config.get('max_reconnect_delay', 300),
+            reconnect_policy=ReconnectPolicy(**broker_config['reconnect']) if 'reconnect' in broker_config else None
         )
 
         return cls(
@@ -74,7 +180,14 @@ class BrokerConfig:
             client_id=broker_config.get('client_id', f"device-{device_id}"),
             device_id=device_id,
             topic_prefix=broker_config.get('topic_prefix', 'amora/devices'),
+            groups=list(broker_config.get('groups', [])),
+            group_prefix=broker_config.get('group_prefix', 'amora/groups'),
             connection_options=connection_options,
             default_qos=QoS(broker_config.get('default_qos', 1)),
+            trace_commands=broker_config.get('trace_commands', False),
+            dedup_ttl=broker_config.get('dedup_ttl', 600.0),
+            dedup_max_entries=broker_config.get('dedup_max_entries', 1024),
+            dedup_max_bytes=broker_config.get('dedup_max_bytes', 1024 * 1024),
+            max_schedule_ahead=broker_config.get('max_schedule_ahead', 3600.0),
             raw_config=config
         )
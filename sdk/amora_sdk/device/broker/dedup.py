@@ -0,0 +1,125 @@
+"""
+Command deduplication for the Broker module.
+
+Commands are delivered at least once with the default QoS, so the broker may
+redeliver a command that was already executed, for instance after a
+reconnect. ``CommandDedupCache`` keeps the serialized responses of recently
+executed commands by ``command_id``; a duplicate is answered from the cache
+instead of running its handler again. A command that is still running is
+remembered as pending, with no responses yet.
+
+The cache is an LRU bounded by entry count and total payload size, and
+entries expire after a time-to-live. Lookups and inserts are O(1), with
+evictions amortized over the inserts that cause them.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, List, Optional, Tuple
+
+
+class CommandDedupCache:
+    """LRU/TTL cache of the responses to recently executed commands."""
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 600.0, max_bytes: int = 1024 * 1024,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of commands remembered
+            ttl: Seconds a command is remembered for
+            max_bytes: Maximum total size of the cached response payloads
+            clock: Monotonic clock, replaceable in tests
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self.size_bytes = 0
+        self.hits = 0
+        self._entries: "OrderedDict[str, Tuple[float, List[str], int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, command_id: str) -> Optional[List[str]]:
+        """
+        Look up the responses to a command.
+
+        Args:
+            command_id: Command ID
+
+        Returns:
+            The response payloads if the command was executed recently, an empty list if
+            it is still running, None otherwise
+        """
+        if not command_id:
+            return None
+        with self._lock:
+            entry = self._entries.get(command_id)
+            if entry is None:
+                return None
+            expires_at, payloads, size = entry
+            if expires_at <= self.clock():
+                del self._entries[command_id]
+                self.size_bytes -= size
+                return None
+            self._entries.move_to_end(command_id)
+            self.hits += 1
+            return payloads
+
+    def put(self, command_id: str, payloads: List[str]) -> bool:
+        """
+        Remember the responses to an executed command.
+
+        Args:
+            command_id: Command ID
+            payloads: Serialized response messages, in publish order
+
+        Returns:
+            True if the responses were cached, False if they are larger than the whole cache
+        """
+        if not command_id:
+            return False
+        size = sum(len(payload) for payload in payloads)
+        if size > self.max_bytes:
+            return False
+
+        with self._lock:
+            now = self.clock()
+            previous = self._entries.pop(command_id, None)
+            if previous is not None:
+                self.size_bytes -= previous[2]
+            self._entries[command_id] = (now + self.ttl, payloads, size)
+            self.size_bytes += size
+
+            # Evict expired entries at the old end, then least recently used ones
+            while self._entries:
+                oldest_id, (expires_at, _, oldest_size) = next(iter(self._entries.items()))
+                if (expires_at > now and len(self._entries) <= self.max_entries
+                        and self.size_bytes <= self.max_bytes):
+                    break
+                del self._entries[oldest_id]
+                self.size_bytes -= oldest_size
+        return True
+
+    def mark_pending(self, command_id: str) -> bool:
+        """
+        Remember a command that is about to run, until put stores its responses.
+
+        Args:
+            command_id: Command ID
+
+        Returns:
+            True if the command was remembered
+        """
+        return self.put(command_id, [])
+
+    def clear(self) -> None:
+        """Forget every command."""
+        with self._lock:
+            self._entries.clear()
+            self.size_bytes = 0
@@ -5,18 +5,29 @@ Broker Manager for the Broker module.
 import json
 import logging
 import time
-from typing import Dict, Any, Optional, Callable, List, Union
+from typing import Dict, Any, Optional, Callable, Iterable, Iterator, List, Tuple, Union
 
 from .client import MQTTClient
 from .topics import TopicManager, TopicType
 from .config import BrokerConfig, QoS
+from .dedup import CommandDedupCache
+from .scheduler import CommandScheduler
 from .messages import (
-    Message, StateMessage, CommandMessage, ResponseMessage,
-    ConnectionMessage, parse_message
+    Message, StateMessage, CommandMessage, BatchCommandMessage, ResponseMessage,
+    ConnectionMessage, MetricsMessage, BATCH_COMMAND, TIME_SYNC_COMMAND, batch_response, parse_message
 )
+from ... import metrics, tracing
 
 logger = logging.getLogger(__name__)
 
+COMMAND_SECONDS = metrics.histogram("amora_command_seconds", "Time spent in command handlers")
+COMMANDS_TOTAL = metrics.counter("amora_commands_total", "Commands executed, by command and result")
+COMMANDS_DEDUPLICATED = metrics.counter("amora_commands_deduplicated_total", "Redelivered commands answered from the cache")
+SCHEDULE_LATENESS = metrics.histogram("amora_schedule_lateness_seconds", "How late scheduled commands started after their time")
+
+# Where an MQTT 5 request wants its response: (response topic, correlation data)
+ReplyTo = Tuple[str, Optional[bytes]]
+
 
 class BrokerManager:
     """
@@ -26,22 +37,36 @@ class BrokerManager:
     between devices and client applications using MQTT. It abstracts the
     MQTT communication complexity and provides a simple pub/sub framework
     with predefined topics in the device ID namespace.
+    
+    Responses go to the device's responses topic, unless the command was
+    sent with MQTT 5 request/response properties: then they go to the
+    command's response topic, with its correlation data.
+    
+    Commands with an ``execute_at`` time (in the controller's clock) are
+    pre-staged on arrival by their preparer, if one is registered, and run
+    by a scheduler thread at that time converted to the device clock with
+    the sending controller's offset in ``clock_offsets``. Each controller
+    measures its offset with ``time_sync`` probes (see ClockOffsetEstimator),
+    which also tell the device the current estimate. Controllers are told
+    apart by their MQTT 5 response topic; commands without one share the
+    offset of probes without one.
     """
     
-    def __init__(self, config: BrokerConfig):
+    def __init__(self, config: BrokerConfig, mqtt_client: Optional[MQTTClient] = None):
         """
         Initialize the Broker Manager.
         
         Args:
             config: Broker configuration
+            mqtt_client: MQTT client to use instead of creating one from the configuration
         """
         self.config = config
         
         # Create topic manager
-        self.topic_manager = TopicManager(config.topic_prefix, config.device_id)
+        self.topic_manager = TopicManager(config.topic_prefix, config.device_id, config.groups, config.group_prefix)
         
         # Create MQTT client
-        self.mqtt_client = MQTTClient(
+        self.mqtt_client = mqtt_client or MQTTClient(
             client_id=config.client_id,
             broker_url=config.broker_url,
             port=config.port,
@@ -64,8 +89,32 @@ class BrokerManager:
         # State change callbacks
         self.state_change_callbacks: List[Callable[[StateMessage], None]] = []
         
+        # Receives the trace of every command when set (see set_trace_sink)
+        self.trace_sink: Optional[Callable[[Dict[str, Any]], None]] = None
+        
+        # Responses of recently executed commands, so redelivered commands are not run twice
+        self.dedup_cache: Optional[CommandDedupCache] = None
+        if config.dedup_ttl > 0 and config.dedup_max_entries > 0:
+            self.dedup_cache = CommandDedupCache(
+                max_entries=config.dedup_max_entries,
+                ttl=config.dedup_ttl,
+                max_bytes=config.dedup_max_bytes
+            )
+        
+        # Preparers pre-staging scheduled commands, and the scheduler running them
+        self.command_preparers: Dict[str, Callable[[CommandMessage], Callable[[], ResponseMessage]]] = {}
+        # A scheduled command is marked pending before it leaves the scheduler, so a
+        # redelivery while it runs is neither scheduled nor executed again
+        self.scheduler = CommandScheduler(on_fire=self._mark_pending)
+        
+        # This device's clock minus each controller's, by response topic, as last sent by its time_sync probes
+        self.clock_offsets: Dict[Optional[str], float] = {}
+        
         # Connection status
         self.connected = False
+        
+        # Subscriptions are registered once; the MQTT client restores them on reconnect
+        self._subscribe_to_commands()
     
     def _set_last_will(self) -> None:
         """Set the last will message."""
@@ -87,7 +136,8 @@ class BrokerManager:
         return self.mqtt_client.connect()
     
     def disconnect(self) -> None:
-        """Disconnect from the MQTT broker."""
+        """Disconnect from the MQTT broker, dropping the scheduled commands."""
+        self.scheduler.stop()
         self.mqtt_client.disconnect()
     
     def _on_connect(self, success: bool) -> None:
@@ -101,9 +151,6 @@ class BrokerManager:
             self.connected = True
             logger.info("Connected to MQTT broker")
             
-            # Subscribe to command topic
-            self._subscribe_to_commands()
-            
             # Publish online status
             self._publish_connection_status("online")
         else:
@@ -116,14 +163,46 @@ class BrokerManager:
         logger.info("Disconnected from MQTT broker")
     
     def _subscribe_to_commands(self) -> None:
-        """Subscribe to command topics."""
+        """Register the command topic subscriptions with the MQTT client."""
         for topic in self.topic_manager.get_subscription_topics():
             self.mqtt_client.subscribe(
                 topic=topic,
                 qos=self.config.default_qos,
                 callback=self._on_command_received
             )
-            logger.info(f"Subscribed to topic: {topic}")
+            logger.info("Subscribed to topic: %s", topic)
+    
+    def join_group(self, group: str) -> bool:
+        """
+        Receive the commands sent to a group.
+        
+        Args:
+            group: Group name
+        
+        Returns:
+            True if the subscription was successful (or registered while disconnected), False otherwise
+        """
+        topic = self.topic_manager.add_group(group)
+        logger.info("Joining group %s on topic: %s", group, topic)
+        return self.mqtt_client.subscribe(topic=topic, qos=self.config.default_qos,
+                                          callback=self._on_command_received)
+    
+    def leave_group(self, group: str) -> bool:
+        """
+        Stop receiving the commands sent to a group.
+        
+        Args:
+            group: Group name
+        
+        Returns:
+            True if the device was in the group and is unsubscribed (or registered while disconnected),
+            False otherwise
+        """
+        topic = self.topic_manager.remove_group(group)
+        if topic is None:
+            return False
+        logger.info("Leaving group %s", group)
+        return self.mqtt_client.unsubscribe(topic)
     
     def _on_command_received(self, topic: str, payload: bytes, properties: Dict[str, Any]) -> None:
         """
@@ -134,28 +213,241 @@ class BrokerManager:
             payload: Message payload
             properties: Message properties
         """
-        logger.info(f"Received command on topic: {topic}")
+        received_at = time.time()
+        origin = time.perf_counter()
+        logger.info("Received command on topic: %s", topic)
         
         # Parse the command message
         command_msg = parse_message(payload, 'command')
         if not command_msg or not isinstance(command_msg, CommandMessage):
-            logger.error(f"Invalid command message received on topic {topic}")
+            logger.error("Invalid command message received on topic %s", topic)
+            return
+        
+        reply_to = self._reply_to(properties)
+        
+        # Clock probes are answered at once with the receive time, and never cached
+        if command_msg.command == TIME_SYNC_COMMAND and TIME_SYNC_COMMAND not in self.command_handlers:
+            self.publish_response(self._time_sync(command_msg, received_at, reply_to), reply_to)
+            return
+        
+        # A redelivered command gets its original responses again without running the handler
+        if self.dedup_cache is not None:
+            cached = self.dedup_cache.get(command_msg.command_id)
+            if cached is not None:
+                if cached:
+                    logger.info("Duplicate command %s (ID: %s), republishing its response",
+                                command_msg.command, command_msg.command_id)
+                else:
+                    logger.info("Duplicate command %s (ID: %s), still running",
+                                command_msg.command, command_msg.command_id)
+                COMMANDS_DEDUPLICATED.inc(command=command_msg.command)
+                for payload in cached:
+                    self._publish_response_payload(payload, reply_to)
+                return
+        
+        # Commands for later are pre-staged now and answered once they have run
+        if command_msg.execute_at is not None:
+            self._schedule_command(command_msg, reply_to)
             return
         
-        # Execute the command
-        response = self._execute_command(command_msg)
+        embed_trace = command_msg.trace or self.config.trace_commands
+        trace = None
+        if embed_trace or self.trace_sink:
+            trace = tracing.CommandTrace(command_msg.command_id, command_msg.timestamp, received_at, origin)
+            trace.add_span("parse", origin, time.perf_counter())
+            token = tracing.start_trace(trace)
         
-        # Publish the response
-        self.publish_response(response)
+        try:
+            # Execute the command
+            response = self._execute_command(command_msg)
+            
+            # The publish span can only reach the trace sink, not the response itself
+            if embed_trace and isinstance(response, ResponseMessage):
+                response.data = dict(response.data or {}, trace=trace.to_dict())
+            
+            with tracing.span("publish"):
+                self._publish_command_response(command_msg, response, reply_to)
+        finally:
+            if trace:
+                tracing.end_trace(token)
+        
+        if trace and self.trace_sink:
+            try:
+                self.trace_sink(trace.to_dict())
+            except Exception as e:
+                logger.error(f"Error in trace sink: {e}")
         
-        # Notify command callbacks
+        self._notify_command_callbacks(command_msg)
+    
+    def _publish_command_response(self, command_msg: CommandMessage,
+                                  response: Union[ResponseMessage, Iterable[ResponseMessage]],
+                                  reply_to: Optional[ReplyTo]) -> None:
+        """
+        Publish the response to a command, or each part of a streamed response, and cache it.
+        
+        Args:
+            command_msg: Command message
+            response: Response message, or an iterable of response messages
+            reply_to: Where the response goes, None for the responses topic
+        """
+        if isinstance(response, ResponseMessage):
+            self.publish_response(response, reply_to)
+            payloads = [response.to_json()]
+        else:
+            payloads = []
+            self.publish_response_stream(command_msg.command_id, response, sent=payloads, reply_to=reply_to)
+        
+        # Cached even if publishing failed: the redelivery after a reconnect then gets the response
+        if self.dedup_cache is not None:
+            self.dedup_cache.put(command_msg.command_id, payloads)
+    
+    def _notify_command_callbacks(self, command_msg: CommandMessage) -> None:
+        """Notify the command callbacks of an executed command."""
         for callback in self.command_callbacks:
             try:
                 callback(command_msg)
             except Exception as e:
                 logger.error(f"Error in command callback: {e}")
     
-    def _execute_command(self, command_msg: CommandMessage) -> ResponseMessage:
+    def clock_offset(self, reply_to: Optional[ReplyTo] = None) -> float:
+        """
+        Get the clock offset to a controller.
+        
+        Args:
+            reply_to: Where the controller's responses go, None for the responses topic
+            
+        Returns:
+            This device's clock minus the controller's, 0.0 if it has not sent one
+        """
+        return self.clock_offsets.get(reply_to[0] if reply_to else None, 0.0)
+    
+    def _time_sync(self, command_msg: CommandMessage, received_at: float,
+                   reply_to: Optional[ReplyTo] = None) -> ResponseMessage:
+        """
+        Answer a clock offset probe.
+        
+        The response carries the device clock times the probe was received
+        and answered. A probe's "offset" parameter is the controller's current
+        estimate of its clock offset, which is adopted for that controller.
+        
+        Args:
+            command_msg: time_sync command message
+            received_at: Device clock time the probe was received
+            reply_to: Where the controller's responses go, None for the responses topic
+            
+        Returns:
+            Response message
+        """
+        offset = (command_msg.params or {}).get("offset")
+        if isinstance(offset, (int, float)) and not isinstance(offset, bool):
+            self.clock_offsets[reply_to[0] if reply_to else None] = float(offset)
+        return ResponseMessage(
+            command_id=command_msg.command_id,
+            result=True,
+            data={"received": received_at, "sent": time.time(), "offset": self.clock_offset(reply_to)}
+        )
+    
+    def _schedule_command(self, command_msg: CommandMessage, reply_to: Optional[ReplyTo]) -> None:
+        """
+        Pre-stage a command with an execute_at time and schedule it.
+        
+        Args:
+            command_msg: Command message
+            reply_to: Where the response goes, None for the responses topic
+        """
+        command = command_msg.command
+        command_id = command_msg.command_id
+        if command_id in self.scheduler:
+            logger.info("Duplicate command %s (ID: %s), already scheduled", command, command_id)
+            return
+        
+        fire_at = command_msg.execute_at + self.clock_offset(reply_to)
+        ahead = fire_at - self.scheduler.clock()
+        if ahead > self.config.max_schedule_ahead:
+            logger.warning("Command %s (ID: %s) scheduled too far ahead: %.0fs", command, command_id, ahead)
+            self._publish_command_response(command_msg, ResponseMessage(
+                command_id=command_id,
+                result=False,
+                message=f"Command scheduled too far ahead ({ahead:.0f}s, at most {self.config.max_schedule_ahead:.0f}s)"
+            ), reply_to)
+            return
+        
+        # The preparer does the slow part now and leaves only the final step for the target time
+        fire = None
+        preparer = self.command_preparers.get(command)
+        if preparer:
+            try:
+                fire = preparer(command_msg)
+            except Exception as e:
+                logger.error(f"Error preparing command {command}: {e}")
+                COMMANDS_TOTAL.inc(command=command, result="error")
+                self._publish_command_response(command_msg, ResponseMessage(
+                    command_id=command_id,
+                    result=False,
+                    message=f"Error preparing command: {str(e)}"
+                ), reply_to)
+                return
+        
+        logger.info("Scheduled command %s (ID: %s) in %.3fs", command, command_id, ahead)
+        self.scheduler.schedule(command_id, fire_at, lambda: self._run_scheduled(command_msg, reply_to, fire, fire_at))
+    
+    def _mark_pending(self, command_id: str) -> None:
+        """Mark a scheduled command that is due as running in the dedup cache."""
+        if self.dedup_cache is not None:
+            self.dedup_cache.mark_pending(command_id)
+    
+    def _run_scheduled(self, command_msg: CommandMessage, reply_to: Optional[ReplyTo],
+                       fire: Optional[Callable[[], ResponseMessage]], fire_at: float) -> None:
+        """
+        Run a scheduled command in the scheduler thread and publish its response.
+        
+        Args:
+            command_msg: Command message
+            reply_to: Where the response goes, None for the responses topic
+            fire: Final step returned by the command's preparer, None to run its handler
+            fire_at: Device clock time the command was scheduled for
+        """
+        started_at = self.scheduler.clock()
+        SCHEDULE_LATENESS.observe(max(0.0, started_at - fire_at), command=command_msg.command)
+        
+        if fire is None:
+            response = self._execute_command(command_msg)
+        else:
+            try:
+                with COMMAND_SECONDS.time(command=command_msg.command):
+                    response = fire()
+                COMMANDS_TOTAL.inc(command=command_msg.command, result=getattr(response, "result", True))
+            except Exception as e:
+                logger.error(f"Error executing command {command_msg.command}: {e}")
+                COMMANDS_TOTAL.inc(command=command_msg.command, result="error")
+                response = ResponseMessage(
+                    command_id=command_msg.command_id,
+                    result=False,
+                    message=f"Error executing command: {str(e)}"
+                )
+        
+        if isinstance(response, ResponseMessage):
+            response.data = dict(response.data or {}, schedule={"fire_at": fire_at, "started_at": started_at})
+        self._publish_command_response(command_msg, response, reply_to)
+        self._notify_command_callbacks(command_msg)
+    
+    @staticmethod
+    def _reply_to(properties: Dict[str, Any]) -> Optional[ReplyTo]:
+        """
+        Get where the response to a command goes from its MQTT 5 properties.
+        
+        Args:
+            properties: Message properties
+            
+        Returns:
+            Response topic and correlation data, or None for the responses topic
+        """
+        response_topic = properties.get("response_topic")
+        if not response_topic:
+            return None
+        return response_topic, properties.get("correlation_data")
+    
+    def _execute_command(self, command_msg: CommandMessage) -> Union[ResponseMessage, Iterable[ResponseMessage]]:
         """
         Execute a command.
         
@@ -163,47 +455,154 @@ class BrokerManager:
             command_msg: Command message
             
         Returns:
-            Response message
+            Response message, or an iterable of response messages for streamed results
         """
         command = command_msg.command
         command_id = command_msg.command_id
         
-        logger.info(f"Executing command: {command} (ID: {command_id})")
+        logger.info("Executing command: %s (ID: %s)", command, command_id)
         
         # Check if we have a handler for this command
         if command in self.command_handlers:
             try:
                 # Call the command handler
-                response = self.command_handlers[command](command_msg)
-                return response
+                start = time.perf_counter()
+                with tracing.span("handler"):
+                    response = self.command_handlers[command](command_msg)
+                elapsed = time.perf_counter() - start
+                COMMANDS_TOTAL.inc(command=command, result=getattr(response, "result", True))
+                if isinstance(response, ResponseMessage):
+                    COMMAND_SECONDS.observe(elapsed, command=command)
+                    return response
+                # Streaming handlers do their work as the stream is consumed
+                return self._timed_stream(command, response, elapsed)
             except Exception as e:
                 logger.error(f"Error executing command {command}: {e}")
+                COMMANDS_TOTAL.inc(command=command, result="error")
                 return ResponseMessage(
                     command_id=command_id,
                     result=False,
                     message=f"Error executing command: {str(e)}"
                 )
         
+        # Batches without a dedicated handler run their sub-commands through the handlers
+        if isinstance(command_msg, BatchCommandMessage):
+            return self._execute_batch(command_msg)
+        
         # If we get here, we don't know how to handle the command
-        logger.warning(f"Command {command} not supported")
+        logger.warning("Command %s not supported", command)
         return ResponseMessage(
             command_id=command_id,
             result=False,
             message=f"Command {command} not supported"
         )
     
+    @staticmethod
+    def _timed_stream(command: str, responses: Iterable[ResponseMessage],
+                      elapsed: float) -> Iterator[ResponseMessage]:
+        """
+        Yield the responses of a streamed command, recording the handler time once the stream ends.
+        
+        Only the time spent producing responses is counted, not publishing them.
+        
+        Args:
+            command: Command name
+            responses: Responses returned by the handler
+            elapsed: Seconds the handler took to return the stream
+            
+        Yields:
+            Response messages
+        """
+        iterator = iter(responses)
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    response = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    elapsed += time.perf_counter() - start
+                yield response
+        finally:
+            COMMAND_SECONDS.observe(elapsed, command=command)
+    
+    def _execute_batch(self, batch_msg: BatchCommandMessage) -> ResponseMessage:
+        """
+        Execute the sub-commands of a batch in order and combine their responses.
+        
+        Register a handler for the "batch" command to execute batches
+        differently, e.g. as one player command list with one state publish.
+        
+        Args:
+            batch_msg: Batch command message
+            
+        Returns:
+            Combined response message
+        """
+        commands = batch_msg.sub_commands()
+        if not commands:
+            return ResponseMessage(command_id=batch_msg.command_id, result=False, message="Batch has no commands")
+        
+        responses: List[ResponseMessage] = []
+        for command_msg in commands:
+            if responses and batch_msg.stop_on_error and not responses[-1].result:
+                response = ResponseMessage(command_id=command_msg.command_id, result=False,
+                                           message="Skipped after an earlier failure")
+            elif command_msg.command == BATCH_COMMAND:
+                response = ResponseMessage(command_id=command_msg.command_id, result=False,
+                                           message="Batches cannot be nested")
+            else:
+                response = self._execute_command(command_msg)
+                if not isinstance(response, ResponseMessage):
+                    # A streamed result has no place in the combined response
+                    getattr(response, "close", lambda: None)()
+                    response = ResponseMessage(command_id=command_msg.command_id, result=False,
+                                               message=f"Command {command_msg.command} cannot be batched")
+            responses.append(response)
+        
+        return batch_response(batch_msg.command_id, commands, responses)
+    
     def register_command_handler(self, command: str,
-                               handler: Callable[[CommandMessage], ResponseMessage]) -> None:
+                               handler: Callable[[CommandMessage],
+                                                 Union[ResponseMessage, Iterable[ResponseMessage]]],
+                               prepare: Optional[Callable[[CommandMessage], Callable[[], ResponseMessage]]] = None) -> None:
         """
         Register a command handler.
         
+        A handler may return a single response message, or an iterable of
+        response messages (e.g. from chunk_responses) that are published in
+        order as they are produced.
+        
+        A command sent with an execute_at time runs its handler at that time,
+        unless a preparer is given: the preparer is then called on arrival to
+        stage the command (e.g. load the queue) and returns the function that
+        completes it (e.g. starts playback) at the target time.
+        
         Args:
             command: Command name
             handler: Command handler function
+            prepare: Preparer for scheduled commands
         """
         self.command_handlers[command] = handler
+        if prepare is not None:
+            self.command_preparers[command] = prepare
+        else:
+            self.command_preparers.pop(command, None)
         logger.info(f"Registered handler for command: {command}")
     
+    def set_trace_sink(self, sink: Optional[Callable[[Dict[str, Any]], None]]) -> None:
+        """
+        Set a sink that receives the trace of every command.
+        
+        Traces are dicts as produced by CommandTrace.to_dict and include the
+        time spent publishing the response.
+        
+        Args:
+            sink: Trace sink, or None to stop tracing commands that did not ask for it
+        """
+        self.trace_sink = sink
+    
     def register_command_callback(self, callback: Callable[[CommandMessage], None]) -> None:
         """
         Register a command callback.
@@ -249,23 +648,102 @@ class BrokerManager:
             retain=True
         )
     
-    def publish_response(self, response: ResponseMessage) -> bool:
+    def publish_response(self, response: ResponseMessage, reply_to: Optional[ReplyTo] = None) -> bool:
         """
         Publish a command response.
         
         Args:
             response: Response message
+            reply_to: MQTT 5 response topic and correlation data, None for the responses topic
             
         Returns:
             True if publish was successful, False otherwise
         """
+        return self._publish_response_payload(response.to_json(), reply_to)
+    
+    def _publish_response_payload(self, payload: str, reply_to: Optional[ReplyTo] = None) -> bool:
+        """
+        Publish a serialized command response.
+        
+        Args:
+            payload: Response message as JSON
+            reply_to: MQTT 5 response topic and correlation data, None for the responses topic
+            
+        Returns:
+            True if publish was successful, False otherwise
+        """
+        if reply_to is not None:
+            response_topic, correlation_data = reply_to
+            return self.mqtt_client.publish(
+                topic=response_topic,
+                payload=payload,
+                qos=self.config.default_qos,
+                retain=False,
+                properties={"correlation_data": correlation_data}
+            )
         return self.mqtt_client.publish(
             topic=self.topic_manager.get_topic(TopicType.RESPONSES),
-            payload=response.to_json(),
+            payload=payload,
             qos=self.config.default_qos,
             retain=False
         )
     
+    def publish_response_stream(self, command_id: str, responses: Iterable[ResponseMessage],
+                                sent: Optional[List[str]] = None, reply_to: Optional[ReplyTo] = None) -> bool:
+        """
+        Publish a streamed command response, one message per part.
+        
+        If producing a part fails, an error response with the same command_id
+        is published and the stream ends.
+        
+        Args:
+            command_id: ID of the command being answered
+            responses: Response messages
+            sent: List the JSON payload of every published part is appended to
+            reply_to: MQTT 5 response topic and correlation data, None for the responses topic
+            
+        Returns:
+            True if every part was published successfully, False otherwise
+        """
+        success = True
+        try:
+            for response in responses:
+                success = self.publish_response(response, reply_to) and success
+                if sent is not None:
+                    sent.append(response.to_json())
+        except Exception as e:
+            logger.error(f"Error streaming response for command {command_id}: {e}")
+            error = ResponseMessage(
+                command_id=command_id,
+                result=False,
+                message=f"Error executing command: {str(e)}",
+                data={"last": True}
+            )
+            self.publish_response(error, reply_to)
+            if sent is not None:
+                sent.append(error.to_json())
+            return False
+        return success
+    
+    def publish_metrics(self, registry: Optional[metrics.MetricsRegistry] = None) -> bool:
+        """
+        Publish a snapshot of the performance metrics.
+        
+        Args:
+            registry: Metrics registry. Defaults to the SDK registry.
+            
+        Returns:
+            True if publish was successful, False otherwise
+        """
+        registry = registry or metrics.REGISTRY
+        metrics_msg = MetricsMessage(device_id=self.config.device_id, metrics=registry.snapshot())
+        return self.mqtt_client.publish(
+            topic=self.topic_manager.get_topic(TopicType.METRICS),
+            payload=metrics_msg.to_json(),
+            qos=QoS.AT_MOST_ONCE,
+            retain=False
+        )
+    
     def _publish_connection_status(self, status: str) -> bool:
         """
         Publish connection status.
@@ -3,13 +3,44 @@ Message handling utilities for the Broker module.
 """
 
 import json
+import sys
 import time
 import uuid
-from typing import Dict, Any, Optional, Callable, Union
-from dataclasses import dataclass, asdict, field
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Callable, Tuple, Union
+from dataclasses import dataclass, field, fields
 
 
-@dataclass
+# Messages use slots instead of a per-instance dict where dataclasses support it (Python 3.10+)
+_DATACLASS_OPTIONS: Dict[str, Any] = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+# Field names per message class, so to_dict does not walk the dataclass fields every time
+_FIELD_NAMES: Dict[type, Tuple[str, ...]] = {}
+
+# Optional fields per message class, with the default value that leaves them out of to_dict
+_OMITTED_DEFAULTS: Dict[type, Dict[str, Any]] = {}
+
+
+def _optional(default: Any) -> Any:
+    """
+    Declare an optional protocol field, left out of the payload while it has its default.
+
+    Devices that predate a field reject payloads carrying it, so optional
+    fields are only sent when they are set.
+    """
+    return field(default=default, metadata={"omit_default": True})
+
+
+def _field_names(cls: type) -> Tuple[str, ...]:
+    """Get the field names of a message class, and cache its optional fields."""
+    names = _FIELD_NAMES.get(cls)
+    if names is None:
+        class_fields = fields(cls)
+        _OMITTED_DEFAULTS[cls] = {f.name: f.default for f in class_fields if f.metadata.get("omit_default")}
+        names = _FIELD_NAMES[cls] = tuple(f.name for f in class_fields)
+    return names
+
+
+@dataclass(**_DATACLASS_OPTIONS)
 class Message:
     """Base class for MQTT messages."""
     timestamp: float = field(default_factory=time.time)
@@ -18,10 +49,20 @@ class Message:
         """
         Convert the message to a dictionary.
         
+        The dictionary is shallow: nested values such as the current song or
+        command params are the message's own objects, not copies, since
+        messages are serialized once and dropped. Optional fields are left
+        out while they have their default value.
+        
         Returns:
             Dictionary representation of the message
         """
-        return asdict(self)
+        cls = type(self)
+        data = {name: getattr(self, name) for name in _field_names(cls)}
+        for name, default in _OMITTED_DEFAULTS[cls].items():
+            if data[name] == default:
+                del data[name]
+        return data
     
     def to_json(self) -> str:
         """
@@ -37,13 +78,17 @@ class Message:
         """
         Create a message from a dictionary.
         
+        Unknown keys are ignored, so that fields added to the protocol later
+        do not make older devices drop the message.
+        
         Args:
             data: Dictionary representation of the message
             
         Returns:
             Message instance
         """
-        return cls(**data)
+        names = _field_names(cls)
+        return cls(**{key: value for key, value in data.items() if key in names})
     
     @classmethod
     def from_json(cls, json_str: str) -> 'Message':
@@ -60,7 +105,7 @@ class Message:
         return cls.from_dict(data)
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class StateMessage(Message):
     """Message for device state updates."""
     state: str = ""
@@ -89,15 +134,55 @@ class StateMessage(Message):
         )
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class CommandMessage(Message):
     """Message for device commands."""
     command: str = ""
     command_id: str = field(default_factory=lambda: str(uuid.uuid4()))
     params: Optional[Dict[str, Any]] = None
+    trace: bool = _optional(False)  # ask the device to embed a timing trace in the response
+    execute_at: Optional[float] = _optional(None)  # controller clock time to run the command at (see BrokerManager)
+
+
+# Command name of clock offset probes, answered by BrokerManager itself
+TIME_SYNC_COMMAND = "time_sync"
+
+# Command name of batch commands
+BATCH_COMMAND = "batch"
+
+
+@dataclass(**_DATACLASS_OPTIONS)
+class BatchCommandMessage(CommandMessage):
+    """
+    Message carrying an ordered list of sub-commands, answered with one response.
+    
+    Each entry of ``commands`` is a dictionary with a ``command`` name and
+    optional ``params``. With ``stop_on_error`` the sub-commands after the
+    first failure are skipped.
+    """
+    command: str = BATCH_COMMAND
+    commands: List[Dict[str, Any]] = field(default_factory=list)
+    stop_on_error: bool = True
+    
+    def sub_commands(self) -> List[CommandMessage]:
+        """
+        Get the sub-commands as command messages.
+        
+        Returns:
+            Command messages with IDs "<batch ID>/<index>"
+        """
+        return [
+            CommandMessage(
+                command=entry.get('command', ''),
+                command_id=f"{self.command_id}/{index}",
+                params=entry.get('params'),
+                timestamp=self.timestamp
+            )
+            for index, entry in enumerate(self.commands)
+        ]
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class ResponseMessage(Message):
     """Message for command responses."""
     command_id: str = ""
@@ -106,12 +191,91 @@ class ResponseMessage(Message):
     data: Optional[Dict[str, Any]] = None
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class ConnectionMessage(Message):
     """Message for connection status."""
     status: str = "offline"  # "online" or "offline"
 
 
+@dataclass(**_DATACLASS_OPTIONS)
+class MetricsMessage(Message):
+    """Message for performance metrics snapshots."""
+    device_id: str = ""
+    metrics: Dict[str, Any] = field(default_factory=dict)
+
+
+def chunk_responses(command_id: str, chunks: Iterable[Tuple[int, int, List[Any]]],
+                    key: str = "items") -> Iterator[ResponseMessage]:
+    """
+    Build a sequence of chunked response messages for one command.
+
+    Every chunk carries the same command_id. Its data holds the items under
+    ``key`` plus ``offset``, ``total``, ``chunk`` (0-based) and ``last`` so
+    that clients can render pages as they arrive and know when the stream
+    has ended. An empty input still produces one (last) response.
+
+    Args:
+        command_id: ID of the command being answered
+        chunks: (offset, total, items) tuples
+        key: Data key for the items
+
+    Yields:
+        Response messages, one per chunk
+    """
+    index = -1
+    for index, (offset, total, items) in enumerate(chunks):
+        yield ResponseMessage(
+            command_id=command_id,
+            result=True,
+            message=f"Chunk {index}",
+            data={
+                key: items,
+                "offset": offset,
+                "total": total,
+                "chunk": index,
+                "last": offset + len(items) >= total
+            }
+        )
+
+    if index < 0:
+        yield ResponseMessage(
+            command_id=command_id,
+            result=True,
+            message="Chunk 0",
+            data={key: [], "offset": 0, "total": 0, "chunk": 0, "last": True}
+        )
+
+
+def batch_response(command_id: str, commands: List[CommandMessage],
+                   responses: List[ResponseMessage]) -> ResponseMessage:
+    """
+    Combine the responses to the sub-commands of a batch into one response.
+    
+    The result is True only if every sub-command succeeded. The data holds
+    one entry per sub-command, in order, with its command, result, message
+    and data.
+    
+    Args:
+        command_id: ID of the batch command
+        commands: Sub-commands
+        responses: Response per sub-command
+        
+    Returns:
+        Combined response message
+    """
+    succeeded = sum(1 for response in responses if response.result)
+    return ResponseMessage(
+        command_id=command_id,
+        result=bool(responses) and succeeded == len(responses),
+        message=f"{succeeded} of {len(responses)} commands succeeded",
+        data={"results": [
+            {"command": command.command, "result": response.result,
+             "message": response.message, "data": response.data}
+            for command, response in zip(commands, responses)
+        ]}
+    )
+
+
 def parse_message(payload: Union[str, bytes], message_type: Optional[str] = None) -> Optional[Message]:
     """
     Parse a message payload.
@@ -132,14 +296,20 @@ def parse_message(payload: Union[str, bytes], message_type: Optional[str] = None
         if message_type == 'state':
             return StateMessage.from_dict(data)
         elif message_type == 'command':
+            if data.get('command') == BATCH_COMMAND:
+                return BatchCommandMessage.from_dict(data)
             return CommandMessage.from_dict(data)
         elif message_type == 'response':
             return ResponseMessage.from_dict(data)
         elif message_type == 'connection':
             return ConnectionMessage.from_dict(data)
+        elif message_type == 'metrics':
+            return MetricsMessage.from_dict(data)
         else:
             # Try to determine the message type from the data
             if 'command' in data:
+                if data['command'] == BATCH_COMMAND:
+                    return BatchCommandMessage.from_dict(data)
                 return CommandMessage.from_dict(data)
             elif 'result' in data and 'command_id' in data:
                 return ResponseMessage.from_dict(data)
@@ -147,6 +317,8 @@ def parse_message(payload: Union[str, bytes], message_type: Optional[str] = None
                 return StateMessage.from_dict(data)
             elif 'status' in data:
                 return ConnectionMessage.from_dict(data)
+            elif 'metrics' in data:
+                return MetricsMessage.from_dict(data)
             else:
                 return Message.from_dict(data)
     except Exception:
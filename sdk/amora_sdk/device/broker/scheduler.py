@@ -0,0 +1,127 @@
+"""
+Command scheduler for the Broker module.
+
+Runs callbacks at wall-clock times from one timer thread, for commands
+sent with an ``execute_at`` time. Entries are kept in a heap of fire times
+so any number of commands can wait without a thread each.
+"""
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class CommandScheduler:
+    """
+    Timer thread firing callbacks at given times.
+
+    Entries are keyed (by command_id), so a redelivered command is not
+    scheduled twice. The thread starts with the first entry.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.time,
+                 on_fire: Optional[Callable[[str], None]] = None):
+        """
+        Initialize the scheduler.
+
+        Args:
+            clock: Wall clock the fire times refer to, replaceable in tests
+            on_fire: Called with the key of an entry that is due, before the entry is
+                removed and its callback run, so the key is never unaccounted for
+        """
+        self.clock = clock
+        self.on_fire = on_fire
+        self._entries: Dict[str, Tuple[float, Callable[[], None]]] = {}
+        self._heap: List[Tuple[float, int, str]] = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def schedule(self, key: str, fire_at: float, callback: Callable[[], None]) -> bool:
+        """
+        Run a callback at a time.
+
+        Args:
+            key: Entry key
+            fire_at: Clock time to run the callback at; past times run at once
+            callback: Function run in the scheduler thread
+
+        Returns:
+            True if scheduled, False if an entry with this key is already waiting
+        """
+        with self._condition:
+            if key in self._entries:
+                return False
+            self._entries[key] = (fire_at, callback)
+            heapq.heappush(self._heap, (fire_at, next(self._sequence), key))
+            if not self._running:
+                self._running = True
+                self._thread = threading.Thread(target=self._run, name="command-scheduler", daemon=True)
+                self._thread.start()
+            elif self._heap[0][2] == key:
+                self._condition.notify()
+        return True
+
+    def cancel(self, key: str) -> bool:
+        """
+        Cancel a waiting entry.
+
+        Args:
+            key: Entry key
+
+        Returns:
+            True if the entry was waiting, False otherwise
+        """
+        with self._condition:
+            # The heap entry is skipped when it comes up
+            return self._entries.pop(key, None) is not None
+
+    def stop(self) -> None:
+        """Stop the thread, dropping the entries still waiting."""
+        with self._condition:
+            self._running = False
+            self._entries.clear()
+            self._heap.clear()
+            self._condition.notify()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2.0)
+        self._thread = None
+
+    def _run(self) -> None:
+        """Wait for the earliest entry and run it when its time comes."""
+        while True:
+            with self._condition:
+                while self._running:
+                    now = self.clock()
+                    if self._heap and self._heap[0][0] <= now:
+                        fire_at, _, key = heapq.heappop(self._heap)
+                        entry = self._entries.get(key)
+                        if entry is not None and entry[0] == fire_at:
+                            if self.on_fire:
+                                try:
+                                    self.on_fire(key)
+                                except Exception as e:
+                                    logger.error(f"Error in scheduler fire hook for {key}: {e}")
+                            del self._entries[key]
+                            break
+                        continue
+                    self._condition.wait(self._heap[0][0] - now if self._heap else None)
+                else:
+                    return
+
+            try:
+                entry[1]()
+            except Exception as e:
+                logger.error(f"Error in scheduled command {key}: {e}")
@@ -3,8 +3,12 @@ Topic management utilities for the Broker module.
 """
 
 import re
+import sys
 from enum import Enum
-from typing import Optional, List, Set
+from typing import Dict, Iterable, Optional, List
+
+# Prefix of the group command topics, which any number of devices subscribe to
+GROUP_TOPIC_PREFIX = "amora/groups"
 
 
 class TopicType(Enum):
@@ -13,6 +17,7 @@ class TopicType(Enum):
     COMMANDS = "commands"
     RESPONSES = "responses"
     CONNECTION = "connection"
+    METRICS = "metrics"
 
 
 class TopicManager:
@@ -20,26 +25,86 @@ class TopicManager:
     Manages MQTT topics for the Broker module.
     
     This class provides utilities for creating, validating, and parsing topics
-    based on the device ID namespace.
+    based on the device ID namespace. Devices that belong to groups also
+    receive commands on the groups' command topics
+    (``<group_prefix>/<group>/commands``), so a controller can reach a whole
+    group with one publish.
     """
     
-    def __init__(self, topic_prefix: str, device_id: str):
+    def __init__(self, topic_prefix: str, device_id: str, groups: Optional[Iterable[str]] = None,
+                 group_prefix: str = GROUP_TOPIC_PREFIX):
         """
         Initialize the TopicManager.
         
         Args:
             topic_prefix: Prefix for all topics (e.g., 'amora/devices')
             device_id: Device ID
+            groups: Groups the device belongs to
+            group_prefix: Prefix of the group command topics
         """
         self.topic_prefix = topic_prefix
         self.device_id = device_id
-        self._valid_topics: Set[str] = set()
-        self._initialize_valid_topics()
+        self.group_prefix = group_prefix
+        
+        # Topic strings are built once and interned, so every publish, subscription
+        # and callback table shares the same string objects
+        self._topics: Dict[TopicType, str] = {
+            topic_type: sys.intern(f"{topic_prefix}/{device_id}/{topic_type.value}")
+            for topic_type in TopicType
+        }
+        self._topic_types: Dict[str, TopicType] = {topic: topic_type for topic_type, topic in self._topics.items()}
+        self._group_topics: Dict[str, str] = {}
+        for group in groups or ():
+            self.add_group(group)
+    
+    @property
+    def groups(self) -> List[str]:
+        """Groups the device belongs to."""
+        return list(self._group_topics)
+    
+    def get_group_topic(self, group: str) -> str:
+        """
+        Get the command topic of a group.
+        
+        Args:
+            group: Group name
+            
+        Returns:
+            Group command topic string
+        """
+        return group_command_topic(group, self.group_prefix)
     
-    def _initialize_valid_topics(self) -> None:
-        """Initialize the set of valid topics."""
-        for topic_type in TopicType:
-            self._valid_topics.add(self.get_topic(topic_type))
+    def add_group(self, group: str) -> str:
+        """
+        Add the device to a group, so the group's command topic is valid and subscribed.
+        
+        Args:
+            group: Group name
+            
+        Returns:
+            Group command topic string
+        """
+        topic = self._group_topics.get(group)
+        if topic is None:
+            topic = sys.intern(self.get_group_topic(group))
+            self._group_topics[group] = topic
+            self._topic_types[topic] = TopicType.COMMANDS
+        return topic
+    
+    def remove_group(self, group: str) -> Optional[str]:
+        """
+        Remove the device from a group.
+        
+        Args:
+            group: Group name
+            
+        Returns:
+            The group's command topic string, or None if the device was not in the group
+        """
+        topic = self._group_topics.pop(group, None)
+        if topic is not None:
+            del self._topic_types[topic]
+        return topic
     
     def get_topic(self, topic_type: TopicType) -> str:
         """
@@ -51,7 +116,7 @@ class TopicManager:
         Returns:
             Full topic string
         """
-        return f"{self.topic_prefix}/{self.device_id}/{topic_type.value}"
+        return self._topics[topic_type]
     
     def is_valid_topic(self, topic: str) -> bool:
         """
@@ -63,7 +128,7 @@ class TopicManager:
         Returns:
             True if the topic is valid, False otherwise
         """
-        return topic in self._valid_topics
+        return topic in self._topic_types
     
     def parse_topic(self, topic: str) -> Optional[TopicType]:
         """
@@ -75,19 +140,7 @@ class TopicManager:
         Returns:
             TopicType if the topic is valid, None otherwise
         """
-        if not self.is_valid_topic(topic):
-            return None
-        
-        # Extract the topic type from the topic string
-        parts = topic.split('/')
-        if len(parts) < 3:
-            return None
-        
-        topic_type_str = parts[-1]
-        try:
-            return TopicType(topic_type_str)
-        except ValueError:
-            return None
+        return self._topic_types.get(topic)
     
     def get_subscription_topics(self) -> List[str]:
         """
@@ -96,7 +149,7 @@ class TopicManager:
         Returns:
             List of topics to subscribe to
         """
-        return [self.get_topic(TopicType.COMMANDS)]
+        return [self.get_topic(TopicType.COMMANDS)] + list(self._group_topics.values())
     
     def get_wildcard_topic(self) -> str:
         """
@@ -115,3 +168,19 @@ class TopicManager:
             Wildcard topic string for all devices
         """
         return f"{self.topic_prefix}/+/#"
+
+
+def group_command_topic(group: str, group_prefix: str = GROUP_TOPIC_PREFIX) -> str:
+    """
+    Get the command topic of a group.
+    
+    Args:
+        group: Group name
+        group_prefix: Prefix of the group command topics
+        
+    Returns:
+        Group command topic string
+    """
+    if not group or any(char in group for char in "/+#"):
+        raise ValueError(f"Invalid group name: {group!r}")
+    return f"{group_prefix}/{group}/{TopicType.COMMANDS.value}"
@@ -7,7 +7,6 @@ This module provides the main IoT device client for connecting to Azure IoT Hub.
 import asyncio
 import json
 import logging
-import random
 import time
 from typing import Dict, Any, List, Optional, Callable
 
@@ -28,6 +27,7 @@ except ImportError:
         """Dummy MethodResponse class for type hints."""
         pass
 
+from ..broker.config import ReconnectPolicy
 from .telemetry import TelemetryManager
 from .twin import TwinManager
 
@@ -57,8 +57,9 @@ class IoTDeviceClient:
         self.reconnect_attempts = 0
         self.reconnect_task = None
         self.connected = False
-        self.reconnect_backoff_factor = 1.5  # Exponential backoff factor
         self.max_backoff_time = 300  # Maximum backoff time in seconds (5 minutes)
+        # Jittered backoff shared with the MQTT client, so a fleet does not reconnect in waves
+        self.reconnect_policy = ReconnectPolicy(base_delay=self.reconnect_interval, max_delay=self.max_backoff_time)
         self.connection_lock = asyncio.Lock()  # Lock to prevent multiple reconnection attempts
 
         # Create telemetry and twin managers
@@ -356,6 +357,7 @@ class IoTDeviceClient:
             logger.info("IoT Hub connection state changed: Connected")
             self.connected = True
             self.reconnect_attempts = 0
+            self.reconnect_policy.reset()
 
             # Log network information for debugging
             try:
@@ -375,7 +377,7 @@ class IoTDeviceClient:
                 self.reconnect_task = asyncio.create_task(self._reconnect())
 
     async def _reconnect(self):
-        """Reconnect to IoT Hub with improved exponential backoff."""
+        """Reconnect to IoT Hub with the reconnect policy's jittered backoff."""
         logger.info("Starting reconnection process")
 
         # Use a lock to prevent multiple reconnection attempts at the same time
@@ -391,16 +393,12 @@ class IoTDeviceClient:
                 logger.info("Resetting reconnection attempts counter")
                 self.reconnect_attempts = 0
 
+            server_busy = False
             while self.running and not self.connected and self.reconnect_attempts < self.max_reconnect_attempts:
                 self.reconnect_attempts += 1
 
-                # Calculate backoff time with exponential backoff and jitter
-                backoff_time = min(
-                    self.reconnect_interval * (self.reconnect_backoff_factor ** (self.reconnect_attempts - 1)),
-                    self.max_backoff_time
-                )
-                jitter = backoff_time * 0.2 * random.random()
-                wait_time = backoff_time + jitter
+                # Decorrelated jitter, backing off further while the hub is throttling
+                wait_time = self.reconnect_policy.next_delay(server_busy)
 
                 logger.info(f"Reconnection attempt {self.reconnect_attempts}/{self.max_reconnect_attempts} in {wait_time:.1f} seconds")
                 await asyncio.sleep(wait_time)
@@ -426,6 +424,7 @@ class IoTDeviceClient:
                     logger.info("Successfully reconnected to IoT Hub")
                     self.connected = True
                     self.reconnect_attempts = 0  # Reset counter on successful connection
+                    self.reconnect_policy.reset()
 
                     # Re-register handlers (they might have been lost during disconnect)
                     self.client.on_method_request_received = self._method_request_handler
@@ -437,6 +436,7 @@ class IoTDeviceClient:
                     break
                 except Exception as e:
                     logger.error(f"Failed to reconnect to IoT Hub: {e}")
+                    server_busy = ReconnectPolicy.is_server_busy(e)
 
                     # If we've had multiple failures, try recreating the client
                     if self.reconnect_attempts > 3:
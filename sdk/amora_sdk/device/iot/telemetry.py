@@ -10,6 +10,8 @@ import logging
 import time
 from typing import Dict, Any, Optional
 
+from amora_sdk import metrics
+
 try:
     from azure.iot.device import Message
     IOT_AVAILABLE = True
@@ -18,6 +20,9 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+TELEMETRY_SEND_SECONDS = metrics.histogram("amora_telemetry_send_seconds", "IoT Hub telemetry send time")
+TELEMETRY_SENT_TOTAL = metrics.counter("amora_telemetry_sent_total", "Telemetry send attempts, by result")
+
 class TelemetryManager:
     """Manages telemetry for the IoT device client."""
 
@@ -92,16 +97,20 @@ class TelemetryManager:
                             # Send with timeout
                             logger.info(f"Sending telemetry message: {json.dumps(telemetry)}")
                             send_task = asyncio.create_task(self.client.send_message(msg))
-                            await asyncio.wait_for(send_task, timeout=10)  # 10 second timeout
+                            with TELEMETRY_SEND_SECONDS.time():
+                                await asyncio.wait_for(send_task, timeout=10)  # 10 second timeout
+                            TELEMETRY_SENT_TOTAL.inc(result="success")
 
                             logger.info(f"Telemetry sent successfully: {json.dumps(telemetry)}")
                             consecutive_errors = 0  # Reset error counter on success
                             break  # Success, exit retry loop
                         except asyncio.TimeoutError:
+                            TELEMETRY_SENT_TOTAL.inc(result="timeout")
                             retry_count += 1
                             logger.warning(f"Telemetry send timed out, retry {retry_count}/{max_retries}")
                             await asyncio.sleep(retry_delay)
                         except Exception as send_ex:
+                            TELEMETRY_SENT_TOTAL.inc(result="error")
                             retry_count += 1
                             logger.warning(f"Error sending telemetry, retry {retry_count}/{max_retries}: {send_ex}")
                             await asyncio.sleep(retry_delay)
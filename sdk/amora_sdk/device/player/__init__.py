@@ -5,5 +5,19 @@ This module provides the music player implementation for Amora OS.
 """
 
 from .music_player import MusicPlayer
+from .library import LibraryIndex, LibraryFile, ScanResult
+from .watcher import LibraryWatcher
+from .metadata import MetadataCache
+from .prefetch import Prefetcher
+from .probe import SystemProbe
 
-__all__ = ["MusicPlayer"]
+__all__ = [
+    "MusicPlayer",
+    "LibraryIndex",
+    "LibraryFile",
+    "ScanResult",
+    "LibraryWatcher",
+    "MetadataCache",
+    "Prefetcher",
+    "SystemProbe"
+]
@@ -0,0 +1,297 @@
+"""
+Music library index for AmoraSDK Device.
+
+Maintains a persistent SQLite index of the music directory so that rescans
+only re-list directories whose modification time has changed.
+"""
+
+import os
+import logging
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+from .scanner import DirectoryListing, list_directory, walk_directories
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS dirs (
+    path TEXT PRIMARY KEY,
+    parent TEXT,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS dirs_parent ON dirs (parent);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    dir TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    inode INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS files_dir ON files (dir);
+"""
+
+
+@dataclass
+class LibraryFile:
+    """A music file as recorded in the library index."""
+    path: str
+    size: int
+    mtime_ns: int
+    inode: int
+
+
+@dataclass
+class ScanResult:
+    """Changes detected by a library scan."""
+    added: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    scanned_dirs: int = 0
+    skipped_dirs: int = 0
+
+    @property
+    def has_changes(self) -> bool:
+        """Whether the scan found any added, removed or changed files."""
+        return bool(self.added or self.removed or self.changed)
+
+
+class LibraryIndex:
+    """
+    Incremental music library indexer.
+
+    The index stores path, size, mtime and inode for every music file, plus the
+    mtime of every directory. A directory is only re-listed with ``os.scandir``
+    when its mtime differs from the indexed one; unchanged directories are
+    skipped and their known subdirectories are visited from the index.
+
+    Note that editing a file in place does not change its directory's mtime, so
+    such changes are only picked up by a ``full`` scan.
+    """
+
+    def __init__(self, music_dir: str, index_path: str = ":memory:"):
+        """
+        Initialize the library index.
+
+        Args:
+            music_dir (str): Root music directory
+            index_path (str, optional): Path of the SQLite index file. Defaults to ":memory:".
+        """
+        self.music_dir = music_dir
+        self.index_path = index_path
+        self._lock = threading.Lock()
+
+        if index_path != ":memory:":
+            index_dir = os.path.dirname(index_path)
+            if index_dir:
+                os.makedirs(index_dir, exist_ok=True)
+
+        self._conn = sqlite3.connect(index_path, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        """Close the index."""
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self) -> "LibraryIndex":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+    def __contains__(self, path: str) -> bool:
+        return self.get(path) is not None
+
+    def get(self, path: str) -> Optional[LibraryFile]:
+        """
+        Get an indexed file.
+
+        Args:
+            path (str): File path relative to the music directory
+
+        Returns:
+            Optional[LibraryFile]: The indexed file, or None if not indexed
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT path, size, mtime_ns, inode FROM files WHERE path = ?", (path,)
+            ).fetchone()
+        return LibraryFile(*row) if row else None
+
+    def files(self) -> List[str]:
+        """
+        Get all indexed music files.
+
+        Returns:
+            List[str]: Sorted list of file paths relative to the music directory
+        """
+        with self._lock:
+            rows = self._conn.execute("SELECT path FROM files ORDER BY path").fetchall()
+        return [row[0] for row in rows]
+
+    def scan(self, full: bool = False, max_workers: Optional[int] = None) -> ScanResult:
+        """
+        Scan the music directory and update the index.
+
+        Args:
+            full (bool, optional): Re-list every directory regardless of its mtime. Defaults to False.
+            max_workers (Optional[int], optional): List directories in parallel with this many
+                threads when every directory has to be listed anyway (first or full scan).
+                Defaults to None (sequential walk).
+
+        Returns:
+            ScanResult: Files added, removed and changed since the previous scan
+        """
+        result = ScanResult()
+
+        with self._lock:
+            known_dirs = dict(self._conn.execute("SELECT path, mtime_ns FROM dirs"))
+
+            with self._conn:
+                if max_workers and (full or not known_dirs):
+                    seen_dirs = self._scan_parallel(max_workers, result)
+                else:
+                    seen_dirs = self._scan_incremental(known_dirs, full, result)
+
+                for rel_dir in set(known_dirs) - seen_dirs:
+                    result.removed.extend(
+                        row[0] for row in self._conn.execute(
+                            "SELECT path FROM files WHERE dir = ?", (rel_dir,)
+                        )
+                    )
+                    self._conn.execute("DELETE FROM files WHERE dir = ?", (rel_dir,))
+                    self._conn.execute("DELETE FROM dirs WHERE path = ?", (rel_dir,))
+
+        result.added.sort()
+        result.removed.sort()
+        result.changed.sort()
+
+        logger.info(
+            f"Library scan of {self.music_dir}: {len(result.added)} added, "
+            f"{len(result.removed)} removed, {len(result.changed)} changed "
+            f"({result.scanned_dirs} dirs listed, {result.skipped_dirs} skipped)"
+        )
+        return result
+
+    def _scan_incremental(self, known_dirs: Dict[str, int], full: bool, result: ScanResult) -> Set[str]:
+        """
+        Walk the tree sequentially, skipping directories whose mtime is unchanged.
+
+        Args:
+            known_dirs (Dict[str, int]): Indexed directories mapped to their mtime
+            full (bool): Re-list every directory regardless of its mtime
+            result (ScanResult): Scan result to record changes in
+
+        Returns:
+            Set[str]: Directories found during the walk
+        """
+        seen_dirs = set()
+        stack = [""]
+
+        while stack:
+            rel_dir = stack.pop()
+            abs_dir = os.path.join(self.music_dir, rel_dir) if rel_dir else self.music_dir
+
+            try:
+                dir_mtime = os.stat(abs_dir).st_mtime_ns
+            except OSError as e:
+                logger.warning(f"Cannot stat music directory {abs_dir}: {e}")
+                continue
+
+            seen_dirs.add(rel_dir)
+
+            if not full and known_dirs.get(rel_dir) == dir_mtime:
+                result.skipped_dirs += 1
+                stack.extend(
+                    row[0] for row in self._conn.execute(
+                        "SELECT path FROM dirs WHERE parent = ?", (rel_dir,)
+                    )
+                )
+                continue
+
+            listing = list_directory(self.music_dir, rel_dir)
+            if listing is None:
+                continue
+
+            self._record_listing(listing, result)
+            stack.extend(listing.subdirs)
+
+        return seen_dirs
+
+    def _scan_parallel(self, max_workers: int, result: ScanResult) -> Set[str]:
+        """
+        Walk the whole tree with a parallel walker, listing every directory.
+
+        Args:
+            max_workers (int): Number of worker threads
+            result (ScanResult): Scan result to record changes in
+
+        Returns:
+            Set[str]: Directories found during the walk
+        """
+        seen_dirs = set()
+
+        for listing in walk_directories(self.music_dir, max_workers=max_workers):
+            seen_dirs.add(listing.rel_dir)
+            self._record_listing(listing, result)
+
+        return seen_dirs
+
+    def _record_listing(self, listing: DirectoryListing, result: ScanResult) -> None:
+        """
+        Store a fresh directory listing in the index.
+
+        Args:
+            listing (DirectoryListing): Directory listing
+            result (ScanResult): Scan result to record changes in
+        """
+        result.scanned_dirs += 1
+        self._apply_directory(listing.rel_dir, listing.files, result)
+        self._conn.execute(
+            "INSERT OR REPLACE INTO dirs (path, parent, mtime_ns) VALUES (?, ?, ?)",
+            (listing.rel_dir, os.path.dirname(listing.rel_dir) if listing.rel_dir else None,
+             listing.mtime_ns)
+        )
+
+    def _apply_directory(self, rel_dir: str, files: Dict[str, Tuple[int, int, int]],
+                         result: ScanResult) -> None:
+        """
+        Merge a fresh directory listing into the index.
+
+        Args:
+            rel_dir (str): Directory path relative to the music directory
+            files (Dict[str, Tuple[int, int, int]]): Files mapped to (size, mtime_ns, inode)
+            result (ScanResult): Scan result to record changes in
+        """
+        indexed = {
+            row[0]: tuple(row[1:]) for row in self._conn.execute(
+                "SELECT path, size, mtime_ns, inode FROM files WHERE dir = ?", (rel_dir,)
+            )
+        }
+
+        upserts = []
+        for path, info in files.items():
+            previous = indexed.pop(path, None)
+            if previous is None:
+                result.added.append(path)
+            elif previous != info:
+                result.changed.append(path)
+            else:
+                continue
+            upserts.append((path, rel_dir) + info)
+
+        if upserts:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO files (path, dir, size, mtime_ns, inode) VALUES (?, ?, ?, ?, ?)",
+                upserts
+            )
+        if indexed:
+            result.removed.extend(indexed)
+            self._conn.executemany("DELETE FROM files WHERE path = ?", [(path,) for path in indexed])
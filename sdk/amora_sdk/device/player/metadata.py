@@ -0,0 +1,273 @@
+"""
+Song metadata cache for AmoraSDK Device.
+
+Keeps song tags (title, artist, album, ...) close to the player so that status
+updates, playlist views and UIs do not have to ask MPD for them repeatedly.
+"""
+
+import os
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Song fields and tags MPD reports for a database song, as python-mpd2 names them;
+# queue fields (pos, id, prio) and anything else are dropped to bound memory use
+METADATA_FIELDS = (
+    "file", "last-modified", "added", "format", "time", "duration", "range",
+    "artist", "artistsort", "album", "albumsort", "albumartist", "albumartistsort",
+    "title", "titlesort", "track", "name", "genre", "mood", "date", "originaldate",
+    "composer", "composersort", "performer", "conductor", "work", "ensemble",
+    "movement", "movementnumber", "location", "grouping", "comment", "disc", "label",
+    "musicbrainz_artistid", "musicbrainz_albumid", "musicbrainz_albumartistid",
+    "musicbrainz_trackid", "musicbrainz_releasetrackid", "musicbrainz_workid",
+    "musicbrainz_releasegroupid"
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS songs (
+    path TEXT PRIMARY KEY,
+    mtime TEXT,
+    data TEXT NOT NULL,
+    stored_at REAL NOT NULL DEFAULT 0
+);
+"""
+
+_INDEX = "CREATE INDEX IF NOT EXISTS songs_stored_at ON songs (stored_at);"
+
+
+def project_metadata(song: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Reduce an MPD song dict to the cached metadata fields.
+
+    Args:
+        song (Dict[str, Any]): Song info as returned by MPD
+
+    Returns:
+        Dict[str, Any]: Song metadata restricted to METADATA_FIELDS
+    """
+    return {key: song[key] for key in METADATA_FIELDS if key in song}
+
+
+class MetadataCache:
+    """
+    LRU cache of song metadata keyed by file path and modification time.
+
+    Entries are stored with the ``last-modified`` value MPD reports for the
+    file; a lookup with a different mtime is treated as a miss, so re-tagged
+    files are refreshed automatically. An optional SQLite backing store keeps
+    the cache warm across restarts; it drops entries older than store_max_age
+    and the oldest entries beyond store_capacity.
+    """
+
+    def __init__(self, capacity: int = 4096, store_path: Optional[str] = None,
+                 store_capacity: int = 65536, store_max_age: Optional[float] = 30 * 86400):
+        """
+        Initialize the metadata cache.
+
+        Args:
+            capacity (int, optional): Maximum number of entries kept in memory. Defaults to 4096.
+            store_path (Optional[str], optional): Path of the SQLite backing store.
+                Defaults to None (memory only).
+            store_capacity (int, optional): Maximum number of entries kept in the backing store.
+                Defaults to 65536.
+            store_max_age (Optional[float], optional): Seconds an entry is kept in the backing
+                store. Defaults to 30 days; None keeps entries until evicted by size.
+        """
+        self.capacity = max(1, capacity)
+        self.store_path = store_path
+        self.store_capacity = max(1, store_capacity)
+        self.store_max_age = store_max_age
+        self.hits = 0
+        self.misses = 0
+
+        self._entries: "OrderedDict[str, Tuple[Optional[str], Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._store = None
+        self._store_count = 0
+
+        if store_path:
+            try:
+                store_dir = os.path.dirname(store_path)
+                if store_dir:
+                    os.makedirs(store_dir, exist_ok=True)
+                self._store = sqlite3.connect(store_path, check_same_thread=False)
+                self._store.executescript(_SCHEMA)
+                columns = [row[1] for row in self._store.execute("PRAGMA table_info(songs)")]
+                if "stored_at" not in columns:
+                    # Stores written before entries were bounded; their entries count as old
+                    self._store.execute("ALTER TABLE songs ADD COLUMN stored_at REAL NOT NULL DEFAULT 0")
+                self._store.executescript(_INDEX)
+                self._prune_store()
+            except Exception as e:
+                logger.error(f"Failed to open metadata store {store_path}: {e}")
+                self._store = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def close(self) -> None:
+        """Close the backing store."""
+        with self._lock:
+            if self._store:
+                self._store.close()
+                self._store = None
+
+    def get(self, path: str, mtime: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Get cached metadata for a file.
+
+        Args:
+            path (str): File path relative to the music directory
+            mtime (Optional[str], optional): ``last-modified`` value MPD reports for the
+                file now. Defaults to None (accept any cached version).
+
+        Returns:
+            Optional[Dict[str, Any]]: Cached metadata, or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(path)
+
+            if entry is None and self._store:
+                oldest = time.time() - self.store_max_age if self.store_max_age is not None else 0
+                row = self._store.execute(
+                    "SELECT mtime, data FROM songs WHERE path = ? AND stored_at >= ?", (path, oldest)
+                ).fetchone()
+                if row:
+                    entry = (row[0], json.loads(row[1]))
+                    self._insert(path, entry)
+
+            if entry is None or (mtime is not None and entry[0] != mtime):
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(path)
+            self.hits += 1
+            return entry[1]
+
+    def get_many(self, paths: Iterable[str],
+                 mtimes: Optional[Iterable[Optional[str]]] = None) -> Tuple[List[Optional[Dict[str, Any]]], int]:
+        """
+        Get cached metadata for several files.
+
+        Args:
+            paths (Iterable[str]): File paths relative to the music directory
+            mtimes (Optional[Iterable[Optional[str]]], optional): ``last-modified`` value per
+                path, as for get. Defaults to None (accept any cached version).
+
+        Returns:
+            Tuple[List[Optional[Dict[str, Any]]], int]: Metadata per path (None on a miss)
+            and the number of misses
+        """
+        if mtimes is None:
+            results = [self.get(path) for path in paths]
+        else:
+            results = [self.get(path, mtime) for path, mtime in zip(paths, mtimes)]
+        return results, sum(1 for result in results if result is None)
+
+    def put(self, song: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Cache metadata for a song.
+
+        Args:
+            song (Dict[str, Any]): Song info as returned by MPD; must contain "file"
+
+        Returns:
+            Dict[str, Any]: The cached metadata
+        """
+        return self.put_many([song])[0]
+
+    def put_many(self, songs: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Cache metadata for several songs.
+
+        Args:
+            songs (Iterable[Dict[str, Any]]): Song infos as returned by MPD
+
+        Returns:
+            List[Dict[str, Any]]: The cached metadata, in input order
+        """
+        cached = []
+        rows = []
+
+        with self._lock:
+            for song in songs:
+                metadata = project_metadata(song)
+                path = metadata.get("file")
+                if not path:
+                    cached.append(metadata)
+                    continue
+
+                mtime = metadata.get("last-modified")
+                previous = self._entries.get(path)
+                self._insert(path, (mtime, metadata))
+                cached.append(metadata)
+
+                if self._store and (previous is None or previous != (mtime, metadata)):
+                    rows.append((path, mtime, json.dumps(metadata), time.time()))
+
+            if rows:
+                try:
+                    with self._store:
+                        self._store.executemany(
+                            "INSERT OR REPLACE INTO songs (path, mtime, data, stored_at) VALUES (?, ?, ?, ?)", rows
+                        )
+                    # Replaced rows are counted too, so this overestimates until the next prune
+                    self._store_count += len(rows)
+                    if self._store_count > self.store_capacity:
+                        self._prune_store()
+                except Exception as e:
+                    logger.error(f"Failed to persist song metadata: {e}")
+
+        return cached
+
+    def invalidate(self, path: str) -> None:
+        """
+        Drop a file, or every file below a directory, from the cache.
+
+        Args:
+            path (str): File or directory path relative to the music directory
+        """
+        prefix = path.rstrip("/") + "/"
+        with self._lock:
+            for key in [key for key in self._entries if key == path or key.startswith(prefix)]:
+                del self._entries[key]
+            if self._store:
+                with self._store:
+                    self._store.execute(
+                        "DELETE FROM songs WHERE path = ? OR substr(path, 1, ?) = ?",
+                        (path, len(prefix), prefix)
+                    )
+
+    def clear(self) -> None:
+        """Drop every entry from the cache and the backing store."""
+        with self._lock:
+            self._entries.clear()
+            if self._store:
+                with self._store:
+                    self._store.execute("DELETE FROM songs")
+                self._store_count = 0
+
+    def _prune_store(self) -> None:
+        """Drop expired entries and the oldest entries beyond store_capacity from the backing store."""
+        with self._store:
+            if self.store_max_age is not None:
+                self._store.execute("DELETE FROM songs WHERE stored_at < ?", (time.time() - self.store_max_age,))
+            self._store.execute(
+                "DELETE FROM songs WHERE path IN "
+                "(SELECT path FROM songs ORDER BY stored_at DESC LIMIT -1 OFFSET ?)",
+                (self.store_capacity,)
+            )
+        self._store_count = self._store.execute("SELECT COUNT(*) FROM songs").fetchone()[0]
+
+    def _insert(self, path: str, entry: Tuple[Optional[str], Dict[str, Any]]) -> None:
+        """Insert an entry as most recently used, evicting the oldest if full."""
+        self._entries[path] = entry
+        self._entries.move_to_end(path)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
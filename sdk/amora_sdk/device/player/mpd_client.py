@@ -9,8 +9,13 @@ import time
 from typing import Dict, Any, List, Optional, Callable, Union
 from mpd import MPDClient
 
+from ... import metrics, tracing
+
 logger = logging.getLogger(__name__)
 
+MPD_COMMAND_SECONDS = metrics.histogram("amora_mpd_command_seconds", "MPD command round trip time")
+MPD_COMMAND_ERRORS = metrics.counter("amora_mpd_command_errors_total", "Failed MPD command attempts")
+
 class MPDClientWrapper:
     """Wrapper around MPDClient with error handling and reconnection logic."""
     
@@ -123,15 +128,17 @@ class MPDClientWrapper:
                 cmd_method = getattr(self.client, command)
                 
                 # Execute the command
-                result = cmd_method(*args, **kwargs)
+                with MPD_COMMAND_SECONDS.time(command=command), tracing.span("mpd"):
+                    result = cmd_method(*args, **kwargs)
                 return result
             except Exception as e:
                 last_error = e
-                logger.warning(f"Error executing MPD command {command}: {e}")
+                MPD_COMMAND_ERRORS.inc(command=command)
+                logger.warning("Error executing MPD command %s: %s", command, e)
                 retries += 1
                 
                 if retries < self.max_retries:
-                    logger.debug(f"Retrying command {command} ({retries}/{self.max_retries})...")
+                    logger.debug("Retrying command %s (%s/%s)...", command, retries, self.max_retries)
                     time.sleep(self.retry_delay)
                     self.reconnect()
         
@@ -158,3 +165,66 @@ class MPDClientWrapper:
             return self._execute_command(name, *args, **kwargs)
             
         return command_wrapper
+
+
+class InstrumentedMPDClient:
+    """
+    MPDClient proxy that records each MPD round trip as an "mpd" span and in MPD_COMMAND_SECONDS.
+
+    Commands queued in a command list are sent by command_list_end, so the
+    whole list is recorded once, as the "command_list" command.
+    """
+    
+    def __init__(self, client: Any):
+        """
+        Initialize the proxy.
+        
+        Args:
+            client (Any): MPD client to forward commands to
+        """
+        object.__setattr__(self, "_client", client)
+        object.__setattr__(self, "_command_list", False)
+    
+    def _call(self, command: str, method: Callable, *args, **kwargs) -> Any:
+        """Run one MPD round trip, timing it and counting failures."""
+        try:
+            with MPD_COMMAND_SECONDS.time(command=command), tracing.span("mpd"):
+                return method(*args, **kwargs)
+        except Exception:
+            MPD_COMMAND_ERRORS.inc(command=command)
+            raise
+    
+    def command_list_ok_begin(self) -> None:
+        """Start a command list."""
+        self._client.command_list_ok_begin()
+        object.__setattr__(self, "_command_list", True)
+    
+    def command_list_end(self) -> Any:
+        """Send the command list and get its results."""
+        object.__setattr__(self, "_command_list", False)
+        return self._call("command_list", self._client.command_list_end)
+    
+    def __getattr__(self, name: str) -> Any:
+        """
+        Handle attribute access for MPD commands.
+        
+        Args:
+            name (str): Attribute name
+            
+        Returns:
+            Any: Instrumented command, or the client's attribute if it is not a command
+        """
+        attr = getattr(self._client, name)
+        if name.startswith("_") or not callable(attr):
+            return attr
+        
+        def command_wrapper(*args, **kwargs):
+            if self._command_list:
+                return attr(*args, **kwargs)
+            return self._call(name, attr, *args, **kwargs)
+            
+        return command_wrapper
+    
+    def __setattr__(self, name: str, value: Any) -> None:
+        """Set attributes such as timeout on the client."""
+        setattr(self._client, name, value)
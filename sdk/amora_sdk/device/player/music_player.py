@@ -9,14 +9,40 @@ import os
 import time
 import json
 import subprocess
-from typing import Dict, Any, List, Optional, Tuple
-from mpd import MPDClient
+import threading
+from typing import Callable, Dict, Any, Iterator, List, Optional, Tuple
+from mpd import CommandError, MPDClient
+
+from .metadata import MetadataCache
+from .mpd_client import InstrumentedMPDClient
+from .queue_diff import diff_queue
 
 logger = logging.getLogger(__name__)
 
 class MusicPlayer:
     """Music Player class for controlling MPD with Pipewire backend."""
 
+    # Commands that map to a single MPD call, so a batch can send them in one
+    # command list: method name -> (MPD command, MPD arguments from the method parameters)
+    BATCH_MPD_COMMANDS = {
+        "play": ("play", lambda: ()),
+        "pause": ("pause", lambda: (1,)),
+        "stop": ("stop", lambda: ()),
+        "next": ("next", lambda: ()),
+        "previous": ("previous", lambda: ()),
+        "set_volume": ("setvol", lambda volume: (max(0, min(100, int(volume))),)),
+        "set_repeat": ("repeat", lambda repeat: (1 if repeat else 0,)),
+        "set_random": ("random", lambda random: (1 if random else 0,)),
+    }
+
+    # Shapes of volume ramps: fraction of the ramp's time elapsed -> fraction of its volume change
+    VOLUME_CURVES = {
+        "linear": lambda x: x,
+        "ease_in": lambda x: x * x,
+        "ease_out": lambda x: 1 - (1 - x) * (1 - x),
+        "s_curve": lambda x: x * x * (3 - 2 * x),
+    }
+
     def __init__(self, config: Dict[str, Any]):
         """
         Initialize the Music Player.
@@ -25,7 +51,8 @@ class MusicPlayer:
             config (Dict[str, Any]): Configuration dictionary
         """
         self.config = config
-        self.mpd_client = MPDClient()
+        # Each MPD round trip is timed and shows up as an "mpd" span in command traces
+        self.mpd_client = InstrumentedMPDClient(MPDClient())
         self.mpd_host = config.get("mpd", {}).get("host", "localhost")
         self.mpd_port = config.get("mpd", {}).get("port", 6600)
         self.music_dir = config.get("content", {}).get("storage_path", "/home/user/music")
@@ -34,6 +61,26 @@ class MusicPlayer:
         self.current_playlist = None
         self.dev_mode = config.get("dev_mode", False)
 
+        # Song metadata cache, so status updates skip MPD lookups and playlist views reuse projected tags
+        cache_config = config.get("metadata_cache", {})
+        self.metadata_cache = MetadataCache(
+            capacity=cache_config.get("capacity", 4096),
+            store_path=cache_config.get("store_path"),
+            store_capacity=cache_config.get("store_capacity", 65536),
+            store_max_age=cache_config.get("store_max_age", 30 * 86400)
+        )
+        self._current_song_key = None
+        self._current_song_file = None
+        self._current_song_mtime = None
+        # Paths (None for the whole library) of database updates MPD has not finished yet
+        self._pending_updates: List[Optional[str]] = []
+        self._pending_updates_lock = threading.Lock()
+
+        # Volume ramps run in their own thread, with their own MPD connection
+        self.ramp_step_interval = config.get("volume_ramp", {}).get("step_interval", 0.05)
+        self._ramp_thread: Optional[threading.Thread] = None
+        self._ramp_cancel = threading.Event()
+
     def connect(self) -> bool:
         """
         Connect to MPD server.
@@ -53,6 +100,7 @@ class MusicPlayer:
 
     def disconnect(self) -> None:
         """Disconnect from MPD server."""
+        self.cancel_ramp()
         if self.connected:
             try:
                 self.mpd_client.close()
@@ -63,6 +111,25 @@ class MusicPlayer:
             finally:
                 self.connected = False
 
+    def open_connection(self) -> Optional[Any]:
+        """
+        Open a separate MPD connection, for callers on other threads.
+
+        The player's own connection is not thread-safe, so threads other than
+        the one driving the player send their commands on a connection of
+        their own, and close it when done.
+
+        Returns:
+            Optional[Any]: Connected MPD client, None if the connection failed
+        """
+        client = InstrumentedMPDClient(MPDClient())
+        try:
+            client.connect(self.mpd_host, self.mpd_port)
+            return client
+        except Exception as e:
+            logger.error(f"Failed to connect to MPD server: {e}")
+            return None
+
     def _ensure_connected(self) -> bool:
         """
         Ensure connection to MPD server.
@@ -184,6 +251,9 @@ class MusicPlayer:
         if not self._ensure_connected():
             return False
 
+        # The latest volume command wins over a ramp in progress
+        self.cancel_ramp()
+
         try:
             # Ensure volume is within valid range
             volume = max(0, min(100, volume))
@@ -194,6 +264,129 @@ class MusicPlayer:
             logger.error(f"Failed to set volume: {e}")
             return False
 
+    def ramp_volume(self, target: int, duration: float, curve: str = "linear",
+                    on_complete: Optional[Callable[[int], None]] = None) -> bool:
+        """
+        Move the volume to a target gradually, e.g. for a fade-out.
+
+        The ramp runs in a background thread with its own MPD connection,
+        setting the volume every ramp_step_interval seconds while it changes.
+        A later volume command (set_volume, ramp_volume, or set_volume in a
+        batch) cancels it, leaving the volume where the ramp had got to.
+
+        Args:
+            target (int): Final volume level (0-100)
+            duration (float): Seconds the ramp takes, 0 to set the volume at once
+            curve (str, optional): Shape of the ramp, a VOLUME_CURVES key. Defaults to "linear".
+            on_complete (Optional[Callable[[int], None]], optional): Called from the ramp thread
+                with the final volume once it is reached; not called if the ramp is cancelled
+                or fails. Defaults to None.
+
+        Returns:
+            bool: True if the ramp started, False otherwise
+        """
+        shape = self.VOLUME_CURVES.get(curve)
+        if shape is None:
+            logger.error(f"Unknown volume curve: {curve}")
+            return False
+
+        if not self._ensure_connected():
+            return False
+
+        self.cancel_ramp()
+
+        try:
+            target = max(0, min(100, int(target)))
+            duration = max(0.0, float(duration))
+            start = int(self.mpd_client.status().get("volume", "-1"))
+        except Exception as e:
+            logger.error(f"Failed to start volume ramp: {e}")
+            return False
+
+        if start < 0:
+            logger.error("Failed to start volume ramp: MPD has no mixer")
+            return False
+
+        self._ramp_cancel = threading.Event()
+        self._ramp_thread = threading.Thread(
+            target=self._run_ramp,
+            args=(start, target, duration, shape, self._ramp_cancel, on_complete),
+            name="volume-ramp",
+            daemon=True
+        )
+        self._ramp_thread.start()
+        logger.info(f"Volume ramp from {start} to {target} over {duration}s ({curve})")
+        return True
+
+    def cancel_ramp(self) -> bool:
+        """
+        Stop a volume ramp in progress at its current volume.
+
+        Returns:
+            bool: True if a ramp was running, False otherwise
+        """
+        thread = self._ramp_thread
+        if thread is None or not thread.is_alive():
+            return False
+
+        self._ramp_cancel.set()
+        # Joined, so no ramp step lands after the command that cancelled it
+        if thread is not threading.current_thread():
+            thread.join(timeout=2.0)
+        return True
+
+    @property
+    def ramping(self) -> bool:
+        """Whether a volume ramp is in progress."""
+        return self._ramp_thread is not None and self._ramp_thread.is_alive()
+
+    def _run_ramp(self, start: int, target: int, duration: float, shape: Callable[[float], float],
+                  cancel: threading.Event, on_complete: Optional[Callable[[int], None]]) -> None:
+        """
+        Step the volume from start to target, in the ramp thread.
+
+        Args:
+            start (int): Volume at the start of the ramp
+            target (int): Final volume
+            duration (float): Seconds the ramp takes
+            shape (Callable[[float], float]): Ramp curve
+            cancel (threading.Event): Set to stop the ramp
+            on_complete (Optional[Callable[[int], None]]): Called with the final volume once reached
+        """
+        client = MPDClient()
+        try:
+            client.connect(self.mpd_host, self.mpd_port)
+            began = time.monotonic()
+            volume = start
+            while True:
+                # Follow the clock rather than count steps, so slow steps do not stretch the ramp
+                fraction = min(1.0, (time.monotonic() - began) / duration) if duration > 0 else 1.0
+                step = round(start + (target - start) * shape(fraction))
+                if step != volume:
+                    client.setvol(step)
+                    volume = step
+                if fraction >= 1.0:
+                    break
+                if cancel.wait(self.ramp_step_interval):
+                    logger.info(f"Volume ramp cancelled at {volume}")
+                    return
+        except Exception as e:
+            logger.error(f"Volume ramp failed: {e}")
+            return
+        finally:
+            try:
+                client.close()
+                client.disconnect()
+            except Exception:
+                pass
+
+        logger.info(f"Volume ramp reached {target}")
+        if on_complete:
+            try:
+                on_complete(target)
+            except Exception as e:
+                logger.error(f"Error in volume ramp callback: {e}")
+
     def get_volume(self) -> int:
         """
         Get current volume level.
@@ -226,9 +419,12 @@ class MusicPlayer:
             status = self.mpd_client.status()
             current_song = None
 
+            if self._pending_updates and "updating_db" not in status:
+                self._finish_database_updates()
+
             if status.get("state") != "stop":
                 try:
-                    song_info = self.mpd_client.currentsong()
+                    song_info = self._get_current_song(status)
                     if song_info:
                         # Extract file path and convert to relative path
                         file_path = song_info.get("file", "")
@@ -278,6 +474,63 @@ class MusicPlayer:
                 "error": str(e)
             }
 
+    def _get_current_song(self, status: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Get the current song, asking MPD only when the song has changed.
+
+        MPD bumps the queue version when a database update changes a queued
+        song, so a re-tagged current song is fetched again too.
+
+        Args:
+            status (Dict[str, Any]): MPD status
+
+        Returns:
+            Dict[str, Any]: Current song metadata
+        """
+        song_key = (status.get("playlist"), status.get("songid"))
+
+        if status.get("songid") is not None and song_key == self._current_song_key:
+            song_info = self.metadata_cache.get(self._current_song_file, self._current_song_mtime)
+            if song_info:
+                return song_info
+
+        song_info = self.mpd_client.currentsong()
+        if song_info and song_info.get("file"):
+            song_info = self.metadata_cache.put(song_info)
+            self._current_song_key = song_key
+            self._current_song_file = song_info["file"]
+            self._current_song_mtime = song_info.get("last-modified")
+
+        return song_info
+
+    def get_song_metadata(self, file: str, mtime: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Get the metadata of a song.
+
+        Args:
+            file (str): File path relative to the music directory
+            mtime (Optional[str], optional): ``last-modified`` value MPD reports for the file,
+                to refresh the cached metadata if it has changed. Defaults to None.
+
+        Returns:
+            Optional[Dict[str, Any]]: Song metadata, or None if not found
+        """
+        song_info = self.metadata_cache.get(file, mtime)
+        if song_info:
+            return song_info
+
+        if not self._ensure_connected():
+            return None
+
+        try:
+            for song in self.mpd_client.lsinfo(file):
+                if song.get("file") == file:
+                    return self.metadata_cache.put(song)
+            return None
+        except Exception as e:
+            logger.error(f"Failed to get metadata for {file}: {e}")
+            return None
+
     def get_playlists(self) -> List[str]:
         """
         Get available playlists.
@@ -295,28 +548,58 @@ class MusicPlayer:
             logger.error(f"Failed to get playlists: {e}")
             return []
 
-    def update_database(self) -> bool:
+    def update_database(self, path: Optional[str] = None, client: Optional[Any] = None) -> bool:
         """
         Update MPD database.
 
+        Args:
+            path (Optional[str], optional): Only rescan this path, relative to the
+                music directory. Defaults to None (whole library).
+            client (Optional[Any], optional): Connected MPD client to send the update on,
+                for callers on other threads. Defaults to the player's own connection.
+
         Returns:
             bool: True if successful, False otherwise
         """
-        if not self._ensure_connected():
-            return False
+        if client is None:
+            if not self._ensure_connected():
+                return False
+            client = self.mpd_client
 
         try:
-            self.mpd_client.update()
-            logger.info("Database update started")
+            if path:
+                client.update(path)
+                self.metadata_cache.invalidate(path)
+                logger.info(f"Database update started for {path}")
+            else:
+                client.update()
+                self.metadata_cache.clear()
+                logger.info("Database update started")
+            # Songs looked up while MPD rescans may still get the old tags; drop them again once it is done
+            with self._pending_updates_lock:
+                self._pending_updates.append(path)
             return True
         except Exception as e:
             logger.error(f"Failed to update database: {e}")
             return False
 
+    def _finish_database_updates(self) -> None:
+        """Drop the metadata cached while the pending database updates ran."""
+        with self._pending_updates_lock:
+            pending, self._pending_updates = self._pending_updates, []
+        if None in pending:
+            self.metadata_cache.clear()
+            return
+        for path in pending:
+            self.metadata_cache.invalidate(path)
+
     def play_playlist(self, playlist_name: str) -> bool:
         """
         Play a playlist.
 
+        The queue is edited in place to match the playlist, so if the current
+        song is part of the new playlist it keeps playing without a gap.
+
         Args:
             playlist_name (str): Name of the playlist
 
@@ -327,14 +610,15 @@ class MusicPlayer:
             return False
 
         try:
-            # Clear current playlist
-            self.mpd_client.clear()
+            files = self.mpd_client.listplaylist(playlist_name)
+            status = self.mpd_client.status()
 
-            # Load the playlist
-            self.mpd_client.load(playlist_name)
+            if not self.sync_queue(files, status):
+                return False
 
-            # Start playback
-            self.mpd_client.play()
+            # Start from the top unless the current song survived the edit
+            if files and (status.get("state") != "play" or not self._queue_has_song(status.get("songid"))):
+                self.mpd_client.play(0)
 
             # Store the current playlist name
             self.current_playlist = playlist_name
@@ -345,6 +629,115 @@ class MusicPlayer:
             logger.error(f"Failed to play playlist {playlist_name}: {e}")
             return False
 
+    def stage_playlist(self, playlist_name: str) -> bool:
+        """
+        Load a playlist into the queue without changing playback.
+
+        Used to schedule playback: the queue edit, the slow part of
+        play_playlist, is done ahead of time, and play_from_start only has to
+        send one MPD command at the target time. If the current song is not
+        in the playlist, playback moves on within the new queue meanwhile.
+
+        Args:
+            playlist_name (str): Name of the playlist
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        if not self._ensure_connected():
+            return False
+
+        try:
+            if not self.sync_queue(self.mpd_client.listplaylist(playlist_name)):
+                return False
+            self.current_playlist = playlist_name
+            logger.info(f"Staged playlist: {playlist_name}")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to stage playlist {playlist_name}: {e}")
+            return False
+
+    def play_from_start(self, client: Optional[Any] = None) -> bool:
+        """
+        Start playback at the top of the queue.
+
+        Args:
+            client (Optional[Any], optional): Connected MPD client to send the command on,
+                for callers on other threads. Defaults to the player's own connection.
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        if client is None:
+            if not self._ensure_connected():
+                return False
+            client = self.mpd_client
+
+        try:
+            client.play(0)
+            logger.info("Playback started from the top of the queue")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to start playback: {e}")
+            return False
+
+    def sync_queue(self, files: List[str], status: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        Make the queue match a list of files with the fewest queue edits.
+
+        Songs already queued are kept, deleted or moved by id and missing ones
+        are added, all in a single command list, instead of clearing and
+        reloading the queue.
+
+        Args:
+            files (List[str]): Target list of files
+            status (Optional[Dict[str, Any]], optional): Current MPD status, used to keep the
+                current song. Defaults to None (fetched from MPD).
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        if not self._ensure_connected():
+            return False
+
+        try:
+            if status is None:
+                status = self.mpd_client.status()
+
+            current = [(song["id"], song["file"]) for song in self.mpd_client.playlistinfo()]
+            ops = diff_queue(current, files, keep_id=status.get("songid"))
+
+            if ops:
+                self.mpd_client.command_list_ok_begin()
+                try:
+                    for op in ops:
+                        getattr(self.mpd_client, op.command)(*op.args())
+                finally:
+                    self.mpd_client.command_list_end()
+
+            logger.info(f"Queue synced with {len(ops)} edit(s) for {len(files)} tracks")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to sync queue: {e}")
+            return False
+
+    def _queue_has_song(self, song_id: Optional[str]) -> bool:
+        """
+        Check whether a song id is still in the queue.
+
+        Args:
+            song_id (Optional[str]): Song id
+
+        Returns:
+            bool: True if the song is queued, False otherwise
+        """
+        if song_id is None:
+            return False
+        try:
+            return bool(self.mpd_client.playlistid(song_id))
+        except Exception:
+            return False
+
     def set_repeat(self, repeat: bool) -> bool:
         """
         Set repeat mode.
@@ -387,13 +780,114 @@ class MusicPlayer:
             logger.error(f"Failed to set random mode: {e}")
             return False
 
-    def create_playlist(self, playlist_name: str, files: List[str]) -> bool:
+    def run_batch(self, commands: List[Tuple[str, Dict[str, Any]]],
+                  stop_on_error: bool = True) -> List[Dict[str, Any]]:
+        """
+        Run several player commands with as few MPD round trips as possible.
+
+        Consecutive commands that map to a single MPD call (see
+        BATCH_MPD_COMMANDS) are sent as one command list; any other player
+        method runs on its own, in order. MPD aborts a command list at the
+        first error, so the commands after a failure are skipped, or with
+        stop_on_error=False sent again in a new list.
+
+        Args:
+            commands (List[Tuple[str, Dict[str, Any]]]): (method name, parameters) pairs
+            stop_on_error (bool, optional): Skip the commands after the first failure. Defaults to True.
+
+        Returns:
+            List[Dict[str, Any]]: Per command, "result" (bool) and "data" (the method's
+            return value), "error" for failures and "skipped" for commands not run
+        """
+        if not self._ensure_connected():
+            return [{"result": False, "error": "Not connected to MPD"} for _ in commands]
+
+        results: List[Optional[Dict[str, Any]]] = [None] * len(commands)
+        pending: List[Tuple[int, str, tuple]] = []
+
+        def failed() -> bool:
+            return stop_on_error and any(result is not None and not result["result"] for result in results)
+
+        for index, (command, params) in enumerate(commands):
+            if failed():
+                break
+
+            if command == "set_volume":
+                self.cancel_ramp()
+
+            mapping = self.BATCH_MPD_COMMANDS.get(command)
+            if mapping:
+                try:
+                    pending.append((index, mapping[0], mapping[1](**(params or {}))))
+                    continue
+                except (TypeError, ValueError) as e:
+                    results[index] = {"result": False, "error": f"Invalid parameters for {command}: {e}"}
+                    continue
+
+            # Commands with their own reads run on their own, after what is queued
+            self._run_command_list(pending, results, stop_on_error)
+            if failed():
+                break
+            method = getattr(self, command, None) if not command.startswith("_") else None
+            if method is None or not callable(method) or command in ("run_batch", "connect", "disconnect"):
+                results[index] = {"result": False, "error": f"Command {command} not supported"}
+                continue
+            try:
+                value = method(**(params or {}))
+                results[index] = {"result": value is not False, "data": value}
+            except Exception as e:
+                results[index] = {"result": False, "error": str(e)}
+
+        self._run_command_list(pending, results, stop_on_error)
+        return [result if result is not None else {"result": False, "skipped": True} for result in results]
+
+    def _run_command_list(self, pending: List[Tuple[int, str, tuple]],
+                          results: List[Optional[Dict[str, Any]]], stop_on_error: bool) -> None:
+        """
+        Send queued MPD calls as one command list and record their results.
+
+        Args:
+            pending (List[Tuple[int, str, tuple]]): (batch index, MPD command, arguments), emptied on return
+            results (List[Optional[Dict[str, Any]]]): Results by batch index
+            stop_on_error (bool): Leave the calls after a failure unsent
+        """
+        while pending:
+            try:
+                self.mpd_client.command_list_ok_begin()
+                try:
+                    for _, name, args in pending:
+                        getattr(self.mpd_client, name)(*args)
+                finally:
+                    self.mpd_client.command_list_end()
+                for index, _, _ in pending:
+                    results[index] = {"result": True, "data": True}
+                logger.info(f"Ran {len(pending)} command(s) in one command list")
+                pending.clear()
+            except CommandError as e:
+                # MPD ran the calls before the failing one and none after it
+                offset = e.offset if e.offset is not None else 0
+                logger.error(f"Command list failed at {pending[offset][1]}: {e}")
+                for index, _, _ in pending[:offset]:
+                    results[index] = {"result": True, "data": True}
+                results[pending[offset][0]] = {"result": False, "error": str(e)}
+                del pending[:offset + 1]
+                if stop_on_error:
+                    pending.clear()
+            except Exception as e:
+                logger.error(f"Command list failed: {e}")
+                for index, _, _ in pending:
+                    results[index] = {"result": False, "error": str(e)}
+                pending.clear()
+
+    def create_playlist(self, playlist_name: str, files: List[str], overwrite: bool = False) -> bool:
         """
         Create a new playlist.
 
         Args:
             playlist_name (str): Name of the playlist
             files (List[str]): List of music files to add to the playlist
+            overwrite (bool, optional): Replace the songs of an existing playlist with this
+                name. Defaults to False (fail if it exists).
 
         Returns:
             bool: True if successful, False otherwise
@@ -402,15 +896,20 @@ class MusicPlayer:
             return False
 
         try:
-            # Create a new playlist
-            self.mpd_client.clear()
-
-            # Add files to the playlist
-            for file in files:
-                self.mpd_client.add(file)
-
-            # Save the playlist
-            self.mpd_client.save(playlist_name)
+            if not overwrite and any(
+                playlist.get("playlist") == playlist_name for playlist in self.mpd_client.listplaylists()
+            ):
+                logger.error(f"Failed to create playlist {playlist_name}: playlist already exists")
+                return False
+
+            # Write the stored playlist directly so the queue is left untouched
+            self.mpd_client.command_list_ok_begin()
+            try:
+                self.mpd_client.playlistclear(playlist_name)
+                for file in files:
+                    self.mpd_client.playlistadd(playlist_name, file)
+            finally:
+                self.mpd_client.command_list_end()
 
             logger.info(f"Created playlist: {playlist_name} with {len(files)} tracks")
             return True
@@ -439,12 +938,16 @@ class MusicPlayer:
             logger.error(f"Failed to delete playlist {playlist_name}: {e}")
             return False
 
-    def get_playlist_songs(self, playlist_name: str) -> List[Dict[str, Any]]:
+    def get_playlist_songs(self, playlist_name: str, offset: int = 0, limit: Optional[int] = None,
+                           fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
         """
         Get the songs in a playlist.
 
         Args:
             playlist_name (str): Name of the playlist
+            offset (int, optional): Index of the first song to return. Defaults to 0.
+            limit (Optional[int], optional): Maximum number of songs to return. Defaults to None (all).
+            fields (Optional[List[str]], optional): Only include these tags per song. Defaults to None (all).
 
         Returns:
             List[Dict[str, Any]]: List of songs in the playlist
@@ -453,8 +956,132 @@ class MusicPlayer:
             return []
 
         try:
-            songs = self.mpd_client.listplaylistinfo(playlist_name)
-            return songs
+            if offset or limit is not None:
+                files = self.mpd_client.listplaylist(playlist_name)
+                offset = max(0, offset)
+                files = files[offset:None if limit is None else offset + max(0, limit)]
+                songs = self._resolve_songs(files)
+            else:
+                songs = self._cache_songs(self.mpd_client.listplaylistinfo(playlist_name))
+
+            return self._project_songs(songs, fields)
         except Exception as e:
             logger.error(f"Failed to get songs in playlist {playlist_name}: {e}")
             return []
+
+    def iter_playlist_songs(self, playlist_name: str, chunk_size: int = 100,
+                            fields: Optional[List[str]] = None) -> Iterator[Tuple[int, int, List[Dict[str, Any]]]]:
+        """
+        Stream the songs in a playlist in chunks.
+
+        Only the playlist's file list is held in full; tags are resolved one
+        chunk at a time, so the first chunk is available immediately and
+        memory use stays bounded for long playlists.
+
+        Args:
+            playlist_name (str): Name of the playlist
+            chunk_size (int, optional): Songs per chunk. Defaults to 100.
+            fields (Optional[List[str]], optional): Only include these tags per song. Defaults to None (all).
+
+        Yields:
+            Tuple[int, int, List[Dict[str, Any]]]: (offset, total, songs) for each chunk
+        """
+        if not self._ensure_connected():
+            return
+
+        try:
+            files = self.mpd_client.listplaylist(playlist_name)
+        except Exception as e:
+            logger.error(f"Failed to get songs in playlist {playlist_name}: {e}")
+            return
+
+        chunk_size = max(1, chunk_size)
+        total = len(files)
+        for offset in range(0, total, chunk_size):
+            songs = self._resolve_songs(files[offset:offset + chunk_size])
+            yield offset, total, self._project_songs(songs, fields)
+
+    def _resolve_songs(self, files: List[str]) -> List[Dict[str, Any]]:
+        """
+        Get the metadata of several songs, listing them in one command list.
+
+        Args:
+            files (List[str]): File paths relative to the music directory
+
+        Returns:
+            List[Dict[str, Any]]: Song metadata in input order; unknown files only carry "file"
+        """
+        # Streams and other URIs are not in the database
+        listed = [file for file in files if "://" not in file]
+        fetched = {}
+        if listed:
+            infos = [info for result in self._lsinfo_many(listed) for info in result if "file" in info]
+            fetched = {song["file"]: song for song in self._cache_songs(infos)}
+
+        return [fetched.get(file, {"file": file}) for file in files]
+
+    def _cache_songs(self, infos: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Get the cached metadata of songs MPD has listed, caching new and changed ones.
+
+        Cached entries are matched on the ``last-modified`` value MPD lists, so
+        songs re-tagged by any database update, including ones this player did
+        not start, are cached again rather than served stale.
+
+        Args:
+            infos (List[Dict[str, Any]]): Song infos as returned by MPD
+
+        Returns:
+            List[Dict[str, Any]]: Song metadata in input order
+        """
+        songs, misses = self.metadata_cache.get_many(
+            [info.get("file") for info in infos], [info.get("last-modified") for info in infos]
+        )
+        if not misses:
+            return songs
+
+        fetched = iter(self.metadata_cache.put_many([info for info, song in zip(infos, songs) if song is None]))
+        return [song if song is not None else next(fetched) for song in songs]
+
+    def _lsinfo_many(self, files: List[str]) -> List[List[Dict[str, Any]]]:
+        """
+        Run lsinfo for several files in a single command list.
+
+        Args:
+            files (List[str]): File paths relative to the music directory
+
+        Returns:
+            List[List[Dict[str, Any]]]: lsinfo result per file
+        """
+        try:
+            self.mpd_client.command_list_ok_begin()
+            for file in files:
+                self.mpd_client.lsinfo(file)
+            return self.mpd_client.command_list_end()
+        except Exception as e:
+            # One missing file aborts the whole list; retry one by one
+            logger.debug(f"Batched lsinfo failed ({e}), falling back to single lookups")
+
+        results = []
+        for file in files:
+            try:
+                results.append(self.mpd_client.lsinfo(file))
+            except Exception:
+                results.append([])
+        return results
+
+    @staticmethod
+    def _project_songs(songs: List[Dict[str, Any]], fields: Optional[List[str]]) -> List[Dict[str, Any]]:
+        """
+        Restrict songs to the requested fields.
+
+        Args:
+            songs (List[Dict[str, Any]]): Song metadata
+            fields (Optional[List[str]]): Fields to keep, or None to keep all
+
+        Returns:
+            List[Dict[str, Any]]: Projected songs
+        """
+        if not fields:
+            return songs
+        return [{key: song[key] for key in fields if key in song} for song in songs]
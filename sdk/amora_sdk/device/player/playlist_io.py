@@ -0,0 +1,260 @@
+"""
+Playlist file I/O for the player module.
+
+Reads and writes M3U/M3U8 playlists in bulk. Writes are atomic (temporary
+file plus rename), reads are streamed, and M3UIndex gives random access to
+large playlists through a memory map without loading them into memory.
+"""
+
+import os
+import mmap
+import stat
+import logging
+import tempfile
+from array import array
+from dataclasses import dataclass
+from typing import Iterable, Iterator, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+EXTM3U = "#EXTM3U"
+EXTINF = "#EXTINF:"
+
+# Number of lines joined into one write call
+WRITE_BATCH = 4096
+
+
+@dataclass
+class PlaylistEntry:
+    """A playlist entry with optional EXTINF metadata."""
+    path: str
+    duration: Optional[float] = None
+    title: Optional[str] = None
+
+
+def _format_entry(entry: Union[str, PlaylistEntry], extended: bool) -> str:
+    """
+    Format an entry as one or two playlist lines.
+
+    Args:
+        entry (Union[str, PlaylistEntry]): File path or playlist entry
+        extended (bool): Whether to emit EXTINF lines
+
+    Returns:
+        str: Entry lines, newline terminated
+    """
+    if isinstance(entry, str):
+        return entry + "\n"
+
+    if extended and (entry.duration is not None or entry.title):
+        duration = -1 if entry.duration is None else int(entry.duration)
+        return f"{EXTINF}{duration},{entry.title or ''}\n{entry.path}\n"
+
+    return entry.path + "\n"
+
+
+def write_m3u(path: str, entries: Iterable[Union[str, PlaylistEntry]], extended: bool = True) -> int:
+    """
+    Write a playlist file atomically.
+
+    The playlist is written to a temporary file in the same directory, synced
+    and then renamed over the target, so readers never see a partial file.
+    A replaced playlist keeps its permissions; a new one is made 0644.
+
+    Args:
+        path (str): Playlist file path
+        entries (Iterable[Union[str, PlaylistEntry]]): File paths or playlist entries
+        extended (bool, optional): Write the #EXTM3U header and EXTINF lines. Defaults to True.
+
+    Returns:
+        int: Number of entries written
+
+    Raises:
+        OSError: If the playlist cannot be written
+    """
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+
+    count = 0
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="\n") as f:
+            batch = [EXTM3U + "\n"] if extended else []
+            for entry in entries:
+                batch.append(_format_entry(entry, extended))
+                count += 1
+                if len(batch) >= WRITE_BATCH:
+                    f.write("".join(batch))
+                    batch.clear()
+            if batch:
+                f.write("".join(batch))
+            f.flush()
+            os.fsync(f.fileno())
+
+        try:
+            mode = stat.S_IMODE(os.stat(path).st_mode)
+        except FileNotFoundError:
+            mode = 0o644
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+    return count
+
+
+def _parse_extinf(line: str) -> PlaylistEntry:
+    """
+    Parse an EXTINF line into an entry without a path.
+
+    Args:
+        line (str): Line starting with #EXTINF:
+
+    Returns:
+        PlaylistEntry: Entry carrying duration and title
+    """
+    info = line[len(EXTINF):]
+    duration_str, _, title = info.partition(",")
+    try:
+        duration = float(duration_str.split()[0]) if duration_str.strip() else None
+    except ValueError:
+        duration = None
+    if duration is not None and duration < 0:
+        duration = None
+    return PlaylistEntry(path="", duration=duration, title=title.strip() or None)
+
+
+def iter_m3u(path: str) -> Iterator[PlaylistEntry]:
+    """
+    Stream the entries of a playlist file.
+
+    Args:
+        path (str): Playlist file path
+
+    Yields:
+        PlaylistEntry: Each entry, with EXTINF metadata when present
+    """
+    pending = None
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith(EXTINF):
+                pending = _parse_extinf(line)
+            elif line.startswith("#"):
+                continue
+            elif pending is not None:
+                pending.path = line
+                yield pending
+                pending = None
+            else:
+                yield PlaylistEntry(path=line)
+
+
+def read_m3u(path: str) -> List[PlaylistEntry]:
+    """
+    Read all entries of a playlist file.
+
+    Args:
+        path (str): Playlist file path
+
+    Returns:
+        List[PlaylistEntry]: Playlist entries
+    """
+    return list(iter_m3u(path))
+
+
+class M3UIndex:
+    """
+    Random access to the entries of a playlist file.
+
+    The file is memory-mapped and only the byte offsets of the entry lines are
+    kept, so ``index[i]`` decodes a single entry without reading the rest of
+    the playlist into memory.
+    """
+
+    def __init__(self, path: str):
+        """
+        Open and index a playlist file.
+
+        Args:
+            path (str): Playlist file path
+        """
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = None
+        # Start offsets of entry lines, and of the EXTINF line preceding each (-1 if none),
+        # as 8-byte machine integers rather than a Python int object each
+        self._offsets = array("Q")
+        self._info_offsets = array("q")
+
+        if os.fstat(self._file.fileno()).st_size:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._build()
+
+    def _build(self) -> None:
+        """Record the offsets of every entry line."""
+        data = self._map
+        size = len(data)
+        position = 0
+        info_offset = -1
+
+        while position < size:
+            end = data.find(b"\n", position)
+            if end < 0:
+                end = size
+
+            first = data[position:position + 1]
+            if first == b"#":
+                if data[position:position + len(EXTINF)] == EXTINF.encode():
+                    info_offset = position
+            elif first not in (b"\n", b"\r") and data[position:end].strip():
+                self._offsets.append(position)
+                self._info_offsets.append(info_offset)
+                info_offset = -1
+
+            position = end + 1
+
+    def _line(self, offset: int) -> str:
+        """Decode the line starting at an offset."""
+        end = self._map.find(b"\n", offset)
+        return self._map[offset:end if end >= 0 else len(self._map)].decode("utf-8", "replace").strip()
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def __getitem__(self, index: int) -> PlaylistEntry:
+        if index < 0:
+            index += len(self._offsets)
+        if not 0 <= index < len(self._offsets):
+            raise IndexError("playlist index out of range")
+
+        path = self._line(self._offsets[index])
+        info_offset = self._info_offsets[index]
+        if info_offset < 0:
+            return PlaylistEntry(path=path)
+
+        entry = _parse_extinf(self._line(info_offset))
+        entry.path = path
+        return entry
+
+    def __iter__(self) -> Iterator[PlaylistEntry]:
+        for index in range(len(self._offsets)):
+            yield self[index]
+
+    def close(self) -> None:
+        """Release the memory map and the file."""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __enter__(self) -> "M3UIndex":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
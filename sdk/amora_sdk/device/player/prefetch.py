@@ -0,0 +1,288 @@
+"""
+Track prefetcher for AmoraSDK Device.
+
+Follows the MPD queue position and warms the page cache for the next few
+tracks, so that opening and decoding the next file does not stall playback
+on slow storage such as SD cards or network shares.
+"""
+
+import os
+import select
+import socket
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from mpd import MPDClient
+
+logger = logging.getLogger(__name__)
+
+FADVISE_AVAILABLE = hasattr(os, "posix_fadvise")
+
+DEFAULT_BYTE_BUDGET = 64 * 1024 * 1024
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+
+class Prefetcher:
+    """
+    Warms the page cache for the upcoming tracks in the MPD queue.
+
+    A watcher thread holds its own MPD connection in idle mode and, whenever
+    the current song or the queue changes, schedules the next ``count`` tracks.
+    A worker thread then warms them, either with ``posix_fadvise(WILLNEED)``
+    (the kernel reads ahead asynchronously) or by reading the files in chunks.
+    At most ``byte_budget`` bytes are warmed per schedule, and warming is
+    abandoned as soon as a new schedule arrives (e.g. the user skipped).
+    """
+
+    def __init__(self, player, count: int = 2, byte_budget: int = DEFAULT_BYTE_BUDGET,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, mode: str = "auto",
+                 client_factory: Optional[Callable[[], Any]] = None):
+        """
+        Initialize the prefetcher.
+
+        Args:
+            player: MusicPlayer instance, used for the MPD address and music directory
+            count (int, optional): Number of upcoming tracks to warm. Defaults to 2.
+            byte_budget (int, optional): Maximum bytes warmed per schedule. Defaults to 64 MiB.
+            chunk_size (int, optional): Read size in "read" mode. Defaults to 1 MiB.
+            mode (str, optional): "fadvise", "read" or "auto" (fadvise when available).
+                Defaults to "auto".
+            client_factory (Optional[Callable[[], Any]], optional): Creates the idle connection.
+                Defaults to MPDClient.
+        """
+        if mode == "auto":
+            mode = "fadvise" if FADVISE_AVAILABLE else "read"
+        if mode not in ("fadvise", "read"):
+            raise ValueError(f"Unknown prefetch mode: {mode}")
+
+        self.player = player
+        self.music_dir = player.music_dir
+        self.count = count
+        self.byte_budget = byte_budget
+        self.chunk_size = chunk_size
+        self.mode = mode
+        self.client_factory = client_factory or MPDClient
+
+        self.warmed_bytes = 0
+        self._scheduled: List[str] = []
+        self._warmed: Set[str] = set()
+        self._generation = 0
+        self._condition = threading.Condition()
+        self._running = False
+        self._client = None
+        self._threads: List[threading.Thread] = []
+
+    def start(self) -> bool:
+        """
+        Start the watcher and worker threads.
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        if self._running:
+            return True
+
+        self._running = True
+        self._threads = [
+            threading.Thread(target=self._watch, name="prefetch-watcher", daemon=True),
+            threading.Thread(target=self._work, name="prefetch-worker", daemon=True)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+        logger.info(f"Prefetcher started ({self.mode}, {self.count} tracks, {self.byte_budget} bytes)")
+        return True
+
+    def stop(self) -> None:
+        """Stop prefetching."""
+        with self._condition:
+            self._running = False
+            self._generation += 1
+            self._condition.notify_all()
+        self._interrupt_idle()
+
+        for thread in self._threads:
+            if thread.is_alive() and thread is not threading.current_thread():
+                thread.join(timeout=2.0)
+        self._threads = []
+        logger.info("Prefetcher stopped")
+
+    def schedule(self, files: List[str]) -> None:
+        """
+        Set the upcoming tracks to warm, cancelling any warming in progress.
+
+        Args:
+            files (List[str]): Upcoming files relative to the music directory, next first
+        """
+        files = [file for file in files if "://" not in file][:self.count]
+        with self._condition:
+            if files == self._scheduled:
+                return
+            self._scheduled = files
+            # Anything no longer upcoming may be evicted; warm it again if it comes back
+            self._warmed.intersection_update(files)
+            self._generation += 1
+            self._condition.notify_all()
+
+    def refresh(self, client) -> List[str]:
+        """
+        Read the upcoming tracks from MPD and schedule them.
+
+        Args:
+            client: Connected MPD client
+
+        Returns:
+            List[str]: Scheduled files
+        """
+        status = client.status()
+        if "nextsong" in status:
+            start = int(status["nextsong"])
+        elif "song" in status:
+            start = int(status["song"]) + 1
+        else:
+            start = 0
+
+        songs = client.playlistinfo(f"{start}:{start + self.count}") if self.count else []
+        files = [song["file"] for song in songs]
+        self.schedule(files)
+        return files
+
+    def warm(self, file: str, limit: int, generation: Optional[int] = None) -> int:
+        """
+        Warm the page cache for the start of a file.
+
+        Args:
+            file (str): File path relative to the music directory
+            limit (int): Maximum number of bytes to warm
+            generation (Optional[int], optional): Schedule this warm belongs to; reading stops
+                once a newer schedule arrives. Defaults to None (never cancelled).
+
+        Returns:
+            int: Number of bytes warmed
+        """
+        path = os.path.join(self.music_dir, file)
+        try:
+            with open(path, "rb", buffering=0) as f:
+                length = min(os.fstat(f.fileno()).st_size, limit)
+                if length <= 0:
+                    return 0
+
+                if self.mode == "fadvise":
+                    os.posix_fadvise(f.fileno(), 0, length, os.POSIX_FADV_WILLNEED)
+                    return length
+
+                buffer = bytearray(min(self.chunk_size, length))
+                view = memoryview(buffer)
+                done = 0
+                while done < length:
+                    if generation is not None and generation != self._generation:
+                        break
+                    read = f.readinto(view[:min(len(buffer), length - done)])
+                    if not read:
+                        break
+                    done += read
+                return done
+        except OSError as e:
+            logger.debug(f"Cannot prefetch {file}: {e}")
+            return 0
+
+    def _work(self) -> None:
+        """Worker loop warming the scheduled files."""
+        while True:
+            with self._condition:
+                while self._running and all(file in self._warmed for file in self._scheduled):
+                    self._condition.wait()
+                if not self._running:
+                    return
+                generation = self._generation
+                files = list(self._scheduled)
+
+            budget = self.byte_budget
+            for file in files:
+                if generation != self._generation or budget <= 0:
+                    break
+                if file in self._warmed:
+                    continue
+
+                warmed = self.warm(file, budget, generation)
+                budget -= warmed
+                self.warmed_bytes += warmed
+
+                with self._condition:
+                    if generation == self._generation:
+                        self._warmed.add(file)
+
+            with self._condition:
+                if generation == self._generation:
+                    # Out of budget: mark the rest done until the next schedule
+                    self._warmed.update(files)
+
+    def _watch(self) -> None:
+        """Watcher loop following the queue through MPD idle events."""
+        while self._running:
+            try:
+                if self._client is None:
+                    self._client = self.client_factory()
+                    self._client.connect(self.player.mpd_host, self.player.mpd_port)
+
+                self.refresh(self._client)
+
+                # Wait for a player or queue change without blocking stop()
+                if hasattr(self._client, "send_idle"):
+                    self._client.send_idle("player", "playlist")
+                    while self._running:
+                        readable, _, _ = select.select([self._client], [], [], 1.0)
+                        if readable:
+                            self._client.fetch_idle()
+                            break
+                else:
+                    # python-mpd2 3.x has no send_idle; stop() wakes idle() through the socket
+                    self._client.idle("player", "playlist")
+            except Exception as e:
+                if not self._running:
+                    break
+                logger.error(f"Error in prefetch watcher: {e}")
+                self._close_client()
+                with self._condition:
+                    self._condition.wait(5.0)
+
+        self._close_client()
+
+    def _interrupt_idle(self) -> None:
+        """Wake a watcher blocked in idle() by shutting its connection down."""
+        client = self._client
+        if client is None or hasattr(client, "send_idle"):
+            return
+        try:
+            sock = socket.socket(fileno=os.dup(client.fileno()))
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            finally:
+                sock.close()
+        except Exception as e:
+            logger.debug(f"Could not interrupt prefetch watcher: {e}")
+
+    def _close_client(self) -> None:
+        """Close the idle connection."""
+        if self._client is not None:
+            try:
+                self._client.disconnect()
+            except Exception:
+                pass
+            self._client = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get prefetcher statistics.
+
+        Returns:
+            Dict[str, Any]: Mode, scheduled files and bytes warmed so far
+        """
+        with self._condition:
+            return {
+                "mode": self.mode,
+                "scheduled": list(self._scheduled),
+                "warmed": sorted(self._warmed),
+                "warmed_bytes": self.warmed_bytes
+            }
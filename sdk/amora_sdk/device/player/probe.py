@@ -0,0 +1,327 @@
+"""
+System probe for AmoraSDK Device.
+
+Caches the audio device list and the MPD service state, which are otherwise
+read by spawning ``aplay`` and ``systemctl`` on every call, and notifies
+listeners when either changes. Cached values expire after a TTL and are
+refreshed early when a hot-plug event arrives; while started, the probe also
+re-reads every expired value itself, so changes without an event (the MPD
+service stopping, hot-plugs without netlink) still reach listeners.
+"""
+
+import queue
+import socket
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from . import utils
+
+logger = logging.getLogger(__name__)
+
+# Probe kinds
+AUDIO_DEVICES = "audio_devices"
+MPD_STATUS = "mpd_status"
+
+NETLINK_KOBJECT_UEVENT = 15
+UEVENT_AVAILABLE = hasattr(socket, "AF_NETLINK")
+
+
+class UeventSource:
+    """
+    Event source backed by kernel uevents (the netlink messages udev consumes).
+
+    Reports AUDIO_DEVICES whenever a device in the "sound" subsystem is added,
+    removed or changed, e.g. when a USB DAC is plugged in.
+    """
+
+    def __init__(self):
+        """Initialize the uevent source."""
+        if not UEVENT_AVAILABLE:
+            raise OSError("netlink is not available on this platform")
+        self.sock: Optional[socket.socket] = None
+
+    def start(self) -> None:
+        """Open the netlink socket and join the kernel uevent group."""
+        self.sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, NETLINK_KOBJECT_UEVENT)
+        self.sock.bind((0, 1))
+
+    def close(self) -> None:
+        """Close the netlink socket."""
+        if self.sock:
+            self.sock.close()
+            self.sock = None
+
+    def read(self, timeout: float) -> List[str]:
+        """
+        Wait for uevents and return the probe kinds they affect.
+
+        Args:
+            timeout (float): Maximum time to wait in seconds
+
+        Returns:
+            List[str]: Affected probe kinds
+        """
+        self.sock.settimeout(timeout)
+        kinds = set()
+        try:
+            while True:
+                data = self.sock.recv(16 * 1024)
+                fields = data.split(b"\0")
+                if b"SUBSYSTEM=sound" in fields:
+                    kinds.add(AUDIO_DEVICES)
+                # Drain whatever else is already queued without waiting again
+                self.sock.settimeout(0)
+        except (socket.timeout, BlockingIOError):
+            pass
+        return sorted(kinds)
+
+
+class ManualEventSource:
+    """
+    Event source fed by the application.
+
+    Stand-in for platforms without netlink, and for tests; call ``trigger``
+    to report a change.
+    """
+
+    def __init__(self):
+        """Initialize the manual event source."""
+        self._events: "queue.Queue[str]" = queue.Queue()
+
+    def start(self) -> None:
+        """Nothing to start."""
+
+    def close(self) -> None:
+        """Wake up a pending read."""
+        self._events.put("")
+
+    def trigger(self, kind: str) -> None:
+        """
+        Report a change.
+
+        Args:
+            kind (str): Probe kind that changed
+        """
+        self._events.put(kind)
+
+    def read(self, timeout: float) -> List[str]:
+        """
+        Wait for triggered changes.
+
+        Args:
+            timeout (float): Maximum time to wait in seconds
+
+        Returns:
+            List[str]: Changed probe kinds
+        """
+        kinds = set()
+        try:
+            kinds.add(self._events.get(timeout=timeout))
+            while True:
+                kinds.add(self._events.get_nowait())
+        except queue.Empty:
+            pass
+        kinds.discard("")
+        return sorted(kinds)
+
+
+def create_event_source():
+    """
+    Create the best available event source.
+
+    Returns:
+        UeventSource if netlink is available, ManualEventSource otherwise
+    """
+    if UEVENT_AVAILABLE:
+        return UeventSource()
+    logger.info("netlink not available, hot-plug events must be triggered manually")
+    return ManualEventSource()
+
+
+class SystemProbe:
+    """
+    Cached view of the audio devices and the MPD service state.
+
+    Reads happen at most once per ``ttl`` seconds per kind, or when the event
+    source reports a change. Once started, the background thread re-reads
+    each kind when its value expires, unless ``poll`` is off. Listeners are
+    called with ``(kind, value)`` only when a refreshed value differs from
+    the cached one.
+    """
+
+    def __init__(self, ttl: float = 30.0, event_source=None,
+                 readers: Optional[Dict[str, Callable[[], Any]]] = None, poll: bool = True):
+        """
+        Initialize the system probe.
+
+        Args:
+            ttl (float, optional): Seconds a cached value stays valid. Defaults to 30.0.
+            event_source (optional): Event source. Defaults to create_event_source().
+            readers (Optional[Dict[str, Callable[[], Any]]], optional): Reader per probe kind.
+                Defaults to utils.get_audio_devices and utils.check_mpd_status.
+            poll (bool, optional): Re-read expired values in the background thread.
+                Defaults to True.
+        """
+        self.ttl = ttl
+        self.poll = poll
+        self.event_source = event_source
+        self.readers = readers or {
+            AUDIO_DEVICES: utils.get_audio_devices,
+            MPD_STATUS: utils.check_mpd_status
+        }
+
+        self._values: Dict[str, Tuple[float, Any]] = {}
+        self._listeners: List[Callable[[str, Any], None]] = []
+        self._lock = threading.Lock()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> bool:
+        """
+        Start listening for change events in a background thread.
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        if self._running:
+            return True
+
+        try:
+            if self.event_source is None:
+                self.event_source = create_event_source()
+            self.event_source.start()
+        except Exception as e:
+            logger.error(f"Failed to start system probe events: {e}")
+            return False
+
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="system-probe", daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self) -> None:
+        """Stop listening for change events."""
+        self._running = False
+        if self._thread and self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2.0)
+        self._thread = None
+        if self.event_source:
+            self.event_source.close()
+
+    def add_listener(self, callback: Callable[[str, Any], None]) -> None:
+        """
+        Register a change listener.
+
+        Args:
+            callback (Callable[[str, Any], None]): Called with the probe kind and new value
+        """
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback: Callable[[str, Any], None]) -> None:
+        """
+        Unregister a change listener.
+
+        Args:
+            callback (Callable[[str, Any], None]): Previously registered callback
+        """
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def get(self, kind: str) -> Any:
+        """
+        Get a probe value, reading it only if the cached value has expired.
+
+        Args:
+            kind (str): Probe kind
+
+        Returns:
+            Any: Cached or freshly read value
+        """
+        with self._lock:
+            cached = self._values.get(kind)
+        if cached is not None and time.monotonic() - cached[0] < self.ttl:
+            return cached[1]
+        return self.refresh(kind)
+
+    def get_audio_devices(self) -> List[Dict[str, str]]:
+        """
+        Get available audio devices.
+
+        Returns:
+            List[Dict[str, str]]: List of audio devices
+        """
+        return self.get(AUDIO_DEVICES)
+
+    def get_mpd_status(self) -> Tuple[bool, str]:
+        """
+        Get the MPD service state.
+
+        Returns:
+            Tuple[bool, str]: (is_running, status_message)
+        """
+        return self.get(MPD_STATUS)
+
+    def invalidate(self, kind: Optional[str] = None) -> None:
+        """
+        Drop a cached value, or all of them, so the next get reads again.
+
+        Args:
+            kind (Optional[str], optional): Probe kind. Defaults to None (all kinds).
+        """
+        with self._lock:
+            if kind is None:
+                self._values.clear()
+            else:
+                self._values.pop(kind, None)
+
+    def refresh(self, kind: str) -> Any:
+        """
+        Read a probe value now and notify listeners if it changed.
+
+        Args:
+            kind (str): Probe kind
+
+        Returns:
+            Any: Fresh value
+        """
+        value = self.readers[kind]()
+
+        with self._lock:
+            previous = self._values.get(kind)
+            self._values[kind] = (time.monotonic(), value)
+
+        if previous is not None and previous[1] != value:
+            for listener in list(self._listeners):
+                try:
+                    listener(kind, value)
+                except Exception as e:
+                    logger.error(f"Error in system probe listener: {e}")
+
+        return value
+
+    def _expired(self) -> List[str]:
+        """Get the kinds whose value has expired or was never read."""
+        now = time.monotonic()
+        with self._lock:
+            return [
+                kind for kind in self.readers
+                if kind not in self._values or now - self._values[kind][0] >= self.ttl
+            ]
+
+    def _run(self) -> None:
+        """Event loop refreshing the kinds reported by the event source, and expired ones."""
+        while self._running:
+            try:
+                for kind in self.event_source.read(min(1.0, self.ttl)):
+                    if kind in self.readers:
+                        self.refresh(kind)
+                if self.poll:
+                    for kind in self._expired():
+                        self.refresh(kind)
+            except Exception as e:
+                if not self._running:
+                    break
+                logger.error(f"Error in system probe: {e}")
+                time.sleep(1.0)
@@ -0,0 +1,209 @@
+"""
+Queue diffing for the player module.
+
+Computes the minimal set of MPD queue edits (deleteid, addid, moveid) that
+turn the current queue into a target list of files, so that a new playlist
+can be applied without clearing the queue and interrupting playback. When
+most of the queue would have to move, the queue is rebuilt instead around
+the current song (delete ranges, then addid).
+"""
+
+from bisect import bisect_left
+from collections import defaultdict, deque
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+
+@dataclass
+class QueueOp:
+    """A single queue edit: ("deleteid", id), ("delete", "start:end"), ("addid", file, pos) or ("moveid", id, pos)."""
+    command: str
+    arg: Union[str, int]
+    pos: Optional[int] = None
+
+    def args(self) -> Tuple:
+        """Arguments to pass to the MPD command."""
+        return (self.arg,) if self.pos is None else (self.arg, self.pos)
+
+
+def _longest_increasing_subsequence(values: Sequence[int]) -> List[int]:
+    """
+    Find the indices of a longest strictly increasing subsequence.
+
+    Args:
+        values (Sequence[int]): Values
+
+    Returns:
+        List[int]: Indices into values, in increasing order
+    """
+    tails: List[int] = []
+    tail_indices: List[int] = []
+    previous = [-1] * len(values)
+
+    for i, value in enumerate(values):
+        k = bisect_left(tails, value)
+        if k == len(tails):
+            tails.append(value)
+            tail_indices.append(i)
+        else:
+            tails[k] = value
+            tail_indices[k] = i
+        previous[i] = tail_indices[k - 1] if k else -1
+
+    result = []
+    i = tail_indices[-1] if tail_indices else -1
+    while i >= 0:
+        result.append(i)
+        i = previous[i]
+    return result[::-1]
+
+
+class _PositionTree:
+    """Fenwick tree counting occupied slots, for queue positions in O(log n)."""
+
+    def __init__(self, size: int):
+        self._tree = [0] * (size + 1)
+
+    def add(self, slot: int, delta: int) -> None:
+        """Occupy (delta=1) or vacate (delta=-1) a slot."""
+        slot += 1
+        while slot < len(self._tree):
+            self._tree[slot] += delta
+            slot += slot & -slot
+
+    def before(self, slot: int) -> int:
+        """Count the occupied slots before a slot."""
+        count = 0
+        while slot > 0:
+            count += self._tree[slot]
+            slot -= slot & -slot
+        return count
+
+
+def rebuild_queue(current: Sequence[Tuple[str, str]], target: Sequence[str],
+                  keep_id: Optional[str] = None) -> List[QueueOp]:
+    """
+    Compute the queue edits that replace the queue with the target list, keeping only the current song.
+
+    Everything but the current song is deleted in at most two ranges and the
+    other target files are added around it, so playback is not interrupted if
+    the current song is in the target.
+
+    Args:
+        current (Sequence[Tuple[str, str]]): (song id, file) for each queue entry, in queue order
+        target (Sequence[str]): Target list of files
+        keep_id (Optional[str], optional): Song id of the current song
+
+    Returns:
+        List[QueueOp]: Queue edits to apply in order
+    """
+    position = next((pos for pos, (song_id, _) in enumerate(current) if song_id == keep_id), None)
+    keep_at = None
+    if position is not None and current[position][1] in target:
+        keep_at = list(target).index(current[position][1])
+
+    if keep_at is None:
+        ops = [QueueOp("delete", f"0:{len(current)}")] if current else []
+        return ops + [QueueOp("addid", file, pos) for pos, file in enumerate(target)]
+
+    ops = []
+    if position + 1 < len(current):
+        ops.append(QueueOp("delete", f"{position + 1}:{len(current)}"))
+    if position > 0:
+        ops.append(QueueOp("delete", f"0:{position}"))
+    ops.extend(QueueOp("addid", file, pos) for pos, file in enumerate(target) if pos != keep_at)
+    return ops
+
+
+def diff_queue(current: Sequence[Tuple[str, str]], target: Sequence[str],
+               keep_id: Optional[str] = None, rebuild_ratio: float = 0.5) -> List[QueueOp]:
+    """
+    Compute the queue edits that turn the current queue into the target list.
+
+    Songs already in the queue are reused wherever their file appears in the
+    target. The reused songs that form a longest increasing run stay where they
+    are; every other reused song is moved exactly once, and missing files are
+    added in place. Operations are ordered so that each position is valid when
+    it is applied. If more than rebuild_ratio of the target would have to be
+    moved, the edits of rebuild_queue are returned instead: MPD moves cost as
+    much as adds, and rebuilding needs no diff.
+
+    Args:
+        current (Sequence[Tuple[str, str]]): (song id, file) for each queue entry, in queue order
+        target (Sequence[str]): Target list of files
+        keep_id (Optional[str], optional): Song id to prefer when a file appears more than
+            once, typically the current song, so it is kept rather than deleted
+        rebuild_ratio (float, optional): Fraction of the target that may be moved before the
+            queue is rebuilt instead. Defaults to 0.5.
+
+    Returns:
+        List[QueueOp]: Queue edits to apply in order
+    """
+    # Match target positions to existing songs with the same file
+    candidates: Dict[str, deque] = defaultdict(deque)
+    for song_id, file in current:
+        if song_id == keep_id:
+            candidates[file].appendleft(song_id)
+        else:
+            candidates[file].append(song_id)
+
+    matched: List[Optional[str]] = []
+    for file in target:
+        ids = candidates.get(file)
+        matched.append(ids.popleft() if ids else None)
+
+    target_index = {song_id: j for j, song_id in enumerate(matched) if song_id is not None}
+
+    ops = [QueueOp("deleteid", song_id) for song_id, _ in current if song_id not in target_index]
+
+    # Kept songs in queue order, and which of them can stay put
+    kept = [song_id for song_id, _ in current if song_id in target_index]
+    stable = {kept[i] for i in _longest_increasing_subsequence([target_index[song_id] for song_id in kept])}
+
+    if len(kept) - len(stable) > rebuild_ratio * len(target):
+        return rebuild_queue(current, target, keep_id)
+
+    # Every song is placed right after its predecessor in the target, which
+    # is already final by then, so the queue order over time is a fixed order
+    # of slots: the kept songs' original slots, each stable song followed by
+    # the new slots of the placed run after it. A Fenwick tree over the
+    # occupied slots then gives each position in O(log n).
+    keys = [song_id if song_id is not None else ("new", j) for j, song_id in enumerate(matched)]
+    new_slot: Dict[int, int] = {}
+    old_slot: Dict[str, int] = {}
+    order = 0
+
+    def place_run(j: int) -> None:
+        nonlocal order
+        while j < len(keys) and keys[j] not in stable:
+            new_slot[j] = order
+            order += 1
+            j += 1
+
+    place_run(0)
+    following = {song_id: j + 1 for j, song_id in enumerate(matched) if song_id in stable}
+    for song_id in kept:
+        old_slot[song_id] = order
+        order += 1
+        if song_id in stable:
+            place_run(following[song_id])
+
+    tree = _PositionTree(order)
+    for slot in old_slot.values():
+        tree.add(slot, 1)
+
+    for j, key in enumerate(keys):
+        if key in stable:
+            continue
+
+        if key in target_index:
+            tree.add(old_slot[key], -1)
+        pos = tree.before(new_slot[j])
+        tree.add(new_slot[j], 1)
+
+        if key in target_index:
+            ops.append(QueueOp("moveid", key, pos))
+        else:
+            ops.append(QueueOp("addid", target[j], pos))
+
+    return ops
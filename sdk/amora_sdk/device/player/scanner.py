@@ -0,0 +1,131 @@
+"""
+Directory scanning utilities for the player module.
+
+Provides a parallel, streaming walker for music directories. Subtrees are
+listed concurrently on a thread pool, which hides per-directory latency on
+network-mounted and SD-card storage, and results are yielded as soon as each
+directory has been listed.
+"""
+
+import os
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MUSIC_EXTENSIONS = (".mp3", ".flac", ".ogg", ".m4a", ".wav")
+
+DEFAULT_MAX_WORKERS = 8
+
+
+@dataclass
+class DirectoryListing:
+    """Music files and subdirectories of a single directory."""
+    rel_dir: str
+    mtime_ns: int
+    files: Dict[str, Optional[Tuple[int, int, int]]] = field(default_factory=dict)
+    subdirs: List[str] = field(default_factory=list)
+
+
+def list_directory(root: str, rel_dir: str = "", with_stat: bool = True) -> Optional[DirectoryListing]:
+    """
+    List the music files and subdirectories of a directory with ``os.scandir``.
+
+    Args:
+        root (str): Root music directory
+        rel_dir (str, optional): Directory relative to the root. Defaults to the root itself.
+        with_stat (bool, optional): Stat each music file for (size, mtime_ns, inode).
+            Defaults to True. When False, file values are None.
+
+    Returns:
+        Optional[DirectoryListing]: Directory listing, or None if the directory cannot be read
+    """
+    abs_dir = os.path.join(root, rel_dir) if rel_dir else root
+
+    try:
+        listing = DirectoryListing(rel_dir=rel_dir, mtime_ns=os.stat(abs_dir).st_mtime_ns)
+
+        with os.scandir(abs_dir) as entries:
+            for entry in entries:
+                rel_path = os.path.join(rel_dir, entry.name) if rel_dir else entry.name
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        listing.subdirs.append(rel_path)
+                    elif entry.name.lower().endswith(MUSIC_EXTENSIONS) and entry.is_file():
+                        if with_stat:
+                            st = entry.stat()
+                            listing.files[rel_path] = (st.st_size, st.st_mtime_ns, st.st_ino)
+                        else:
+                            listing.files[rel_path] = None
+                except OSError as e:
+                    logger.warning(f"Cannot stat {entry.path}: {e}")
+    except OSError as e:
+        logger.error(f"Error scanning music directory {abs_dir}: {e}")
+        return None
+
+    return listing
+
+
+def walk_directories(root: str, max_workers: int = DEFAULT_MAX_WORKERS,
+                     max_in_flight: Optional[int] = None,
+                     with_stat: bool = True) -> Iterator[DirectoryListing]:
+    """
+    Walk a directory tree in parallel, yielding each directory as it is listed.
+
+    Directories are yielded in completion order, not in tree order. Closing the
+    generator early cancels any listings that have not started yet.
+
+    Args:
+        root (str): Root music directory
+        max_workers (int, optional): Number of worker threads. Defaults to 8.
+        max_in_flight (Optional[int], optional): Maximum number of concurrent ``scandir``
+            calls. Defaults to twice the number of workers.
+        with_stat (bool, optional): Stat each music file. Defaults to True.
+
+    Yields:
+        DirectoryListing: Listing of each readable directory in the tree
+    """
+    max_workers = max(1, max_workers)
+    max_in_flight = max(1, max_in_flight or max_workers * 2)
+
+    backlog = deque([""])
+    pending = set()
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="music-scan")
+
+    try:
+        while backlog or pending:
+            while backlog and len(pending) < max_in_flight:
+                pending.add(executor.submit(list_directory, root, backlog.popleft(), with_stat))
+
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                listing = future.result()
+                if listing is None:
+                    continue
+                backlog.extend(listing.subdirs)
+                yield listing
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+
+def iter_music_files(root: str, max_workers: int = DEFAULT_MAX_WORKERS,
+                     max_in_flight: Optional[int] = None) -> Iterator[str]:
+    """
+    Stream the music files under a directory using a parallel walk.
+
+    Args:
+        root (str): Root music directory
+        max_workers (int, optional): Number of worker threads. Defaults to 8.
+        max_in_flight (Optional[int], optional): Maximum number of concurrent ``scandir``
+            calls. Defaults to twice the number of workers.
+
+    Yields:
+        str: Music file paths relative to the root directory
+    """
+    for listing in walk_directories(root, max_workers, max_in_flight, with_stat=False):
+        yield from listing.files
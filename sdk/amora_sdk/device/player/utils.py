@@ -7,25 +7,32 @@ import logging
 import subprocess
 from typing import List, Dict, Any, Optional, Tuple
 
+from .scanner import MUSIC_EXTENSIONS, iter_music_files
+from .playlist_io import write_m3u
+
 logger = logging.getLogger(__name__)
 
-def scan_music_directory(directory: str) -> List[str]:
+def scan_music_directory(directory: str, max_workers: Optional[int] = None) -> List[str]:
     """
     Scan a directory for music files.
     
     Args:
         directory (str): Directory to scan
+        max_workers (Optional[int], optional): Walk subtrees in parallel with this many
+            threads. Defaults to None (sequential walk).
         
     Returns:
         List[str]: List of music files
     """
-    music_extensions = [".mp3", ".flac", ".ogg", ".m4a", ".wav"]
     music_files = []
     
     try:
+        if max_workers:
+            return list(iter_music_files(directory, max_workers=max_workers))
+
         for root, _, files in os.walk(directory):
             for file in files:
-                if any(file.lower().endswith(ext) for ext in music_extensions):
+                if file.lower().endswith(MUSIC_EXTENSIONS):
                     rel_path = os.path.relpath(os.path.join(root, file), directory)
                     music_files.append(rel_path)
     except Exception as e:
@@ -52,10 +59,7 @@ def create_playlist_file(playlist_name: str, files: List[str], playlists_dir: st
         # Create the playlist file
         playlist_path = os.path.join(playlists_dir, f"{playlist_name}.m3u")
         
-        with open(playlist_path, "w") as f:
-            f.write("#EXTM3U\n")
-            for file in files:
-                f.write(f"{file}\n")
+        write_m3u(playlist_path, files)
         
         logger.info(f"Created playlist file: {playlist_path}")
         return playlist_path
@@ -0,0 +1,472 @@
+"""
+Library watcher for AmoraSDK Device.
+
+Watches the music directory for changes and asks MPD to rescan only the
+directories that changed, instead of triggering a full database update.
+"""
+
+import os
+import ctypes
+import ctypes.util
+import errno
+import logging
+import select
+import struct
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from mpd import MPDClient
+
+from .library import LibraryIndex
+
+logger = logging.getLogger(__name__)
+
+# inotify event masks (see inotify(7))
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+def _load_libc():
+    """Load libc if it provides the inotify API."""
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+_libc = _load_libc()
+INOTIFY_AVAILABLE = _libc is not None
+
+
+class InotifyEventSource:
+    """
+    Event source backed by Linux inotify.
+
+    Every directory below the root gets a watch; directories created later are
+    watched as they appear. Each event is reported as the directory (relative
+    to the root) in which it happened.
+    """
+
+    def __init__(self, root: str):
+        """
+        Initialize the inotify event source.
+
+        Args:
+            root (str): Root directory to watch
+        """
+        if not INOTIFY_AVAILABLE:
+            raise OSError("inotify is not available on this platform")
+
+        self.root = root
+        self.fd = -1
+        self._watches: Dict[int, str] = {}
+
+    def start(self) -> None:
+        """Create the inotify instance and watch the whole tree."""
+        self.fd = _libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self._watch_tree("")
+        logger.info(f"Watching {len(self._watches)} directories under {self.root}")
+
+    def close(self) -> None:
+        """Close the inotify instance."""
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+        self._watches.clear()
+
+    def _watch_tree(self, rel_dir: str) -> None:
+        """
+        Add watches for a directory and all its subdirectories.
+
+        Args:
+            rel_dir (str): Directory relative to the root
+        """
+        for dir_path, dir_names, _ in os.walk(os.path.join(self.root, rel_dir) if rel_dir else self.root):
+            wd = _libc.inotify_add_watch(self.fd, os.fsencode(dir_path), WATCH_MASK | IN_ONLYDIR)
+            if wd < 0:
+                err = ctypes.get_errno()
+                if err == errno.ENOSPC:
+                    logger.error("inotify watch limit reached; raise fs.inotify.max_user_watches")
+                    return
+                logger.warning(f"Cannot watch {dir_path}: {os.strerror(err)}")
+                dir_names[:] = []
+                continue
+            rel_path = os.path.relpath(dir_path, self.root)
+            self._watches[wd] = "" if rel_path == "." else rel_path
+
+    def _unwatch_tree(self, rel_dir: str) -> None:
+        """
+        Remove the watches of a directory and all its subdirectories.
+
+        Args:
+            rel_dir (str): Directory relative to the root
+        """
+        prefix = rel_dir + "/"
+        for wd, path in list(self._watches.items()):
+            if path == rel_dir or path.startswith(prefix):
+                _libc.inotify_rm_watch(self.fd, wd)
+                del self._watches[wd]
+
+    def read(self, timeout: float) -> List[str]:
+        """
+        Wait for events and return the directories they happened in.
+
+        Args:
+            timeout (float): Maximum time to wait in seconds
+
+        Returns:
+            List[str]: Changed directories relative to the root; the root itself is ""
+        """
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        changed: Set[str] = set()
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _, name_len = _EVENT_HEADER.unpack_from(data, offset)
+            name = data[offset + _EVENT_HEADER.size:offset + _EVENT_HEADER.size + name_len].rstrip(b"\0")
+            offset += _EVENT_HEADER.size + name_len
+
+            if mask & IN_Q_OVERFLOW:
+                # Events were dropped; the only safe answer is the whole tree
+                changed.add("")
+                continue
+
+            if mask & IN_IGNORED:
+                self._watches.pop(wd, None)
+                continue
+
+            rel_dir = self._watches.get(wd)
+            if rel_dir is None:
+                continue
+
+            if mask & IN_DELETE_SELF:
+                # The parent directory reports the deletion as well
+                continue
+
+            changed.add(rel_dir)
+
+            if mask & IN_ISDIR:
+                child = os.path.join(rel_dir, os.fsdecode(name)) if rel_dir else os.fsdecode(name)
+                if mask & IN_MOVED_FROM:
+                    # Watches follow the moved directory, so they would report under its old path
+                    self._unwatch_tree(child)
+                elif mask & (IN_CREATE | IN_MOVED_TO):
+                    self._watch_tree(child)
+
+        return sorted(changed)
+
+
+class PollingEventSource:
+    """
+    Event source that periodically rescans a LibraryIndex.
+
+    Stand-in for platforms or filesystems without inotify (e.g. network mounts),
+    which only re-lists directories whose mtime changed between polls.
+    """
+
+    def __init__(self, root: str, interval: float = 30.0, index: Optional[LibraryIndex] = None):
+        """
+        Initialize the polling event source.
+
+        Args:
+            root (str): Root directory to watch
+            interval (float, optional): Seconds between scans. Defaults to 30.0.
+            index (Optional[LibraryIndex], optional): Index to scan. Defaults to an in-memory index.
+        """
+        self.root = root
+        self.interval = interval
+        self.index = index if index is not None else LibraryIndex(root)
+        self._owns_index = index is None
+        self._next_scan = 0.0
+        self._closed = threading.Event()
+
+    def start(self) -> None:
+        """Prime the index so that the first poll only reports real changes."""
+        if len(self.index) == 0:
+            self.index.scan()
+        self._next_scan = time.monotonic() + self.interval
+
+    def close(self) -> None:
+        """Stop polling."""
+        self._closed.set()
+        if self._owns_index:
+            self.index.close()
+
+    def read(self, timeout: float) -> List[str]:
+        """
+        Wait until the next scan is due (or the timeout expires) and report changes.
+
+        Args:
+            timeout (float): Maximum time to wait in seconds
+
+        Returns:
+            List[str]: Changed directories relative to the root; the root itself is ""
+        """
+        wait_time = self._next_scan - time.monotonic()
+        if wait_time > 0:
+            if self._closed.wait(min(timeout, wait_time)) or wait_time > timeout:
+                return []
+
+        self._next_scan = time.monotonic() + self.interval
+        result = self.index.scan()
+        return sorted({self._existing_parent(path) for path in result.added + result.removed + result.changed})
+
+    def _existing_parent(self, path: str) -> str:
+        """
+        Get the nearest directory above a file that still exists.
+
+        A removed file's directory may have been removed with it; the update
+        then has to cover the nearest surviving ancestor.
+
+        Args:
+            path (str): File path relative to the root
+
+        Returns:
+            str: Directory relative to the root; the root itself is ""
+        """
+        directory = os.path.dirname(path)
+        while directory and not os.path.isdir(os.path.join(self.root, directory)):
+            directory = os.path.dirname(directory)
+        return directory
+
+
+def create_event_source(root: str, poll_interval: float = 30.0):
+    """
+    Create the best available event source for a directory.
+
+    Args:
+        root (str): Root directory to watch
+        poll_interval (float, optional): Poll interval for the polling fallback. Defaults to 30.0.
+
+    Returns:
+        InotifyEventSource if inotify is available, PollingEventSource otherwise
+    """
+    if INOTIFY_AVAILABLE:
+        return InotifyEventSource(root)
+    logger.info("inotify not available, falling back to polling")
+    return PollingEventSource(root, poll_interval)
+
+
+def collapse_paths(paths: Iterable[str]) -> List[str]:
+    """
+    Reduce a set of directories to the minimal set of covering ancestors.
+
+    Args:
+        paths (Iterable[str]): Directories relative to the root; "" is the root
+
+    Returns:
+        List[str]: Sorted directories with no entry below another
+    """
+    result: List[str] = []
+    for path in sorted(set(paths)):
+        if path == "":
+            return [""]
+        if result and (path == result[-1] or path.startswith(result[-1] + "/")):
+            continue
+        result.append(path)
+    return result
+
+
+class LibraryWatcher:
+    """
+    Debounced filesystem watcher that issues targeted MPD database updates.
+
+    Bursts of events (e.g. copying an album) are collected until no new event
+    has arrived for ``debounce`` seconds, or ``max_delay`` seconds have passed
+    since the first one, and then collapsed into as few ``update <path>`` calls
+    as possible. Updates are sent on a connection of the watcher's own, as
+    the player's MPD client is not thread-safe.
+    """
+
+    def __init__(self, player, music_dir: str, event_source=None, debounce: float = 1.0,
+                 max_delay: float = 10.0, max_paths: int = 32,
+                 on_update: Optional[Callable[[List[str]], None]] = None,
+                 client_factory: Optional[Callable[[], Any]] = None):
+        """
+        Initialize the library watcher.
+
+        Args:
+            player: MusicPlayer instance
+            music_dir (str): Music directory, as configured for MPD
+            event_source (optional): Event source. Defaults to create_event_source(music_dir).
+            debounce (float, optional): Quiet period in seconds before updating. Defaults to 1.0.
+            max_delay (float, optional): Maximum seconds to defer an update. Defaults to 10.0.
+            max_paths (int, optional): Above this many directories, run a full update instead.
+                Defaults to 32.
+            on_update (Optional[Callable[[List[str]], None]], optional): Called with the updated
+                paths after each flush. A full update is reported as [""].
+            client_factory (Optional[Callable[[], Any]], optional): Creates the connection
+                updates are sent on. Defaults to MPDClient.
+        """
+        self.player = player
+        self.music_dir = music_dir
+        self.event_source = event_source or create_event_source(music_dir)
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.max_paths = max_paths
+        self.on_update = on_update
+        self.client_factory = client_factory or MPDClient
+
+        self._pending: Set[str] = set()
+        self._first_event = 0.0
+        self._last_event = 0.0
+        self._lock = threading.Lock()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> bool:
+        """
+        Start watching in a background thread.
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        if self._running:
+            return True
+
+        try:
+            self.event_source.start()
+        except Exception as e:
+            logger.error(f"Failed to start library watcher: {e}")
+            return False
+
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="library-watcher", daemon=True)
+        self._thread.start()
+        logger.info(f"Library watcher started for {self.music_dir}")
+        return True
+
+    def stop(self) -> None:
+        """Stop watching and flush pending changes."""
+        self._running = False
+        if self._thread and self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2.0)
+        self._thread = None
+        self.event_source.close()
+        self.flush()
+        logger.info("Library watcher stopped")
+
+    def add_changes(self, dirs: Iterable[str], now: Optional[float] = None) -> None:
+        """
+        Record changed directories.
+
+        Args:
+            dirs (Iterable[str]): Changed directories relative to the music directory
+            now (Optional[float], optional): Current monotonic time. Defaults to time.monotonic().
+        """
+        dirs = list(dirs)
+        if not dirs:
+            return
+
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if not self._pending:
+                self._first_event = now
+            self._last_event = now
+            self._pending.update(dirs)
+
+    def poll(self, now: Optional[float] = None) -> List[str]:
+        """
+        Flush pending changes if the debounce period has elapsed.
+
+        Args:
+            now (Optional[float], optional): Current monotonic time. Defaults to time.monotonic().
+
+        Returns:
+            List[str]: Paths that were updated, empty if nothing was due
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if not self._pending:
+                return []
+            if now - self._last_event < self.debounce and now - self._first_event < self.max_delay:
+                return []
+        return self.flush()
+
+    def flush(self) -> List[str]:
+        """
+        Issue MPD updates for all pending changes immediately.
+
+        Returns:
+            List[str]: Paths that were updated
+        """
+        with self._lock:
+            paths = collapse_paths(self._pending)
+            self._pending.clear()
+
+        if not paths:
+            return []
+
+        if len(paths) > self.max_paths:
+            paths = [""]
+
+        # Connected per flush: flushes are rare and MPD drops idle connections
+        client = self.client_factory()
+        try:
+            client.connect(self.player.mpd_host, self.player.mpd_port)
+            if paths == [""]:
+                self.player.update_database(client=client)
+            else:
+                for path in paths:
+                    self.player.update_database(path, client=client)
+        except Exception as e:
+            logger.error(f"Failed to issue library update: {e}")
+            self.add_changes(paths)
+            return []
+        finally:
+            try:
+                client.disconnect()
+            except Exception:
+                pass
+
+        logger.info(f"Library update issued for {len(paths)} path(s)")
+
+        if self.on_update:
+            try:
+                self.on_update(paths)
+            except Exception as e:
+                logger.error(f"Error in library update callback: {e}")
+
+        return paths
+
+    def _run(self) -> None:
+        """Main watcher loop."""
+        while self._running:
+            try:
+                timeout = self.debounce if self._pending else 1.0
+                self.add_changes(self.event_source.read(timeout))
+                self.poll()
+            except Exception as e:
+                if not self._running:
+                    break
+                logger.error(f"Error in library watcher: {e}")
+                time.sleep(1.0)
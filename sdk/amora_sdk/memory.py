@@ -0,0 +1,237 @@
+"""
+Memory budget helpers for AmoraSDK.
+
+On a long-running device most of the resident memory growth does not come
+from Python objects. It comes from the C allocator: glibc gives each thread
+that allocates its own malloc arena (up to eight per core), and freed memory
+at the top of those arenas is only returned to the OS when asked to. The
+edge app runs several threads (MQTT network loop, status updates, probes,
+watchers), so its RSS creeps up over a day even when the Python heap is
+flat.
+
+``MemoryBudget`` bundles the counter-measures: it caps the number of arenas,
+freezes the objects created at startup so the cyclic garbage collector stops
+rescanning them, and trims the heap periodically. ``report()`` returns RSS,
+garbage collector and ``tracemalloc`` figures, including the allocation sites
+that grew the most since tracing started, for diagnosing soak runs.
+
+The allocator controls need glibc. Elsewhere they are no-ops and
+``MALLOC_TUNING_AVAILABLE`` is False.
+"""
+
+import ctypes
+import ctypes.util
+import gc
+import logging
+import os
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    _libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6")
+    _mallopt = _libc.mallopt
+    _malloc_trim = _libc.malloc_trim
+    MALLOC_TUNING_AVAILABLE = True
+except (OSError, AttributeError):
+    MALLOC_TUNING_AVAILABLE = False
+
+# mallopt parameter for the maximum number of arenas (malloc.h)
+M_ARENA_MAX = -8
+
+
+def rss_bytes() -> Optional[int]:
+    """
+    Get the resident set size of the process.
+
+    Returns:
+        Optional[int]: Resident memory in bytes, or None if it cannot be read
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+
+    try:
+        import resource
+        # Peak rather than current RSS, in kilobytes on Linux and bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    except (ImportError, OSError):
+        return None
+
+
+def set_arena_max(count: int) -> bool:
+    """
+    Limit the number of malloc arenas.
+
+    Only arenas created after the call are affected, so call it before
+    starting threads.
+
+    Args:
+        count (int): Maximum number of arenas
+
+    Returns:
+        bool: True if the limit was set
+    """
+    if not MALLOC_TUNING_AVAILABLE:
+        return False
+    return _mallopt(M_ARENA_MAX, count) == 1
+
+
+def trim() -> bool:
+    """
+    Return free memory at the top of the malloc heaps to the OS.
+
+    Returns:
+        bool: True if memory was released
+    """
+    if not MALLOC_TUNING_AVAILABLE:
+        return False
+    return _malloc_trim(0) == 1
+
+
+def _take_snapshot() -> tracemalloc.Snapshot:
+    """Take a tracemalloc snapshot without tracemalloc's own allocations."""
+    return tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ))
+
+
+def _format_stat(stat: Any) -> Dict[str, Any]:
+    frame = stat.traceback[0]
+    entry = {"location": f"{frame.filename}:{frame.lineno}", "size": stat.size, "count": stat.count}
+    if hasattr(stat, "size_diff"):
+        entry["size_diff"] = stat.size_diff
+        entry["count_diff"] = stat.count_diff
+    return entry
+
+
+class MemoryBudget:
+    """Memory-budget mode for long-running device processes."""
+
+    def __init__(self, arena_max: int = 2, trim_interval: float = 300.0,
+                 trace: bool = False, trace_frames: int = 1):
+        """
+        Initialize the memory budget.
+
+        Args:
+            arena_max (int, optional): Maximum number of malloc arenas, 0 to keep the default. Defaults to 2.
+            trim_interval (float, optional): Seconds between heap trims, 0 to disable. Defaults to 300.0.
+            trace (bool, optional): Trace Python allocations with tracemalloc. Defaults to False.
+            trace_frames (int, optional): Stack frames stored per traced allocation. Defaults to 1.
+        """
+        self.arena_max = arena_max
+        self.trim_interval = trim_interval
+        self.trace = trace
+        self.trace_frames = trace_frames
+        self.started_at: Optional[float] = None
+        self.last_trim = 0.0
+        self.baseline: Optional[tracemalloc.Snapshot] = None
+        self.baseline_rss: Optional[int] = None
+
+    def start(self) -> None:
+        """Apply the allocator limits and start tracing, before other threads start."""
+        if self.arena_max and not set_arena_max(self.arena_max):
+            logger.debug("Cannot limit malloc arenas on this platform")
+        if self.trace and not tracemalloc.is_tracing():
+            tracemalloc.start(self.trace_frames)
+        self.started_at = self.last_trim = time.monotonic()
+        logger.info("Memory budget mode enabled (arena_max=%s, trim_interval=%s, trace=%s)",
+                    self.arena_max, self.trim_interval, self.trace)
+
+    def freeze(self) -> None:
+        """
+        Mark the end of startup.
+
+        Collects garbage, moves every surviving object to the permanent
+        generation so later collections skip it, and records the baseline
+        that report() compares against.
+        """
+        gc.collect()
+        gc.freeze()
+        trim()
+        if tracemalloc.is_tracing():
+            self.baseline = _take_snapshot()
+        self.baseline_rss = rss_bytes()
+
+    def trim_if_due(self, now: Optional[float] = None) -> bool:
+        """
+        Trim the heap if the trim interval has elapsed.
+
+        Args:
+            now (Optional[float], optional): Current monotonic time. Defaults to now.
+
+        Returns:
+            bool: True if the heap was trimmed
+        """
+        if not self.trim_interval:
+            return False
+        now = time.monotonic() if now is None else now
+        if now - self.last_trim < self.trim_interval:
+            return False
+        self.last_trim = now
+        return trim()
+
+    def report(self, limit: int = 10, group_by: str = "lineno") -> Dict[str, Any]:
+        """
+        Report memory usage.
+
+        Args:
+            limit (int, optional): Number of allocation sites to list. Defaults to 10.
+            group_by (str, optional): tracemalloc grouping, "lineno" or "filename". Defaults to "lineno".
+
+        Returns:
+            Dict[str, Any]: RSS, garbage collector counts and, while tracing,
+            the largest and fastest-growing allocation sites
+        """
+        report = memory_report(limit, group_by, self.baseline)
+        if self.started_at is not None:
+            report["uptime"] = round(time.monotonic() - self.started_at, 1)
+        if self.baseline_rss is not None and report["rss_bytes"] is not None:
+            report["rss_growth_bytes"] = report["rss_bytes"] - self.baseline_rss
+        return report
+
+    def stop(self) -> None:
+        """Stop tracing and unfreeze the startup objects."""
+        if self.trace and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self.baseline = None
+        gc.unfreeze()
+
+
+def memory_report(limit: int = 10, group_by: str = "lineno",
+                  baseline: Optional[tracemalloc.Snapshot] = None) -> Dict[str, Any]:
+    """
+    Report memory usage of the process.
+
+    Args:
+        limit (int, optional): Number of allocation sites to list. Defaults to 10.
+        group_by (str, optional): tracemalloc grouping, "lineno" or "filename". Defaults to "lineno".
+        baseline (Optional[tracemalloc.Snapshot], optional): Snapshot to compare against. Defaults to None.
+
+    Returns:
+        Dict[str, Any]: RSS, garbage collector counts and, while tracemalloc is
+        tracing, traced memory with the largest (and, given a baseline,
+        fastest-growing) allocation sites
+    """
+    report: Dict[str, Any] = {
+        "rss_bytes": rss_bytes(),
+        "gc": {"counts": list(gc.get_count()), "frozen": gc.get_freeze_count()},
+        "tracing": tracemalloc.is_tracing()
+    }
+
+    if tracemalloc.is_tracing():
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = _take_snapshot()
+        top: List[Dict[str, Any]] = [_format_stat(stat) for stat in snapshot.statistics(group_by)[:limit]]
+        report.update(traced_bytes=current, traced_peak_bytes=peak, top=top)
+        if baseline is not None:
+            report["growth"] = [_format_stat(stat) for stat in snapshot.compare_to(baseline, group_by)[:limit]]
+
+    return report
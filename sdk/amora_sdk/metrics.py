@@ -0,0 +1,522 @@
+"""
+Performance metrics for AmoraSDK.
+
+Counters, gauges and log-bucketed latency histograms shared by the SDK hot
+paths (MPD round trips, MQTT publishes, command handling, telemetry). The
+default registry is disabled: every recording call then returns after a
+single flag check, so instrumentation can stay in place in production.
+
+Enable it with ``metrics.enable()``, read it with ``snapshot()`` or export
+it in Prometheus text format through ``render_prometheus()`` or
+``MetricsServer``.
+"""
+
+import math
+import time
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Sub-buckets per power of two in histograms; 3 bits gives ~12.5% resolution
+HISTOGRAM_PRECISION_BITS = 3
+
+# Quantiles reported for histograms
+DEFAULT_QUANTILES = (0.5, 0.9, 0.99)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    """Turn a label dict into a hashable, ordered key."""
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(key: Iterable[Tuple[str, str]]) -> str:
+    """Format labels for the Prometheus text format."""
+    parts = [
+        '{}="{}"'.format(name, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in key
+    ]
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    """Base class for metrics; values are kept per label set."""
+
+    type_name = "untyped"
+
+    def __init__(self, registry: "MetricsRegistry", name: str, description: str = ""):
+        self.registry = registry
+        self.name = name
+        self.description = description
+        self._values: Dict[LabelKey, Any] = {}
+        self._lock = threading.Lock()
+
+    def clear(self) -> None:
+        """Drop all recorded values."""
+        with self._lock:
+            self._values.clear()
+
+    def samples(self) -> List[Tuple[str, LabelKey, float]]:
+        """
+        Get the exported samples.
+
+        Returns:
+            List[Tuple[str, LabelKey, float]]: (sample name, labels, value) per sample
+        """
+        with self._lock:
+            return [(self.name, key, value) for key, value in self._values.items()]
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """
+        Get the current values as plain data.
+
+        Returns:
+            List[Dict[str, Any]]: Labels and value per label set
+        """
+        with self._lock:
+            return [{"labels": dict(key), "value": value} for key, value in self._values.items()]
+
+
+class Counter(_Metric):
+    """Monotonically increasing count."""
+
+    type_name = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        """
+        Increase the counter.
+
+        Args:
+            amount (float, optional): Amount to add. Defaults to 1.
+            **labels: Label values
+        """
+        if not self.registry.enabled:
+            return
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels) -> float:
+        """Get the current count for a label set."""
+        return self._values.get(_label_key(labels), 0)
+
+
+class Gauge(_Metric):
+    """Value that can go up and down."""
+
+    type_name = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        """
+        Set the gauge.
+
+        Args:
+            value (float): New value
+            **labels: Label values
+        """
+        if not self.registry.enabled:
+            return
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        """
+        Increase (or with a negative amount, decrease) the gauge.
+
+        Args:
+            amount (float, optional): Amount to add. Defaults to 1.
+            **labels: Label values
+        """
+        if not self.registry.enabled:
+            return
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels) -> float:
+        """Get the current value for a label set."""
+        return self._values.get(_label_key(labels), 0)
+
+
+class _HistogramData:
+    """Log-linear bucket counts for one label set."""
+
+    __slots__ = ("buckets", "count", "total", "minimum", "maximum")
+
+    def __init__(self):
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.minimum = math.inf
+        self.maximum = 0.0
+
+
+class _NullTimer:
+    """Timer returned while metrics are disabled."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    """Context manager observing the elapsed time into a histogram."""
+
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram: "Histogram", labels: Dict[str, Any]):
+        self.histogram = histogram
+        self.labels = labels
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class Histogram(_Metric):
+    """
+    Latency histogram with HDR-style log-linear buckets.
+
+    Values (seconds) are recorded in microseconds into buckets that split each
+    power of two into ``2 ** HISTOGRAM_PRECISION_BITS`` linear steps, giving a
+    bounded relative error over the whole range with a few dozen buckets and
+    no configuration. Quantiles are read from the bucket counts.
+    """
+
+    type_name = "summary"
+
+    @staticmethod
+    def bucket_index(micros: int) -> int:
+        """
+        Get the bucket index for a value in microseconds.
+
+        Args:
+            micros (int): Value in microseconds
+
+        Returns:
+            int: Bucket index
+        """
+        sub_count = 1 << HISTOGRAM_PRECISION_BITS
+        if micros < 2 * sub_count:
+            return max(micros, 0)
+        shift = micros.bit_length() - 1 - HISTOGRAM_PRECISION_BITS
+        return (shift + 1) * sub_count + (micros >> shift) - sub_count
+
+    @staticmethod
+    def bucket_upper_bound(index: int) -> int:
+        """
+        Get the largest value in microseconds that falls into a bucket.
+
+        Args:
+            index (int): Bucket index
+
+        Returns:
+            int: Inclusive upper bound in microseconds
+        """
+        sub_count = 1 << HISTOGRAM_PRECISION_BITS
+        if index < 2 * sub_count:
+            return index
+        shift = index // sub_count - 1
+        return ((sub_count + index % sub_count + 1) << shift) - 1
+
+    def observe(self, value: float, **labels) -> None:
+        """
+        Record a value.
+
+        Args:
+            value (float): Value in seconds
+            **labels: Label values
+        """
+        if not self.registry.enabled:
+            return
+        index = self.bucket_index(int(value * 1_000_000))
+        key = _label_key(labels)
+        with self._lock:
+            data = self._values.get(key)
+            if data is None:
+                data = self._values[key] = _HistogramData()
+            data.buckets[index] = data.buckets.get(index, 0) + 1
+            data.count += 1
+            data.total += value
+            if value < data.minimum:
+                data.minimum = value
+            if value > data.maximum:
+                data.maximum = value
+
+    def time(self, **labels):
+        """
+        Time a block of code.
+
+        Args:
+            **labels: Label values
+
+        Returns:
+            Context manager that records the elapsed time on exit
+        """
+        if not self.registry.enabled:
+            return _NULL_TIMER
+        return _Timer(self, labels)
+
+    def quantile(self, q: float, **labels) -> Optional[float]:
+        """
+        Estimate a quantile.
+
+        Args:
+            q (float): Quantile between 0 and 1
+            **labels: Label values
+
+        Returns:
+            Optional[float]: Estimated value in seconds, or None without observations
+        """
+        with self._lock:
+            data = self._values.get(_label_key(labels))
+            return self._quantile(data, q) if data else None
+
+    def _quantile(self, data: _HistogramData, q: float) -> float:
+        """Estimate a quantile from bucket counts (caller holds the lock)."""
+        rank = max(1, math.ceil(q * data.count))
+        seen = 0
+        for index in sorted(data.buckets):
+            seen += data.buckets[index]
+            if seen >= rank:
+                return min(self.bucket_upper_bound(index) / 1_000_000, data.maximum)
+        return data.maximum
+
+    def samples(self) -> List[Tuple[str, LabelKey, float]]:
+        with self._lock:
+            result = []
+            for key, data in self._values.items():
+                for q in self.registry.quantiles:
+                    result.append((self.name, key + (("quantile", str(q)),), self._quantile(data, q)))
+                result.append((self.name + "_sum", key, data.total))
+                result.append((self.name + "_count", key, data.count))
+            return result
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [{
+                "labels": dict(key),
+                "count": data.count,
+                "sum": data.total,
+                "min": data.minimum,
+                "max": data.maximum,
+                "quantiles": {str(q): self._quantile(data, q) for q in self.registry.quantiles}
+            } for key, data in self._values.items()]
+
+
+class MetricsRegistry:
+    """Collection of named metrics."""
+
+    def __init__(self, enabled: bool = False, const_labels: Optional[Dict[str, str]] = None,
+                 quantiles: Tuple[float, ...] = DEFAULT_QUANTILES):
+        """
+        Initialize the registry.
+
+        Args:
+            enabled (bool, optional): Whether values are recorded. Defaults to False.
+            const_labels (Optional[Dict[str, str]], optional): Labels added to every exported
+                sample, e.g. {"device_id": ...}. Defaults to None.
+            quantiles (Tuple[float, ...], optional): Quantiles reported for histograms.
+        """
+        self.enabled = enabled
+        self.const_labels = dict(const_labels or {})
+        self.quantiles = quantiles
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, description: str):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(self, name, description)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} already registered as {metric.type_name}")
+            return metric
+
+    def counter(self, name: str, description: str = "") -> Counter:
+        """Get or create a counter."""
+        return self._get_or_create(Counter, name, description)
+
+    def gauge(self, name: str, description: str = "") -> Gauge:
+        """Get or create a gauge."""
+        return self._get_or_create(Gauge, name, description)
+
+    def histogram(self, name: str, description: str = "") -> Histogram:
+        """Get or create a histogram."""
+        return self._get_or_create(Histogram, name, description)
+
+    def reset(self) -> None:
+        """Drop all recorded values, keeping the metrics registered."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            metric.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Get all recorded values as plain data.
+
+        Returns:
+            Dict[str, Any]: Metric type and values per metric name
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {
+            metric.name: {"type": metric.type_name, "values": metric.snapshot()}
+            for metric in metrics
+        }
+
+    def render_prometheus(self) -> str:
+        """
+        Render all metrics in the Prometheus text exposition format.
+
+        Returns:
+            str: Exposition text
+        """
+        const_key = _label_key(self.const_labels)
+        with self._lock:
+            metrics = list(self._metrics.values())
+
+        lines = []
+        for metric in metrics:
+            if metric.description:
+                lines.append(f"# HELP {metric.name} {metric.description}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            for sample_name, key, value in metric.samples():
+                lines.append(f"{sample_name}{_format_labels(const_key + key)} {float(value)!r}")
+        return "\n".join(lines) + "\n"
+
+
+# Default registry used by the SDK
+REGISTRY = MetricsRegistry()
+
+
+def enable(const_labels: Optional[Dict[str, str]] = None) -> None:
+    """
+    Start recording metrics in the default registry.
+
+    Args:
+        const_labels (Optional[Dict[str, str]], optional): Labels added to every exported sample
+    """
+    if const_labels:
+        REGISTRY.const_labels.update(const_labels)
+    REGISTRY.enabled = True
+
+
+def disable() -> None:
+    """Stop recording metrics in the default registry."""
+    REGISTRY.enabled = False
+
+
+def is_enabled() -> bool:
+    """Check whether the default registry records metrics."""
+    return REGISTRY.enabled
+
+
+def counter(name: str, description: str = "") -> Counter:
+    """Get or create a counter in the default registry."""
+    return REGISTRY.counter(name, description)
+
+
+def gauge(name: str, description: str = "") -> Gauge:
+    """Get or create a gauge in the default registry."""
+    return REGISTRY.gauge(name, description)
+
+
+def histogram(name: str, description: str = "") -> Histogram:
+    """Get or create a histogram in the default registry."""
+    return REGISTRY.histogram(name, description)
+
+
+def snapshot() -> Dict[str, Any]:
+    """Get all values of the default registry as plain data."""
+    return REGISTRY.snapshot()
+
+
+def render_prometheus() -> str:
+    """Render the default registry in the Prometheus text format."""
+    return REGISTRY.render_prometheus()
+
+
+class MetricsServer:
+    """
+    Minimal HTTP server exposing a registry at ``/metrics`` for Prometheus.
+    """
+
+    def __init__(self, registry: Optional[MetricsRegistry] = None, host: str = "127.0.0.1", port: int = 9100):
+        """
+        Initialize the metrics server.
+
+        Args:
+            registry (Optional[MetricsRegistry], optional): Registry to expose. Defaults to REGISTRY.
+            host (str, optional): Address to bind. Defaults to "127.0.0.1".
+            port (int, optional): Port to bind; 0 picks a free port. Defaults to 9100.
+        """
+        self.registry = registry or REGISTRY
+        self.host = host
+        self.port = port
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> bool:
+        """
+        Start serving in a background thread.
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.debug("metrics: " + format, *args)
+
+        try:
+            self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        except OSError as e:
+            logger.error(f"Failed to start metrics server on {self.host}:{self.port}: {e}")
+            return False
+
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="metrics-server", daemon=True)
+        self._thread.start()
+        logger.info(f"Metrics server listening on http://{self.host}:{self.port}/metrics")
+        return True
+
+    def stop(self) -> None:
+        """Stop serving."""
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self._thread:
+            self._thread.join(timeout=2.0)
+            self._thread = None
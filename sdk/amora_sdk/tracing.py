@@ -0,0 +1,172 @@
+"""
+Command tracing for AmoraSDK.
+
+Records how long each stage of handling a command takes on the device:
+parsing, the command handler, MPD round trips and publishing the response.
+Combined with the command's own timestamp this separates network delay from
+time spent on the device and in MPD.
+
+The active trace is held in a context variable, so code deeper in the call
+stack (e.g. the MPD client) can add spans without it being passed around.
+When no trace is active, ``span()`` returns a shared no-op context manager.
+"""
+
+import time
+import contextvars
+from typing import Any, Dict, List, Optional, Tuple
+
+_current_trace: "contextvars.ContextVar[Optional[CommandTrace]]" = contextvars.ContextVar(
+    "amora_command_trace", default=None
+)
+
+
+class _NullSpan:
+    """Span returned when no trace is active."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    """Context manager recording one span of a trace."""
+
+    __slots__ = ("trace", "name", "start")
+
+    def __init__(self, trace: "CommandTrace", name: str):
+        self.trace = trace
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.trace.add_span(self.name, self.start, time.perf_counter())
+        return False
+
+
+class CommandTrace:
+    """Timing spans recorded while a device handles one command."""
+
+    __slots__ = ("command_id", "sent_at", "received_at", "origin", "spans")
+
+    def __init__(self, command_id: str, sent_at: Optional[float] = None,
+                 received_at: Optional[float] = None, origin: Optional[float] = None):
+        """
+        Initialize a trace.
+
+        Args:
+            command_id (str): ID of the traced command
+            sent_at (Optional[float], optional): Command timestamp set by the sender, in seconds
+                (or milliseconds, as sent by the TypeScript client). Defaults to None.
+            received_at (Optional[float], optional): Wall-clock receive time. Defaults to now.
+            origin (Optional[float], optional): perf_counter value at receive time. Defaults to now.
+        """
+        self.command_id = command_id
+        self.sent_at = sent_at / 1000.0 if sent_at and sent_at > 1e11 else sent_at
+        self.received_at = time.time() if received_at is None else received_at
+        self.origin = time.perf_counter() if origin is None else origin
+        self.spans: List[Tuple[str, float, float]] = []
+
+    def span(self, name: str) -> _Span:
+        """
+        Record a span around a block of code.
+
+        Args:
+            name (str): Span name
+
+        Returns:
+            Context manager recording the span
+        """
+        return _Span(self, name)
+
+    def add_span(self, name: str, start: float, end: float) -> None:
+        """
+        Add a span measured elsewhere.
+
+        Args:
+            name (str): Span name
+            start (float): perf_counter value at the start
+            end (float): perf_counter value at the end
+        """
+        self.spans.append((name, start, end))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert the trace to plain data, with times in milliseconds.
+
+        Returns:
+            Dict[str, Any]: Command ID, receive time, network delay (when the sender's
+            timestamp is known), total device time and spans relative to receipt
+        """
+        end = max((span_end for _, _, span_end in self.spans), default=self.origin)
+        result = {
+            "command_id": self.command_id,
+            "received_at": self.received_at,
+            "total_ms": round((end - self.origin) * 1000, 3),
+            "spans": [
+                {
+                    "name": name,
+                    "start_ms": round((start - self.origin) * 1000, 3),
+                    "duration_ms": round((span_end - start) * 1000, 3)
+                }
+                for name, start, span_end in self.spans
+            ]
+        }
+        if self.sent_at:
+            result["sent_at"] = self.sent_at
+            result["network_ms"] = round((self.received_at - self.sent_at) * 1000, 3)
+        return result
+
+
+def start_trace(trace: CommandTrace) -> contextvars.Token:
+    """
+    Make a trace the active trace of the current context.
+
+    Args:
+        trace (CommandTrace): Trace to activate
+
+    Returns:
+        contextvars.Token: Token for end_trace
+    """
+    return _current_trace.set(trace)
+
+
+def end_trace(token: contextvars.Token) -> None:
+    """
+    Restore the trace that was active before start_trace.
+
+    Args:
+        token (contextvars.Token): Token returned by start_trace
+    """
+    _current_trace.reset(token)
+
+
+def current_trace() -> Optional[CommandTrace]:
+    """Get the active trace, if any."""
+    return _current_trace.get()
+
+
+def span(name: str):
+    """
+    Record a span in the active trace.
+
+    Args:
+        name (str): Span name
+
+    Returns:
+        Context manager recording the span, or a no-op one without an active trace
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        return _NULL_SPAN
+    return _Span(trace, name)
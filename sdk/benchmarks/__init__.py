@@ -0,0 +1,9 @@
+"""
+Benchmarks for AmoraSDK.
+
+Each module in this package can be run directly with ``python -m benchmarks.<name>``
+from the ``sdk`` directory, or through the runner::
+
+    python -m benchmarks run all --output-dir results/
+    python -m benchmarks compare baseline/broker_stack.json results/broker_stack.json
+"""
@@ -0,0 +1,141 @@
+"""
+Benchmark runner for AmoraSDK.
+
+Usage:
+    python -m benchmarks list
+    python -m benchmarks run NAME [NAME ...] [--output-dir DIR] [-- ARGS]
+    python -m benchmarks compare BASELINE.json CURRENT.json [--threshold 0.1]
+
+``run`` executes benchmark modules and saves each result as
+``<output-dir>/<name>.json``; arguments after ``--`` are passed to every
+benchmark. ``compare`` walks two result files and reports every numeric
+value that changed by more than the threshold (relative).
+"""
+
+import argparse
+import importlib
+import json
+import os
+import pkgutil
+import sys
+from typing import Any, Dict, Iterator, List, Tuple
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def available() -> List[str]:
+    """List the benchmark modules in this package."""
+    return sorted(
+        module.name for module in pkgutil.iter_modules([PACKAGE_DIR])
+        if not module.name.startswith("_")
+    )
+
+
+def flatten(data: Any, prefix: str = "") -> Iterator[Tuple[str, float]]:
+    """
+    Yield every numeric value in a result with its dotted path.
+
+    Args:
+        data: Benchmark result
+        prefix: Path of data within the result
+
+    Yields:
+        (path, value) pairs
+    """
+    if isinstance(data, dict):
+        for key, value in data.items():
+            yield from flatten(value, f"{prefix}.{key}" if prefix else str(key))
+    elif isinstance(data, (int, float)) and not isinstance(data, bool):
+        yield prefix, data
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> List[Dict[str, Any]]:
+    """
+    Compare two benchmark results.
+
+    Args:
+        baseline: Baseline result
+        current: Current result
+        threshold: Minimum relative change to report
+
+    Returns:
+        Changed values with their relative change
+    """
+    old_values = dict(flatten(baseline))
+    changes = []
+    for path, new in flatten(current):
+        old = old_values.get(path)
+        if old is None or old == new:
+            continue
+        change = (new - old) / abs(old) if old else float("inf")
+        if abs(change) >= threshold:
+            changes.append({"path": path, "baseline": old, "current": new, "change": round(change, 4)})
+    return changes
+
+
+def run(names: List[str], output_dir: str, extra_args: List[str]) -> int:
+    """
+    Run benchmark modules.
+
+    Args:
+        names: Benchmark module names
+        output_dir: Directory for the JSON results
+        extra_args: Arguments passed to every benchmark
+
+    Returns:
+        Exit code
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    status = 0
+    for name in names:
+        module = importlib.import_module(f"benchmarks.{name}")
+        output = os.path.join(output_dir, f"{name}.json")
+        print(f"== {name} -> {output}")
+        status = module.main(extra_args + ["--output", output]) or status
+    return status
+
+
+def main(argv=None) -> int:
+    """Run the benchmark CLI."""
+    argv = list(sys.argv[1:] if argv is None else argv)
+    extra_args: List[str] = []
+    if "--" in argv:
+        split = argv.index("--")
+        argv, extra_args = argv[:split], argv[split + 1:]
+
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("list", help="List benchmarks")
+
+    run_parser = commands.add_parser("run", help="Run benchmarks")
+    run_parser.add_argument("names", nargs="+", choices=available() + ["all"], metavar="NAME")
+    run_parser.add_argument("--output-dir", default="benchmark-results", help="Directory for JSON results")
+
+    compare_parser = commands.add_parser("compare", help="Compare two result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.1, help="Relative change to report")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "list":
+        print("\n".join(available()))
+        return 0
+
+    if args.command == "run":
+        names = available() if "all" in args.names else args.names
+        return run(names, args.output_dir, extra_args)
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    changes = compare(baseline, current, args.threshold)
+    print(json.dumps(changes, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
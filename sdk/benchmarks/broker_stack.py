@@ -0,0 +1,366 @@
+"""
+Broker and player stack benchmark.
+
+Simulates a fleet of devices, each a BrokerManager driving a MusicPlayer
+backed by MockMPDClient, and measures at several fleet sizes:
+
+* memory per device (tracemalloc, BrokerManager + MusicPlayer + client),
+* command throughput and end-to-end latency percentiles, from a controller
+  publishing commands through an in-process broker until each response
+  arrives,
+* state publish throughput,
+* raw command dispatch rate without a broker hop (MockMQTTClient).
+
+Usage:
+    python -m benchmarks.broker_stack [--devices 1 100 10000] [--commands 20000] [--in-flight 64] [--output FILE]
+"""
+
+import argparse
+import gc
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from typing import Any, Dict, List, Tuple
+
+# Add the SDK to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from amora_sdk.device.broker.client import MQTTClient
+from amora_sdk.device.broker.config import BrokerConfig, ConnectionOptions, QoS
+from amora_sdk.device.broker.manager import BrokerManager
+from amora_sdk.device.broker.messages import CommandMessage, ResponseMessage
+from amora_sdk.device.broker.topics import TopicType
+from amora_sdk.device.player.music_player import MusicPlayer
+from tests.mocks.inprocess_broker import InProcessBroker
+from tests.mocks.mock_mpd import MockMPDClient
+from tests.mocks.mock_mqtt import MockMQTTClient
+
+TOPIC_PREFIX = "amora/devices"
+
+PLAYER_CONFIG = {
+    "mpd": {"host": "localhost", "port": 6600},
+    "content": {"storage_path": "/tmp/music", "playlists_path": "/tmp/music/playlists"},
+    "audio": {"backend": "pipewire", "device": "default", "volume": 80},
+    "dev_mode": True
+}
+
+# Commands sent round-robin, with their parameters
+COMMAND_MIX = [
+    ("play", {}),
+    ("set_volume", {"volume": 40}),
+    ("get_status", {}),
+    ("pause", {}),
+]
+
+
+def percentiles(values: List[float], points=(50, 90, 99, 99.9)) -> Dict[str, float]:
+    """
+    Compute percentiles of latencies in seconds, reported in milliseconds.
+
+    Args:
+        values: Latencies in seconds
+        points: Percentiles to report
+
+    Returns:
+        Percentile name to milliseconds
+    """
+    if not values:
+        return {}
+    ordered = sorted(values)
+    result = {}
+    for point in points:
+        index = min(len(ordered) - 1, max(0, int(round(point / 100 * len(ordered))) - 1))
+        result[f"p{point:g}"] = round(ordered[index] * 1000, 3)
+    result["max"] = round(ordered[-1] * 1000, 3)
+    return result
+
+
+def create_player() -> MusicPlayer:
+    """Create a MusicPlayer backed by a connected MockMPDClient."""
+    player = MusicPlayer(PLAYER_CONFIG)
+    player.mpd_client = MockMPDClient()
+    player.mpd_client.connect("localhost", 6600)
+    player.connected = True
+    return player
+
+
+def player_handler(player: MusicPlayer, command: str):
+    """Create a command handler calling a player method, as the edge app does."""
+    method = getattr(player, command)
+
+    def handler(command_msg: CommandMessage) -> ResponseMessage:
+        result = method(**(command_msg.params or {}))
+        return ResponseMessage(
+            command_id=command_msg.command_id,
+            result=result is not False,
+            message=f"Command {command} executed",
+            data={"result": result}
+        )
+
+    return handler
+
+
+def create_device(index: int, client) -> Tuple[BrokerManager, MusicPlayer]:
+    """
+    Create one simulated device.
+
+    Args:
+        index: Device number
+        client: Paho-compatible client for the device
+
+    Returns:
+        The device's BrokerManager and MusicPlayer
+    """
+    device_id = f"bench-{index:05d}"
+    config = BrokerConfig(
+        broker_url="localhost",
+        port=1883,
+        client_id=f"device-{device_id}",
+        device_id=device_id,
+        topic_prefix=TOPIC_PREFIX,
+        connection_options=ConnectionOptions(use_tls=False, reconnect_on_failure=False),
+        default_qos=QoS.AT_MOST_ONCE
+    )
+    mqtt_client = MQTTClient(config.client_id, config.broker_url, config.port, config.connection_options, client=client)
+    manager = BrokerManager(config, mqtt_client=mqtt_client)
+    player = create_player()
+    for command, _ in COMMAND_MIX:
+        manager.register_command_handler(command, player_handler(player, command))
+    return manager, player
+
+
+def measure_memory(num_devices: int) -> Dict[str, Any]:
+    """
+    Measure the memory used per device.
+
+    Args:
+        num_devices: Number of devices to create
+
+    Returns:
+        Bytes per device and total
+    """
+    broker = InProcessBroker(synchronous=True)
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+
+    devices = [create_device(i, broker.client(f"device-{i}")) for i in range(num_devices)]
+    for manager, _ in devices:
+        manager.connect()
+
+    gc.collect()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    total = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    return {"total_bytes": total, "bytes_per_device": round(total / num_devices)}
+
+
+def run_round_trips(num_devices: int, num_commands: int, max_in_flight: int = 64) -> Dict[str, Any]:
+    """
+    Send commands through the in-process broker and time each round trip.
+
+    Args:
+        num_devices: Number of devices
+        num_commands: Total number of commands, spread round-robin over devices
+        max_in_flight: Maximum commands awaiting a response
+
+    Returns:
+        Throughput and latency percentiles
+    """
+    broker = InProcessBroker()
+    broker.start()
+
+    devices = [create_device(i, broker.client(f"device-{i}")) for i in range(num_devices)]
+    for manager, _ in devices:
+        manager.connect()
+
+    sent: Dict[str, float] = {}
+    latencies: List[float] = []
+    window = threading.Semaphore(max_in_flight)
+    done = threading.Event()
+
+    def on_response(client, userdata, msg):
+        received = time.perf_counter()
+        command_id = json.loads(msg.payload)["command_id"]
+        start = sent.pop(command_id, None)
+        if start is not None:
+            latencies.append(received - start)
+            window.release()
+            if len(latencies) == num_commands:
+                done.set()
+
+    controller = broker.client("controller")
+    controller.on_message = on_response
+    controller.connect()
+    controller.subscribe(f"{TOPIC_PREFIX}/+/responses")
+
+    command_topics = [manager.topic_manager.get_topic(TopicType.COMMANDS) for manager, _ in devices]
+
+    start = time.perf_counter()
+    for i in range(num_commands):
+        command, params = COMMAND_MIX[i % len(COMMAND_MIX)]
+        command_id = uuid.uuid4().hex
+        payload = CommandMessage(command=command, command_id=command_id, params=params).to_json()
+        window.acquire()
+        sent[command_id] = time.perf_counter()
+        controller.publish(command_topics[i % num_devices], payload)
+    done.wait(timeout=300)
+    elapsed = time.perf_counter() - start
+
+    broker.stop()
+    return {
+        "commands": len(latencies),
+        "seconds": round(elapsed, 4),
+        "commands_per_second": round(len(latencies) / elapsed, 1),
+        "latency_ms": percentiles(latencies)
+    }
+
+
+def run_state_publishes(num_devices: int, num_publishes: int) -> Dict[str, Any]:
+    """
+    Publish state updates from every device and time delivery to a subscriber.
+
+    Args:
+        num_devices: Number of devices
+        num_publishes: Total number of state updates, spread over devices
+
+    Returns:
+        Publish and delivery throughput
+    """
+    broker = InProcessBroker()
+    broker.start()
+
+    devices = [create_device(i, broker.client(f"device-{i}")) for i in range(num_devices)]
+    for manager, _ in devices:
+        manager.connect()
+
+    received = [0]
+    controller = broker.client("controller")
+    controller.on_message = lambda client, userdata, msg: received.__setitem__(0, received[0] + 1)
+    controller.connect()
+    controller.subscribe(f"{TOPIC_PREFIX}/+/state")
+    broker.join()
+    received[0] = 0
+
+    states = [player.get_status() for _, player in devices]
+
+    start = time.perf_counter()
+    for i in range(num_publishes):
+        index = i % num_devices
+        devices[index][0].publish_state(states[index])
+    published = time.perf_counter() - start
+    broker.join()
+    delivered = time.perf_counter() - start
+
+    broker.stop()
+    return {
+        "publishes": num_publishes,
+        "publishes_per_second": round(num_publishes / published, 1),
+        "delivered": received[0],
+        "delivered_per_second": round(received[0] / delivered, 1)
+    }
+
+
+def run_direct_dispatch(num_commands: int) -> Dict[str, Any]:
+    """
+    Dispatch commands straight into one BrokerManager through MockMQTTClient.
+
+    The same few payloads are replayed, so deduplication is off while
+    measuring dispatch; the replay is then repeated with it on to measure
+    duplicates answered from the cache.
+
+    Args:
+        num_commands: Number of commands
+
+    Returns:
+        Dispatch and duplicate throughput
+    """
+    client = MockMQTTClient("device-direct")
+    manager, _ = create_device(0, client)
+    manager.connect()
+    topic = manager.topic_manager.get_topic(TopicType.COMMANDS)
+    payloads = [
+        CommandMessage(command=command, params=params).to_json()
+        for command, params in COMMAND_MIX
+    ]
+
+    dedup_cache, manager.dedup_cache = manager.dedup_cache, None
+    start = time.perf_counter()
+    for i in range(num_commands):
+        client.simulate_message(topic, payloads[i % len(payloads)])
+    elapsed = time.perf_counter() - start
+
+    manager.dedup_cache = dedup_cache
+    for payload in payloads:
+        client.simulate_message(topic, payload)
+    start = time.perf_counter()
+    for i in range(num_commands):
+        client.simulate_message(topic, payloads[i % len(payloads)])
+    duplicates_elapsed = time.perf_counter() - start
+
+    return {
+        "commands": num_commands,
+        "commands_per_second": round(num_commands / elapsed, 1),
+        "duplicates_per_second": round(num_commands / duplicates_elapsed, 1)
+    }
+
+
+def run(device_counts: List[int], num_commands: int, max_in_flight: int = 64) -> Dict[str, Any]:
+    """
+    Run the stack benchmarks for each fleet size.
+
+    Args:
+        device_counts: Fleet sizes
+        num_commands: Commands and state publishes per fleet size
+        max_in_flight: Maximum commands awaiting a response in the round-trip benchmark
+
+    Returns:
+        Benchmark results
+    """
+    results: Dict[str, Any] = {
+        "commands": num_commands,
+        "max_in_flight": max_in_flight,
+        "direct_dispatch": run_direct_dispatch(num_commands),
+        "fleets": {}
+    }
+
+    for count in device_counts:
+        results["fleets"][str(count)] = {
+            "memory": measure_memory(count),
+            "round_trips": run_round_trips(count, max(num_commands, count), max_in_flight),
+            "state_publishes": run_state_publishes(count, max(num_commands, count))
+        }
+
+    return results
+
+
+def main(argv=None) -> int:
+    """Run the benchmark from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--devices", type=int, nargs="+", default=[1, 100, 10_000], help="Fleet sizes")
+    parser.add_argument("--commands", type=int, default=20_000, help="Commands per fleet size")
+    parser.add_argument("--in-flight", type=int, default=64, help="Maximum commands awaiting a response")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    # Per-command info logging would dominate the measurements
+    logging.disable(logging.WARNING)
+
+    results = run(args.devices, args.commands, args.in_flight)
+
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
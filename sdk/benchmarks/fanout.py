@@ -0,0 +1,159 @@
+"""
+Command fan-out benchmark.
+
+Sends one command to every device of a fleet on an in-process broker and
+measures the time until every device has answered, for:
+
+* ``sequential``: the loop a controller had to write before, one command
+  per device, each waiting for its response before the next,
+* ``fanout``: FanOutDispatcher.dispatch without a rate limit and at
+  ``--rate`` commands per second,
+* ``group``: FanOutDispatcher.dispatch_group, one publish to a group topic
+  every device subscribes to.
+
+Usage:
+    python -m benchmarks.fanout [--devices 20000] [--rate 5000] [--output FILE]
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from typing import Any, Dict, List
+
+# Add the SDK to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from amora_sdk.controller import FanOutDispatcher, FanOutSummary, RPCClient
+from amora_sdk.device.broker.client import MQTTClient
+from amora_sdk.device.broker.config import BrokerConfig, ConnectionOptions, QoS
+from amora_sdk.device.broker.manager import BrokerManager
+from amora_sdk.device.broker.messages import CommandMessage, ResponseMessage
+from tests.mocks.inprocess_broker import InProcessBroker
+
+TOPIC_PREFIX = "amora/devices"
+GROUP = "stores"
+
+
+def create_device(broker: InProcessBroker, index: int) -> BrokerManager:
+    """Create and connect one device in the stores group, answering load_playlist."""
+    device_id = f"store-{index:05d}"
+    options = ConnectionOptions(use_tls=False, reconnect_on_failure=False)
+    config = BrokerConfig(broker_url="localhost", port=1883, client_id=f"device-{device_id}", device_id=device_id,
+                          topic_prefix=TOPIC_PREFIX, groups=[GROUP], connection_options=options,
+                          default_qos=QoS.AT_MOST_ONCE, dedup_ttl=0)
+    manager = BrokerManager(config, mqtt_client=MQTTClient(config.client_id, config.broker_url, config.port,
+                                                            options, client=broker.client(config.client_id)))
+    manager.register_command_handler(
+        "load_playlist", lambda msg: ResponseMessage(command_id=msg.command_id, result=True)
+    )
+    manager.connect()
+    return manager
+
+
+def create_rpc(broker: InProcessBroker, timeout: float) -> RPCClient:
+    """Create and connect a controller RPC client."""
+    options = ConnectionOptions(use_tls=False, clean_session=True, reconnect_on_failure=False)
+    config = BrokerConfig(broker_url="localhost", port=1883, client_id="bench-controller",
+                          topic_prefix=TOPIC_PREFIX, connection_options=options, default_qos=QoS.AT_MOST_ONCE)
+    rpc = RPCClient(config, mqtt_client=MQTTClient(config.client_id, config.broker_url, config.port, options,
+                                                   client=broker.client(config.client_id)),
+                    default_timeout=timeout)
+    rpc.connect()
+    return rpc
+
+
+def playlist_command() -> CommandMessage:
+    """The command pushed to every store."""
+    return CommandMessage(command="load_playlist", params={"playlist_name": "Autumn"})
+
+
+def summarise(summary: FanOutSummary, seconds: float, publishes: int) -> Dict[str, Any]:
+    """Results of one fan-out."""
+    return {
+        "seconds": round(seconds, 4),
+        "succeeded": len(summary.succeeded),
+        "timed_out": len(summary.timed_out),
+        "devices_per_second": round(summary.total / seconds, 1),
+        "controller_publishes": publishes
+    }
+
+
+def run_sequential(rpc: RPCClient, device_ids: List[str]) -> Dict[str, Any]:
+    """Send the command to one device at a time, waiting for each response."""
+    start = time.perf_counter()
+    succeeded = 0
+    for device_id in device_ids:
+        succeeded += rpc.send(device_id, playlist_command()).result().result
+    seconds = time.perf_counter() - start
+    return {
+        "seconds": round(seconds, 4),
+        "succeeded": succeeded,
+        "devices_per_second": round(len(device_ids) / seconds, 1),
+        "controller_publishes": len(device_ids)
+    }
+
+
+def run(num_devices: int, rate: float, timeout: float) -> Dict[str, Any]:
+    """
+    Run the benchmark.
+
+    Args:
+        num_devices: Number of devices
+        rate: Commands per second of the rate-limited fan-out
+        timeout: Seconds each device has to answer
+
+    Returns:
+        Results per dispatch strategy
+    """
+    broker = InProcessBroker()
+    broker.start()
+    start = time.perf_counter()
+    device_ids = [create_device(broker, i).config.device_id for i in range(num_devices)]
+    results: Dict[str, Any] = {"devices": num_devices, "setup_seconds": round(time.perf_counter() - start, 2)}
+
+    rpc = create_rpc(broker, timeout)
+    dispatcher = FanOutDispatcher(rpc, rate=rate)
+
+    results["sequential"] = run_sequential(rpc, device_ids)
+
+    for name, fan_rate in (("fanout_unlimited", 0), (f"fanout_{rate:g}_per_second", rate)):
+        start = time.perf_counter()
+        summary = dispatcher.dispatch(playlist_command(), device_ids, rate=fan_rate).result()
+        results[name] = summarise(summary, time.perf_counter() - start, num_devices)
+
+    start = time.perf_counter()
+    summary = dispatcher.dispatch_group(GROUP, playlist_command(), device_ids).result()
+    results["group"] = summarise(summary, time.perf_counter() - start, 1)
+
+    rpc.disconnect()
+    broker.stop()
+    return results
+
+
+def main(argv=None) -> int:
+    """Run the benchmark from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--devices", type=int, default=20_000, help="Number of devices")
+    parser.add_argument("--rate", type=float, default=5000.0, help="Commands per second of the rate-limited fan-out")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds each device has to answer")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    # Per-command info logging would dominate the measurements
+    logging.disable(logging.WARNING)
+
+    results = run(args.devices, args.rate, args.timeout)
+
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,206 @@
+"""
+Fleet state store benchmark.
+
+Ingests state and connection messages for a simulated fleet into a
+FleetStateStore and, for comparison, into a dictionary of StateMessage
+objects per device, then measures:
+
+* ``ingest``: messages per second, one at a time and in batches,
+* ``queries``: latency of typical fleet queries (state counts, filtered
+  device lists, volume statistics), vectorised against a Python loop,
+* ``memory``: bytes per device retained after ingest (tracemalloc).
+
+Usage:
+    python -m benchmarks.fleet_state [--devices 1000 10000 100000] [--repeat 20] [--output FILE]
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Tuple
+
+# Add the SDK to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from amora_sdk.controller.fleet import FleetStateStore
+from amora_sdk.device.broker.messages import StateMessage
+
+TOPIC_PREFIX = "amora/devices"
+STATES = ("play", "pause", "stop")
+
+
+def fleet_messages(num_devices: int, seed: int = 0) -> List[Tuple[str, str]]:
+    """Build one connection and one state message per device."""
+    rng = random.Random(seed)
+    messages = []
+    for i in range(num_devices):
+        device_id = f"device-{i:06d}"
+        status = "online" if rng.random() < 0.9 else "offline"
+        messages.append((f"{TOPIC_PREFIX}/{device_id}/connection",
+                         json.dumps({"status": status, "timestamp": 1000.0 - rng.random() * 600})))
+        song = {"title": f"Song {i}", "artist": "Artist", "album": "Album", "position": rng.random() * 200,
+                "duration": 200.0}
+        state = StateMessage(state=rng.choice(STATES), current_song=song, volume=rng.randint(0, 100),
+                             timestamp=1000.0 - rng.random() * 600)
+        messages.append((f"{TOPIC_PREFIX}/{device_id}/state", state.to_json()))
+    return messages
+
+
+class DictFleet:
+    """Baseline: the latest StateMessage and connection status per device in dictionaries."""
+
+    def __init__(self):
+        self.states: Dict[str, StateMessage] = {}
+        self.online: Dict[str, bool] = {}
+        self.last_seen: Dict[str, float] = {}
+
+    def ingest(self, topic: str, payload: str) -> None:
+        device_id, _, kind = topic[len(TOPIC_PREFIX) + 1:].partition("/")
+        data = json.loads(payload)
+        if kind == "state":
+            self.states[device_id] = StateMessage.from_dict(data)
+            self.last_seen[device_id] = data["timestamp"]
+        else:
+            self.online[device_id] = data["status"] == "online"
+
+    def state_counts(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for state in self.states.values():
+            counts[state.state] = counts.get(state.state, 0) + 1
+        return counts
+
+    def device_ids(self, state: str, online: bool, seen_within: float, now: float) -> List[str]:
+        return [device_id for device_id, message in self.states.items()
+                if message.state == state and self.online.get(device_id) == online
+                and self.last_seen[device_id] >= now - seen_within]
+
+    def volume_stats(self, state: str) -> Dict[str, Any]:
+        volumes = [message.volume for message in self.states.values() if message.state == state]
+        return {"count": len(volumes), "mean": statistics.fmean(volumes), "min": min(volumes), "max": max(volumes)}
+
+
+def time_query(query: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    """Median and best latency of a query in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        query()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {"median_ms": round(statistics.median(samples), 4), "min_ms": round(min(samples), 4)}
+
+
+def measure_ingest(create: Callable[[], Any], ingest: Callable[[Any], None],
+                   num_messages: int) -> Tuple[Any, Dict[str, Any]]:
+    """Ingest into a new store, measuring throughput and the memory retained."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    store = create()
+    ingest(store)
+    elapsed = time.perf_counter() - start
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # Throughput again without tracemalloc overhead
+    start = time.perf_counter()
+    ingest(create())
+    elapsed = time.perf_counter() - start
+    return store, {"messages_per_second": round(num_messages / elapsed, 1), "retained_bytes": retained}
+
+
+def run(device_counts: List[int], repeat: int) -> Dict[str, Any]:
+    """
+    Run the benchmark.
+
+    Args:
+        device_counts: Fleet sizes to measure
+        repeat: Runs per query
+
+    Returns:
+        Results per fleet size
+    """
+    results: Dict[str, Any] = {"repeat": repeat}
+    now = 1000.0
+
+    for num_devices in device_counts:
+        messages = fleet_messages(num_devices)
+
+        def ingest_each(store):
+            for topic, payload in messages:
+                store.ingest(topic, payload)
+
+        columnar, columnar_ingest = measure_ingest(lambda: FleetStateStore(TOPIC_PREFIX, clock=lambda: now),
+                                                   ingest_each, len(messages))
+        _, batch_ingest = measure_ingest(lambda: FleetStateStore(TOPIC_PREFIX, clock=lambda: now),
+                                         lambda store: store.ingest_many(messages), len(messages))
+        baseline, baseline_ingest = measure_ingest(DictFleet, ingest_each, len(messages))
+
+        # Both stores must agree before their timings mean anything
+        expected = baseline.device_ids("play", True, 300, now)
+        assert columnar.device_ids(state="play", online=True, seen_within=300) == expected
+        assert columnar.volume_stats(state="play")["count"] == baseline.volume_stats("play")["count"]
+
+        results[str(num_devices)] = {
+            "messages": len(messages),
+            "ingest": {
+                "columnar": columnar_ingest["messages_per_second"],
+                "columnar_batch": batch_ingest["messages_per_second"],
+                "dict": baseline_ingest["messages_per_second"]
+            },
+            "memory_bytes_per_device": {
+                "columnar": round(columnar_ingest["retained_bytes"] / num_devices, 1),
+                "columnar_columns": round(columnar.memory_bytes / num_devices, 1),
+                "dict": round(baseline_ingest["retained_bytes"] / num_devices, 1)
+            },
+            "queries": {
+                "state_counts": {
+                    "columnar": time_query(columnar.state_counts, repeat),
+                    "dict": time_query(baseline.state_counts, repeat)
+                },
+                "device_ids": {
+                    "matches": len(expected),
+                    "columnar": time_query(
+                        lambda: columnar.device_ids(state="play", online=True, seen_within=300), repeat),
+                    "dict": time_query(lambda: baseline.device_ids("play", True, 300, now), repeat)
+                },
+                "count": {
+                    "columnar": time_query(lambda: columnar.count(state="play", online=True, seen_within=300), repeat),
+                    "dict": time_query(lambda: len(baseline.device_ids("play", True, 300, now)), repeat)
+                },
+                "volume_stats": {
+                    "columnar": time_query(lambda: columnar.volume_stats(state="play"), repeat),
+                    "dict": time_query(lambda: baseline.volume_stats("play"), repeat)
+                }
+            }
+        }
+
+    return results
+
+
+def main(argv=None) -> int:
+    """Run the benchmark from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--devices", type=int, nargs="+", default=[1000, 10_000, 100_000], help="Fleet sizes")
+    parser.add_argument("--repeat", type=int, default=20, help="Runs per query")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.WARNING)
+
+    results = run(args.devices, args.repeat)
+
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
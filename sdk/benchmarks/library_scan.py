@@ -0,0 +1,133 @@
+"""
+Music library scan benchmark.
+
+Builds a synthetic music tree (100k files by default) and compares the
+sequential ``scan_music_directory`` walk, the parallel walker with varying
+worker counts, and the incremental ``LibraryIndex``.
+
+Usage:
+    python -m benchmarks.library_scan [--files 100000] [--workers 1 4 8 16] [--root DIR]
+
+Pass ``--root`` to benchmark an existing tree, e.g. on a network mount or an
+SD card, where parallel walking matters most.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+# Add the SDK to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from amora_sdk.device.player.library import LibraryIndex
+from amora_sdk.device.player.scanner import iter_music_files
+from amora_sdk.device.player.utils import scan_music_directory
+
+
+def build_tree(root: str, num_files: int, files_per_dir: int = 100, dirs_per_artist: int = 10) -> None:
+    """
+    Build a synthetic music tree of empty files.
+
+    Args:
+        root: Root directory
+        num_files: Total number of music files
+        files_per_dir: Music files per album directory
+        dirs_per_artist: Album directories per artist directory
+    """
+    for i in range(num_files):
+        album = i // files_per_dir
+        artist = album // dirs_per_artist
+        album_dir = os.path.join(root, f"artist{artist:04d}", f"album{album:05d}")
+        if i % files_per_dir == 0:
+            os.makedirs(album_dir, exist_ok=True)
+            open(os.path.join(album_dir, "cover.jpg"), "wb").close()
+        open(os.path.join(album_dir, f"track{i:06d}.mp3"), "wb").close()
+
+
+def _timed(func) -> Dict[str, Any]:
+    start = time.perf_counter()
+    count = func()
+    return {"seconds": round(time.perf_counter() - start, 4), "files": count}
+
+
+def run(root: str, workers: List[int]) -> Dict[str, Any]:
+    """
+    Run the scan benchmarks against a tree.
+
+    Args:
+        root: Root directory of the tree
+        workers: Worker counts to benchmark the parallel walker with
+
+    Returns:
+        Benchmark results
+    """
+    results: Dict[str, Any] = {"root": root}
+
+    results["sequential"] = _timed(lambda: len(scan_music_directory(root)))
+
+    results["parallel"] = {}
+    for count in workers:
+        first = {}
+
+        def walk():
+            start = time.perf_counter()
+            total = 0
+            for _ in iter_music_files(root, max_workers=count):
+                if not total:
+                    first["seconds"] = time.perf_counter() - start
+                total += 1
+            return total
+
+        entry = _timed(walk)
+        entry["first_file_seconds"] = round(first.get("seconds", 0.0), 4)
+        results["parallel"][str(count)] = entry
+
+    index_dir = tempfile.mkdtemp(prefix="amora-index-")
+    try:
+        with LibraryIndex(root, os.path.join(index_dir, "library.db")) as index:
+            results["index_first_scan"] = _timed(lambda: len(index.scan(max_workers=max(workers)).added))
+            results["index_rescan"] = _timed(lambda: len(index.scan().added))
+    finally:
+        shutil.rmtree(index_dir)
+
+    return results
+
+
+def main(argv=None) -> int:
+    """Run the benchmark from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=100_000, help="Number of synthetic files")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8, 16], help="Worker counts")
+    parser.add_argument("--root", help="Benchmark an existing tree instead of a synthetic one")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    root = args.root
+    tmp_dir = None
+    if not root:
+        tmp_dir = tempfile.mkdtemp(prefix="amora-scan-")
+        root = tmp_dir
+        print(f"Building synthetic tree with {args.files} files in {root}...")
+        build_tree(root, args.files)
+
+    try:
+        results = run(root, args.workers)
+    finally:
+        if tmp_dir:
+            shutil.rmtree(tmp_dir)
+
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
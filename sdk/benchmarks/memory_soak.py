@@ -0,0 +1,198 @@
+"""
+Memory soak benchmark.
+
+Runs the edge app's steady-state traffic (commands answered by a
+BrokerManager driving a MusicPlayer, plus a state publish per command) in
+several threads, as the edge app spreads work over its MQTT, status and probe
+threads, and samples the process RSS as it goes. A flat RSS after warm-up is
+what a 24 h soak run should show; the slope is reported per million commands.
+
+Each mode runs in a fresh interpreter, since the malloc arena limit only
+applies to arenas created after it is set:
+
+* ``baseline``: default allocator settings,
+* ``budget``: memory-budget mode (``amora_sdk.memory.MemoryBudget``).
+
+Usage:
+    python -m benchmarks.memory_soak [--mode both|baseline|budget] [--commands 200000]
+                                     [--threads 4] [--samples 20] [--output FILE]
+"""
+
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from typing import Any, Dict, List
+
+# Add the SDK to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from amora_sdk import memory
+from amora_sdk.device.broker.messages import CommandMessage
+from amora_sdk.device.broker.topics import TopicType
+from benchmarks.broker_stack import COMMAND_MIX, create_device
+from tests.mocks.inprocess_broker import InProcessBroker
+
+MB = 1024 * 1024
+
+
+def _slope(points: List[List[float]]) -> float:
+    """Least-squares slope of (x, y) points."""
+    if len(points) < 2:
+        return 0.0
+    n = len(points)
+    mean_x = sum(x for x, _ in points) / n
+    mean_y = sum(y for _, y in points) / n
+    var_x = sum((x - mean_x) ** 2 for x, _ in points)
+    if not var_x:
+        return 0.0
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / var_x
+
+
+def run_soak(num_commands: int, num_threads: int, num_samples: int, budget: bool, arena_max: int = 2) -> Dict[str, Any]:
+    """
+    Run the soak in this process.
+
+    Args:
+        num_commands: Total number of commands, spread over threads
+        num_threads: Number of worker threads, each with its own device
+        num_samples: Number of RSS samples
+        budget: Whether to enable memory-budget mode
+        arena_max: Malloc arena limit in budget mode
+
+    Returns:
+        RSS samples and growth figures
+    """
+    memory_budget = memory.MemoryBudget(arena_max=arena_max, trim_interval=0) if budget else None
+    if memory_budget:
+        memory_budget.start()
+
+    per_block = max(1, num_commands // (num_threads * num_samples))
+    barrier = threading.Barrier(num_threads + 1)
+    stop = threading.Event()
+
+    def worker(index: int) -> None:
+        broker = InProcessBroker(synchronous=True)
+        manager, player = create_device(index, broker.client(f"device-{index}"))
+        manager.connect()
+        controller = broker.client("controller")
+        controller.connect()
+        controller.subscribe(manager.topic_manager.get_topic(TopicType.RESPONSES))
+        command_topic = manager.topic_manager.get_topic(TopicType.COMMANDS)
+        sent = 0
+        barrier.wait()
+        while True:
+            barrier.wait()
+            if stop.is_set():
+                return
+            for _ in range(per_block):
+                command, params = COMMAND_MIX[sent % len(COMMAND_MIX)]
+                sent += 1
+                payload = CommandMessage(command=command, command_id=uuid.uuid4().hex, params=params).to_json()
+                controller.publish(command_topic, payload)
+                manager.publish_state(player.get_status())
+            barrier.wait()
+
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(num_threads)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+
+    if memory_budget:
+        memory_budget.freeze()
+
+    samples = []
+    start = time.perf_counter()
+    for block in range(num_samples):
+        barrier.wait()
+        barrier.wait()
+        if memory_budget:
+            memory.trim()
+        commands = (block + 1) * per_block * num_threads
+        samples.append([commands, memory.rss_bytes()])
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    barrier.wait()
+    for thread in threads:
+        thread.join()
+
+    # The first quarter is warm-up: caches fill and the allocator grows its pools
+    steady = samples[len(samples) // 4:]
+    rss = [value for _, value in samples]
+    return {
+        "mode": "budget" if budget else "baseline",
+        "threads": num_threads,
+        "commands": samples[-1][0],
+        "commands_per_second": round(samples[-1][0] / elapsed, 1),
+        "rss_mb": {
+            "first": round(rss[0] / MB, 2),
+            "last": round(rss[-1] / MB, 2),
+            "max": round(max(rss) / MB, 2)
+        },
+        "steady_growth_mb": round((steady[-1][1] - steady[0][1]) / MB, 3),
+        "slope_mb_per_million_commands": round(_slope(steady) * 1e6 / MB, 3),
+        "samples": samples
+    }
+
+
+def run(modes: List[str], num_commands: int, num_threads: int, num_samples: int, arena_max: int) -> Dict[str, Any]:
+    """
+    Run each mode in a fresh interpreter.
+
+    Args:
+        modes: "baseline" and/or "budget"
+        num_commands: Total number of commands per mode
+        num_threads: Number of worker threads
+        num_samples: Number of RSS samples
+        arena_max: Malloc arena limit in budget mode
+
+    Returns:
+        Results per mode
+    """
+    results = {}
+    for mode in modes:
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.memory_soak", "--mode", mode,
+             "--commands", str(num_commands), "--threads", str(num_threads),
+             "--samples", str(num_samples), "--arena-max", str(arena_max)],
+            cwd=os.path.abspath(os.path.join(os.path.dirname(__file__), '..')),
+            capture_output=True, text=True, check=True
+        ).stdout
+        results[mode] = json.loads(output)
+    return results
+
+
+def main(argv=None) -> int:
+    """Run the benchmark from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=["both", "baseline", "budget"], default="both", help="Mode to run")
+    parser.add_argument("--commands", type=int, default=200000, help="Total number of commands")
+    parser.add_argument("--threads", type=int, default=4, help="Worker threads")
+    parser.add_argument("--samples", type=int, default=20, help="RSS samples")
+    parser.add_argument("--arena-max", type=int, default=2, help="Malloc arena limit in budget mode")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.WARNING)
+
+    if args.mode == "both":
+        results = run(["baseline", "budget"], args.commands, args.threads, args.samples, args.arena_max)
+    else:
+        results = run_soak(args.commands, args.threads, args.samples, args.mode == "budget", args.arena_max)
+
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,204 @@
+"""
+MPD protocol benchmark.
+
+Drives the SDK over real TCP sockets against the fake MPD server and
+measures, for each injected server latency:
+
+* command round trip percentiles (``status``) through MPDClientWrapper,
+* ``MusicPlayer.get_status`` latency,
+* a batch of commands sent one by one versus as one command list,
+* fetching the whole queue with ``playlistinfo``,
+
+plus a soak run with injected ACK errors and dropped connections that counts
+how many commands the wrapper's retry logic recovers.
+
+Usage:
+    python -m benchmarks.mpd_protocol [--latency 0 1 5] [--commands 1000] [--songs 1000]
+                                      [--batch 10] [--error-rate 0.01] [--output FILE]
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from typing import Any, Dict, List
+
+# Add the SDK to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from amora_sdk.device.player.mpd_client import MPDClientWrapper
+from amora_sdk.device.player.music_player import MusicPlayer
+from benchmarks.broker_stack import percentiles
+from tests.mocks.fake_mpd_server import FakeMPDServer
+
+
+def create_server(num_songs: int, **options) -> FakeMPDServer:
+    """Start a fake MPD server with a library of num_songs songs, all queued."""
+    server = FakeMPDServer(seed=1, **options).start()
+    for i in range(num_songs):
+        server.add_song(f"artist{i // 100:03d}/album{i // 10:04d}/track{i:05d}.mp3",
+                        Title=f"Track {i}", Artist=f"Artist {i // 100}", Album=f"Album {i // 10}")
+    return server
+
+
+def _timed_calls(func, count: int) -> List[float]:
+    times = []
+    for _ in range(count):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def run_latency(latency_ms: float, num_commands: int, num_songs: int, batch: int) -> Dict[str, Any]:
+    """
+    Measure round trips at one injected server latency.
+
+    Args:
+        latency_ms: Server latency per response in milliseconds
+        num_commands: Commands per measurement
+        num_songs: Songs in the library and queue
+        batch: Commands per batch
+
+    Returns:
+        Latency percentiles and batch timings
+    """
+    server = create_server(num_songs, latency=latency_ms / 1000.0)
+    try:
+        wrapper = MPDClientWrapper(host=server.host, port=server.port)
+        wrapper.add("")
+
+        player = MusicPlayer({
+            "mpd": {"host": server.host, "port": server.port},
+            "content": {"storage_path": "/tmp/music", "playlists_path": "/tmp/music/playlists"},
+            "audio": {"backend": "pipewire", "device": "default", "volume": 80},
+            "dev_mode": True
+        })
+        player.connect()
+        player.play()
+
+        status = _timed_calls(wrapper.status, num_commands)
+        player_status = _timed_calls(player.get_status, num_commands)
+
+        client = wrapper.client
+        num_batches = max(1, num_commands // batch)
+
+        def sequential():
+            for i in range(batch):
+                client.setvol(i)
+
+        def command_list():
+            client.command_list_ok_begin()
+            for i in range(batch):
+                client.setvol(i)
+            client.command_list_end()
+
+        sequential_times = _timed_calls(sequential, num_batches)
+        list_times = _timed_calls(command_list, num_batches)
+        queue_times = _timed_calls(wrapper.playlistinfo, max(1, num_commands // 100))
+
+        player.disconnect()
+        wrapper.disconnect()
+        return {
+            "status_ms": percentiles(status),
+            "player_get_status_ms": percentiles(player_status),
+            "batch": {
+                "commands": batch,
+                "sequential_ms": percentiles(sequential_times),
+                "command_list_ms": percentiles(list_times),
+                "speedup": round(sum(sequential_times) / sum(list_times), 2)
+            },
+            "playlistinfo_ms": percentiles(queue_times)
+        }
+    finally:
+        server.stop()
+
+
+def run_soak(num_commands: int, num_songs: int, error_rate: float) -> Dict[str, Any]:
+    """
+    Run commands against a server injecting errors and dropped connections.
+
+    Args:
+        num_commands: Number of commands
+        num_songs: Songs in the library and queue
+        error_rate: Probability of an ACK error, and of a dropped connection, per command
+
+    Returns:
+        Recovered and failed command counts
+    """
+    server = create_server(num_songs, error_rate=error_rate, drop_rate=error_rate)
+    try:
+        wrapper = MPDClientWrapper(host=server.host, port=server.port)
+        wrapper.retry_delay = 0
+        failed = 0
+
+        start = time.perf_counter()
+        for _ in range(num_commands):
+            try:
+                wrapper.status()
+            except Exception:
+                failed += 1
+        elapsed = time.perf_counter() - start
+
+        wrapper.disconnect()
+        return {
+            "commands": num_commands,
+            "error_rate": error_rate,
+            "failed": failed,
+            "connections": server.connections_total,
+            "commands_per_second": round(num_commands / elapsed, 1)
+        }
+    finally:
+        server.stop()
+
+
+def run(latencies: List[float], num_commands: int, num_songs: int, batch: int, error_rate: float) -> Dict[str, Any]:
+    """
+    Run the MPD protocol benchmarks.
+
+    Args:
+        latencies: Injected server latencies in milliseconds
+        num_commands: Commands per measurement
+        num_songs: Songs in the library and queue
+        batch: Commands per batch
+        error_rate: Fault rate for the soak run
+
+    Returns:
+        Benchmark results
+    """
+    return {
+        "commands": num_commands,
+        "songs": num_songs,
+        "latency": {f"{latency:g}ms": run_latency(latency, num_commands, num_songs, batch) for latency in latencies},
+        "soak": run_soak(num_commands, num_songs, error_rate)
+    }
+
+
+def main(argv=None) -> int:
+    """Run the benchmark from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, nargs="+", default=[0, 1, 5], help="Server latencies in ms")
+    parser.add_argument("--commands", type=int, default=1000, help="Commands per measurement")
+    parser.add_argument("--songs", type=int, default=1000, help="Songs in the library and queue")
+    parser.add_argument("--batch", type=int, default=10, help="Commands per batch")
+    parser.add_argument("--error-rate", type=float, default=0.01, help="Fault rate for the soak run")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    # Retried commands log warnings that would dominate the output
+    logging.disable(logging.ERROR)
+
+    results = run(args.latency, args.commands, args.songs, args.batch, args.error_rate)
+
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
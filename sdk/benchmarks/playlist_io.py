@@ -0,0 +1,103 @@
+"""
+Playlist file I/O benchmark.
+
+Compares per-line writes with the batched atomic writer, and line-by-line
+reading with the streaming reader and the memory-mapped index, on a
+100k-entry playlist by default.
+
+Usage:
+    python -m benchmarks.playlist_io [--entries 100000] [--output results.json]
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from typing import Any, Dict
+
+# Add the SDK to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from amora_sdk.device.player.playlist_io import M3UIndex, PlaylistEntry, iter_m3u, write_m3u
+
+
+def _timed(func) -> float:
+    start = time.perf_counter()
+    func()
+    return round(time.perf_counter() - start, 4)
+
+
+def run(num_entries: int, directory: str) -> Dict[str, Any]:
+    """
+    Run the playlist I/O benchmarks.
+
+    Args:
+        num_entries: Number of playlist entries
+        directory: Directory for the playlist files
+
+    Returns:
+        Benchmark results in seconds
+    """
+    files = [f"artist{i // 1000:03d}/album{i // 10:05d}/track{i:06d}.mp3" for i in range(num_entries)]
+    entries = [PlaylistEntry(path, 180 + i % 120, f"Artist {i // 1000} - Track {i}") for i, path in enumerate(files)]
+    path = os.path.join(directory, "bench.m3u8")
+    baseline_path = os.path.join(directory, "baseline.m3u")
+
+    def write_per_line():
+        with open(baseline_path, "w") as f:
+            f.write("#EXTM3U\n")
+            for file in files:
+                f.write(f"{file}\n")
+
+    def read_lines():
+        with open(path) as f:
+            return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+    results: Dict[str, Any] = {"entries": num_entries}
+    results["write_per_line"] = _timed(write_per_line)
+    results["write_m3u"] = _timed(lambda: write_m3u(path, files))
+    results["write_m3u_extinf"] = _timed(lambda: write_m3u(path, entries))
+    results["read_lines"] = _timed(read_lines)
+    results["iter_m3u"] = _timed(lambda: sum(1 for _ in iter_m3u(path)))
+
+    index = None
+
+    def build_index():
+        nonlocal index
+        index = M3UIndex(path)
+
+    results["index_build"] = _timed(build_index)
+    positions = [random.randrange(num_entries) for _ in range(10_000)]
+    results["index_random_access_10k"] = _timed(lambda: [index[i] for i in positions])
+    index.close()
+
+    return results
+
+
+def main(argv=None) -> int:
+    """Run the benchmark from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=100_000, help="Number of playlist entries")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    directory = tempfile.mkdtemp(prefix="amora-playlist-")
+    try:
+        results = run(args.entries, directory)
+    finally:
+        shutil.rmtree(directory)
+
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+"""
+Reconnect storm benchmark.
+
+Simulates a broker restart that drops a whole fleet at once, in virtual time,
+with a broker that accepts a limited number of connections per second and
+refuses the rest as "server unavailable". Each device retries on its own
+schedule, and the benchmark reports the connection attempt rate over time
+for:
+
+* ``doubling``: the previous fixed 1, 2, 4, ... s backoff, which ignores the
+  broker's refusals,
+* ``jittered``: ReconnectPolicy (random initial offset, decorrelated jitter,
+  longer delays after "server busy").
+
+A flat curve close to the broker's capacity, with few refused attempts, is
+what the fleet should produce.
+
+Usage:
+    python -m benchmarks.reconnect_storm [--devices 10000] [--capacity 500]
+                                         [--bucket 5] [--seed 1] [--output FILE]
+"""
+
+import argparse
+import heapq
+import json
+import os
+import random
+import sys
+from collections import Counter
+from typing import Any, Callable, Dict, List
+
+# Add the SDK to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from amora_sdk.device.broker.config import ReconnectPolicy
+
+# Stop simulating after this much virtual time
+HORIZON = 24 * 3600.0
+
+
+class DoublingPolicy:
+    """The previous reconnect schedule: 1 s doubling up to a cap, no jitter."""
+
+    def __init__(self, max_delay: float = 300.0):
+        self.max_delay = max_delay
+        self.delay = 1.0
+
+    def next_delay(self, server_busy: bool = False) -> float:
+        delay = self.delay
+        self.delay = min(self.delay * 2, self.max_delay)
+        return delay
+
+
+def simulate(num_devices: int, capacity: int, create_policy: Callable[[int], Any],
+             bucket: float = 5.0) -> Dict[str, Any]:
+    """
+    Simulate every device reconnecting after a broker restart.
+
+    Args:
+        num_devices: Number of devices dropped at time 0
+        capacity: Connections the broker accepts per second
+        create_policy: Creates the reconnect policy of device i
+        bucket: Width of the curve buckets in seconds
+
+    Returns:
+        Attempt and refusal counts, connect time percentiles and the attempt rate curve
+    """
+    policies = [create_policy(i) for i in range(num_devices)]
+    events = [(policies[i].next_delay(), i) for i in range(num_devices)]
+    heapq.heapify(events)
+
+    accepted: Counter = Counter()
+    attempts: Counter = Counter()
+    connect_times: List[float] = []
+    refused = 0
+
+    while events:
+        now, device = heapq.heappop(events)
+        if now > HORIZON:
+            break
+        second = int(now)
+        attempts[second] += 1
+        if accepted[second] < capacity:
+            accepted[second] += 1
+            connect_times.append(now)
+        else:
+            refused += 1
+            heapq.heappush(events, (now + policies[device].next_delay(server_busy=True), device))
+
+    connect_times.sort()
+    peak_second = max(attempts.values()) if attempts else 0
+    end = int(connect_times[-1]) + 1 if connect_times else 0
+    curve = Counter()
+    for second, count in attempts.items():
+        curve[int(second // bucket)] += count
+
+    def at(fraction: float) -> float:
+        index = min(len(connect_times) - 1, int(fraction * len(connect_times)))
+        return round(connect_times[index], 1) if connect_times else 0.0
+
+    return {
+        "connected": len(connect_times),
+        "attempts": sum(attempts.values()),
+        "refused": refused,
+        "peak_attempts_per_second": peak_second,
+        "peak_over_capacity": round(peak_second / capacity, 1),
+        "busiest_seconds_over_capacity": sum(1 for count in attempts.values() if count > capacity),
+        "connect_seconds": {"p50": at(0.5), "p90": at(0.9), "p99": at(0.99), "all": round(connect_times[-1], 1) if connect_times else None},
+        "attempts_per_second_by_bucket": [
+            round(curve[index] / bucket, 1) for index in range(int(end // bucket) + 1)
+        ]
+    }
+
+
+def run(num_devices: int, capacity: int, bucket: float, seed: int) -> Dict[str, Any]:
+    """
+    Compare the doubling and jittered reconnect schedules.
+
+    Args:
+        num_devices: Number of devices
+        capacity: Connections the broker accepts per second
+        bucket: Width of the curve buckets in seconds
+        seed: Random seed for the jittered policies
+
+    Returns:
+        Results per policy
+    """
+    rng = random.Random(seed)
+    return {
+        "devices": num_devices,
+        "capacity_per_second": capacity,
+        "bucket_seconds": bucket,
+        "doubling": simulate(num_devices, capacity, lambda i: DoublingPolicy(), bucket),
+        "jittered": simulate(num_devices, capacity, lambda i: ReconnectPolicy(seed=rng.getrandbits(32)), bucket)
+    }
+
+
+def main(argv=None) -> int:
+    """Run the benchmark from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--devices", type=int, default=10000, help="Number of devices")
+    parser.add_argument("--capacity", type=int, default=500, help="Connections the broker accepts per second")
+    parser.add_argument("--bucket", type=float, default=5.0, help="Curve bucket width in seconds")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    results = run(args.devices, args.capacity, args.bucket, args.seed)
+
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+"""
+Controller RPC benchmark.
+
+Sends bursts of commands from one RPCClient to a fleet of devices on an
+in-process broker, without any in-flight window, and measures:
+
+* ``burst``: throughput and per-command latency (send until the future is
+  resolved), for MQTT 3.1.1 response matching and MQTT 5 response topics,
+* ``timeouts``: commands to devices that never answer, all expiring through
+  the single timer thread; reports how late the futures fail after their
+  deadline,
+* the threads added by the client, which stay constant however many
+  commands are outstanding.
+
+Usage:
+    python -m benchmarks.rpc_client [--devices 100] [--commands 10000] [--timeout 2.0] [--output FILE]
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import wait
+from typing import Any, Dict, List
+
+# Add the SDK to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from amora_sdk.controller import RPCClient
+from amora_sdk.device.broker.client import MQTTClient
+from amora_sdk.device.broker.config import BrokerConfig, ConnectionOptions, QoS
+from amora_sdk.device.broker.manager import BrokerManager
+from benchmarks.broker_stack import COMMAND_MIX, TOPIC_PREFIX, create_player, percentiles, player_handler
+from tests.mocks.inprocess_broker import InProcessBroker
+
+
+def create_device(broker: InProcessBroker, index: int, mqtt5: bool) -> BrokerManager:
+    """Create and connect one device answering the command mix."""
+    device_id = f"bench-{index:05d}"
+    options = ConnectionOptions(use_tls=False, reconnect_on_failure=False, mqtt5=mqtt5)
+    config = BrokerConfig(broker_url="localhost", port=1883, client_id=f"device-{device_id}", device_id=device_id,
+                          topic_prefix=TOPIC_PREFIX, connection_options=options, default_qos=QoS.AT_MOST_ONCE,
+                          dedup_ttl=0)
+    manager = BrokerManager(config, mqtt_client=MQTTClient(config.client_id, config.broker_url, config.port,
+                                                            options, client=broker.client(config.client_id)))
+    player = create_player()
+    for command, _ in COMMAND_MIX:
+        manager.register_command_handler(command, player_handler(player, command))
+    manager.connect()
+    return manager
+
+
+def create_rpc(broker: InProcessBroker, mqtt5: bool, timeout: float) -> RPCClient:
+    """Create and connect a controller RPC client."""
+    options = ConnectionOptions(use_tls=False, clean_session=True, reconnect_on_failure=False, mqtt5=mqtt5)
+    config = BrokerConfig(broker_url="localhost", port=1883, client_id="bench-controller",
+                          topic_prefix=TOPIC_PREFIX, connection_options=options, default_qos=QoS.AT_MOST_ONCE)
+    rpc = RPCClient(config, mqtt_client=MQTTClient(config.client_id, config.broker_url, config.port, options,
+                                                   client=broker.client(config.client_id)),
+                    default_timeout=timeout)
+    rpc.connect()
+    return rpc
+
+
+def send_burst(rpc: RPCClient, device_ids: List[str], num_commands: int, timeout: float) -> Dict[str, Any]:
+    """
+    Send every command at once and wait for all futures.
+
+    Args:
+        rpc: Connected RPC client
+        device_ids: Devices the commands are spread over, round-robin
+        num_commands: Number of commands
+        timeout: Timeout per command in seconds
+
+    Returns:
+        Timing of the burst, with per-command completion times in seconds after their send
+    """
+    threads_before = threading.active_count()
+    completions: List[float] = []
+    futures = []
+
+    start = time.perf_counter()
+    for i in range(num_commands):
+        command, params = COMMAND_MIX[i % len(COMMAND_MIX)]
+        sent_at = time.perf_counter()
+        future = rpc.send_command(device_ids[i % len(device_ids)], command, params, timeout=timeout)
+        future.add_done_callback(lambda f, sent_at=sent_at: completions.append(time.perf_counter() - sent_at))
+        futures.append(future)
+    sent = time.perf_counter() - start
+    peak_pending = rpc.pending_count
+    threads_added = threading.active_count() - threads_before
+
+    wait(futures, timeout=timeout + 60)
+    elapsed = time.perf_counter() - start
+    failed = sum(1 for future in futures if future.exception() is not None)
+
+    return {
+        "commands": num_commands,
+        "peak_pending": peak_pending,
+        "failed": failed,
+        "threads_added": threads_added,
+        "send_seconds": round(sent, 4),
+        "seconds": round(elapsed, 4),
+        "commands_per_second": round(num_commands / elapsed, 1),
+        "completion_ms": percentiles(completions)
+    }
+
+
+def run(num_devices: int, num_commands: int, timeout: float) -> Dict[str, Any]:
+    """
+    Run the benchmark.
+
+    Args:
+        num_devices: Number of devices
+        num_commands: Commands per burst
+        timeout: Timeout of the commands in the timeout burst, in seconds
+
+    Returns:
+        Results per protocol version
+    """
+    results: Dict[str, Any] = {"devices": num_devices, "commands": num_commands, "timeout": timeout}
+
+    for name, mqtt5 in (("mqtt311", False), ("mqtt5", True)):
+        broker = InProcessBroker()
+        broker.start()
+        device_ids = [create_device(broker, i, mqtt5).config.device_id for i in range(num_devices)]
+        rpc = create_rpc(broker, mqtt5, timeout)
+
+        burst = send_burst(rpc, device_ids, num_commands, timeout=60.0)
+
+        # Nobody answers: the completion times are the timeouts plus how late they fired
+        timeouts = send_burst(rpc, [f"missing-{i}" for i in range(num_devices)], num_commands, timeout)
+        timeouts["late_ms"] = {
+            point: round(value - timeout * 1000, 3) for point, value in timeouts.pop("completion_ms").items()
+        }
+
+        rpc.disconnect()
+        broker.stop()
+        results[name] = {"burst": burst, "timeouts": timeouts}
+
+    return results
+
+
+def main(argv=None) -> int:
+    """Run the benchmark from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--devices", type=int, default=100, help="Number of devices")
+    parser.add_argument("--commands", type=int, default=10_000, help="Commands in flight per burst")
+    parser.add_argument("--timeout", type=float, default=2.0, help="Timeout of the unanswered commands in seconds")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    # Per-command info logging would dominate the measurements
+    logging.disable(logging.WARNING)
+
+    results = run(args.devices, args.commands, args.timeout)
+
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,192 @@
+"""
+Scheduled command benchmark.
+
+Starts a playlist on every device of a fleet on an in-process broker and
+measures how far apart the devices start, for:
+
+* ``immediate``: play_playlist fanned out at ``--rate`` commands per second,
+  each device starting as soon as its queue is loaded,
+* ``scheduled``: the same fan-out with an ``execute_at`` time after the last
+  delivery; each device loads its queue on arrival (the preparer) and starts
+  at the target time from the command scheduler.
+
+Loading the queue is not slept through, which would serialise the devices
+on the broker's one dispatch thread: each device gets a load time drawn
+from ``--load-ms`` that is added to its start time when immediate, and that
+must fit before the target time when scheduled. Devices share one clock in
+process, so the offsets measured by ClockOffsetEstimator beforehand are
+reported as the clock part of the skew a real fleet would add. They also
+share one interpreter: with many devices, the scheduler threads waking at
+the target time queue for the GIL, which a fleet of separate devices does
+not, so the scheduled spread grows with ``--devices`` here.
+
+Usage:
+    python -m benchmarks.scheduled_commands [--devices 200] [--rate 2000] [--output FILE]
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import time
+from typing import Any, Dict, List
+
+# Add the SDK to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from amora_sdk.controller import ClockOffsetEstimator, FanOutDispatcher, RPCClient
+from amora_sdk.device.broker.client import MQTTClient
+from amora_sdk.device.broker.config import BrokerConfig, ConnectionOptions, QoS
+from amora_sdk.device.broker.manager import BrokerManager
+from amora_sdk.device.broker.messages import CommandMessage, ResponseMessage
+from tests.mocks.inprocess_broker import InProcessBroker
+
+TOPIC_PREFIX = "amora/devices"
+
+
+class SimulatedDevice:
+    """A device whose play_playlist takes a fixed queue load time, recording when playback starts."""
+
+    def __init__(self, broker: InProcessBroker, index: int, load_seconds: float):
+        self.load_seconds = load_seconds
+        self.started_at = None
+        self.staged_late = False
+        device_id = f"store-{index:05d}"
+        options = ConnectionOptions(use_tls=False, reconnect_on_failure=False)
+        config = BrokerConfig(broker_url="localhost", port=1883, client_id=f"device-{device_id}",
+                              device_id=device_id, topic_prefix=TOPIC_PREFIX, connection_options=options,
+                              default_qos=QoS.AT_MOST_ONCE, dedup_ttl=0)
+        self.manager = BrokerManager(config, mqtt_client=MQTTClient(
+            config.client_id, config.broker_url, config.port, options, client=broker.client(config.client_id)
+        ))
+        self.manager.register_command_handler("play_playlist", self.play_playlist, prepare=self.prepare)
+        self.manager.connect()
+
+    def play_playlist(self, msg: CommandMessage) -> ResponseMessage:
+        """Load the queue and start at once."""
+        self.started_at = time.time() + self.load_seconds
+        return ResponseMessage(command_id=msg.command_id, result=True)
+
+    def prepare(self, msg: CommandMessage):
+        """Load the queue now and start at the target time."""
+        fire_at = msg.execute_at + self.manager.clock_offset
+        self.staged_late = time.time() + self.load_seconds > fire_at
+
+        def fire() -> ResponseMessage:
+            self.started_at = time.time()
+            return ResponseMessage(command_id=msg.command_id, result=True)
+        return fire
+
+
+def create_rpc(broker: InProcessBroker, timeout: float) -> RPCClient:
+    """Create and connect a controller RPC client."""
+    options = ConnectionOptions(use_tls=False, clean_session=True, reconnect_on_failure=False)
+    config = BrokerConfig(broker_url="localhost", port=1883, client_id="bench-controller",
+                          topic_prefix=TOPIC_PREFIX, connection_options=options, default_qos=QoS.AT_MOST_ONCE)
+    rpc = RPCClient(config, mqtt_client=MQTTClient(config.client_id, config.broker_url, config.port, options,
+                                                   client=broker.client(config.client_id)),
+                    default_timeout=timeout)
+    rpc.connect()
+    return rpc
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of sorted values."""
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def skew(devices: List[SimulatedDevice], target: float) -> Dict[str, Any]:
+    """Spread of the devices' start times, and their distance from a target time."""
+    starts = sorted(device.started_at for device in devices if device.started_at is not None)
+    errors = sorted(abs(start - target) for start in starts)
+    return {
+        "started": len(starts),
+        "spread_ms": round((starts[-1] - starts[0]) * 1000, 2),
+        "p50_from_target_ms": round(percentile(errors, 0.5) * 1000, 2),
+        "p99_from_target_ms": round(percentile(errors, 0.99) * 1000, 2),
+        "max_from_target_ms": round(errors[-1] * 1000, 2)
+    }
+
+
+def run(num_devices: int, rate: float, load_ms: List[float], lead: float, timeout: float) -> Dict[str, Any]:
+    """
+    Run the benchmark.
+
+    Args:
+        num_devices: Number of devices
+        rate: Commands per second of the fan-out
+        load_ms: Range of queue load times in milliseconds
+        lead: Seconds between the last delivery and the target time
+        timeout: Seconds each device has to answer
+
+    Returns:
+        Results per start strategy
+    """
+    rng = random.Random(0)
+    broker = InProcessBroker()
+    broker.start()
+    devices = [SimulatedDevice(broker, i, rng.uniform(*load_ms) / 1000) for i in range(num_devices)]
+    device_ids = [device.manager.config.device_id for device in devices]
+    rpc = create_rpc(broker, timeout)
+    dispatcher = FanOutDispatcher(rpc, rate=rate)
+    results: Dict[str, Any] = {"devices": num_devices, "rate": rate, "load_ms": load_ms}
+
+    start = time.perf_counter()
+    estimator = ClockOffsetEstimator(rpc)
+    offsets = estimator.synchronise(device_ids, timeout=timeout)
+    bounds = sorted(estimator.error_bound(device_id) for device_id in device_ids if offsets[device_id] is not None)
+    results["clock_sync"] = {
+        "seconds": round(time.perf_counter() - start, 3),
+        "synchronised": len(bounds),
+        "p50_error_bound_ms": round(percentile(bounds, 0.5) * 1000, 3),
+        "max_error_bound_ms": round(bounds[-1] * 1000, 3)
+    }
+
+    command = CommandMessage(command="play_playlist", params={"playlist_name": "Autumn"})
+    sent_at = time.time()
+    dispatcher.dispatch(command, device_ids).result()
+    results["immediate"] = skew(devices, sent_at)
+
+    for device in devices:
+        device.started_at = None
+    target = time.time() + num_devices / rate + lead
+    command = CommandMessage(command="play_playlist", params={"playlist_name": "Autumn"}, execute_at=target)
+    dispatcher.dispatch(command, device_ids).result()
+    results["scheduled"] = dict(skew(devices, target), staged_late=sum(device.staged_late for device in devices))
+
+    rpc.disconnect()
+    for device in devices:
+        device.manager.disconnect()
+    broker.stop()
+    return results
+
+
+def main(argv=None) -> int:
+    """Run the benchmark from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--devices", type=int, default=200, help="Number of devices")
+    parser.add_argument("--rate", type=float, default=2000.0, help="Commands per second of the fan-out")
+    parser.add_argument("--load-ms", type=float, nargs=2, default=[20.0, 200.0], metavar=("MIN", "MAX"),
+                        help="Range of queue load times in milliseconds")
+    parser.add_argument("--lead", type=float, default=0.5, help="Seconds between the last delivery and the target time")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Seconds each device has to answer")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    # Per-command info logging would dominate the measurements
+    logging.disable(logging.WARNING)
+
+    results = run(args.devices, args.rate, args.load_ms, args.lead, args.timeout)
+
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,177 @@
+"""
+TLS reconnect benchmark.
+
+Reconnects an MQTTClient to a fake TLS broker behind a latency relay and
+measures, for each round-trip time and TLS version, the reconnect-to-first-
+publish latency (connect until the broker acknowledges a QoS 1 publish):
+
+* ``full``: TLS session resumption off, every reconnect does a full handshake,
+* ``resumed``: the client offers the session of its previous connection.
+
+TLS 1.2 needs two round trips for a full handshake and one to resume; TLS
+1.3 needs one either way, so resumption only saves the certificate exchange
+and verification there.
+
+It also measures the client setup cost of building a TLS context with the
+system CA bundle on every client, as before, against the shared context.
+
+Usage:
+    python -m benchmarks.tls_reconnect [--rtt 0 100 300] [--reconnects 20] [--output FILE]
+"""
+
+import argparse
+import json
+import logging
+import os
+import ssl
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List
+
+# Add the SDK to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from amora_sdk.device.broker.client import MQTTClient
+from amora_sdk.device.broker.config import ConnectionOptions
+from amora_sdk.device.broker.tls import clear_tls_contexts, get_tls_context
+from tests.mocks.fake_mqtt_server import FakeMQTTServer, create_self_signed_cert, server_tls_context
+
+TLS_VERSIONS = {"1.2": ssl.TLSVersion.TLSv1_2, "1.3": ssl.TLSVersion.TLSv1_3}
+
+
+def _summary(samples: List[float]) -> Dict[str, float]:
+    samples = sorted(samples)
+    return {
+        "p50": round(statistics.median(samples) * 1000, 1),
+        "max": round(samples[-1] * 1000, 1)
+    }
+
+
+def measure_reconnects(server: FakeMQTTServer, ca_file: str, resume: bool, count: int) -> Dict[str, Any]:
+    """
+    Reconnect a client repeatedly and time each reconnect.
+
+    Args:
+        server: Running TLS broker
+        ca_file: CA file trusting the broker's certificate
+        resume: Whether to resume TLS sessions
+        count: Number of reconnects, after one initial connection
+
+    Returns:
+        Connect and first-publish latency percentiles in milliseconds
+    """
+    options = ConnectionOptions(use_tls=True, ca_file=ca_file, reconnect_on_failure=False,
+                                tls_session_resumption=resume)
+    client = MQTTClient(f"bench-{resume}", "localhost", server.port, options)
+    connected = threading.Event()
+    client.register_on_connect(lambda success: connected.set())
+
+    connect_times, publish_times, resumed = [], [], 0
+    for attempt in range(count + 1):
+        connected.clear()
+        start = time.perf_counter()
+        client.connect()
+        if not connected.wait(10):
+            raise RuntimeError("Timed out connecting to the broker")
+        connect_time = time.perf_counter() - start
+        client.client.publish("bench/reconnect", b"1", qos=1).wait_for_publish(10)
+        publish_time = time.perf_counter() - start
+        session_reused = client.client.socket().session_reused
+        client.disconnect()
+
+        # The first connection has no session to resume
+        if attempt:
+            connect_times.append(connect_time)
+            publish_times.append(publish_time)
+            resumed += session_reused
+
+    return {
+        "resumed": resumed,
+        "connect_ms": _summary(connect_times),
+        "first_publish_ms": _summary(publish_times)
+    }
+
+
+def measure_context_setup(count: int) -> Dict[str, Any]:
+    """
+    Time building a TLS context with the system CA bundle, fresh versus shared.
+
+    Args:
+        count: Number of clients set up
+
+    Returns:
+        Average setup time per client in milliseconds
+    """
+    start = time.perf_counter()
+    for _ in range(count):
+        clear_tls_contexts()
+        get_tls_context()
+    fresh = (time.perf_counter() - start) / count
+
+    start = time.perf_counter()
+    for _ in range(count):
+        get_tls_context()
+    shared = (time.perf_counter() - start) / count
+
+    return {"fresh_ms": round(fresh * 1000, 3), "shared_ms": round(shared * 1000, 4)}
+
+
+def run(rtts: List[float], versions: List[str], num_reconnects: int) -> Dict[str, Any]:
+    """
+    Run the benchmark.
+
+    Args:
+        rtts: Round-trip times to simulate in milliseconds
+        versions: TLS versions to test
+        num_reconnects: Reconnects per measurement
+
+    Returns:
+        Results per TLS version and round-trip time
+    """
+    results: Dict[str, Any] = {"reconnects": num_reconnects, "context_setup": measure_context_setup(20)}
+    with tempfile.TemporaryDirectory() as directory:
+        cert_file, key_file = create_self_signed_cert(directory)
+        for version in versions:
+            context = server_tls_context(cert_file, key_file)
+            context.minimum_version = context.maximum_version = TLS_VERSIONS[version]
+            for rtt in rtts:
+                with FakeMQTTServer(ssl_context=context, latency=rtt / 2000.0) as server:
+                    full = measure_reconnects(server, cert_file, False, num_reconnects)
+                    resumed = measure_reconnects(server, cert_file, True, num_reconnects)
+                saved = full["first_publish_ms"]["p50"] - resumed["first_publish_ms"]["p50"]
+                results[f"tls{version}_rtt{rtt:g}ms"] = {
+                    "full": full,
+                    "resumed": resumed,
+                    "first_publish_saved_ms": round(saved, 1),
+                    "first_publish_saved_percent": round(100 * saved / full["first_publish_ms"]["p50"], 1)
+                }
+    return results
+
+
+def main(argv=None) -> int:
+    """Run the benchmark from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rtt", type=float, nargs="+", default=[0, 100, 300], help="Round-trip times in ms")
+    parser.add_argument("--tls", nargs="+", choices=sorted(TLS_VERSIONS), default=sorted(TLS_VERSIONS),
+                        help="TLS versions")
+    parser.add_argument("--reconnects", type=int, default=20, help="Reconnects per measurement")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.WARNING)
+
+    results = run(args.rtt, args.tls, args.reconnects)
+
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,197 @@
+"""
+Volume ramp benchmark.
+
+Fades a device from full volume to silence, with the device's player on
+the fake MPD server and its BrokerManager on an in-process broker, and
+counts the MQTT messages and MPD commands each way takes:
+
+* ``set_volume_steps``: the web player's fade, one set_volume command per
+  step, each publishing the player state as the edge app's handlers do,
+* ``ramp_volume``: one ramp_volume command, the player stepping the volume
+  itself and the state published when the ramp starts and ends.
+
+Usage:
+    python -m benchmarks.volume_ramp [--duration 3] [--steps 30] [--output FILE]
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict
+
+# Add the SDK to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from amora_sdk.controller import RPCClient
+from amora_sdk.device.broker.client import MQTTClient
+from amora_sdk.device.broker.config import BrokerConfig, ConnectionOptions, QoS
+from amora_sdk.device.broker.manager import BrokerManager
+from amora_sdk.device.broker.messages import CommandMessage, ResponseMessage
+from amora_sdk.device.player.music_player import MusicPlayer
+from tests.mocks.fake_mpd_server import FakeMPDServer
+from tests.mocks.inprocess_broker import InProcessBroker
+
+DEVICE_ID = "amora-player-001"
+
+
+class Device:
+    """A player with set_volume and ramp_volume handlers that publish the state like the edge app."""
+
+    def __init__(self, broker: InProcessBroker, server: FakeMPDServer):
+        self.player = MusicPlayer({"mpd": {"host": server.host, "port": server.port}})
+        self.player.connect()
+        self.ramp_done = threading.Event()
+        options = ConnectionOptions(use_tls=False, reconnect_on_failure=False)
+        config = BrokerConfig(broker_url="localhost", port=1883, client_id=f"device-{DEVICE_ID}",
+                              device_id=DEVICE_ID, connection_options=options, default_qos=QoS.AT_MOST_ONCE)
+        self.manager = BrokerManager(config, mqtt_client=MQTTClient(
+            config.client_id, config.broker_url, config.port, options, client=broker.client(config.client_id)
+        ))
+        self.manager.register_command_handler("set_volume", self.set_volume)
+        self.manager.register_command_handler("ramp_volume", self.ramp_volume)
+        self.manager.connect()
+
+    def publish_state(self) -> None:
+        """Publish the player state."""
+        self.manager.publish_state(self.player.get_status())
+
+    def set_volume(self, msg: CommandMessage) -> ResponseMessage:
+        """Set the volume and publish the state."""
+        result = self.player.set_volume(msg.params["volume"])
+        self.publish_state()
+        return ResponseMessage(command_id=msg.command_id, result=result)
+
+    def ramp_volume(self, msg: CommandMessage) -> ResponseMessage:
+        """Start a ramp, publishing the state now and when it ends."""
+        def on_complete(volume: int) -> None:
+            self.publish_state()
+            self.ramp_done.set()
+
+        result = self.player.ramp_volume(msg.params["target"], msg.params["duration"], on_complete=on_complete)
+        self.publish_state()
+        return ResponseMessage(command_id=msg.command_id, result=result)
+
+
+class Traffic:
+    """Counts the messages and bytes on the broker, by topic kind."""
+
+    def __init__(self, broker: InProcessBroker):
+        self.messages: Counter = Counter()
+        self.bytes = 0
+        self._lock = threading.Lock()
+        client = broker.client("traffic-observer")
+        client.on_message = self._on_message
+        client.connect()
+        client.subscribe("amora/#")
+
+    def _on_message(self, client, userdata, msg) -> None:
+        """Count one message."""
+        with self._lock:
+            self.messages[msg.topic.rsplit("/", 1)[-1]] += 1
+            self.bytes += len(msg.payload)
+
+    def reset(self) -> None:
+        """Start counting again."""
+        with self._lock:
+            self.messages.clear()
+            self.bytes = 0
+
+
+def measure(broker: InProcessBroker, traffic: Traffic, server: FakeMPDServer, fade,
+            seconds_target: float) -> Dict[str, Any]:
+    """Run one fade and collect its traffic."""
+    server.volume = 100
+    traffic.reset()
+    server.command_counts.clear()
+    start = time.perf_counter()
+    fade()
+    seconds = time.perf_counter() - start
+    broker.join()
+    return {
+        "seconds": round(seconds, 3),
+        "target_seconds": seconds_target,
+        "final_volume": server.volume,
+        "mqtt_messages": dict(traffic.messages),
+        "mqtt_bytes": traffic.bytes,
+        "mpd_setvol": server.command_counts.get("setvol", 0),
+        "mpd_commands": sum(server.command_counts.values())
+    }
+
+
+def run(duration: float, steps: int) -> Dict[str, Any]:
+    """
+    Run the benchmark.
+
+    Args:
+        duration: Seconds the fade takes
+        steps: Volume steps of the set_volume fade
+
+    Returns:
+        Traffic per fade strategy
+    """
+    server = FakeMPDServer().start()
+    broker = InProcessBroker()
+    broker.start()
+    device = Device(broker, server)
+    traffic = Traffic(broker)
+
+    options = ConnectionOptions(use_tls=False, clean_session=True, reconnect_on_failure=False)
+    config = BrokerConfig(broker_url="localhost", port=1883, client_id="web-player", connection_options=options,
+                          default_qos=QoS.AT_MOST_ONCE)
+    rpc = RPCClient(config, mqtt_client=MQTTClient(config.client_id, config.broker_url, config.port, options,
+                                                   client=broker.client(config.client_id)), default_timeout=10.0)
+    rpc.connect()
+
+    def set_volume_steps() -> None:
+        began = time.monotonic()
+        for step in range(1, steps + 1):
+            volume = round(100 * (1 - step / steps))
+            rpc.send_command(DEVICE_ID, "set_volume", {"volume": volume}).result()
+            time.sleep(max(0.0, began + duration * step / steps - time.monotonic()))
+
+    def ramp_volume() -> None:
+        device.ramp_done.clear()
+        rpc.send_command(DEVICE_ID, "ramp_volume", {"target": 0, "duration": duration}).result()
+        device.ramp_done.wait(duration + 10)
+
+    results = {
+        "set_volume_steps": measure(broker, traffic, server, set_volume_steps, duration),
+        "ramp_volume": measure(broker, traffic, server, ramp_volume, duration)
+    }
+
+    rpc.disconnect()
+    device.manager.disconnect()
+    device.player.disconnect()
+    broker.stop()
+    server.stop()
+    return results
+
+
+def main(argv=None) -> int:
+    """Run the benchmark from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=3.0, help="Seconds the fade takes")
+    parser.add_argument("--steps", type=int, default=30, help="Volume steps of the set_volume fade")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    # Per-command info logging would dominate the measurements
+    logging.disable(logging.WARNING)
+
+    results = run(args.duration, args.steps)
+
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,20 @@
+"""
+Fleet simulator for AmoraSDK.
+
+Simulates thousands of devices running the device-side SDK in one process,
+for capacity planning of the MQTT broker. Run with ``python -m simulator``
+from the ``sdk`` directory.
+"""
+
+from .player import SimulatedPlayer, create_catalog
+from .fleet import FleetConfig, FleetSimulator, SimulatedDevice, parse_command_mix, run_fleet
+
+__all__ = [
+    'SimulatedPlayer',
+    'create_catalog',
+    'FleetConfig',
+    'FleetSimulator',
+    'SimulatedDevice',
+    'parse_command_mix',
+    'run_fleet'
+]
@@ -0,0 +1,101 @@
+"""
+Fleet simulator command line.
+
+Usage:
+    python -m simulator [--devices 1000] [--duration 30] [--command-rate 100]
+                        [--mix "get_status=4,set_volume=2,play=1"]
+                        [--state-interval 30] [--position-interval 5]
+                        [--broker HOST [--port 1883] [--username U --password P] [--tls]]
+                        [--output FILE]
+
+Without --broker the devices talk through an in-process broker.
+"""
+
+import argparse
+import json
+import logging
+import os
+import resource
+import sys
+
+# Add the SDK to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from amora_sdk.device.broker.config import QoS
+from simulator.fleet import DEFAULT_COMMAND_MIX, FleetConfig, parse_command_mix, run_fleet
+
+
+def raise_file_limit() -> None:
+    """Raise the open file limit to the hard limit; every device holds a socket."""
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+def main(argv=None) -> int:
+    """Run the simulator from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--devices", type=int, default=1000, help="Number of simulated devices")
+    parser.add_argument("--duration", type=float, default=30.0, help="Measured run time in seconds")
+    parser.add_argument("--command-rate", type=float, default=100.0, help="Commands per second across the fleet")
+    parser.add_argument("--mix", default=DEFAULT_COMMAND_MIX, help="Command mix as command=weight pairs")
+    parser.add_argument("--state-interval", type=float, default=30.0, help="Full state update interval (0 disables)")
+    parser.add_argument("--position-interval", type=float, default=5.0, help="Position update interval (0 disables)")
+    parser.add_argument("--playing", type=float, default=0.5, help="Fraction of devices playing at start")
+    parser.add_argument("--broker", help="MQTT broker host (default: in-process broker)")
+    parser.add_argument("--port", type=int, default=1883, help="MQTT broker port")
+    parser.add_argument("--username", help="MQTT username")
+    parser.add_argument("--password", help="MQTT password")
+    parser.add_argument("--tls", action="store_true", help="Connect with TLS")
+    parser.add_argument("--qos", type=int, choices=[0, 1], default=0, help="QoS for commands and state")
+    parser.add_argument("--topic-prefix", default="amora/devices", help="Topic prefix")
+    parser.add_argument("--connect-rate", type=float, default=500.0, help="Device connections per second")
+    parser.add_argument("--no-trace-memory", action="store_true", help="Skip tracemalloc during fleet creation")
+    parser.add_argument("--sdk-metrics", action="store_true", help="Include the SDK's own metrics in the report")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--output", help="Write the report as JSON to this file")
+    args = parser.parse_args(argv)
+
+    # Per-command info logging would dominate the run
+    logging.basicConfig(level=logging.WARNING)
+    logging.disable(logging.WARNING)
+
+    try:
+        mix = parse_command_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+
+    raise_file_limit()
+
+    config = FleetConfig(
+        devices=args.devices,
+        duration=args.duration,
+        command_rate=args.command_rate,
+        command_mix=mix,
+        state_interval=args.state_interval,
+        position_interval=args.position_interval,
+        playing_fraction=args.playing,
+        broker_url=args.broker,
+        port=args.port,
+        username=args.username,
+        password=args.password,
+        use_tls=args.tls,
+        topic_prefix=args.topic_prefix,
+        qos=QoS(args.qos),
+        connect_rate=args.connect_rate,
+        trace_memory=not args.no_trace_memory,
+        sdk_metrics=args.sdk_metrics,
+        seed=args.seed
+    )
+    report = run_fleet(config)
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
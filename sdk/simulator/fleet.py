@@ -0,0 +1,515 @@
+"""
+Fleet simulator for the device-side SDK.
+
+Runs thousands of simulated devices in one process on a single asyncio event
+loop. Every device is a real BrokerManager (with its TopicManager and message
+classes) answering commands from a SimulatedPlayer and publishing state like
+the edge app does: a full state update every ``state_interval`` seconds and
+position updates every ``position_interval`` seconds while playing. A
+controller sends commands at a fixed rate with a configurable mix and times
+every response.
+
+Devices connect either to a real MQTT broker, with every paho client driven
+by the event loop instead of its own network thread, or to an in-process
+broker for runs without a network.
+"""
+
+import asyncio
+import heapq
+import json
+import logging
+import random
+import resource
+import socket
+import time
+import tracemalloc
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from amora_sdk import metrics
+from amora_sdk.device.broker.client import MQTT_AVAILABLE, MQTTClient, mqtt
+from amora_sdk.device.broker.config import BrokerConfig, ConnectionOptions, QoS
+from amora_sdk.device.broker.manager import BrokerManager
+from amora_sdk.device.broker.messages import CommandMessage, ResponseMessage
+from amora_sdk.device.broker.tls import get_tls_context
+from amora_sdk.device.broker.topics import TopicType
+
+from .player import Catalog, SimulatedPlayer, create_catalog
+
+logger = logging.getLogger(__name__)
+
+# Commands the edge app exposes that the simulated player implements
+PLAYER_COMMANDS = [
+    "play", "pause", "stop", "next", "previous", "set_volume", "get_volume",
+    "get_status", "get_playlists", "play_playlist", "set_repeat", "set_random",
+    "update_database"
+]
+
+DEFAULT_COMMAND_MIX = "get_status=4,set_volume=2,play=1,pause=1,next=1,play_playlist=1"
+
+# Scheduler resolution of the command and state loops in seconds
+TICK = 0.01
+
+
+def parse_command_mix(spec: str) -> Dict[str, float]:
+    """
+    Parse a command mix such as ``"get_status=4,play=1"``.
+
+    Args:
+        spec (str): Comma-separated command=weight pairs (weight defaults to 1)
+
+    Returns:
+        Dict[str, float]: Command to weight
+
+    Raises:
+        ValueError: If a command is unknown or a weight is invalid
+    """
+    mix: Dict[str, float] = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        command, _, weight = item.partition("=")
+        if command not in PLAYER_COMMANDS:
+            raise ValueError(f"Unknown command in mix: {command}")
+        mix[command] = float(weight) if weight else 1.0
+        if mix[command] < 0:
+            raise ValueError(f"Negative weight for {command}")
+    if not mix or not sum(mix.values()):
+        raise ValueError("Empty command mix")
+    return mix
+
+
+@dataclass
+class FleetConfig:
+    """Configuration of a simulation run."""
+
+    devices: int = 1000
+    duration: float = 30.0
+    command_rate: float = 100.0
+    command_mix: Dict[str, float] = field(default_factory=lambda: parse_command_mix(DEFAULT_COMMAND_MIX))
+    state_interval: float = 30.0
+    position_interval: float = 5.0
+    playing_fraction: float = 0.5
+    broker_url: Optional[str] = None
+    port: int = 1883
+    username: Optional[str] = None
+    password: Optional[str] = None
+    use_tls: bool = False
+    topic_prefix: str = "amora/devices"
+    qos: QoS = QoS.AT_MOST_ONCE
+    connect_rate: float = 500.0
+    drain: float = 5.0
+    trace_memory: bool = True
+    sdk_metrics: bool = False
+    seed: int = 0
+
+
+if MQTT_AVAILABLE:
+    class AsyncioMQTTClient(mqtt.Client):
+        """
+        Paho client whose network I/O runs on an asyncio event loop.
+
+        ``loop_start()`` registers the socket with the event loop instead of
+        starting a thread, so thousands of clients share one thread.
+        Keepalive processing (``loop_misc``) is done by the simulator for all
+        clients at once.
+        """
+
+        def __init__(self, event_loop: asyncio.AbstractEventLoop, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.event_loop = event_loop
+            self.on_socket_open = self._socket_open
+            self.on_socket_close = self._socket_close
+            self.on_socket_register_write = self._register_write
+            self.on_socket_unregister_write = self._unregister_write
+
+        def loop_start(self):
+            return mqtt.MQTT_ERR_SUCCESS
+
+        def loop_stop(self, force=False):
+            return mqtt.MQTT_ERR_SUCCESS
+
+        def _socket_open(self, client, userdata, sock):
+            self.event_loop.add_reader(sock, self.loop_read)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 2048)
+
+        def _socket_close(self, client, userdata, sock):
+            self.event_loop.remove_reader(sock)
+
+        def _register_write(self, client, userdata, sock):
+            self.event_loop.add_writer(sock, self.loop_write)
+
+        def _unregister_write(self, client, userdata, sock):
+            self.event_loop.remove_writer(sock)
+
+
+class SimulatedDevice:
+    """One simulated device: a BrokerManager answering commands from a SimulatedPlayer."""
+
+    def __init__(self, fleet: "FleetSimulator", device_id: str, client: Any, player: SimulatedPlayer):
+        """
+        Initialize the device.
+
+        Args:
+            fleet (FleetSimulator): Simulator collecting statistics
+            device_id (str): Device ID
+            client (Any): Paho-compatible client
+            player (SimulatedPlayer): Simulated player
+        """
+        config = fleet.config
+        self.fleet = fleet
+        self.player = player
+        broker_config = BrokerConfig(
+            broker_url=config.broker_url or "localhost",
+            port=config.port,
+            client_id=f"sim-{device_id}",
+            device_id=device_id,
+            topic_prefix=config.topic_prefix,
+            connection_options=ConnectionOptions(
+                use_tls=config.use_tls,
+                username=config.username,
+                password=config.password,
+                reconnect_on_failure=False
+            ),
+            default_qos=config.qos
+        )
+        mqtt_client = MQTTClient(broker_config.client_id, broker_config.broker_url, broker_config.port,
+                                 broker_config.connection_options, client=client)
+        self.manager = BrokerManager(broker_config, mqtt_client=mqtt_client)
+        for command in PLAYER_COMMANDS:
+            self.manager.register_command_handler(command, self._handler(command))
+
+        self.next_full = 0.0
+        self.next_position = 0.0
+
+    def _handler(self, command: str):
+        """Create a command handler like the edge app's create_command_handler."""
+        method = getattr(self.player, command)
+
+        def handler(command_msg: CommandMessage) -> ResponseMessage:
+            result = method(**(command_msg.params or {}))
+            self.publish_state(self.player.get_status())
+            return ResponseMessage(
+                command_id=command_msg.command_id,
+                result=result is not False,
+                message=f"Command {command} executed",
+                data={"result": result}
+            )
+
+        return handler
+
+    def publish_state(self, state: Dict[str, Any]) -> None:
+        if self.manager.publish_state(state):
+            self.fleet.states_published += 1
+
+    def publish_due(self, now: float) -> float:
+        """
+        Publish the state updates due at a time.
+
+        Args:
+            now (float): Current time
+
+        Returns:
+            float: Time of the next update
+        """
+        config = self.fleet.config
+        if now >= self.next_full:
+            self.publish_state(self.player.get_status())
+            self.next_full = now + config.state_interval if config.state_interval > 0 else float("inf")
+            self.next_position = now + config.position_interval if config.position_interval > 0 else float("inf")
+        elif now >= self.next_position:
+            status = self.player.get_status()
+            if status["state"] == "play" and status["current_song"]:
+                self.publish_state({
+                    "state": status["state"],
+                    "current_song": {"position": status["current_song"]["position"]}
+                })
+            self.next_position = now + config.position_interval
+        return min(self.next_full, self.next_position)
+
+
+class FleetSimulator:
+    """Runs a fleet of simulated devices and a controller on one event loop."""
+
+    def __init__(self, config: FleetConfig):
+        """
+        Initialize the simulator.
+
+        Args:
+            config (FleetConfig): Simulation configuration
+        """
+        if config.broker_url and not MQTT_AVAILABLE:
+            raise ImportError("Paho MQTT client not available. Cannot connect to a broker.")
+
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.catalog: Catalog = create_catalog(seed=config.seed)
+        self.devices: List[SimulatedDevice] = []
+        self.clients: List[Any] = []
+        self.broker = None
+        self.controller = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+
+        # Latency histograms are kept in a private registry so long runs use bounded memory
+        self.registry = metrics.MetricsRegistry(enabled=True)
+        self.latency = self.registry.histogram("sim_command_latency_seconds", "Command round trip time")
+
+        self.pending: Dict[str, Tuple[str, float]] = {}
+        self.commands_sent = 0
+        self.responses = 0
+        self.failed = 0
+        self.states_published = 0
+        self.states_received = 0
+        self.memory: Dict[str, Any] = {}
+
+    # Clients
+
+    def _create_client(self, client_id: str) -> Any:
+        if self.config.broker_url:
+            return AsyncioMQTTClient(self.loop, client_id=client_id, clean_session=True)
+        return self.broker.client(client_id)
+
+    async def _keepalive(self) -> None:
+        """Run paho's periodic processing (keepalive pings) for every client."""
+        while True:
+            await asyncio.sleep(1.0)
+            for client in self.clients:
+                client.loop_misc()
+
+    # Setup
+
+    async def create_devices(self) -> None:
+        """Create and connect the devices, at most connect_rate per second."""
+        config = self.config
+        if config.trace_memory:
+            tracemalloc.start()
+            before = tracemalloc.take_snapshot()
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        batch = max(1, int(config.connect_rate * TICK))
+        for i in range(config.devices):
+            device_id = f"sim-{i:06d}"
+            client = self._create_client(f"sim-{device_id}")
+            player = SimulatedPlayer(self.catalog, rng=random.Random(self.rng.random()))
+            player.volume = self.rng.randint(20, 100)
+            if self.rng.random() < config.playing_fraction:
+                player.play()
+            device = SimulatedDevice(self, device_id, client, player)
+            self.devices.append(device)
+            self.clients.append(client)
+            device.manager.connect()
+            if (i + 1) % batch == 0:
+                await asyncio.sleep(TICK)
+
+        if config.trace_memory:
+            after = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            traced = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+            self.memory["traced_bytes_per_device"] = round(traced / max(1, config.devices))
+        rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in kilobytes on Linux
+        self.memory["rss_bytes_per_device"] = round((rss_after - rss_before) * 1024 / max(1, config.devices))
+        self.memory["rss_peak_bytes"] = rss_after * 1024
+
+    async def create_controller(self) -> None:
+        """Connect the controller and subscribe to every device's responses and state."""
+        self.controller = self._create_client(f"sim-controller-{uuid.uuid4().hex[:8]}")
+        self.controller.on_message = self._on_controller_message
+        connected = asyncio.Event()
+        self.controller.on_connect = lambda client, userdata, flags, rc: connected.set()
+        if self.config.username and self.config.password:
+            self.controller.username_pw_set(self.config.username, self.config.password)
+        if self.config.use_tls:
+            self.controller.tls_set_context(get_tls_context())
+        self.controller.connect(self.config.broker_url or "localhost", self.config.port)
+        self.clients.append(self.controller)
+        await asyncio.wait_for(connected.wait(), timeout=10)
+        prefix = self.config.topic_prefix
+        self.controller.subscribe([
+            (f"{prefix}/+/{TopicType.RESPONSES.value}", 0),
+            (f"{prefix}/+/{TopicType.STATE.value}", 0)
+        ])
+
+    # Controller
+
+    def _on_controller_message(self, client, userdata, msg) -> None:
+        if msg.topic.endswith("/" + TopicType.STATE.value):
+            self.states_received += 1
+            return
+        try:
+            data = json.loads(msg.payload)
+        except ValueError:
+            return
+        pending = self.pending.pop(data.get("command_id"), None)
+        if pending is None:
+            return
+        command, sent_at = pending
+        elapsed = time.perf_counter() - sent_at
+        self.latency.observe(elapsed)
+        self.latency.observe(elapsed, command=command)
+        self.responses += 1
+        if not data.get("result", False):
+            self.failed += 1
+
+    def _command_params(self, command: str) -> Dict[str, Any]:
+        if command == "set_volume":
+            return {"volume": self.rng.randint(0, 100)}
+        if command == "play_playlist":
+            return {"playlist_name": self.rng.choice(list(self.catalog))}
+        if command in ("set_repeat", "set_random"):
+            key = command.split("_", 1)[1]
+            return {key: self.rng.random() < 0.5}
+        return {}
+
+    def send_command(self) -> None:
+        """Send one command from the mix to a random device."""
+        mix = self.config.command_mix
+        command = self.rng.choices(list(mix), weights=list(mix.values()))[0]
+        device = self.devices[self.rng.randrange(len(self.devices))]
+        command_msg = CommandMessage(command=command, params=self._command_params(command))
+        self.pending[command_msg.command_id] = (command, time.perf_counter())
+        self.commands_sent += 1
+        self.controller.publish(device.manager.topic_manager.get_topic(TopicType.COMMANDS),
+                                command_msg.to_json(), qos=self.config.qos.value)
+
+    async def _send_commands(self, until: float) -> None:
+        """Send commands at command_rate per second (open loop)."""
+        start = self.loop.time()
+        sent = 0
+        while self.loop.time() < until:
+            due = int((self.loop.time() - start) * self.config.command_rate)
+            while sent < due:
+                self.send_command()
+                sent += 1
+            await asyncio.sleep(TICK)
+
+    async def _publish_states(self, until: float) -> None:
+        """Publish every device's state updates when due."""
+        now = self.loop.time()
+        interval = self.config.state_interval or self.config.position_interval or 1.0
+        # Spread the first full update of every device over one interval
+        heap = [(now + self.rng.random() * interval, i) for i in range(len(self.devices))]
+        heapq.heapify(heap)
+        for due, i in heap:
+            self.devices[i].next_full = due
+        while heap and self.loop.time() < until:
+            now = self.loop.time()
+            while heap and heap[0][0] <= now:
+                _, i = heapq.heappop(heap)
+                next_due = self.devices[i].publish_due(now)
+                if next_due != float("inf"):
+                    heapq.heappush(heap, (next_due, i))
+            await asyncio.sleep(TICK)
+
+    # Run
+
+    async def run(self) -> Dict[str, Any]:
+        """
+        Run the simulation.
+
+        Returns:
+            Dict[str, Any]: Report with throughput, latency and memory figures
+        """
+        config = self.config
+        self.loop = asyncio.get_running_loop()
+        if config.sdk_metrics:
+            metrics.enable({"simulator": "fleet"})
+
+        if not config.broker_url:
+            from tests.mocks.inprocess_broker import InProcessBroker
+            self.broker = InProcessBroker(synchronous=True)
+
+        keepalive = asyncio.ensure_future(self._keepalive()) if config.broker_url else None
+        try:
+            setup_start = time.perf_counter()
+            await self.create_controller()
+            await self.create_devices()
+            setup_seconds = time.perf_counter() - setup_start
+
+            # Let connection status and retained messages settle before measuring
+            await asyncio.sleep(0.5 if config.broker_url else 0)
+            self.states_published = self.states_received = 0
+
+            start = time.perf_counter()
+            until = self.loop.time() + config.duration
+            await asyncio.gather(self._send_commands(until), self._publish_states(until))
+            elapsed = time.perf_counter() - start
+
+            drain_until = self.loop.time() + config.drain
+            while self.pending and self.loop.time() < drain_until:
+                await asyncio.sleep(TICK)
+
+            return self.report(elapsed, setup_seconds)
+        finally:
+            await self.shutdown()
+            if keepalive:
+                keepalive.cancel()
+
+    async def shutdown(self) -> None:
+        """Disconnect every device and the controller."""
+        for device in self.devices:
+            device.manager.disconnect()
+        if self.controller is not None:
+            self.controller.disconnect()
+        # Let the event loop flush the DISCONNECT packets
+        await asyncio.sleep(0.1 if self.config.broker_url else 0)
+
+    def _latency_report(self, **labels) -> Dict[str, float]:
+        report = {}
+        for q in (0.5, 0.9, 0.99, 0.999):
+            value = self.latency.quantile(q, **labels)
+            if value is not None:
+                report[f"p{q * 100:g}"] = round(value * 1000, 3)
+        return report
+
+    def report(self, elapsed: float, setup_seconds: float) -> Dict[str, Any]:
+        """
+        Build the run report.
+
+        Args:
+            elapsed (float): Measured run time in seconds
+            setup_seconds (float): Time to create and connect the fleet
+
+        Returns:
+            Dict[str, Any]: Report
+        """
+        config = self.config
+        result = {
+            "devices": len(self.devices),
+            "broker": f"{config.broker_url}:{config.port}" if config.broker_url else "in-process",
+            "duration_seconds": round(elapsed, 3),
+            "setup_seconds": round(setup_seconds, 3),
+            "commands": {
+                "sent": self.commands_sent,
+                "answered": self.responses,
+                "failed": self.failed,
+                "lost": len(self.pending),
+                "per_second": round(self.responses / elapsed, 1),
+                "latency_ms": self._latency_report(),
+                "latency_ms_by_command": {
+                    command: self._latency_report(command=command) for command in config.command_mix
+                }
+            },
+            "state": {
+                "published": self.states_published,
+                "received": self.states_received,
+                "published_per_second": round(self.states_published / elapsed, 1),
+                "received_per_second": round(self.states_received / elapsed, 1)
+            },
+            "memory": self.memory
+        }
+        if config.sdk_metrics:
+            result["sdk_metrics"] = metrics.snapshot()
+        return result
+
+
+def run_fleet(config: FleetConfig) -> Dict[str, Any]:
+    """
+    Run a simulation on a new event loop.
+
+    Args:
+        config (FleetConfig): Simulation configuration
+
+    Returns:
+        Dict[str, Any]: Report
+    """
+    return asyncio.run(FleetSimulator(config).run())
@@ -0,0 +1,216 @@
+"""
+Simulated music player for the fleet simulator.
+
+Implements the MusicPlayer methods the edge app exposes as commands as a
+small state machine driven by a clock instead of MPD. Playback position is
+computed lazily from the clock, and the player moves on to the next track
+when the current one ends, so a device left playing changes songs over time
+without any per-device timer.
+"""
+
+import random
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+# Playlists shared by every simulated player: name -> list of tracks
+Catalog = Dict[str, List[Dict[str, Any]]]
+
+
+def create_catalog(num_playlists: int = 5, tracks_per_playlist: int = 20, seed: int = 0) -> Catalog:
+    """
+    Create a catalog of playlists with random track durations.
+
+    Args:
+        num_playlists (int, optional): Number of playlists. Defaults to 5.
+        tracks_per_playlist (int, optional): Tracks per playlist. Defaults to 20.
+        seed (int, optional): Random seed. Defaults to 0.
+
+    Returns:
+        Catalog: Playlist name to tracks
+    """
+    rng = random.Random(seed)
+    catalog: Catalog = {}
+    for p in range(num_playlists):
+        catalog[f"Playlist {p + 1}"] = [
+            {
+                "title": f"Track {t + 1}",
+                "artist": f"Artist {(p * tracks_per_playlist + t) % 50}",
+                "album": f"Album {p + 1}",
+                "file": f"playlist{p + 1}/track{t + 1:03d}.mp3",
+                "duration": rng.randint(120, 360)
+            }
+            for t in range(tracks_per_playlist)
+        ]
+    return catalog
+
+
+class SimulatedPlayer:
+    """Music player state machine with the MusicPlayer command interface."""
+
+    def __init__(self, catalog: Catalog, clock: Callable[[], float] = time.monotonic,
+                 rng: Optional[random.Random] = None):
+        """
+        Initialize the simulated player.
+
+        Args:
+            catalog (Catalog): Playlists, usually shared between players
+            clock (Callable[[], float], optional): Time source in seconds. Defaults to time.monotonic.
+            rng (Optional[random.Random], optional): Random generator for shuffle. Defaults to a new one.
+        """
+        self.catalog = catalog
+        self.clock = clock
+        self.rng = rng or random.Random()
+        self.state = "stop"
+        self.volume = 80
+        self.repeat = False
+        self.random = False
+        self.current_playlist: Optional[str] = None
+        self.index = 0
+        self.elapsed = 0.0
+        self.started_at = 0.0
+
+        # Start with the first playlist queued, as a device restoring its last playlist
+        if catalog:
+            self.current_playlist = next(iter(catalog))
+
+    @property
+    def tracks(self) -> List[Dict[str, Any]]:
+        """Tracks of the current playlist."""
+        return self.catalog.get(self.current_playlist, []) if self.current_playlist else []
+
+    def _position(self) -> float:
+        if self.state == "play":
+            return self.elapsed + self.clock() - self.started_at
+        return self.elapsed
+
+    def _advance(self) -> None:
+        """Move past every track that has finished since the last call."""
+        if self.state != "play":
+            return
+        tracks = self.tracks
+        position = self._position()
+        while tracks and position >= tracks[self.index]["duration"]:
+            position -= tracks[self.index]["duration"]
+            if not self._step(1):
+                return
+        self.elapsed = position
+        self.started_at = self.clock()
+
+    def _step(self, offset: int) -> bool:
+        """
+        Move to another track.
+
+        Returns:
+            bool: False if playback stopped at the end of the playlist
+        """
+        tracks = self.tracks
+        if not tracks:
+            return False
+        if self.random:
+            self.index = self.rng.randrange(len(tracks))
+        elif 0 <= self.index + offset < len(tracks):
+            self.index += offset
+        elif self.repeat:
+            self.index = (self.index + offset) % len(tracks)
+        else:
+            self.state = "stop"
+            self.index = 0
+            self.elapsed = 0.0
+            return False
+        self.elapsed = 0.0
+        self.started_at = self.clock()
+        return True
+
+    def play(self) -> bool:
+        """Start or resume playback."""
+        if not self.tracks:
+            return False
+        if self.state != "play":
+            self.started_at = self.clock()
+            self.state = "play"
+        return True
+
+    def pause(self) -> bool:
+        """Pause playback."""
+        if self.state == "play":
+            self._advance()
+            self.elapsed = self._position()
+            self.state = "pause"
+        return True
+
+    def stop(self) -> bool:
+        """Stop playback."""
+        self.state = "stop"
+        self.elapsed = 0.0
+        return True
+
+    def next(self) -> bool:
+        """Skip to the next track."""
+        self._advance()
+        return self._step(1)
+
+    def previous(self) -> bool:
+        """Go back to the previous track."""
+        self._advance()
+        return self._step(-1) if self.index > 0 else self._step(0)
+
+    def set_volume(self, volume: int) -> bool:
+        """Set the volume (0-100)."""
+        if not 0 <= volume <= 100:
+            return False
+        self.volume = volume
+        return True
+
+    def get_volume(self) -> int:
+        """Get the volume."""
+        return self.volume
+
+    def set_repeat(self, repeat: bool) -> bool:
+        """Enable or disable repeat."""
+        self.repeat = bool(repeat)
+        return True
+
+    def set_random(self, random: bool) -> bool:
+        """Enable or disable random playback."""
+        self.random = bool(random)
+        return True
+
+    def get_playlists(self) -> List[str]:
+        """Get the playlist names."""
+        return list(self.catalog)
+
+    def play_playlist(self, playlist_name: str) -> bool:
+        """Play a playlist from the start."""
+        if playlist_name not in self.catalog:
+            return False
+        self.current_playlist = playlist_name
+        self.index = 0
+        self.elapsed = 0.0
+        self.started_at = self.clock()
+        self.state = "play"
+        return True
+
+    def update_database(self, path: Optional[str] = None) -> bool:
+        """Accept a database update request."""
+        return True
+
+    def get_status(self) -> Dict[str, Any]:
+        """
+        Get player status in the MusicPlayer format.
+
+        Returns:
+            Dict[str, Any]: Player status
+        """
+        self._advance()
+        current_song = None
+        if self.state != "stop" and self.tracks:
+            track = self.tracks[self.index]
+            current_song = dict(track, position=round(self._position(), 1))
+        return {
+            "state": self.state,
+            "volume": self.volume,
+            "current_song": current_song,
+            "playlist": self.current_playlist,
+            "repeat": self.repeat,
+            "random": self.random
+        }
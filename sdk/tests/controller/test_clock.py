@@ -0,0 +1,102 @@
+"""
+Tests for the controller clock offset estimator.
+"""
+
+import logging
+import os
+import sys
+import time
+import unittest
+from unittest.mock import MagicMock
+
+# Add the parent directory to the path so we can import the module
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+# Import the module
+from amora_sdk.controller import ClockOffsetEstimator, CommandTimeoutError, RPCClient
+from amora_sdk.device.broker.client import MQTTClient
+from amora_sdk.device.broker.config import BrokerConfig, ConnectionOptions
+from amora_sdk.device.broker.manager import BrokerManager
+from tests.mocks.inprocess_broker import InProcessBroker
+
+# Disable logging during tests
+logging.disable(logging.CRITICAL)
+
+
+class TestClockOffsetSamples(unittest.TestCase):
+    """Tests for the offset arithmetic."""
+
+    def setUp(self):
+        """Set up the test."""
+        self.estimator = ClockOffsetEstimator(MagicMock(), window=3)
+
+    def test_offset_from_one_probe(self):
+        """Test a probe gives the NTP offset, with half its round trip as error bound."""
+        # Device 2s ahead, 10ms each way, 1ms on the device
+        offset = self.estimator.add_sample("d", sent=100.0, received=102.010, replied=102.011, answered=100.021)
+
+        self.assertAlmostEqual(offset, 2.0)
+        self.assertAlmostEqual(self.estimator.offset("d"), 2.0)
+        self.assertAlmostEqual(self.estimator.error_bound("d"), 0.010)
+        self.assertIsNone(self.estimator.offset("other"))
+
+    def test_shortest_round_trip_wins(self):
+        """Test the estimate comes from the probe least delayed, within the window."""
+        # Delayed outbound: skews the offset by +40ms
+        self.estimator.add_sample("d", sent=0.0, received=2.090, replied=2.090, answered=0.100)
+        self.assertAlmostEqual(self.estimator.offset("d"), 2.04)
+        # Quick probe
+        self.estimator.add_sample("d", sent=1.0, received=3.005, replied=3.005, answered=1.010)
+        self.assertAlmostEqual(self.estimator.offset("d"), 2.0)
+
+        # The quick probe leaves the window
+        for i in range(3):
+            self.estimator.add_sample("d", sent=10.0 + i, received=12.03 + i, replied=12.03 + i, answered=10.05 + i)
+        self.assertAlmostEqual(self.estimator.offset("d"), 2.005)
+
+
+class TestClockOffsetEstimator(unittest.TestCase):
+    """Tests for probing a device on an in-process broker."""
+
+    def setUp(self):
+        """Set up a device and a controller whose clock is 300ms behind the device's."""
+        self.broker = InProcessBroker(synchronous=True)
+        self.broker.start()
+        self.addCleanup(self.broker.stop)
+
+        options = ConnectionOptions(use_tls=False, reconnect_on_failure=False)
+        config = BrokerConfig(broker_url="localhost", port=1883, client_id="device-test",
+                              device_id="test", connection_options=options)
+        self.device = BrokerManager(config, mqtt_client=MQTTClient(
+            config.client_id, config.broker_url, config.port, options, client=self.broker.client(config.client_id)
+        ))
+        self.device.connect()
+
+        options = ConnectionOptions(use_tls=False, clean_session=True, reconnect_on_failure=False)
+        config = BrokerConfig(broker_url="localhost", port=1883, client_id="controller", connection_options=options)
+        self.rpc = RPCClient(config, mqtt_client=MQTTClient(
+            config.client_id, config.broker_url, config.port, options, client=self.broker.client("controller")
+        ), default_timeout=2.0)
+        self.rpc.connect()
+        self.addCleanup(self.rpc.disconnect)
+        self.estimator = ClockOffsetEstimator(self.rpc, clock=lambda: time.time() - 0.3)
+
+    def test_synchronise(self):
+        """Test the estimate matches the clock difference and the device adopts it."""
+        offsets = self.estimator.synchronise(["test"], probes=3)
+
+        self.assertAlmostEqual(offsets["test"], 0.3, delta=0.01)
+        self.assertAlmostEqual(self.device.clock_offset((self.rpc.response_topic, None) if self.rpc.mqtt5 else None), 0.3, delta=0.01)
+        self.assertLess(self.estimator.error_bound("test"), 0.01)
+
+    def test_silent_device(self):
+        """Test a device that does not answer has no estimate."""
+        offsets = self.estimator.synchronise(["missing"], probes=1, timeout=0.05)
+
+        self.assertEqual(offsets, {"missing": None})
+        with self.assertRaises(CommandTimeoutError):
+            self.estimator.probe("missing", timeout=0.05).result(timeout=2)
+
+
+if __name__ == '__main__':
+    unittest.main()
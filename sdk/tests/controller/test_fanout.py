@@ -0,0 +1,172 @@
+"""
+Tests for the controller command fan-out.
+"""
+
+import logging
+import os
+import sys
+import time
+import unittest
+
+# Add the parent directory to the path so we can import the module
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+# Import the module
+from amora_sdk.controller import FanOutDispatcher, RPCClient
+from amora_sdk.controller.fleet import FleetStateStore, NUMPY_AVAILABLE
+from amora_sdk.device.broker.client import MQTTClient
+from amora_sdk.device.broker.config import BrokerConfig, ConnectionOptions
+from amora_sdk.device.broker.manager import BrokerManager
+from amora_sdk.device.broker.messages import CommandMessage, ResponseMessage
+from tests.mocks.inprocess_broker import InProcessBroker
+
+# Disable logging during tests
+logging.disable(logging.CRITICAL)
+
+
+class FanOutTestCase(unittest.TestCase):
+    """Base class with a few devices and a controller on an in-process broker."""
+
+    mqtt5 = False
+
+    def setUp(self):
+        """Set up the test."""
+        self.broker = InProcessBroker(synchronous=True)
+        self.broker.start()
+        self.addCleanup(self.broker.stop)
+
+        self.executed = []
+        self.devices = [self.create_device(f"d{i}", groups=["store"] if i < 3 else []) for i in range(4)]
+
+        options = ConnectionOptions(use_tls=False, clean_session=True, reconnect_on_failure=False, mqtt5=self.mqtt5)
+        config = BrokerConfig(broker_url="localhost", port=1883, client_id="controller", connection_options=options)
+        self.rpc = RPCClient(config, mqtt_client=MQTTClient(
+            config.client_id, config.broker_url, config.port, options, client=self.broker.client("controller")
+        ), default_timeout=5.0)
+        self.rpc.connect()
+        self.addCleanup(self.rpc.disconnect)
+        self.dispatcher = FanOutDispatcher(self.rpc, rate=0)
+
+    def create_device(self, device_id, groups):
+        """Create and connect a device that plays, unless its ID is d3."""
+        options = ConnectionOptions(use_tls=False, reconnect_on_failure=False, mqtt5=self.mqtt5)
+        config = BrokerConfig(broker_url="localhost", port=1883, client_id=f"device-{device_id}",
+                              device_id=device_id, connection_options=options, groups=groups)
+        device = BrokerManager(config, mqtt_client=MQTTClient(
+            config.client_id, config.broker_url, config.port, options, client=self.broker.client(config.client_id)
+        ))
+
+        def play(msg):
+            self.executed.append((device_id, msg.command_id))
+            ok = device_id != "d3"
+            return ResponseMessage(command_id=msg.command_id, result=ok, message="" if ok else "no disk")
+
+        device.register_command_handler("play", play)
+        device.connect()
+        return device
+
+
+class TestFanOutDispatcher(FanOutTestCase):
+    """Tests for FanOutDispatcher."""
+
+    def test_dispatch(self):
+        """Test one command message reaches every device and the responses are summarised."""
+        command = CommandMessage(command="play")
+        summary = self.dispatcher.dispatch(command, devices=["d0", "d1", "d2", "d3", "d0"]).result(timeout=2)
+
+        self.assertEqual(sorted(summary.succeeded), ["d0", "d1", "d2"])
+        self.assertEqual(summary.failed, {"d3": "no disk"})
+        self.assertEqual(summary.to_dict()["total"], 4)
+        self.assertEqual(sorted(self.executed), [(f"d{i}", command.command_id) for i in range(4)])
+        self.assertEqual(self.rpc.pending_count, 0)
+
+    def test_timeouts(self):
+        """Test devices that do not answer time out without holding up the others."""
+        summary = self.dispatcher.dispatch(CommandMessage(command="play"), devices=["d0", "gone"],
+                                           timeout=0.05).result(timeout=2)
+
+        self.assertEqual(summary.succeeded, ["d0"])
+        self.assertEqual(summary.timed_out, ["gone"])
+
+    def test_rate(self):
+        """Test the commands are paced at the requested rate."""
+        start = time.monotonic()
+        fan_out = self.dispatcher.dispatch(CommandMessage(command="play"), devices=["d0", "d1", "d2"]
+                                           + [f"gone-{i}" for i in range(7)], timeout=0.01, rate=50)
+        fan_out.result(timeout=5)
+
+        # Ten commands at 50 per second: the last one leaves 9 / 50 s after the first
+        self.assertGreaterEqual(time.monotonic() - start, 0.18)
+        self.assertEqual(fan_out.sent, 10)
+
+    def test_cancel(self):
+        """Test a cancelled fan-out stops sending and settles every device."""
+        fan_out = self.dispatcher.dispatch(CommandMessage(command="play"),
+                                           devices=[f"gone-{i}" for i in range(100)], rate=100)
+        time.sleep(0.05)
+        fan_out.cancel()
+        summary = fan_out.result(timeout=2)
+
+        self.assertEqual(len(summary.not_sent), 100)
+        self.assertLess(fan_out.sent, 100)
+        self.assertEqual(self.rpc.pending_count, 0)
+
+    def test_dispatch_group(self):
+        """Test a group command is published once and every member's response is awaited."""
+        observed = []
+        observer = self.broker.client("observer")
+        observer.on_message = lambda client, userdata, msg: observed.append(msg.topic)
+        observer.connect()
+        observer.subscribe("amora/+/+/commands")
+
+        command = CommandMessage(command="play")
+        summary = self.dispatcher.dispatch_group("store", command, devices=["d0", "d1", "d2", "d4"],
+                                                 timeout=0.1).result(timeout=2)
+
+        self.assertEqual(observed, ["amora/groups/store/commands"])
+        self.assertEqual(sorted(summary.succeeded), ["d0", "d1", "d2"])
+        self.assertEqual(summary.timed_out, ["d4"])
+
+    def test_select_needs_fleet(self):
+        """Test selecting by a filter without a fleet state store is an error."""
+        with self.assertRaises(ValueError):
+            self.dispatcher.select(where={"state": "play"})
+        self.assertEqual(self.dispatcher.dispatch(CommandMessage(command="play"), devices=[]).result().total, 0)
+
+    @unittest.skipUnless(NUMPY_AVAILABLE, "NumPy not available")
+    def test_select_from_fleet(self):
+        """Test devices can be selected by a filter over the fleet state store."""
+        fleet = FleetStateStore()
+        for device_id, state in (("d0", "play"), ("d1", "stop"), ("d2", "play")):
+            fleet.update_state(device_id, {"state": state})
+        dispatcher = FanOutDispatcher(self.rpc, fleet=fleet, rate=0)
+
+        self.assertEqual(dispatcher.select(where={"state": "play"}), ["d0", "d2"])
+        self.assertEqual(dispatcher.select(["d2", "d1"], where={"state": "play"}), ["d2"])
+        self.assertEqual(dispatcher.select(), ["d0", "d1", "d2"])
+        summary = dispatcher.dispatch(CommandMessage(command="play"), where={"state": "play"}).result(timeout=2)
+        self.assertEqual(sorted(summary.succeeded), ["d0", "d2"])
+
+
+class TestFanOutDispatcherMQTT5(FanOutTestCase):
+    """Tests for fan-out with MQTT 5 response topics."""
+
+    mqtt5 = True
+
+    def test_dispatch(self):
+        """Test each device's response is told apart by its correlation data."""
+        summary = self.dispatcher.dispatch(CommandMessage(command="play"), devices=["d0", "d1", "d3"]).result(timeout=2)
+
+        self.assertEqual(sorted(summary.succeeded), ["d0", "d1"])
+        self.assertEqual(list(summary.failed), ["d3"])
+
+    def test_dispatch_group(self):
+        """Test group members answer on their own responses topics."""
+        summary = self.dispatcher.dispatch_group("store", CommandMessage(command="play"),
+                                                 devices=["d0", "d1", "d2"]).result(timeout=2)
+
+        self.assertEqual(sorted(summary.succeeded), ["d0", "d1", "d2"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,165 @@
+"""
+Tests for the controller fleet state store.
+"""
+
+import json
+import logging
+import os
+import subprocess
+import sys
+import unittest
+
+# Add the parent directory to the path so we can import the module
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+# Import the module
+from amora_sdk.controller.fleet import FleetStateStore, NUMPY_AVAILABLE
+from amora_sdk.device.broker.client import MQTTClient
+from amora_sdk.device.broker.config import BrokerConfig, ConnectionOptions
+from amora_sdk.device.broker.manager import BrokerManager
+from amora_sdk.device.broker.messages import StateMessage
+from tests.mocks.inprocess_broker import InProcessBroker
+
+# Disable logging during tests
+logging.disable(logging.CRITICAL)
+
+
+def state_payload(state, volume=50, position=None, timestamp=100.0):
+    """Build a state message payload."""
+    song = {"title": "Song", "position": position, "duration": 200.0} if position is not None else None
+    return StateMessage(state=state, current_song=song, volume=volume, timestamp=timestamp).to_json()
+
+
+@unittest.skipUnless(NUMPY_AVAILABLE, "NumPy not available")
+class TestFleetStateStore(unittest.TestCase):
+    """Tests for the FleetStateStore class."""
+
+    def setUp(self):
+        """Set up the test."""
+        self.now = 1000.0
+        self.store = FleetStateStore(capacity=2, clock=lambda: self.now)
+
+    def test_ingest_state(self):
+        """Test a state message fills the device's columns."""
+        self.assertTrue(self.store.ingest("amora/devices/a/state", state_payload("play", volume=70, position=12.5)))
+
+        self.assertEqual(self.store.get("a"), {
+            "state": "play", "volume": 70, "position": 12.5, "duration": 200.0,
+            "repeat": False, "random": False, "online": False, "last_seen": 100.0
+        })
+
+    def test_ingest_connection(self):
+        """Test connection messages set the online column and unreported fields stay unknown."""
+        self.store.ingest("amora/devices/a/connection", json.dumps({"status": "online", "timestamp": 5.0}))
+        self.assertEqual(self.store.get("a"), {
+            "state": "unknown", "volume": None, "position": None, "duration": None,
+            "repeat": False, "random": False, "online": True, "last_seen": 5.0
+        })
+
+        self.store.ingest("amora/devices/a/connection", json.dumps({"status": "offline"}))
+        self.assertFalse(self.store.get("a")["online"])
+
+    def test_ignores_other_messages(self):
+        """Test messages on other topics or with invalid payloads are not stored."""
+        self.assertFalse(self.store.ingest("amora/devices/a/commands", "{}"))
+        self.assertFalse(self.store.ingest("other/a/state", state_payload("play")))
+        self.assertFalse(self.store.ingest("amora/devices/a/state", "not json"))
+        self.assertEqual(len(self.store), 0)
+        self.assertIsNone(self.store.get("a"))
+
+    def test_malformed_messages_are_skipped(self):
+        """Test bad field values skip only their own message and volumes are clipped."""
+        messages = [
+            ("amora/devices/a/state", json.dumps({"state": "play", "volume": "loud"})),
+            ("amora/devices/b/state", json.dumps({"state": "play", "current_song": {"position": [1]}})),
+            ("amora/devices/c/state", json.dumps({"state": ["play"], "volume": 300, "timestamp": 7.0})),
+            ("amora/devices/d/connection", json.dumps({"status": "online", "timestamp": "soon"})),
+            ("amora/devices/e/state", state_payload("pause", volume=20, position=3.0)),
+        ]
+
+        self.assertEqual(self.store.ingest_many(messages), 2)
+        self.assertEqual(self.store.device_ids(), ["c", "e"])
+        self.assertEqual(self.store.get("c")["state"], "unknown")
+        self.assertEqual(self.store.get("c")["volume"], 100)
+        self.assertEqual(self.store.get("e")["position"], 3.0)
+
+    def test_grows(self):
+        """Test the columns grow past their capacity and keep earlier rows."""
+        messages = [(f"amora/devices/d{i}/state", state_payload("play", volume=i)) for i in range(10)]
+
+        self.assertEqual(self.store.ingest_many(messages), 10)
+        self.assertEqual(len(self.store), 10)
+        self.assertEqual([self.store.get(f"d{i}")["volume"] for i in range(10)], list(range(10)))
+
+    def test_filters(self):
+        """Test filters combine and match the expected devices."""
+        self.store.update_state("a", StateMessage(state="play", volume=80))
+        self.store.update_state("b", {"state": "pause", "volume": 20, "timestamp": 990.0})
+        self.store.update_state("c", {"state": "play", "volume": 30, "timestamp": 900.0})
+        self.store.update_connection("a", "online")
+        self.store.update_connection("b", "online")
+        self.store.update_connection("d", "offline")
+
+        self.assertEqual(self.store.device_ids(state="play"), ["a", "c"])
+        self.assertEqual(self.store.device_ids(state=["play", "pause"], online=True), ["a", "b"])
+        self.assertEqual(self.store.device_ids(min_volume=25, max_volume=50), ["c"])
+        self.assertEqual(self.store.device_ids(max_volume=100), ["a", "b", "c"])
+        self.assertEqual(self.store.device_ids(seen_within=60), ["a", "b"])
+        self.assertEqual(self.store.count(online=False), 2)
+        self.assertEqual(self.store.mask(state="stop").tolist(), [False] * 4)
+        with self.assertRaises(TypeError):
+            self.store.count(colour="red")
+
+    def test_aggregates(self):
+        """Test state counts and volume statistics over the filtered devices."""
+        for device_id, state, volume in (("a", "play", 80), ("b", "play", 40), ("c", "stop", 10), ("d", "bogus", 0)):
+            self.store.update_state(device_id, {"state": state, "volume": volume})
+        self.store.update_connection("e", "online")
+
+        counts = self.store.state_counts()
+        self.assertEqual(counts["play"], 2)
+        self.assertEqual(counts["stop"], 1)
+        self.assertEqual(counts["unknown"], 2)
+        self.assertEqual(self.store.volume_stats(state="play"), {"count": 2, "mean": 60.0, "min": 40, "max": 80})
+        self.assertEqual(self.store.volume_stats()["count"], 4)
+        self.assertEqual(self.store.volume_stats(state="pause")["count"], 0)
+
+    def test_subscribe(self):
+        """Test the store follows the state and connection messages of devices on a broker."""
+        broker = InProcessBroker(synchronous=True)
+        broker.start()
+        self.addCleanup(broker.stop)
+        options = ConnectionOptions(use_tls=False, reconnect_on_failure=False)
+        controller = MQTTClient("controller", "localhost", 1883, options, client=broker.client("controller"))
+        controller.connect()
+        self.store.subscribe(controller)
+
+        config = BrokerConfig(broker_url="localhost", port=1883, client_id="device-a", device_id="a",
+                              connection_options=options)
+        device = BrokerManager(config, mqtt_client=MQTTClient(
+            config.client_id, config.broker_url, config.port, options, client=broker.client(config.client_id)
+        ))
+        device.connect()
+        device.publish_state(StateMessage(state="pause", volume=35))
+
+        self.assertEqual(self.store.get("a")["state"], "pause")
+        self.assertEqual(self.store.get("a")["volume"], 35)
+        self.assertTrue(self.store.get("a")["online"])
+
+
+
+class TestControllerImport(unittest.TestCase):
+    """Tests for how the controller package is loaded."""
+
+    def test_not_imported_with_sdk(self):
+        """Test importing the SDK on a device does not load the controller package or NumPy."""
+        code = "import sys, amora_sdk; print('amora_sdk.controller' in sys.modules, 'numpy' in sys.modules)"
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                                cwd=os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+        self.assertEqual(result.stdout.split(), ["False", "False"])
+        self.assertNotIn("NumPy", result.stderr)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,203 @@
+"""
+Tests for the controller RPC client.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import unittest
+from concurrent.futures import wait
+
+# Add the parent directory to the path so we can import the module
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+# Import the module
+from amora_sdk.controller import CommandTimeoutError, RPCClient
+from amora_sdk.device.broker.client import MQTTClient
+from amora_sdk.device.broker.config import BrokerConfig, ConnectionOptions
+from amora_sdk.device.broker.manager import BrokerManager
+from amora_sdk.device.broker.messages import CommandMessage, ResponseMessage, chunk_responses
+from tests.mocks.inprocess_broker import InProcessBroker
+
+# Disable logging during tests
+logging.disable(logging.CRITICAL)
+
+
+class RPCTestCase(unittest.TestCase):
+    """Base class with a device and a controller on an in-process broker."""
+
+    mqtt5 = False
+    synchronous = True
+
+    def setUp(self):
+        """Set up the test."""
+        self.broker = InProcessBroker(synchronous=self.synchronous)
+        self.broker.start()
+        self.addCleanup(self.broker.stop)
+
+        self.device = self.create_device("test")
+        self.executed = []
+        self.device.register_command_handler("play", self.play)
+        self.device.register_command_handler(
+            "get_playlist_songs", lambda msg: chunk_responses(msg.command_id, [(0, 3, ["a", "b"]), (2, 3, ["c"])], key="songs")
+        )
+        self.device.connect()
+
+        options = ConnectionOptions(use_tls=False, clean_session=True, reconnect_on_failure=False, mqtt5=self.mqtt5)
+        config = BrokerConfig(broker_url="localhost", port=1883, client_id="controller", connection_options=options)
+        self.rpc = RPCClient(config, mqtt_client=MQTTClient(
+            config.client_id, config.broker_url, config.port, options, client=self.broker.client("controller")
+        ), default_timeout=5.0)
+        self.rpc.connect()
+        self.addCleanup(self.rpc.disconnect)
+
+    def create_device(self, device_id):
+        """Create a device BrokerManager on the broker."""
+        options = ConnectionOptions(use_tls=False, reconnect_on_failure=False, mqtt5=self.mqtt5)
+        config = BrokerConfig(broker_url="localhost", port=1883, client_id=f"device-{device_id}",
+                              device_id=device_id, connection_options=options)
+        return BrokerManager(config, mqtt_client=MQTTClient(
+            config.client_id, config.broker_url, config.port, options, client=self.broker.client(config.client_id)
+        ))
+
+    def play(self, msg):
+        """Handler for play."""
+        self.executed.append(msg.command_id)
+        return ResponseMessage(command_id=msg.command_id, result=True, data={"result": True})
+
+
+class TestRPCClient(RPCTestCase):
+    """Tests for RPCClient with MQTT 3.1.1 response matching."""
+
+    def test_send_command(self):
+        """Test the future resolves with the device's response."""
+        response = self.rpc.send_command("test", "play").result(timeout=1)
+
+        self.assertTrue(response.result)
+        self.assertEqual(self.executed, [response.command_id])
+        self.assertEqual(self.rpc.pending_count, 0)
+
+    def test_streamed_response(self):
+        """Test a streamed response resolves with every part once the last arrives."""
+        parts = self.rpc.send_command("test", "get_playlist_songs", stream=True).result(timeout=1)
+
+        self.assertEqual([part.data["songs"] for part in parts], [["a", "b"], ["c"]])
+
+    def test_batch(self):
+        """Test a batch resolves with the combined response."""
+        response = self.rpc.send_batch("test", [{"command": "play"}, {"command": "play"}]).result(timeout=1)
+
+        self.assertTrue(response.result)
+        self.assertEqual(len(response.data["results"]), 2)
+
+    def test_timeout(self):
+        """Test a command to a silent device fails with CommandTimeoutError and is forgotten."""
+        start = time.monotonic()
+        future = self.rpc.send_command("missing", "play", timeout=0.05)
+
+        with self.assertRaises(CommandTimeoutError) as context:
+            future.result(timeout=2)
+        self.assertGreaterEqual(time.monotonic() - start, 0.05)
+        self.assertEqual(context.exception.device_id, "missing")
+        self.assertEqual(self.rpc.pending_count, 0)
+
+    def test_scheduled_command_timeout(self):
+        """Test a scheduled command's timeout counts from its execute_at time."""
+        self.addCleanup(self.device.scheduler.stop)
+        future = self.rpc.send("test", CommandMessage(command="play", execute_at=time.time() + 0.2), timeout=0.05)
+
+        self.assertTrue(future.result(timeout=2).result)
+        self.assertEqual(len(self.executed), 1)
+
+    def test_timeouts_fire_in_deadline_order(self):
+        """Test one timer thread serves deadlines added out of order."""
+        threads = threading.active_count()
+        futures = [self.rpc.send_command("missing", "play", timeout=t) for t in (0.3, 0.1, 0.2)]
+
+        done, _ = wait(futures[1:2], timeout=2)
+        self.assertEqual(len(done), 1)
+        self.assertFalse(futures[0].done())
+        wait(futures, timeout=2)
+        self.assertTrue(all(isinstance(f.exception(), CommandTimeoutError) for f in futures))
+        self.assertEqual(threading.active_count(), threads)
+
+    def test_cancel_forgets_command(self):
+        """Test a cancelled command leaves the pending table."""
+        future = self.rpc.send_command("missing", "play")
+        self.assertEqual(self.rpc.pending_count, 1)
+
+        self.assertTrue(future.cancel())
+        self.assertEqual(self.rpc.pending_count, 0)
+
+    def test_not_connected(self):
+        """Test a command that cannot be published fails at once."""
+        self.rpc.mqtt_client.connected = False
+
+        with self.assertRaises(ConnectionError):
+            self.rpc.send_command("test", "play").result(timeout=1)
+        self.assertEqual(self.rpc.pending_count, 0)
+
+    def test_request(self):
+        """Test commands can be awaited in asyncio."""
+        async def main():
+            return await asyncio.gather(*(self.rpc.request("test", "play") for _ in range(3)))
+
+        responses = asyncio.run(main())
+        self.assertTrue(all(response.result for response in responses))
+        self.assertEqual(len(set(self.executed)), 3)
+
+
+class TestRPCClientConcurrent(RPCTestCase):
+    """Tests for many commands in flight at once."""
+
+    synchronous = False
+
+    def test_many_in_flight(self):
+        """Test thousands of commands to several devices complete over one connection."""
+        devices = [self.device] + [self.create_device(f"d{i}") for i in range(3)]
+        for device in devices[1:]:
+            device.register_command_handler("play", self.play)
+            device.connect()
+
+        futures = [self.rpc.send_command(devices[i % 4].config.device_id, "play") for i in range(2000)]
+
+        done, not_done = wait(futures, timeout=30)
+        self.assertFalse(not_done)
+        self.assertTrue(all(future.result().result for future in futures))
+        self.assertEqual(len(self.executed), 2000)
+        self.assertEqual(self.rpc.pending_count, 0)
+
+
+class TestRPCClientMQTT5(RPCTestCase):
+    """Tests for RPCClient with MQTT 5 response topics."""
+
+    mqtt5 = True
+
+    def test_response_on_response_topic(self):
+        """Test the device answers on the controller's topic with the correlation data, not its responses topic."""
+        observed = []
+        observer = self.broker.client("observer")
+        observer.on_message = lambda client, userdata, msg: observed.append(msg)
+        observer.connect()
+        observer.subscribe("amora/#")
+
+        response = self.rpc.send_command("test", "play").result(timeout=1)
+
+        self.assertTrue(response.result)
+        self.assertEqual(self.rpc.mqtt_client.subscriptions.keys(), {"amora/controllers/controller/responses"})
+        topics = {msg.topic: msg for msg in observed}
+        self.assertNotIn("amora/devices/test/responses", topics)
+        command, reply = topics["amora/devices/test/commands"], topics["amora/controllers/controller/responses"]
+        self.assertEqual(command.properties.ResponseTopic, "amora/controllers/controller/responses")
+        self.assertEqual(command.properties.MessageExpiryInterval, 5)
+        self.assertEqual(reply.topic, "amora/controllers/controller/responses")
+        self.assertEqual(reply.properties.CorrelationData, response.command_id.encode())
+        self.assertEqual(json.loads(reply.payload)["command_id"], response.command_id)
+
+
+if __name__ == '__main__':
+    unittest.main()
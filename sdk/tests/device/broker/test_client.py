@@ -52,7 +52,8 @@ class TestMQTTClient(unittest.TestCase):
         # Check that the MQTT client was created with the correct parameters
         self.mock_mqtt.Client.assert_called_once_with(
             client_id="test_client",
-            clean_session=True
+            clean_session=True,
+            reconnect_on_failure=False  # reconnects follow the client's reconnect policy
         )
         
         # Check that the callbacks were set
@@ -171,6 +172,59 @@ class TestMQTTClient(unittest.TestCase):
         # Check that the method returned True
         self.assertTrue(result)
     
+    def test_subscribe_registers_callback_once(self):
+        """Test subscribing again with the same callback does not register it twice."""
+        self.mock_client.subscribe.return_value = (0, 1)
+        self.client.connected = True
+        callback = MagicMock()
+        
+        self.client.subscribe("test/topic", QoS.AT_LEAST_ONCE, callback)
+        self.client.subscribe("test/topic", QoS.AT_LEAST_ONCE, callback)
+        
+        self.assertEqual(self.client.on_message_callbacks["test/topic"], [callback])
+        self.assertEqual(self.client.subscriptions, {"test/topic": QoS.AT_LEAST_ONCE})
+    
+    def test_subscribe_while_disconnected(self):
+        """Test subscriptions made while disconnected are sent on connect in one packet."""
+        self.mock_client.subscribe.return_value = (0, 1)
+        
+        self.assertTrue(self.client.subscribe("a/topic", QoS.AT_LEAST_ONCE, MagicMock()))
+        self.assertTrue(self.client.subscribe("b/topic", QoS.AT_MOST_ONCE, MagicMock()))
+        self.mock_client.subscribe.assert_not_called()
+        
+        self.client._on_connect(self.mock_client, None, {"session present": 0}, 0)
+        
+        self.mock_client.subscribe.assert_called_once_with([("a/topic", 1), ("b/topic", 0)])
+    
+    def test_resumed_session_skips_subscribe(self):
+        """Test no SUBSCRIBE is sent when the broker still has the session."""
+        self.client.subscribe("test/topic", QoS.AT_LEAST_ONCE, MagicMock())
+        
+        self.client._on_connect(self.mock_client, None, {"session present": 1}, 0)
+        
+        self.assertTrue(self.client.session_present)
+        self.mock_client.subscribe.assert_not_called()
+    
+    @patch('amora_sdk.device.broker.client.threading.Timer')
+    def test_refused_connection_schedules_one_reconnect(self, mock_timer):
+        """Test a busy refusal backs off and the following disconnect keeps the pending attempt."""
+        mock_timer.return_value.is_alive.return_value = True
+        
+        self.client._on_connect(self.mock_client, None, {}, 3)  # server unavailable
+        self.client._on_disconnect(self.mock_client, None, 1)
+        
+        mock_timer.assert_called_once()
+        self.assertGreaterEqual(mock_timer.call_args[0][0], self.client.reconnect_policy.busy_delay)
+    
+    def test_reconnect_restarts_network_loop(self):
+        """Test a reconnect attempt restarts the network thread around the reconnect."""
+        self.client._reconnect()
+        
+        self.assertEqual(
+            [c[0] for c in self.mock_client.method_calls if c[0] in ("loop_stop", "reconnect", "loop_start")],
+            ["loop_stop", "reconnect", "loop_start"]
+        )
+    
     def test_unsubscribe(self):
         """Test unsubscribe method."""
         # Set up the MQTT client's unsubscribe method to return a successful result
@@ -213,5 +267,51 @@ class TestMQTTClient(unittest.TestCase):
         self.assertEqual(args[3], True)
 
 
+
+class TestMQTTClientMQTT5(unittest.TestCase):
+    """Tests for the MQTTClient class with MQTT 5."""
+    
+    def setUp(self):
+        """Set up the test."""
+        self.mock_client = MagicMock()
+        self.mock_client.publish.return_value.rc = 0
+        self.options = ConnectionOptions(use_tls=False, mqtt5=True)
+        self.client = MQTTClient("test_client", "test.broker.com", 1883, self.options, client=self.mock_client)
+    
+    def test_connect_keeps_persistent_session(self):
+        """Test a persistent session connects without clean start and with a session expiry."""
+        self.client.connect()
+        
+        args, kwargs = self.mock_client.connect.call_args
+        self.assertFalse(kwargs["clean_start"])
+        self.assertEqual(kwargs["properties"].SessionExpiryInterval, 0xFFFFFFFF)
+    
+    def test_publish_properties(self):
+        """Test request/response properties are passed to paho."""
+        self.client.connected = True
+        
+        self.assertTrue(self.client.publish("test/topic", "x", properties={
+            "response_topic": "reply/topic", "correlation_data": b"c1", "message_expiry_interval": 5
+        }))
+        
+        properties = self.mock_client.publish.call_args[1]["properties"]
+        self.assertEqual(properties.ResponseTopic, "reply/topic")
+        self.assertEqual(properties.CorrelationData, b"c1")
+        self.assertEqual(properties.MessageExpiryInterval, 5)
+    
+    def test_message_properties_reach_callbacks(self):
+        """Test received request/response properties are passed to message callbacks."""
+        received = []
+        self.client.subscribe("test/topic", callback=lambda topic, payload, properties: received.append(properties))
+        msg = MagicMock(topic="test/topic", payload=b"x", qos=1, retain=False)
+        msg.properties.ResponseTopic = "reply/topic"
+        msg.properties.CorrelationData = b"c1"
+        msg.properties.MessageExpiryInterval = None
+        
+        self.client._on_message(self.mock_client, None, msg)
+        
+        self.assertEqual(received, [{"qos": 1, "retain": False, "response_topic": "reply/topic", "correlation_data": b"c1"}])
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,75 @@
+"""
+Tests for the Broker configuration models.
+"""
+
+import unittest
+import sys
+import os
+
+# Add the parent directory to the path so we can import the module
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
+
+# Import the module
+from amora_sdk.device.broker.config import BrokerConfig, ReconnectPolicy
+
+
+class TestReconnectPolicy(unittest.TestCase):
+    """Tests for the ReconnectPolicy class."""
+    
+    def setUp(self):
+        """Set up the test."""
+        self.policy = ReconnectPolicy(base_delay=1, max_delay=60, initial_spread=10, busy_delay=15, seed=42)
+    
+    def test_delays_stay_in_bounds(self):
+        """Test the first delay is an offset within the spread and later ones stay within the bounds."""
+        self.assertLessEqual(self.policy.next_delay(), 10)
+        delays = [self.policy.next_delay() for _ in range(100)]
+        self.assertTrue(all(1 <= delay <= 60 for delay in delays))
+        self.assertEqual(self.policy.attempts, 101)
+    
+    def test_delays_are_jittered(self):
+        """Test devices with different seeds do not share a schedule."""
+        first = [ReconnectPolicy(seed=seed).next_delay() for seed in range(100)]
+        self.assertGreater(len(set(first)), 90)
+    
+    def test_server_busy_backs_off(self):
+        """Test a busy server pushes the next delay past busy_delay."""
+        self.assertGreaterEqual(self.policy.next_delay(server_busy=True), 15)
+        self.assertGreaterEqual(self.policy.next_delay(server_busy=True), 15)
+    
+    def test_reset_and_copy(self):
+        """Test reset restarts the schedule and copies start fresh."""
+        for _ in range(5):
+            self.policy.next_delay()
+        copy = self.policy.copy()
+        self.assertEqual(copy.attempts, 0)
+        self.assertEqual(copy.max_delay, 60)
+        
+        self.policy.reset()
+        self.assertEqual(self.policy.attempts, 0)
+        self.assertLessEqual(self.policy.next_delay(), 10)
+    
+    def test_is_server_busy(self):
+        """Test server busy detection from codes and errors."""
+        self.assertTrue(ReconnectPolicy.is_server_busy(3))
+        self.assertTrue(ReconnectPolicy.is_server_busy(0x89))
+        self.assertFalse(ReconnectPolicy.is_server_busy(5))
+        self.assertTrue(ReconnectPolicy.is_server_busy(Exception("Throttling: too many requests")))
+        self.assertFalse(ReconnectPolicy.is_server_busy(ConnectionRefusedError("Connection refused")))
+        self.assertFalse(ReconnectPolicy.is_server_busy(None))
+    
+    def test_from_dict(self):
+        """Test the reconnect policy can be configured."""
+        config = BrokerConfig.from_dict({"broker": {"reconnect": {"initial_spread": 5, "max_delay": 30}}})
+        self.assertEqual(config.connection_options.reconnect_policy.initial_spread, 5)
+        self.assertIsNone(BrokerConfig.from_dict({}).connection_options.reconnect_policy)
+    
+    def test_groups_from_dict(self):
+        """Test the device's groups can be configured."""
+        config = BrokerConfig.from_dict({"broker": {"groups": ["store-12", "eu"]}})
+        self.assertEqual(config.groups, ["store-12", "eu"])
+        self.assertEqual(config.group_prefix, "amora/groups")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+"""
+Tests for the Broker command deduplication cache.
+"""
+
+import unittest
+import sys
+import os
+
+# Add the parent directory to the path so we can import the module
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
+
+# Import the module
+from amora_sdk.device.broker.dedup import CommandDedupCache
+
+
+class FakeClock:
+    """Manually advanced clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestCommandDedupCache(unittest.TestCase):
+    """Tests for the CommandDedupCache class."""
+
+    def setUp(self):
+        """Set up the test."""
+        self.clock = FakeClock()
+        self.cache = CommandDedupCache(max_entries=3, ttl=60, max_bytes=100, clock=self.clock)
+
+    def test_get_and_put(self):
+        """Test cached responses are returned until they expire."""
+        self.assertIsNone(self.cache.get("a"))
+        self.assertTrue(self.cache.put("a", ["one", "two"]))
+        self.assertEqual(self.cache.get("a"), ["one", "two"])
+        self.assertEqual(self.cache.hits, 1)
+
+        self.clock.now = 60
+        self.assertIsNone(self.cache.get("a"))
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(self.cache.size_bytes, 0)
+
+    def test_evicts_least_recently_used(self):
+        """Test the entry count is bounded, evicting the least recently used entry."""
+        for command_id in ("a", "b", "c"):
+            self.cache.put(command_id, [command_id])
+        self.cache.get("a")
+        self.cache.put("d", ["d"])
+
+        self.assertEqual(len(self.cache), 3)
+        self.assertIsNone(self.cache.get("b"))
+        self.assertEqual(self.cache.get("a"), ["a"])
+
+    def test_bounded_by_size(self):
+        """Test the total payload size is bounded and oversized responses are not cached."""
+        self.assertFalse(self.cache.put("huge", ["x" * 101]))
+        self.cache.put("a", ["x" * 60])
+        self.cache.put("b", ["x" * 60])
+
+        self.assertIsNone(self.cache.get("a"))
+        self.assertEqual(self.cache.size_bytes, 60)
+
+    def test_expired_entries_evicted_on_put(self):
+        """Test expired entries at the old end are dropped by later inserts."""
+        self.cache.put("a", ["a"])
+        self.clock.now = 61
+        self.cache.put("b", ["b"])
+
+        self.assertEqual(len(self.cache), 1)
+        self.assertEqual(self.cache.size_bytes, 1)
+
+    def test_pending(self):
+        """Test a pending command has no responses until they are put."""
+        self.assertTrue(self.cache.mark_pending("a"))
+        self.assertEqual(self.cache.get("a"), [])
+
+        self.cache.put("a", ["done"])
+        self.assertEqual(self.cache.get("a"), ["done"])
+
+    def test_empty_command_id_ignored(self):
+        """Test commands without an ID are never deduplicated."""
+        self.assertFalse(self.cache.put("", ["a"]))
+        self.assertIsNone(self.cache.get(""))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -8,6 +8,8 @@ import sys
 import os
 import json
 import logging
+import threading
+import time
 
 # Add the parent directory to the path so we can import the module
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
@@ -16,7 +18,12 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../.
 from amora_sdk.device.broker.manager import BrokerManager
 from amora_sdk.device.broker.config import BrokerConfig, ConnectionOptions, QoS
 from amora_sdk.device.broker.topics import TopicType
-from amora_sdk.device.broker.messages import CommandMessage, ResponseMessage, StateMessage
+from amora_sdk.device.broker.messages import CommandMessage, ResponseMessage, StateMessage, chunk_responses
+from amora_sdk.device.broker.client import MQTTClient
+from amora_sdk.device.player.music_player import MusicPlayer
+from amora_sdk.metrics import MetricsRegistry
+from tests.mocks.fake_mpd_server import FakeMPDServer
+from tests.mocks.inprocess_broker import InProcessBroker
 
 # Disable logging during tests
 logging.disable(logging.CRITICAL)
@@ -170,7 +177,7 @@ class TestBrokerManager(unittest.TestCase):
 
         # Check that the publish_response method was called with the correct parameters
         self.broker_manager.publish_response.assert_called_once_with(
-            self.broker_manager._execute_command.return_value
+            self.broker_manager._execute_command.return_value, None
         )
 
     def test_execute_command_with_handler(self):
@@ -279,5 +286,610 @@ class TestBrokerManager(unittest.TestCase):
         self.assertEqual(result, self.broker_manager.publish_state.return_value)
 
 
+class BrokerManagerTestCase(unittest.TestCase):
+    """Base class that creates a BrokerManager with a mocked MQTT client."""
+
+    def setUp(self):
+        """Set up the test."""
+        patcher = patch('amora_sdk.device.broker.manager.MQTTClient')
+        self.mock_mqtt_client = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.mock_client_instance = MagicMock()
+        self.mock_mqtt_client.return_value = self.mock_client_instance
+
+        self.config = BrokerConfig(
+            broker_url="test.broker.com",
+            port=1883,
+            client_id="test_client",
+            device_id="test_device",
+            topic_prefix="amora/devices",
+            connection_options=ConnectionOptions(use_tls=False),
+            default_qos=QoS.AT_LEAST_ONCE
+        )
+        self.broker_manager = BrokerManager(self.config)
+
+    def receive(self, command, command_id="test_id", params=None, **fields):
+        """Deliver a command message to the manager."""
+        payload = dict(command=command, command_id=command_id, params=params or {}, **fields)
+        self.broker_manager._on_command_received(
+            "amora/devices/test_device/commands",
+            json.dumps(payload).encode('utf-8'),
+            {"qos": 1, "retain": False}
+        )
+
+    def published(self, topic_type):
+        """Get the decoded payloads published to a topic type."""
+        topic = self.broker_manager.topic_manager.get_topic(topic_type)
+        return [
+            json.loads(kwargs["payload"])
+            for _, kwargs in self.mock_client_instance.publish.call_args_list
+            if kwargs.get("topic") == topic
+        ]
+
+
+class TestBrokerManagerStreaming(BrokerManagerTestCase):
+    """Tests for streamed command responses."""
+
+    def test_streamed_response(self):
+        """Test every chunk of a streamed response is published with the command ID."""
+        def handler(command_msg):
+            pages = [(0, 3, ["a", "b"]), (2, 3, ["c"])]
+            return chunk_responses(command_msg.command_id, pages, key="songs")
+
+        self.broker_manager.register_command_handler("get_playlist_songs", handler)
+        self.receive("get_playlist_songs", command_id="stream_id")
+
+        responses = self.published(TopicType.RESPONSES)
+        self.assertEqual(len(responses), 2)
+        self.assertTrue(all(r["command_id"] == "stream_id" for r in responses))
+        self.assertEqual(responses[0]["data"]["songs"], ["a", "b"])
+        self.assertFalse(responses[0]["data"]["last"])
+        self.assertEqual(responses[1]["data"]["chunk"], 1)
+        self.assertTrue(responses[1]["data"]["last"])
+
+    def test_empty_stream(self):
+        """Test an empty stream still produces a final response."""
+        responses = list(chunk_responses("empty_id", []))
+
+        self.assertEqual(len(responses), 1)
+        self.assertTrue(responses[0].data["last"])
+        self.assertEqual(responses[0].data["items"], [])
+
+    def test_stream_error(self):
+        """Test a failing stream ends with an error response."""
+        def handler(command_msg):
+            yield ResponseMessage(command_id=command_msg.command_id, result=True, data={"last": False})
+            raise RuntimeError("MPD went away")
+
+        self.broker_manager.register_command_handler("get_playlist_songs", handler)
+        self.receive("get_playlist_songs", command_id="stream_id")
+
+        responses = self.published(TopicType.RESPONSES)
+        self.assertEqual(len(responses), 2)
+        self.assertFalse(responses[1]["result"])
+        self.assertIn("MPD went away", responses[1]["message"])
+
+
+class TestBrokerManagerMetrics(BrokerManagerTestCase):
+    """Tests for command metrics."""
+
+    def test_command_latency_recorded(self):
+        """Test command handling time is recorded when metrics are enabled."""
+        from amora_sdk.device.broker import manager
+
+        registry = MetricsRegistry(enabled=True)
+        histogram = registry.histogram("amora_command_seconds")
+        with patch.object(manager, "COMMAND_SECONDS", histogram):
+            self.broker_manager.register_command_handler(
+                "play", lambda msg: ResponseMessage(command_id=msg.command_id, result=True)
+            )
+            self.receive("play")
+
+        self.assertIsNotNone(histogram.quantile(0.5, command="play"))
+
+    def test_streamed_command_latency_covers_iteration(self):
+        """Test a streaming handler's time includes producing every chunk."""
+        from amora_sdk.device.broker import manager
+
+        def handler(command_msg):
+            for i in range(2):
+                time.sleep(0.02)
+                yield ResponseMessage(command_id=command_msg.command_id, result=True, data={"last": i == 1})
+
+        registry = MetricsRegistry(enabled=True)
+        histogram = registry.histogram("amora_command_seconds")
+        with patch.object(manager, "COMMAND_SECONDS", histogram):
+            self.broker_manager.register_command_handler("get_playlist_songs", handler)
+            self.receive("get_playlist_songs")
+
+        self.assertEqual(len(self.published(TopicType.RESPONSES)), 2)
+        self.assertGreaterEqual(histogram.quantile(0.5, command="get_playlist_songs"), 0.035)
+
+    def test_publish_metrics(self):
+        """Test a metrics snapshot is published to the metrics topic."""
+        registry = MetricsRegistry(enabled=True)
+        registry.counter("amora_commands_total").inc(command="play")
+
+        self.broker_manager.publish_metrics(registry)
+
+        messages = self.published(TopicType.METRICS)
+        self.assertEqual(len(messages), 1)
+        self.assertEqual(messages[0]["device_id"], "test_device")
+        self.assertEqual(messages[0]["metrics"]["amora_commands_total"]["values"][0]["value"], 1)
+
+
+class TestBrokerManagerTracing(BrokerManagerTestCase):
+    """Tests for command tracing."""
+
+    def setUp(self):
+        """Set up the test."""
+        super().setUp()
+        self.broker_manager.register_command_handler(
+            "play", lambda msg: ResponseMessage(command_id=msg.command_id, result=True)
+        )
+
+    def test_no_trace_by_default(self):
+        """Test responses carry no trace unless asked for."""
+        self.receive("play")
+
+        response = self.published(TopicType.RESPONSES)[0]
+        self.assertIsNone(response["data"])
+
+    def test_trace_embedded_on_request(self):
+        """Test a command asking for a trace gets one in the response data."""
+        self.receive("play", command_id="traced", trace=True)
+
+        trace = self.published(TopicType.RESPONSES)[0]["data"]["trace"]
+        self.assertEqual(trace["command_id"], "traced")
+        self.assertEqual([span["name"] for span in trace["spans"]], ["parse", "handler"])
+
+    def test_trace_sink(self):
+        """Test the trace sink receives traces including the publish span."""
+        traces = []
+        self.broker_manager.set_trace_sink(traces.append)
+
+        self.receive("play")
+
+        self.assertEqual(len(traces), 1)
+        self.assertEqual([span["name"] for span in traces[0]["spans"]], ["parse", "handler", "publish"])
+        self.assertIsNone(self.published(TopicType.RESPONSES)[0]["data"])
+
+    def test_music_player_mpd_spans(self):
+        """Test a handler backed by a MusicPlayer records its MPD round trips as mpd spans."""
+        server = FakeMPDServer().start()
+        self.addCleanup(server.stop)
+        player = MusicPlayer({"mpd": {"host": server.host, "port": server.port}})
+        self.assertTrue(player.connect())
+        self.addCleanup(player.disconnect)
+        self.broker_manager.register_command_handler(
+            "set_volume",
+            lambda msg: ResponseMessage(command_id=msg.command_id, result=player.set_volume(msg.params["volume"]))
+        )
+
+        self.receive("set_volume", command_id="traced", params={"volume": 40}, trace=True)
+
+        response = self.published(TopicType.RESPONSES)[0]
+        self.assertTrue(response["result"])
+        self.assertIn("mpd", [span["name"] for span in response["data"]["trace"]["spans"]])
+        self.assertEqual(server.volume, 40)
+
+
+class TestBrokerManagerDedup(BrokerManagerTestCase):
+    """Tests for redelivered command deduplication."""
+
+    def setUp(self):
+        """Set up the test."""
+        super().setUp()
+        self.executed = []
+        self.broker_manager.register_command_handler(
+            "play", lambda msg: self.executed.append(msg.command_id) or ResponseMessage(command_id=msg.command_id, result=True)
+        )
+        self.broker_manager.register_command_handler(
+            "get_playlist_songs", lambda msg: self.executed.append(msg.command_id) or chunk_responses(
+                msg.command_id, [(0, 3, ["a", "b"]), (2, 3, ["c"])], key="songs")
+        )
+
+    def test_duplicate_republishes_response(self):
+        """Test a redelivered command gets the same response without running again."""
+        self.receive("play", command_id="dup")
+        self.receive("play", command_id="dup")
+        self.receive("play", command_id="other")
+
+        self.assertEqual(self.executed, ["dup", "other"])
+        responses = self.published(TopicType.RESPONSES)
+        self.assertEqual(len(responses), 3)
+        self.assertEqual(responses[0], responses[1])
+
+    def test_duplicate_stream_republishes_every_part(self):
+        """Test a redelivered streamed command gets every part again."""
+        self.receive("get_playlist_songs", command_id="stream")
+        self.receive("get_playlist_songs", command_id="stream")
+
+        self.assertEqual(self.executed, ["stream"])
+        responses = self.published(TopicType.RESPONSES)
+        self.assertEqual(responses[2:], responses[:2])
+
+    def test_dedup_disabled(self):
+        """Test a zero TTL turns deduplication off."""
+        self.config.dedup_ttl = 0
+        manager = BrokerManager(self.config)
+        self.assertIsNone(manager.dedup_cache)
+
+
+class TestBrokerManagerResponseTopic(BrokerManagerTestCase):
+    """Tests for MQTT 5 response topics."""
+
+    def test_response_on_response_topic(self):
+        """Test a command naming a response topic is answered there, with its correlation data, also when redelivered."""
+        self.broker_manager.register_command_handler(
+            "play", lambda msg: ResponseMessage(command_id=msg.command_id, result=True)
+        )
+        payload = json.dumps({"command": "play", "command_id": "c1"}).encode('utf-8')
+        for _ in range(2):
+            self.broker_manager._on_command_received(
+                "amora/devices/test_device/commands", payload,
+                {"qos": 1, "retain": False, "response_topic": "amora/controllers/c/responses", "correlation_data": b"c1"}
+            )
+
+        self.assertEqual(self.published(TopicType.RESPONSES), [])
+        calls = self.mock_client_instance.publish.call_args_list
+        self.assertEqual(len(calls), 2)
+        for _, kwargs in calls:
+            self.assertEqual(kwargs["topic"], "amora/controllers/c/responses")
+            self.assertEqual(kwargs["properties"], {"correlation_data": b"c1"})
+            self.assertEqual(json.loads(kwargs["payload"])["command_id"], "c1")
+
+
+class TestBrokerManagerBatch(BrokerManagerTestCase):
+    """Tests for batch commands without a dedicated handler."""
+
+    def setUp(self):
+        """Set up the test."""
+        super().setUp()
+        self.executed = []
+
+        def set_volume(msg):
+            self.executed.append(msg.command_id)
+            volume = msg.params["volume"]
+            return ResponseMessage(command_id=msg.command_id, result=0 <= volume <= 100, data={"result": volume})
+
+        self.broker_manager.register_command_handler("set_volume", set_volume)
+        self.broker_manager.register_command_handler(
+            "play", lambda msg: self.executed.append(msg.command_id) or ResponseMessage(command_id=msg.command_id, result=True)
+        )
+
+    def test_batch_runs_sub_commands_in_order(self):
+        """Test every sub-command runs and one combined response is published."""
+        self.receive("batch", command_id="b", commands=[
+            {"command": "set_volume", "params": {"volume": 40}},
+            {"command": "play"}
+        ])
+
+        self.assertEqual(self.executed, ["b/0", "b/1"])
+        responses = self.published(TopicType.RESPONSES)
+        self.assertEqual(len(responses), 1)
+        self.assertEqual(responses[0]["command_id"], "b")
+        self.assertTrue(responses[0]["result"])
+        self.assertEqual([r["command"] for r in responses[0]["data"]["results"]], ["set_volume", "play"])
+        self.assertEqual(responses[0]["data"]["results"][0]["data"], {"result": 40})
+
+    def test_batch_stops_on_error(self):
+        """Test the sub-commands after a failure are skipped unless asked otherwise."""
+        commands = [{"command": "set_volume", "params": {"volume": 400}}, {"command": "unknown"}, {"command": "play"}]
+        self.receive("batch", command_id="stop", commands=commands)
+        self.receive("batch", command_id="go", commands=commands, stop_on_error=False)
+
+        self.assertEqual(self.executed, ["stop/0", "go/0", "go/2"])
+        stopped, continued = self.published(TopicType.RESPONSES)
+        self.assertFalse(stopped["result"])
+        self.assertEqual(stopped["message"], "0 of 3 commands succeeded")
+        self.assertEqual(stopped["data"]["results"][2]["message"], "Skipped after an earlier failure")
+        self.assertEqual([r["result"] for r in continued["data"]["results"]], [False, False, True])
+
+    def test_batch_rejects_nesting_and_streams(self):
+        """Test nested batches and streamed commands are refused."""
+        self.broker_manager.register_command_handler(
+            "get_playlist_songs", lambda msg: chunk_responses(msg.command_id, [(0, 1, ["a"])], key="songs")
+        )
+        self.receive("batch", command_id="b", stop_on_error=False, commands=[
+            {"command": "batch", "commands": []},
+            {"command": "get_playlist_songs"}
+        ])
+
+        results = self.published(TopicType.RESPONSES)[0]["data"]["results"]
+        self.assertEqual(results[0]["message"], "Batches cannot be nested")
+        self.assertIn("cannot be batched", results[1]["message"])
+
+    def test_registered_batch_handler_wins(self):
+        """Test a registered batch handler replaces the default execution."""
+        self.broker_manager.register_command_handler(
+            "batch", lambda msg: ResponseMessage(command_id=msg.command_id, result=True, message="custom")
+        )
+        self.receive("batch", command_id="b", commands=[{"command": "play"}])
+
+        self.assertEqual(self.executed, [])
+        self.assertEqual(self.published(TopicType.RESPONSES)[0]["message"], "custom")
+
+
+class TestBrokerManagerScheduling(BrokerManagerTestCase):
+    """Tests for commands with an execute_at time and clock probes."""
+
+    def setUp(self):
+        """Set up the test."""
+        super().setUp()
+        self.addCleanup(self.broker_manager.scheduler.stop)
+        self.events = []
+        self.done = threading.Event()
+        self.broker_manager.register_command_handler(
+            "play", lambda msg: self.events.append(("play", time.time())) or ResponseMessage(command_id=msg.command_id, result=True)
+        )
+        self.broker_manager.register_command_callback(lambda msg: self.done.set())
+
+    def prepare(self, msg):
+        """Preparer recording when it staged the command."""
+        self.events.append(("prepare", time.time()))
+
+        def fire():
+            self.events.append(("fire", time.time()))
+            return ResponseMessage(command_id=msg.command_id, result=True)
+        return fire
+
+    def test_time_sync(self):
+        """Test a clock probe is answered with the device times and its offset adopted."""
+        before = time.time()
+        self.receive("time_sync", command_id="t1")
+        self.receive("time_sync", command_id="t2", params={"offset": 0.25})
+        # Probes are never answered from the dedup cache
+        self.receive("time_sync", command_id="t2", params={"offset": -0.5})
+
+        responses = self.published(TopicType.RESPONSES)
+        self.assertEqual(len(responses), 3)
+        data = responses[0]["data"]
+        self.assertLessEqual(before, data["received"])
+        self.assertLessEqual(data["received"], data["sent"])
+        self.assertEqual(data["offset"], 0.0)
+        self.assertEqual(responses[1]["data"]["offset"], 0.25)
+        self.assertEqual(self.broker_manager.clock_offset(), -0.5)
+
+    def test_clock_offset_per_controller(self):
+        """Test each controller's probes set its own offset, used for its scheduled commands."""
+        def receive_from(controller, command, command_id, **fields):
+            payload = dict(command=command, command_id=command_id, **fields)
+            self.broker_manager._on_command_received(
+                "amora/devices/test_device/commands", json.dumps(payload).encode('utf-8'),
+                {"qos": 1, "retain": False, "response_topic": f"amora/controllers/{controller}/responses"}
+            )
+
+        receive_from("a", "time_sync", "t1", params={"offset": 0.25})
+        receive_from("b", "time_sync", "t2", params={"offset": -0.5})
+        self.assertEqual(self.broker_manager.clock_offset(("amora/controllers/a/responses", None)), 0.25)
+        self.assertEqual(self.broker_manager.clock_offset(), 0.0)
+
+        execute_at = time.time() + 60
+        receive_from("a", "play", "s1", execute_at=execute_at)
+        fire_at = self.broker_manager.scheduler.clock() + 60 + 0.25
+        self.assertAlmostEqual(self.broker_manager.scheduler._entries["s1"][0], fire_at, delta=0.1)
+
+    def test_scheduled_handler_runs_at_time(self):
+        """Test a command with an execute_at time runs its handler then and is answered afterwards."""
+        execute_at = time.time() + 0.1
+        self.receive("play", command_id="s1", execute_at=execute_at)
+
+        self.assertEqual(self.published(TopicType.RESPONSES), [])
+        self.assertIn("s1", self.broker_manager.scheduler)
+        self.assertTrue(self.done.wait(2.0))
+
+        self.assertGreaterEqual(self.events[0][1], execute_at)
+        response = self.published(TopicType.RESPONSES)[0]
+        self.assertTrue(response["result"])
+        self.assertAlmostEqual(response["data"]["schedule"]["fire_at"], execute_at)
+
+    def test_scheduled_command_prepared_on_arrival(self):
+        """Test a preparer stages the command on arrival and its final step runs at the device time."""
+        self.broker_manager.register_command_handler("play_playlist", lambda msg: None, prepare=self.prepare)
+        self.broker_manager.clock_offsets[None] = -0.2
+        execute_at = time.time() + 0.3
+        self.receive("play_playlist", command_id="s1", execute_at=execute_at)
+
+        self.assertEqual([name for name, _ in self.events], ["prepare"])
+        self.assertTrue(self.done.wait(2.0))
+
+        self.assertEqual([name for name, _ in self.events], ["prepare", "fire"])
+        # Run at the target time in the device clock
+        self.assertGreaterEqual(self.events[1][1], execute_at - 0.2)
+        self.assertLess(self.events[1][1], execute_at)
+        self.assertTrue(self.published(TopicType.RESPONSES)[0]["result"])
+
+    def test_redelivery_while_scheduled_ignored(self):
+        """Test a redelivered command is not scheduled twice, and is answered from the cache once it has run."""
+        execute_at = time.time() + 0.05
+        self.receive("play", command_id="s1", execute_at=execute_at)
+        self.receive("play", command_id="s1", execute_at=execute_at)
+        self.assertTrue(self.done.wait(2.0))
+        self.receive("play", command_id="s1", execute_at=execute_at)
+
+        self.assertEqual(len(self.events), 1)
+        self.assertEqual(len(self.published(TopicType.RESPONSES)), 2)
+
+    def test_redelivery_while_running_ignored(self):
+        """Test a command redelivered while its scheduled run is in progress is not run again."""
+        running, release = threading.Event(), threading.Event()
+
+        def play(msg):
+            running.set()
+            release.wait(2.0)
+            self.events.append(("play", time.time()))
+            return ResponseMessage(command_id=msg.command_id, result=True)
+
+        self.broker_manager.register_command_handler("play", play)
+        execute_at = time.time()
+        self.receive("play", command_id="s1", execute_at=execute_at)
+        self.assertTrue(running.wait(2.0))
+        self.assertNotIn("s1", self.broker_manager.scheduler)
+
+        self.receive("play", command_id="s1", execute_at=execute_at)
+        release.set()
+        self.assertTrue(self.done.wait(2.0))
+
+        self.assertEqual(len(self.events), 1)
+        self.assertEqual(len(self.published(TopicType.RESPONSES)), 1)
+
+    def test_preparer_error(self):
+        """Test a failing preparer is answered at once and nothing is scheduled."""
+        def fail(msg):
+            raise RuntimeError("no such playlist")
+
+        self.broker_manager.register_command_handler("play_playlist", lambda msg: None, prepare=fail)
+        self.receive("play_playlist", command_id="s1", execute_at=time.time() + 10)
+
+        response = self.published(TopicType.RESPONSES)[0]
+        self.assertFalse(response["result"])
+        self.assertIn("no such playlist", response["message"])
+        self.assertEqual(len(self.broker_manager.scheduler), 0)
+
+    def test_too_far_ahead_rejected(self):
+        """Test a command due beyond max_schedule_ahead is rejected."""
+        self.receive("play", command_id="s1", execute_at=time.time() + self.config.max_schedule_ahead + 60)
+
+        response = self.published(TopicType.RESPONSES)[0]
+        self.assertFalse(response["result"])
+        self.assertIn("too far ahead", response["message"])
+        self.assertEqual(self.events, [])
+        self.assertEqual(len(self.broker_manager.scheduler), 0)
+
+
+class TestBrokerManagerInProcess(unittest.TestCase):
+    """Tests for BrokerManager with an injected client on an in-process broker."""
+
+    def setUp(self):
+        """Set up a device and a controller on the same broker."""
+        self.broker = InProcessBroker(synchronous=True)
+        config = BrokerConfig(
+            broker_url="localhost",
+            port=1883,
+            client_id="device-test",
+            device_id="test",
+            topic_prefix="amora/devices",
+            connection_options=ConnectionOptions(use_tls=False)
+        )
+        mqtt_client = MQTTClient(config.client_id, config.broker_url, config.port,
+                                 config.connection_options, client=self.broker.client(config.client_id))
+        self.broker_manager = BrokerManager(config, mqtt_client=mqtt_client)
+        self.broker_manager.register_command_handler(
+            "play", lambda msg: ResponseMessage(command_id=msg.command_id, result=True, message="ok")
+        )
+
+        self.messages = []
+        self.controller = self.broker.client("controller")
+        self.controller.on_message = lambda client, userdata, msg: self.messages.append(msg)
+        self.controller.connect()
+
+    def test_command_round_trip(self):
+        """Test a command published by a controller is answered on the responses topic."""
+        self.assertTrue(self.broker_manager.connect())
+        self.controller.subscribe("amora/devices/+/responses")
+
+        self.controller.publish("amora/devices/test/commands",
+                                CommandMessage(command="play", command_id="rt").to_json())
+
+        self.assertEqual(len(self.messages), 1)
+        self.assertEqual(self.messages[0].topic, "amora/devices/test/responses")
+        self.assertEqual(json.loads(self.messages[0].payload)["command_id"], "rt")
+
+    def test_group_commands(self):
+        """Test a device answers commands sent to the groups it joined, on its own responses topic."""
+        self.broker_manager.connect()
+        self.controller.subscribe("amora/devices/+/responses")
+        self.assertTrue(self.broker_manager.join_group("store-12"))
+
+        self.controller.publish("amora/groups/store-12/commands",
+                                CommandMessage(command="play", command_id="g1").to_json())
+        self.assertTrue(self.broker_manager.leave_group("store-12"))
+        self.assertFalse(self.broker_manager.leave_group("store-12"))
+        self.controller.publish("amora/groups/store-12/commands",
+                                CommandMessage(command="play", command_id="g2").to_json())
+
+        self.assertEqual([json.loads(msg.payload)["command_id"] for msg in self.messages], ["g1"])
+        self.assertEqual(self.messages[0].topic, "amora/devices/test/responses")
+
+    def create_persistent_manager(self):
+        """Create a device on a persistent session, counting SUBSCRIBE packets."""
+        options = ConnectionOptions(use_tls=False, reconnect_on_failure=False)
+        self.assertFalse(options.clean_session)
+        client = self.broker.client("device-persistent", clean_session=options.clean_session)
+        client.subscribe = MagicMock(wraps=client.subscribe)
+        config = BrokerConfig(broker_url="localhost", port=1883, client_id="device-persistent",
+                              device_id="persistent", connection_options=options)
+        manager = BrokerManager(config, mqtt_client=MQTTClient(config.client_id, config.broker_url,
+                                                                config.port, options, client=client))
+        executed = []
+        manager.register_command_handler(
+            "play", lambda msg: executed.append(msg.command_id) or ResponseMessage(command_id=msg.command_id, result=True)
+        )
+        return manager, client, executed
+
+    def test_reconnect_resumes_session(self):
+        """Test a reconnect on a persistent session sends no SUBSCRIBE and runs commands once."""
+        manager, client, executed = self.create_persistent_manager()
+        manager.connect()
+        for i in range(3):
+            client.simulate_disconnect()
+            # Commands sent while offline are queued by the broker for the session
+            self.controller.publish("amora/devices/persistent/commands",
+                                    CommandMessage(command="play", command_id=f"offline-{i}").to_json(), qos=1)
+            manager.connect()
+        
+        self.controller.publish("amora/devices/persistent/commands",
+                                CommandMessage(command="play", command_id="online").to_json(), qos=1)
+        
+        self.assertEqual(client.subscribe.call_count, 1)
+        self.assertEqual(executed, ["offline-0", "offline-1", "offline-2", "online"])
+        self.assertEqual(len(manager.mqtt_client.on_message_callbacks["amora/devices/persistent/commands"]), 1)
+
+    def test_reconnect_without_session_resubscribes(self):
+        """Test subscriptions are sent again when the broker lost the session."""
+        manager, client, executed = self.create_persistent_manager()
+        manager.connect()
+        client.simulate_disconnect()
+        client.expire_session()
+        manager.connect()
+        
+        self.controller.publish("amora/devices/persistent/commands",
+                                CommandMessage(command="play", command_id="c1").to_json(), qos=1)
+        
+        self.assertEqual(client.subscribe.call_count, 2)
+        client.subscribe.assert_called_with([("amora/devices/persistent/commands", 1)])
+        self.assertEqual(executed, ["c1"])
+
+    def test_leave_group_while_offline(self):
+        """Test a group left while disconnected is not resubscribed or run after a reconnect."""
+        for expire_session in (False, True):
+            manager, client, executed = self.create_persistent_manager()
+            manager.connect()
+            self.assertTrue(manager.join_group("store-12"))
+            client.simulate_disconnect()
+            if expire_session:
+                client.expire_session()
+
+            self.assertTrue(manager.leave_group("store-12"))
+            self.assertNotIn("amora/groups/store-12/commands", manager.mqtt_client.subscriptions)
+            manager.connect()
+            self.controller.publish("amora/groups/store-12/commands",
+                                    CommandMessage(command="play", command_id="g1").to_json(), qos=1)
+
+            self.assertEqual(executed, [])
+            self.assertNotIn("amora/groups/store-12/commands", client.subscriptions)
+            manager.disconnect()
+
+    def test_retained_connection_status(self):
+        """Test a late subscriber receives the retained connection status."""
+        self.broker_manager.connect()
+
+        self.controller.subscribe("amora/devices/test/connection")
+
+        self.assertEqual(len(self.messages), 1)
+        self.assertEqual(json.loads(self.messages[0].payload)["status"], "online")
+
+
 if __name__ == '__main__':
     unittest.main()
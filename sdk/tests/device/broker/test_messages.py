@@ -0,0 +1,112 @@
+"""
+Tests for the broker message classes.
+"""
+
+import json
+import unittest
+import sys
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+# Add the parent directory to the path so we can import the module
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
+
+# Import the module
+from amora_sdk.device.broker.messages import (
+    BatchCommandMessage, CommandMessage, ConnectionMessage, ResponseMessage, StateMessage,
+    batch_response, parse_message
+)
+
+
+class TestMessages(unittest.TestCase):
+    """Tests for the message classes."""
+    
+    def test_round_trip(self):
+        """Test messages survive conversion to JSON and back."""
+        command = CommandMessage(command="set_volume", command_id="c1", params={"volume": 40})
+        parsed = parse_message(command.to_json(), 'command')
+        self.assertEqual(parsed, command)
+        
+        response = ResponseMessage(command_id="c1", result=True, data={"result": 40})
+        self.assertEqual(parse_message(response.to_json()), response)
+    
+    def test_to_dict_is_shallow(self):
+        """Test to_dict lists every field and shares nested values."""
+        song = {"title": "A", "position": 1.5}
+        state = StateMessage(state="play", current_song=song, volume=30, timestamp=1.0)
+        data = state.to_dict()
+        
+        self.assertEqual(list(data), ["timestamp", "state", "current_song", "volume", "repeat", "random"])
+        self.assertIs(data["current_song"], song)
+        self.assertEqual(json.loads(state.to_json())["current_song"], song)
+    
+    @unittest.skipIf(sys.version_info < (3, 10), "dataclass slots need Python 3.10")
+    def test_messages_have_no_instance_dict(self):
+        """Test messages use slots instead of a per-instance dict."""
+        message = ConnectionMessage(status="online")
+        self.assertFalse(hasattr(message, "__dict__"))
+        with self.assertRaises(AttributeError):
+            message.unknown = True
+    
+    def test_unknown_fields_are_ignored(self):
+        """Test parsing skips fields this version does not know."""
+        command = parse_message('{"command": "play", "command_id": "c1", "bogus": 1}', 'command')
+        self.assertEqual(command.command, "play")
+        self.assertEqual(command.command_id, "c1")
+    
+    def test_optional_fields_are_omitted(self):
+        """Test optional fields are only sent when set, so older devices can decode commands."""
+        @dataclass
+        class OldCommandMessage:
+            timestamp: float = 0.0
+            command: str = ""
+            command_id: str = ""
+            params: Optional[Dict[str, Any]] = None
+        
+        command = CommandMessage(command="play", command_id="c1", params={"a": 1})
+        data = json.loads(command.to_json())
+        self.assertNotIn("trace", data)
+        self.assertNotIn("execute_at", data)
+        self.assertEqual(OldCommandMessage(**data).command_id, "c1")
+        
+        data = CommandMessage(command="play", trace=True, execute_at=5.0).to_dict()
+        self.assertTrue(data["trace"])
+        self.assertEqual(data["execute_at"], 5.0)
+
+    def test_execute_at(self):
+        """Test commands carry an optional execute_at time."""
+        self.assertIsNone(parse_message('{"command": "play"}', 'command').execute_at)
+        command = CommandMessage(command="play_playlist", params={"playlist_name": "A"}, execute_at=1700000000.25)
+        self.assertEqual(parse_message(command.to_json(), 'command').execute_at, 1700000000.25)
+
+    
+    def test_batch_command(self):
+        """Test batch commands parse to BatchCommandMessage with numbered sub-commands."""
+        payload = json.dumps({"command": "batch", "command_id": "b", "timestamp": 1.0, "commands": [
+            {"command": "set_volume", "params": {"volume": 40}}, {"command": "play"}
+        ]})
+        batch = parse_message(payload)
+        
+        self.assertIsInstance(batch, BatchCommandMessage)
+        self.assertTrue(batch.stop_on_error)
+        sub_commands = batch.sub_commands()
+        self.assertEqual([c.command_id for c in sub_commands], ["b/0", "b/1"])
+        self.assertEqual(sub_commands[0].params, {"volume": 40})
+        self.assertEqual(parse_message(payload, 'command'), batch)
+    
+    def test_batch_response(self):
+        """Test sub-command responses combine into one response."""
+        commands = [CommandMessage(command="play"), CommandMessage(command="next")]
+        responses = [ResponseMessage(command_id="b/0", result=True),
+                     ResponseMessage(command_id="b/1", result=False, message="No next song")]
+        response = batch_response("b", commands, responses)
+        
+        self.assertFalse(response.result)
+        self.assertEqual(response.message, "1 of 2 commands succeeded")
+        self.assertEqual(response.data["results"][1],
+                         {"command": "next", "result": False, "message": "No next song", "data": None})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+"""
+Tests for the Broker command scheduler.
+"""
+
+import unittest
+import sys
+import os
+import threading
+import time
+
+# Add the parent directory to the path so we can import the module
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
+
+# Import the module
+from amora_sdk.device.broker.scheduler import CommandScheduler
+
+
+class TestCommandScheduler(unittest.TestCase):
+    """Tests for the CommandScheduler class."""
+
+    def setUp(self):
+        """Set up the test."""
+        self.scheduler = CommandScheduler()
+        self.fired = []
+        self.done = threading.Event()
+
+    def tearDown(self):
+        """Clean up after the test."""
+        self.scheduler.stop()
+
+    def record(self, key, last=False):
+        """Callback recording its key and fire time."""
+        def callback():
+            self.fired.append((key, time.time()))
+            if last:
+                self.done.set()
+        return callback
+
+    def test_fires_in_time_order(self):
+        """Test entries fire at their times, in time order whatever the scheduling order."""
+        now = time.time()
+        self.assertTrue(self.scheduler.schedule("late", now + 0.15, self.record("late", last=True)))
+        self.assertTrue(self.scheduler.schedule("early", now + 0.05, self.record("early")))
+        self.assertEqual(len(self.scheduler), 2)
+
+        self.assertTrue(self.done.wait(2.0))
+        self.assertEqual([key for key, _ in self.fired], ["early", "late"])
+        self.assertGreaterEqual(self.fired[0][1], now + 0.05)
+        self.assertLess(self.fired[1][1] - (now + 0.15), 0.1)
+        self.assertEqual(len(self.scheduler), 0)
+
+    def test_past_time_fires_at_once(self):
+        """Test an entry due in the past runs straight away."""
+        self.scheduler.schedule("past", time.time() - 10, self.record("past", last=True))
+
+        self.assertTrue(self.done.wait(1.0))
+        self.assertEqual(self.fired[0][0], "past")
+
+    def test_duplicate_key(self):
+        """Test a key that is already waiting is not scheduled again."""
+        now = time.time()
+        self.assertTrue(self.scheduler.schedule("a", now + 0.05, self.record("a", last=True)))
+        self.assertFalse(self.scheduler.schedule("a", now + 0.01, self.record("again")))
+        self.assertIn("a", self.scheduler)
+
+        self.assertTrue(self.done.wait(1.0))
+        time.sleep(0.05)
+        self.assertEqual([key for key, _ in self.fired], ["a"])
+
+    def test_cancel(self):
+        """Test a cancelled entry does not fire and its key can be scheduled again."""
+        now = time.time()
+        self.scheduler.schedule("a", now + 0.05, self.record("a"))
+        self.assertTrue(self.scheduler.cancel("a"))
+        self.assertFalse(self.scheduler.cancel("a"))
+        self.scheduler.schedule("b", now + 0.1, self.record("b", last=True))
+
+        self.assertTrue(self.done.wait(1.0))
+        self.assertEqual([key for key, _ in self.fired], ["b"])
+
+    def test_stop_drops_entries(self):
+        """Test stopping drops the waiting entries and scheduling starts the thread again."""
+        self.scheduler.schedule("a", time.time() + 0.05, self.record("a"))
+        self.scheduler.stop()
+        self.assertEqual(len(self.scheduler), 0)
+        time.sleep(0.1)
+        self.assertEqual(self.fired, [])
+
+        self.scheduler.schedule("b", time.time(), self.record("b", last=True))
+        self.assertTrue(self.done.wait(1.0))
+
+    def test_on_fire_runs_while_entry_waits(self):
+        """Test the fire hook sees the entry still scheduled, before its callback runs."""
+        seen = []
+        self.scheduler.on_fire = lambda key: seen.append((key, key in self.scheduler, list(self.fired)))
+        self.scheduler.schedule("a", time.time(), self.record("a", last=True))
+
+        self.assertTrue(self.done.wait(2.0))
+        self.assertEqual(seen, [("a", True, [])])
+        self.assertNotIn("a", self.scheduler)
+
+    def test_callback_error(self):
+        """Test a failing callback does not stop the thread."""
+        def fail():
+            raise RuntimeError("boom")
+
+        now = time.time()
+        self.scheduler.schedule("fail", now, fail)
+        self.scheduler.schedule("ok", now + 0.02, self.record("ok", last=True))
+
+        self.assertTrue(self.done.wait(1.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
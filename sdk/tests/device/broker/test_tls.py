@@ -0,0 +1,149 @@
+"""
+Tests for the Broker TLS helpers.
+"""
+
+import unittest
+import sys
+import os
+import ssl
+import tempfile
+import threading
+import logging
+from unittest.mock import MagicMock
+
+# Add the parent directory to the path so we can import the module
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
+
+# Import the module
+from amora_sdk.device.broker.client import MQTTClient
+from amora_sdk.device.broker.config import ConnectionOptions
+from amora_sdk.device.broker.tls import ResumableTLSContext, clear_tls_contexts, get_tls_context
+from tests.mocks.fake_mqtt_server import OPENSSL_AVAILABLE, FakeMQTTServer, create_self_signed_cert, server_tls_context
+
+# Disable logging during tests
+logging.disable(logging.CRITICAL)
+
+
+class TestTLSContextCache(unittest.TestCase):
+    """Tests for the shared TLS contexts."""
+
+    def tearDown(self):
+        """Tear down the test."""
+        clear_tls_contexts()
+
+    def test_contexts_are_shared_per_files(self):
+        """Test clients with the same files share a context and others do not."""
+        context = get_tls_context()
+        self.assertIs(get_tls_context(), context)
+        self.assertEqual(context.verify_mode, ssl.CERT_REQUIRED)
+        self.assertTrue(context.check_hostname)
+
+        # A certificate without a key is not used, as before
+        self.assertIs(get_tls_context(cert_file="client.crt"), context)
+
+        clear_tls_contexts()
+        self.assertIsNot(get_tls_context(), context)
+
+    def test_clients_share_context(self):
+        """Test MQTT clients configured alike get the same context."""
+        contexts = []
+        for client_id in ("a", "b"):
+            paho = MagicMock()
+            MQTTClient(client_id, "localhost", 8883, ConnectionOptions(), client=paho)
+            contexts.append(paho.tls_set_context.call_args[0][0])
+
+        self.assertIsNot(contexts[0], contexts[1])
+        self.assertIs(contexts[0].context, contexts[1].context)
+
+
+class TestResumableTLSContext(unittest.TestCase):
+    """Tests for the ResumableTLSContext class."""
+
+    def setUp(self):
+        """Set up the test."""
+        self.shared = MagicMock()
+        self.context = ResumableTLSContext(self.shared)
+        self.sock = MagicMock()
+
+    def test_offers_saved_session(self):
+        """Test the saved session is passed on the next wrap."""
+        self.context.wrap_socket(self.sock, server_hostname="broker")
+        self.assertNotIn("session", self.shared.wrap_socket.call_args[1])
+
+        session = object()
+        connected = MagicMock(spec=ssl.SSLSocket)
+        connected.session = session
+        self.assertTrue(self.context.save_session(connected))
+
+        self.context.wrap_socket(self.sock, server_hostname="broker")
+        self.assertIs(self.shared.wrap_socket.call_args[1]["session"], session)
+
+    def test_rejected_session_falls_back(self):
+        """Test a session the context rejects is dropped for a full handshake."""
+        self.context.session = object()
+        self.shared.wrap_socket.side_effect = [ValueError("Session refers to a different SSLContext"), "wrapped"]
+
+        self.assertEqual(self.context.wrap_socket(self.sock), "wrapped")
+        self.assertIsNone(self.context.session)
+        self.assertNotIn("session", self.shared.wrap_socket.call_args[1])
+
+    def test_resumption_disabled(self):
+        """Test nothing is saved when resumption is off, and attributes come from the shared context."""
+        context = ResumableTLSContext(self.shared, resume=False)
+        self.assertFalse(context.save_session(MagicMock(spec=ssl.SSLSocket)))
+        self.assertIs(context.check_hostname, self.shared.check_hostname)
+
+
+@unittest.skipUnless(OPENSSL_AVAILABLE, "openssl command not available")
+class TestTLSReconnect(unittest.TestCase):
+    """Tests for TLS session resumption against a TLS broker."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Create the broker certificate."""
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.cert_file, cls.key_file = create_self_signed_cert(cls.directory.name)
+
+    @classmethod
+    def tearDownClass(cls):
+        """Remove the broker certificate."""
+        cls.directory.cleanup()
+
+    def setUp(self):
+        """Set up the test."""
+        context = server_tls_context(self.cert_file, self.key_file)
+        context.maximum_version = ssl.TLSVersion.TLSv1_2
+        self.server = FakeMQTTServer(ssl_context=context).start()
+
+    def tearDown(self):
+        """Tear down the test."""
+        self.server.stop()
+        clear_tls_contexts()
+
+    def reconnect(self, resume):
+        """Connect twice and return whether each connection resumed a session."""
+        options = ConnectionOptions(ca_file=self.cert_file, reconnect_on_failure=False, tls_session_resumption=resume)
+        client = MQTTClient("tls-test", "localhost", self.server.port, options)
+        connected = threading.Event()
+        client.register_on_connect(lambda success: connected.set())
+
+        reused = []
+        for _ in range(2):
+            connected.clear()
+            self.assertTrue(client.connect())
+            self.assertTrue(connected.wait(5))
+            reused.append(client.client.socket().session_reused)
+            client.disconnect()
+        return reused
+
+    def test_reconnect_resumes_session(self):
+        """Test a reconnect resumes the previous TLS session."""
+        self.assertEqual(self.reconnect(True), [False, True])
+
+    def test_reconnect_without_resumption(self):
+        """Test every connection does a full handshake when resumption is off."""
+        self.assertEqual(self.reconnect(False), [False, False])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -11,7 +11,7 @@ import logging
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
 
 # Import the module
-from amora_sdk.device.broker.topics import TopicManager, TopicType
+from amora_sdk.device.broker.topics import TopicManager, TopicType, group_command_topic
 
 # Disable logging during tests
 logging.disable(logging.CRITICAL)
@@ -44,6 +44,12 @@ class TestTopicManager(unittest.TestCase):
         connection_topic = self.topic_manager.get_topic(TopicType.CONNECTION)
         self.assertEqual(connection_topic, "amora/devices/test_device/connection")
     
+    def test_topics_are_shared(self):
+        """Test get_topic returns the same interned string every time."""
+        topic = self.topic_manager.get_topic(TopicType.STATE)
+        self.assertIs(topic, self.topic_manager.get_topic(TopicType.STATE))
+        self.assertIs(topic, sys.intern("amora/devices/test_device/state"))
+    
     def test_is_valid_topic(self):
         """Test is_valid_topic method."""
         # Test valid topics
@@ -97,6 +103,26 @@ class TestTopicManager(unittest.TestCase):
         """Test get_all_devices_wildcard method."""
         all_devices_wildcard = self.topic_manager.get_all_devices_wildcard()
         self.assertEqual(all_devices_wildcard, "amora/devices/+/#")
+    
+    def test_groups(self):
+        """Test group command topics are subscribed to and parsed as command topics."""
+        topic_manager = TopicManager(self.topic_prefix, self.device_id, groups=["store-12"])
+        self.assertEqual(topic_manager.get_subscription_topics(),
+                         ["amora/devices/test_device/commands", "amora/groups/store-12/commands"])
+        self.assertEqual(topic_manager.parse_topic("amora/groups/store-12/commands"), TopicType.COMMANDS)
+        
+        self.assertEqual(topic_manager.add_group("eu"), "amora/groups/eu/commands")
+        self.assertEqual(topic_manager.groups, ["store-12", "eu"])
+        self.assertEqual(topic_manager.remove_group("store-12"), "amora/groups/store-12/commands")
+        self.assertIsNone(topic_manager.remove_group("store-12"))
+        self.assertFalse(topic_manager.is_valid_topic("amora/groups/store-12/commands"))
+    
+    def test_group_command_topic(self):
+        """Test group names cannot span or wildcard topic levels."""
+        self.assertEqual(group_command_topic("eu", "fleet/groups"), "fleet/groups/eu/commands")
+        for name in ("", "a/b", "+", "#"):
+            with self.assertRaises(ValueError):
+                group_command_topic(name)
 
 
 if __name__ == '__main__':
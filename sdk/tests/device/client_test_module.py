@@ -12,18 +12,12 @@ import logging
 import random
 import time
 from typing import Dict, Any, List, Optional, Callable
-import sys
-import os
-
-# Add the device directory to the path
-device_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../amora_sdk/device'))
-sys.path.insert(0, device_path)
-
-# Import directly
-from iot import telemetry
-from iot import twin
-from iot.telemetry import TelemetryManager
-from iot.twin import TwinManager
+
+# Import through the package, as the IoT modules use relative imports
+from amora_sdk.device.iot import telemetry
+from amora_sdk.device.iot import twin
+from amora_sdk.device.iot.telemetry import TelemetryManager
+from amora_sdk.device.iot.twin import TwinManager
 
 # Import mocks
 from tests.mocks.mock_azure import MockIoTHubDeviceClient, MockMessage, MockMethodResponse
@@ -0,0 +1,150 @@
+"""
+Tests for the music library index.
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
+
+# Import the module to test
+from amora_sdk.device.player.library import LibraryIndex
+
+
+class TestLibraryIndex(unittest.TestCase):
+    """Test cases for the LibraryIndex class."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.music_dir = os.path.join(self.tmp_dir, "music")
+        self.index_path = os.path.join(self.tmp_dir, "index", "library.db")
+
+        self._write("song1.mp3")
+        self._write("cover.jpg")
+        self._write("album/track1.flac")
+        self._write("album/track2.OGG")
+        self._write("album/disc2/track3.m4a")
+
+        self.index = LibraryIndex(self.music_dir, self.index_path)
+
+    def tearDown(self):
+        """Clean up after tests."""
+        self.index.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def _write(self, rel_path, data=b"data"):
+        path = os.path.join(self.music_dir, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+
+    def _bump_mtime(self, rel_dir):
+        # Force a distinct directory mtime regardless of filesystem timestamp granularity
+        path = os.path.join(self.music_dir, rel_dir)
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+    def test_initial_scan(self):
+        """Test the first scan indexes every music file."""
+        result = self.index.scan()
+
+        self.assertEqual(result.added, [
+            "album/disc2/track3.m4a",
+            "album/track1.flac",
+            "album/track2.OGG",
+            "song1.mp3"
+        ])
+        self.assertEqual(result.removed, [])
+        self.assertEqual(result.changed, [])
+        self.assertEqual(result.scanned_dirs, 3)
+        self.assertEqual(len(self.index), 4)
+        self.assertNotIn("cover.jpg", self.index)
+
+        entry = self.index.get("song1.mp3")
+        self.assertEqual(entry.size, 4)
+        self.assertEqual(entry.inode, os.stat(os.path.join(self.music_dir, "song1.mp3")).st_ino)
+
+    def test_rescan_skips_unchanged_directories(self):
+        """Test a rescan without changes lists no directories."""
+        self.index.scan()
+        result = self.index.scan()
+
+        self.assertFalse(result.has_changes)
+        self.assertEqual(result.scanned_dirs, 0)
+        self.assertEqual(result.skipped_dirs, 3)
+
+    def test_rescan_detects_added_and_removed(self):
+        """Test a rescan reports added and removed files."""
+        self.index.scan()
+
+        self._write("album/disc2/track4.wav")
+        os.remove(os.path.join(self.music_dir, "album/track1.flac"))
+        self._bump_mtime("album/disc2")
+        self._bump_mtime("album")
+
+        result = self.index.scan()
+
+        self.assertEqual(result.added, ["album/disc2/track4.wav"])
+        self.assertEqual(result.removed, ["album/track1.flac"])
+        self.assertEqual(result.scanned_dirs, 2)
+        self.assertEqual(result.skipped_dirs, 1)
+
+    def test_full_scan_detects_changed(self):
+        """Test a full scan reports files modified in place."""
+        self.index.scan()
+
+        self._write("song1.mp3", b"longer data")
+
+        self.assertFalse(self.index.scan().has_changes)
+        result = self.index.scan(full=True)
+        self.assertEqual(result.changed, ["song1.mp3"])
+
+    def test_removed_directory(self):
+        """Test removing a directory removes its files and subdirectories."""
+        self.index.scan()
+
+        shutil.rmtree(os.path.join(self.music_dir, "album"))
+        self._bump_mtime("")
+
+        result = self.index.scan()
+
+        self.assertEqual(result.removed, [
+            "album/disc2/track3.m4a",
+            "album/track1.flac",
+            "album/track2.OGG"
+        ])
+        self.assertEqual(self.index.files(), ["song1.mp3"])
+
+    def test_index_is_persistent(self):
+        """Test the index survives reopening."""
+        self.index.scan()
+        self.index.close()
+
+        self.index = LibraryIndex(self.music_dir, self.index_path)
+
+        self.assertEqual(len(self.index), 4)
+        self.assertFalse(self.index.scan().has_changes)
+
+    def test_parallel_first_scan(self):
+        """Test a parallel first scan indexes the same files as a sequential one."""
+        result = self.index.scan(max_workers=4)
+
+        self.assertEqual(len(result.added), 4)
+        self.assertEqual(result.scanned_dirs, 3)
+        self.assertFalse(self.index.scan(max_workers=4).has_changes)
+
+    def test_missing_music_directory(self):
+        """Test scanning a missing directory returns no changes."""
+        with LibraryIndex(os.path.join(self.tmp_dir, "missing")) as index:
+            result = index.scan()
+
+        self.assertFalse(result.has_changes)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+"""
+Tests for the song metadata cache.
+"""
+
+import os
+import sys
+import shutil
+import sqlite3
+import tempfile
+import time
+import unittest
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
+
+# Import the module to test
+from amora_sdk.device.player.metadata import MetadataCache, project_metadata
+
+
+def make_song(path, title, mtime="2024-01-01T00:00:00Z"):
+    return {"file": path, "title": title, "artist": "Artist", "last-modified": mtime, "format": "44100:16:2"}
+
+
+class TestMetadataCache(unittest.TestCase):
+    """Test cases for the MetadataCache class."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.store_path = os.path.join(self.tmp_dir, "cache", "metadata.db")
+
+    def tearDown(self):
+        """Clean up after tests."""
+        shutil.rmtree(self.tmp_dir)
+
+    def test_project_metadata(self):
+        """Test song fields and tags are kept and queue fields dropped."""
+        song = make_song("a.mp3", "A")
+        self.assertEqual(project_metadata(dict(song, pos="3", id="12")), song)
+
+    def test_get_put(self):
+        """Test basic get and put."""
+        cache = MetadataCache()
+        cache.put(make_song("a.mp3", "A"))
+
+        self.assertEqual(cache.get("a.mp3")["title"], "A")
+        self.assertIsNone(cache.get("b.mp3"))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_mtime_mismatch_is_a_miss(self):
+        """Test a different mtime invalidates the entry."""
+        cache = MetadataCache()
+        cache.put(make_song("a.mp3", "A"))
+
+        self.assertIsNotNone(cache.get("a.mp3", "2024-01-01T00:00:00Z"))
+        self.assertIsNone(cache.get("a.mp3", "2024-02-01T00:00:00Z"))
+
+    def test_lru_eviction(self):
+        """Test the least recently used entry is evicted."""
+        cache = MetadataCache(capacity=2)
+        cache.put(make_song("a.mp3", "A"))
+        cache.put(make_song("b.mp3", "B"))
+        cache.get("a.mp3")
+        cache.put(make_song("c.mp3", "C"))
+
+        self.assertEqual(len(cache), 2)
+        self.assertIsNotNone(cache.get("a.mp3"))
+        self.assertIsNone(cache.get("b.mp3"))
+
+    def test_get_many(self):
+        """Test get_many reports misses."""
+        cache = MetadataCache()
+        cache.put_many([make_song("a.mp3", "A"), make_song("b.mp3", "B")])
+
+        songs, misses = cache.get_many(["a.mp3", "x.mp3", "b.mp3"])
+
+        self.assertEqual(misses, 1)
+        self.assertEqual(songs[0]["title"], "A")
+        self.assertIsNone(songs[1])
+
+    def test_invalidate_directory(self):
+        """Test invalidating a directory drops the files below it only."""
+        cache = MetadataCache(store_path=self.store_path)
+        cache.put_many([make_song("album/a.mp3", "A"), make_song("album2/b.mp3", "B")])
+
+        cache.invalidate("album")
+
+        self.assertIsNone(cache.get("album/a.mp3"))
+        self.assertIsNotNone(cache.get("album2/b.mp3"))
+        cache.close()
+
+    def test_persistent_store(self):
+        """Test entries are served from the backing store after a restart."""
+        cache = MetadataCache(capacity=1, store_path=self.store_path)
+        cache.put_many([make_song("a.mp3", "A"), make_song("b.mp3", "B")])
+        cache.close()
+
+        cache = MetadataCache(store_path=self.store_path)
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.get("a.mp3")["title"], "A")
+        self.assertEqual(cache.get("b.mp3")["title"], "B")
+
+        cache.clear()
+        self.assertIsNone(cache.get("a.mp3"))
+        cache.close()
+
+    def test_store_capacity(self):
+        """Test the backing store keeps only the newest store_capacity entries."""
+        cache = MetadataCache(capacity=1, store_path=self.store_path, store_capacity=3)
+        for i in range(5):
+            cache.put(make_song(f"{i}.mp3", str(i)))
+        cache.close()
+
+        cache = MetadataCache(store_path=self.store_path, store_capacity=3)
+        self.assertLessEqual(cache._store_count, 3)
+        self.assertIsNone(cache.get("0.mp3"))
+        self.assertEqual(cache.get("4.mp3")["title"], "4")
+        cache.close()
+
+    def test_store_max_age(self):
+        """Test expired entries are not served from the backing store and are dropped on open."""
+        cache = MetadataCache(store_path=self.store_path)
+        cache.put_many([make_song("a.mp3", "A"), make_song("b.mp3", "B")])
+        cache.close()
+        with sqlite3.connect(self.store_path) as store:
+            store.execute("UPDATE songs SET stored_at = ? WHERE path = 'a.mp3'", (time.time() - 3600,))
+        store.close()
+
+        cache = MetadataCache(store_path=self.store_path, store_max_age=60)
+        self.assertIsNone(cache.get("a.mp3"))
+        self.assertEqual(cache.get("b.mp3")["title"], "B")
+        self.assertEqual(cache._store_count, 1)
+        cache.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
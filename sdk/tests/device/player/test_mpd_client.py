@@ -13,6 +13,7 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../.
 # Import the module to test
 from amora_sdk.device.player.mpd_client import MPDClientWrapper
 from tests.mocks.mock_mpd import MockMPDClient
+from tests.mocks.fake_mpd_server import FakeMPDServer
 
 
 class TestMPDClientWrapper(unittest.TestCase):
@@ -261,5 +262,59 @@ class TestMPDClientWrapper(unittest.TestCase):
             self.wrapper.invalid_method()
 
 
+
+class TestMPDClientWrapperOverTCP(unittest.TestCase):
+    """Test cases for the MPD Client Wrapper against the fake MPD server."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.server = FakeMPDServer().start()
+        for i in range(3):
+            self.server.add_song(f"album/{i}.mp3", Title=f"Song {i}")
+        self.wrapper = MPDClientWrapper(host=self.server.host, port=self.server.port, timeout=5)
+        self.wrapper.retry_delay = 0
+
+    def tearDown(self):
+        """Clean up after tests."""
+        self.wrapper.disconnect()
+        self.server.stop()
+
+    def test_commands(self):
+        """Test commands round trip over the protocol."""
+        self.wrapper.add("album")
+        self.wrapper.play(1)
+
+        self.assertEqual(self.wrapper.status()["state"], "play")
+        self.assertEqual(self.wrapper.currentsong()["title"], "Song 1")
+        self.assertEqual(len(self.wrapper.playlistinfo()), 3)
+
+    def test_command_list(self):
+        """Test a command list is answered in one response."""
+        self.wrapper.connect()
+        client = self.wrapper.client
+
+        client.command_list_ok_begin()
+        client.setvol(30)
+        client.status()
+        results = client.command_list_end()
+
+        self.assertEqual(results[1]["volume"], "30")
+
+    def test_retry_after_error(self):
+        """Test a failed command is retried on a new connection."""
+        self.server.fail_next("status")
+
+        self.assertEqual(self.wrapper.status()["state"], "stop")
+        self.assertEqual(self.server.command_counts["status"], 2)
+        self.assertEqual(self.server.connections_total, 2)
+
+    def test_reconnect_after_drop(self):
+        """Test the wrapper reconnects after the server drops the connection."""
+        self.wrapper.status()
+        self.server.drop_connections()
+
+        self.assertEqual(self.wrapper.status()["state"], "stop")
+        self.assertEqual(self.server.connections_total, 2)
+
 if __name__ == "__main__":
     unittest.main()
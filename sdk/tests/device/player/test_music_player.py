@@ -4,6 +4,8 @@ Tests for the MusicPlayer class.
 
 import os
 import sys
+import threading
+import time
 import unittest
 from unittest.mock import MagicMock, patch, call
 
@@ -11,8 +13,11 @@ from unittest.mock import MagicMock, patch, call
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
 
 # Import the module to test
+from amora_sdk.device.player import mpd_client
 from amora_sdk.device.player.music_player import MusicPlayer
+from amora_sdk.metrics import MetricsRegistry
 from tests.mocks.mock_mpd import MockMPDClient
+from tests.mocks.fake_mpd_server import FakeMPDServer
 
 
 class TestMusicPlayer(unittest.TestCase):
@@ -602,5 +607,382 @@ class TestMusicPlayer(unittest.TestCase):
             # Verify the results
             self.assertEqual(playlists, [])
 
+    def test_get_status_uses_metadata_cache(self):
+        """Test get_status only asks MPD for the current song when it changes."""
+        self.mock_mpd_client.status_data = {
+            "state": "play",
+            "volume": "75",
+            "playlist": "3",
+            "songid": "7",
+            "elapsed": "30.5",
+            "duration": "180.0"
+        }
+
+        with patch.object(self.player, '_ensure_connected', return_value=True):
+            first = self.player.get_status()
+            second = self.player.get_status()
+
+            self.assertEqual(self.mock_mpd_client.currentsong.call_count, 1)
+            self.assertEqual(first["current_song"], second["current_song"])
+            self.assertEqual(second["current_song"]["title"], "Test Song")
+
+            # A new song id means a new current song
+            self.mock_mpd_client.status_data["songid"] = "8"
+            self.player.get_status()
+            self.assertEqual(self.mock_mpd_client.currentsong.call_count, 2)
+
+    def test_get_playlist_songs_uses_metadata_cache(self):
+        """Test get_playlist_songs reuses cached metadata while MPD lists the same last-modified value."""
+        self.mock_mpd_client.listplaylistinfo = MagicMock(return_value=[
+            {"file": "a.mp3", "title": "A", "last-modified": "2024-01-01T00:00:00Z", "format": "44100:24:2"},
+            {"file": "b.mp3", "title": "B", "last-modified": "2024-01-01T00:00:00Z"}
+        ])
+
+        with patch.object(self.player, '_ensure_connected', return_value=True), \
+                patch.object(self.player.metadata_cache, 'put_many', wraps=self.player.metadata_cache.put_many) as put_many:
+            first = self.player.get_playlist_songs("Playlist 1")
+            second = self.player.get_playlist_songs("Playlist 1")
+
+            self.assertEqual(put_many.call_count, 1)
+            self.assertIs(first[0], second[0])
+            self.assertEqual([song["title"] for song in second], ["A", "B"])
+            self.assertEqual(second[0]["format"], "44100:24:2")
+
+    def test_get_playlist_songs_refreshes_retagged_songs(self):
+        """Test a song re-tagged by a database update this player did not start is not served stale."""
+        self.player.metadata_cache.put({"file": "a.mp3", "title": "Old", "last-modified": "2024-01-01T00:00:00Z"})
+        self.mock_mpd_client.listplaylistinfo = MagicMock(return_value=[
+            {"file": "a.mp3", "title": "New", "last-modified": "2024-02-01T00:00:00Z"}
+        ])
+
+        with patch.object(self.player, '_ensure_connected', return_value=True):
+            self.assertEqual(self.player.get_playlist_songs("Playlist 1")[0]["title"], "New")
+        self.assertEqual(self.player.metadata_cache.get("a.mp3")["title"], "New")
+
+    def test_get_playlist_songs_error(self):
+        """Test get_playlist_songs method with error."""
+        with patch.object(self.player, '_ensure_connected', return_value=True):
+            self.mock_mpd_client.listplaylist = MagicMock(side_effect=Exception("No such playlist"))
+
+            self.assertEqual(self.player.get_playlist_songs("missing"), [])
+
+    def test_get_song_metadata(self):
+        """Test get_song_metadata falls back to MPD once per file."""
+        self.mock_mpd_client.lsinfo = MagicMock(return_value=[{"file": "a.mp3", "title": "A"}])
+
+        with patch.object(self.player, '_ensure_connected', return_value=True):
+            self.assertEqual(self.player.get_song_metadata("a.mp3")["title"], "A")
+            self.assertEqual(self.player.get_song_metadata("a.mp3")["title"], "A")
+            self.mock_mpd_client.lsinfo.assert_called_once_with("a.mp3")
+
+    def test_get_song_metadata_refreshes_changed_file(self):
+        """Test a different last-modified value fetches the song again."""
+        self.player.metadata_cache.put({"file": "a.mp3", "title": "Old", "last-modified": "2024-01-01T00:00:00Z"})
+        self.mock_mpd_client.lsinfo = MagicMock(return_value=[
+            {"file": "a.mp3", "title": "New", "last-modified": "2024-02-01T00:00:00Z"}
+        ])
+
+        with patch.object(self.player, '_ensure_connected', return_value=True):
+            self.assertEqual(self.player.get_song_metadata("a.mp3", "2024-01-01T00:00:00Z")["title"], "Old")
+            self.assertEqual(self.player.get_song_metadata("a.mp3", "2024-02-01T00:00:00Z")["title"], "New")
+            self.mock_mpd_client.lsinfo.assert_called_once_with("a.mp3")
+
+    def test_update_database_path(self):
+        """Test a targeted database update invalidates cached metadata below the path."""
+        self.player.metadata_cache.put({"file": "album/a.mp3", "title": "A"})
+
+        with patch.object(self.player, '_ensure_connected', return_value=True):
+            self.assertTrue(self.player.update_database("album"))
+
+        self.mock_mpd_client.update.assert_called_once_with("album")
+        self.assertIsNone(self.player.metadata_cache.get("album/a.mp3"))
+
+    def test_update_database_on_other_client(self):
+        """Test an update can be sent on another connection, still invalidating the cache."""
+        self.player.metadata_cache.put({"file": "album/a.mp3", "title": "A"})
+        client = MagicMock()
+
+        with patch.object(self.player, '_ensure_connected') as ensure_connected:
+            self.assertTrue(self.player.update_database("album", client=client))
+            ensure_connected.assert_not_called()
+
+        client.update.assert_called_once_with("album")
+        self.mock_mpd_client.update.assert_not_called()
+        self.assertIsNone(self.player.metadata_cache.get("album/a.mp3"))
+
+    def test_update_database_clears_metadata_cache(self):
+        """Test a full database update clears the cache, and again once MPD has finished it."""
+        self.player.metadata_cache.put({"file": "a.mp3", "title": "A"})
+        self.mock_mpd_client.status = MagicMock(return_value={"state": "stop", "volume": "50", "updating_db": "1"})
+
+        with patch.object(self.player, '_ensure_connected', return_value=True):
+            self.assertTrue(self.player.update_database())
+            self.assertEqual(len(self.player.metadata_cache), 0)
+
+            # Looked up while MPD is still scanning
+            self.player.metadata_cache.put({"file": "a.mp3", "title": "A"})
+            self.player.get_status()
+            self.assertEqual(len(self.player.metadata_cache), 1)
+
+            self.mock_mpd_client.status.return_value = {"state": "stop", "volume": "50"}
+            self.player.get_status()
+            self.assertEqual(len(self.player.metadata_cache), 0)
+
+    def test_get_playlist_songs_paginated(self):
+        """Test a page of a playlist is resolved with one command list."""
+        self.mock_mpd_client.listplaylist = MagicMock(return_value=[f"{i}.mp3" for i in range(10)])
+        self.mock_mpd_client.listplaylistinfo = MagicMock()
+        self.mock_mpd_client.command_list_ok_begin = MagicMock()
+        self.mock_mpd_client.lsinfo = MagicMock()
+        self.mock_mpd_client.command_list_end = MagicMock(return_value=[
+            [{"file": "4.mp3", "title": "Four", "artist": "A"}],
+            [{"file": "5.mp3", "title": "Five", "artist": "A"}]
+        ])
+
+        with patch.object(self.player, '_ensure_connected', return_value=True):
+            songs = self.player.get_playlist_songs("Playlist 1", offset=4, limit=2, fields=["title"])
+
+        self.assertEqual(songs, [{"title": "Four"}, {"title": "Five"}])
+        self.mock_mpd_client.listplaylistinfo.assert_not_called()
+        self.mock_mpd_client.lsinfo.assert_has_calls([call("4.mp3"), call("5.mp3")])
+
+    def test_iter_playlist_songs(self):
+        """Test a playlist is streamed in chunks with offsets and total."""
+        files = [f"{i}.mp3" for i in range(5)] + ["http://radio.example/stream"]
+        self.mock_mpd_client.listplaylist = MagicMock(return_value=files)
+        self.mock_mpd_client.command_list_ok_begin = MagicMock()
+        self.mock_mpd_client.lsinfo = MagicMock()
+        self.mock_mpd_client.command_list_end = MagicMock(side_effect=[
+            [[{"file": file, "title": file}] for file in files[:4]],
+            [[{"file": "4.mp3", "title": "4.mp3"}]]
+        ])
+
+        with patch.object(self.player, '_ensure_connected', return_value=True):
+            chunks = list(self.player.iter_playlist_songs("Playlist 1", chunk_size=4))
+
+        self.assertEqual([(offset, total) for offset, total, _ in chunks], [(0, 6), (4, 6)])
+        self.assertEqual(len(chunks[0][2]), 4)
+        self.assertEqual(chunks[1][2], [
+            {"file": "4.mp3", "title": "4.mp3"},
+            {"file": "http://radio.example/stream"}
+        ])
+
+    def _use_queue_client(self):
+        """Replace the MPD client with a stateful mock that tracks queue ids."""
+        client = MockMPDClient()
+        client.connect("localhost", 6600)
+        self.player.mpd_client = client
+        return client
+
+    def test_play_playlist_keeps_current_song(self):
+        """Test switching playlists edits the queue without restarting the current song."""
+        client = self._use_queue_client()
+        for file in ["a.mp3", "b.mp3", "c.mp3"]:
+            client.addid(file)
+        client.stored_playlists["Playlist 2"] = ["b.mp3", "d.mp3"]
+        client.status_data.update({"state": "play", "songid": "2"})
+        client.play = MagicMock()
+
+        with patch.object(self.player, '_ensure_connected', return_value=True):
+            self.assertTrue(self.player.play_playlist("Playlist 2"))
+
+        self.assertEqual(client.queue, ["b.mp3", "d.mp3"])
+        self.assertEqual(client.queue_ids[0], "2")
+        client.play.assert_not_called()
+        self.assertEqual(self.player.current_playlist, "Playlist 2")
+
+    def test_play_playlist_starts_when_stopped(self):
+        """Test playing a playlist from a stopped player starts at the first track."""
+        client = self._use_queue_client()
+        client.stored_playlists["Playlist 1"] = ["a.mp3", "b.mp3"]
+        client.play = MagicMock()
+
+        with patch.object(self.player, '_ensure_connected', return_value=True):
+            self.assertTrue(self.player.play_playlist("Playlist 1"))
+
+        self.assertEqual(client.queue, ["a.mp3", "b.mp3"])
+        client.play.assert_called_once_with(0)
+
+    def test_play_playlist_error(self):
+        """Test play_playlist method with a missing playlist."""
+        self._use_queue_client()
+
+        with patch.object(self.player, '_ensure_connected', return_value=True):
+            self.assertFalse(self.player.play_playlist("missing"))
+
+    def test_create_playlist_leaves_queue(self):
+        """Test creating a playlist writes it directly and leaves the queue alone."""
+        client = self._use_queue_client()
+        client.addid("playing.mp3")
+
+        with patch.object(self.player, '_ensure_connected', return_value=True):
+            self.assertTrue(self.player.create_playlist("New", ["a.mp3", "b.mp3"]))
+
+        self.assertEqual(client.stored_playlists["New"], ["a.mp3", "b.mp3"])
+        self.assertEqual(client.queue, ["playing.mp3"])
+
+    def test_create_playlist_existing(self):
+        """Test creating a playlist that exists fails unless overwrite is set."""
+        client = self._use_queue_client()
+        client.stored_playlists["Old"] = ["old.mp3"]
+        client.playlists = [{"playlist": "Old"}]
+
+        with patch.object(self.player, '_ensure_connected', return_value=True):
+            self.assertFalse(self.player.create_playlist("Old", ["a.mp3"]))
+            self.assertEqual(client.stored_playlists["Old"], ["old.mp3"])
+
+            self.assertTrue(self.player.create_playlist("Old", ["a.mp3"], overwrite=True))
+            self.assertEqual(client.stored_playlists["Old"], ["a.mp3"])
+
+
+class TestMusicPlayerBatch(unittest.TestCase):
+    """Test cases for batched player commands against the fake MPD server."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.server = FakeMPDServer().start()
+        for i in range(2):
+            self.server.add_song(f"{i}.mp3")
+        self.player = MusicPlayer({"mpd": {"host": self.server.host, "port": self.server.port}})
+        self.assertTrue(self.player.connect())
+        self.player.mpd_client.add("0.mp3")
+        self.player.mpd_client.add("1.mp3")
+
+    def tearDown(self):
+        """Clean up after tests."""
+        self.player.disconnect()
+        self.server.stop()
+
+    def test_run_batch(self):
+        """Test simple commands share one command list and others run in order."""
+        results = self.player.run_batch([
+            ("set_volume", {"volume": 30}), ("play", {}), ("get_volume", {}), ("next", {}), ("set_repeat", {"repeat": True})
+        ])
+
+        self.assertTrue(all(result["result"] for result in results))
+        self.assertEqual(results[2]["data"], 30)
+        self.assertEqual((self.server.volume, self.server.state, self.server.current), (30, "play", 1))
+        self.assertEqual(self.server.options["repeat"], 1)
+        # One connection check for the batch, one for get_volume
+        self.assertEqual(self.server.command_counts["ping"], 2)
+
+    def test_mpd_command_metrics(self):
+        """Test MPD round trips are timed per command, with a command list timed once."""
+        registry = MetricsRegistry(enabled=True)
+        seconds = registry.histogram("amora_mpd_command_seconds")
+        errors = registry.counter("amora_mpd_command_errors_total")
+        with patch.object(mpd_client, "MPD_COMMAND_SECONDS", seconds), \
+                patch.object(mpd_client, "MPD_COMMAND_ERRORS", errors):
+            self.assertTrue(self.player.set_volume(30))
+            self.player.run_batch([("play", {}), ("next", {})])
+            self.server.fail_next("setvol")
+            self.assertFalse(self.player.set_volume(40))
+
+        self.assertIsNotNone(seconds.quantile(0.5, command="setvol"))
+        self.assertIsNotNone(seconds.quantile(0.5, command="command_list"))
+        self.assertIsNone(seconds.quantile(0.5, command="play"))
+        self.assertEqual(errors.get(command="setvol"), 1)
+
+    def test_run_batch_stops_at_failure(self):
+        """Test MPD's failing command is reported and the rest is skipped."""
+        self.server.fail_next("setvol")
+        results = self.player.run_batch([("play", {}), ("set_volume", {"volume": 30}), ("stop", {})])
+
+        self.assertTrue(results[0]["result"])
+        self.assertIn("Injected failure", results[1]["error"])
+        self.assertTrue(results[2]["skipped"])
+        self.assertEqual(self.server.state, "play")
+
+    def test_run_batch_continues_after_failure(self):
+        """Test the rest of a failed command list is sent again without stop_on_error."""
+        self.server.fail_next("setvol")
+        results = self.player.run_batch([("play", {}), ("set_volume", {"volume": 30}), ("stop", {})],
+                                        stop_on_error=False)
+
+        self.assertEqual([result["result"] for result in results], [True, False, True])
+        self.assertEqual(self.server.state, "stop")
+
+    def test_run_batch_rejects_unknown_commands(self):
+        """Test private, unknown and badly parameterized commands fail on their own."""
+        results = self.player.run_batch([("_ensure_connected", {}), ("set_volume", {}), ("play", {})],
+                                        stop_on_error=False)
+
+        self.assertIn("not supported", results[0]["error"])
+        self.assertIn("Invalid parameters", results[1]["error"])
+        self.assertTrue(results[2]["result"])
+
+    def test_stage_playlist_then_play_from_start(self):
+        """Test staging loads the queue without playing and play_from_start plays its first song."""
+        self.server.add_song("2.mp3")
+        self.server.stored_playlists["Autumn"] = ["2.mp3", "0.mp3"]
+
+        self.assertTrue(self.player.stage_playlist("Autumn"))
+        self.assertEqual([song["file"] for song in self.server.queue], ["2.mp3", "0.mp3"])
+        self.assertEqual(self.server.state, "stop")
+        self.assertEqual(self.player.current_playlist, "Autumn")
+
+        self.assertTrue(self.player.play_from_start())
+        self.assertEqual((self.server.state, self.server.current), ("play", 0))
+
+    def test_play_from_start_on_own_connection(self):
+        """Test another thread can start playback on a connection of its own."""
+        self.server.stored_playlists["Autumn"] = ["0.mp3"]
+        self.assertTrue(self.player.stage_playlist("Autumn"))
+
+        client = self.player.open_connection()
+        self.addCleanup(client.disconnect)
+        self.assertIsNot(client, self.player.mpd_client)
+        self.assertTrue(self.player.play_from_start(client=client))
+        self.assertEqual((self.server.state, self.server.current), ("play", 0))
+
+    def test_ramp_volume(self):
+        """Test a ramp steps the volume to its target in its own thread and reports completion."""
+        self.server.volume = 80
+        done = threading.Event()
+        completed = []
+        self.player.ramp_step_interval = 0.01
+
+        self.assertTrue(self.player.ramp_volume(20, 0.2, on_complete=lambda volume: completed.append(volume) or done.set()))
+        self.assertTrue(self.player.ramping)
+        self.assertTrue(done.wait(2.0))
+
+        self.assertEqual(completed, [20])
+        self.assertEqual(self.server.volume, 20)
+        # Several steps, each a single setvol, and no status reads from the ramp
+        self.assertGreater(self.server.command_counts["setvol"], 3)
+        self.assertEqual(self.server.command_counts["status"], 1)
+
+    def test_ramp_volume_cancelled_by_set_volume(self):
+        """Test a later volume command stops the ramp where it is and wins."""
+        self.server.volume = 100
+        completed = []
+        self.player.ramp_step_interval = 0.01
+        self.player.ramp_volume(0, 5.0, curve="s_curve", on_complete=completed.append)
+        time.sleep(0.3)
+
+        self.assertTrue(self.player.set_volume(60))
+        self.assertFalse(self.player.ramping)
+        time.sleep(0.05)
+        self.assertEqual(self.server.volume, 60)
+        self.assertEqual(completed, [])
+
+        # Cancelled from a batch as well
+        self.player.ramp_volume(0, 5.0)
+        self.player.run_batch([("set_volume", {"volume": 45})])
+        self.assertFalse(self.player.ramping)
+        self.assertEqual(self.server.volume, 45)
+
+    def test_ramp_volume_rejects_unknown_curve(self):
+        """Test an unknown curve is refused without touching the volume."""
+        self.server.volume = 50
+        self.assertFalse(self.player.ramp_volume(0, 1.0, curve="bounce"))
+        self.assertFalse(self.player.ramping)
+        self.assertEqual(self.server.volume, 50)
+
+    def test_stage_playlist_missing(self):
+        """Test staging a missing playlist fails and leaves the queue alone."""
+        self.assertFalse(self.player.stage_playlist("missing"))
+        self.assertEqual(len(self.server.queue), 2)
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,124 @@
+"""
+Tests for the playlist file I/O module.
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
+
+# Import the module to test
+from amora_sdk.device.player import playlist_io
+from amora_sdk.device.player.playlist_io import M3UIndex, PlaylistEntry, iter_m3u, read_m3u, write_m3u
+
+
+class TestPlaylistIO(unittest.TestCase):
+    """Test cases for the playlist I/O functions."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "test.m3u8")
+
+    def tearDown(self):
+        """Clean up after tests."""
+        self.tmp.cleanup()
+
+    def _read(self):
+        with open(self.path, encoding="utf-8") as f:
+            return f.read()
+
+    def test_write_plain(self):
+        """Test writing plain file paths."""
+        self.assertEqual(write_m3u(self.path, ["a.mp3", "b/c.flac"]), 2)
+        self.assertEqual(self._read(), "#EXTM3U\na.mp3\nb/c.flac\n")
+
+    def test_write_extinf(self):
+        """Test writing entries with EXTINF metadata."""
+        write_m3u(self.path, [
+            PlaylistEntry("a.mp3", 181.7, "Artist - Song"),
+            PlaylistEntry("b.mp3", title="No Duration"),
+            PlaylistEntry("c.mp3")
+        ])
+
+        self.assertEqual(
+            self._read(),
+            "#EXTM3U\n#EXTINF:181,Artist - Song\na.mp3\n#EXTINF:-1,No Duration\nb.mp3\nc.mp3\n"
+        )
+
+    def test_write_in_batches(self):
+        """Test large playlists are written in several batches."""
+        files = [f"{i}.mp3" for i in range(25)]
+        with patch.object(playlist_io, "WRITE_BATCH", 10):
+            write_m3u(self.path, iter(files), extended=False)
+
+        self.assertEqual(self._read(), "\n".join(files) + "\n")
+
+    def test_write_is_atomic(self):
+        """Test a failed write leaves the previous playlist untouched."""
+        write_m3u(self.path, ["old.mp3"])
+
+        def entries():
+            yield "new.mp3"
+            raise RuntimeError("crash")
+
+        with self.assertRaises(RuntimeError):
+            write_m3u(self.path, entries())
+
+        self.assertEqual(self._read(), "#EXTM3U\nold.mp3\n")
+        self.assertEqual(os.listdir(self.tmp.name), ["test.m3u8"])
+
+    def test_write_keeps_mode(self):
+        """Test a new playlist is 0644 and a replaced one keeps its mode."""
+        write_m3u(self.path, ["a.mp3"])
+        self.assertEqual(os.stat(self.path).st_mode & 0o777, 0o644)
+
+        os.chmod(self.path, 0o660)
+        write_m3u(self.path, ["b.mp3"])
+        self.assertEqual(os.stat(self.path).st_mode & 0o777, 0o660)
+
+    def test_read(self):
+        """Test reading a playlist with comments, blank lines and EXTINF."""
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write("#EXTM3U\n\n#EXTINF:200,Ünïcode Title\r\nsong1.mp3\r\n# comment\nsong2.mp3\n"
+                    "#EXTINF:-1,\nhttp://stream")
+
+        entries = read_m3u(self.path)
+
+        self.assertEqual(entries, [
+            PlaylistEntry("song1.mp3", 200.0, "Ünïcode Title"),
+            PlaylistEntry("song2.mp3"),
+            PlaylistEntry("http://stream")
+        ])
+        self.assertEqual(list(iter_m3u(self.path)), entries)
+
+    def test_index(self):
+        """Test random access through the memory-mapped index."""
+        entries = [PlaylistEntry(f"{i}.mp3", i, f"Song {i}") if i % 2 else PlaylistEntry(f"{i}.mp3")
+                   for i in range(50)]
+        write_m3u(self.path, entries)
+
+        with M3UIndex(self.path) as index:
+            self.assertEqual(len(index), 50)
+            self.assertEqual(index[0], PlaylistEntry("0.mp3"))
+            self.assertEqual(index[7], PlaylistEntry("7.mp3", 7.0, "Song 7"))
+            self.assertEqual(index[-1], PlaylistEntry("49.mp3", 49.0, "Song 49"))
+            self.assertEqual(list(index), read_m3u(self.path))
+            with self.assertRaises(IndexError):
+                index[50]
+
+    def test_index_empty_file(self):
+        """Test indexing an empty playlist file."""
+        open(self.path, "w").close()
+
+        with M3UIndex(self.path) as index:
+            self.assertEqual(len(index), 0)
+            self.assertEqual(list(index), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+"""
+Tests for the track prefetcher.
+"""
+
+import os
+import sys
+import time
+import tempfile
+import threading
+import unittest
+from unittest.mock import MagicMock
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
+
+# Import the module to test
+from mpd import MPDClient
+
+from amora_sdk.device.player.prefetch import FADVISE_AVAILABLE, Prefetcher
+from tests.mocks.fake_mpd_server import FakeMPDServer
+
+
+class TestPrefetcher(unittest.TestCase):
+    """Test cases for the Prefetcher class."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.tmp = tempfile.TemporaryDirectory()
+        for name, size in [("a.mp3", 1000), ("b.mp3", 3000), ("c.mp3", 500)]:
+            with open(os.path.join(self.tmp.name, name), "wb") as f:
+                f.write(b"x" * size)
+
+        self.player = MagicMock()
+        self.player.music_dir = self.tmp.name
+        self.prefetcher = Prefetcher(self.player, count=2, byte_budget=2000, chunk_size=256, mode="read")
+
+    def tearDown(self):
+        """Clean up after tests."""
+        self.tmp.cleanup()
+
+    def test_warm_reads_up_to_limit(self):
+        """Test warming reads the file up to the limit."""
+        self.assertEqual(self.prefetcher.warm("a.mp3", 10000), 1000)
+        self.assertEqual(self.prefetcher.warm("b.mp3", 700), 700)
+        self.assertEqual(self.prefetcher.warm("missing.mp3", 700), 0)
+
+    def test_warm_stops_on_new_schedule(self):
+        """Test a warm belonging to an old schedule stops reading."""
+        generation = self.prefetcher._generation
+        self.prefetcher.schedule(["b.mp3"])
+
+        self.assertEqual(self.prefetcher.warm("b.mp3", 3000, generation), 0)
+
+    @unittest.skipUnless(FADVISE_AVAILABLE, "posix_fadvise not available")
+    def test_warm_fadvise(self):
+        """Test fadvise mode hints the whole file within the limit."""
+        prefetcher = Prefetcher(self.player, mode="fadvise")
+        self.assertEqual(prefetcher.warm("b.mp3", 2000), 2000)
+
+    def test_refresh_schedules_next_songs(self):
+        """Test refresh schedules the songs after the current one."""
+        client = MagicMock()
+        client.status.return_value = {"song": "0", "nextsong": "1"}
+        client.playlistinfo.return_value = [{"file": "b.mp3"}, {"file": "http://radio/stream"}]
+
+        self.assertEqual(self.prefetcher.refresh(client), ["b.mp3", "http://radio/stream"])
+        client.playlistinfo.assert_called_once_with("1:3")
+        self.assertEqual(self.prefetcher.get_stats()["scheduled"], ["b.mp3"])
+
+    def test_worker_respects_byte_budget(self):
+        """Test the worker warms scheduled files within the byte budget."""
+        self.prefetcher._running = True
+        worker = threading.Thread(target=self.prefetcher._work, daemon=True)
+        worker.start()
+
+        self.prefetcher.schedule(["a.mp3", "b.mp3", "c.mp3"])
+        deadline = time.monotonic() + 2.0
+        while self.prefetcher.get_stats()["warmed"] != ["a.mp3", "b.mp3"] and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        self.prefetcher.stop()
+        worker.join(timeout=2.0)
+
+        self.assertEqual(self.prefetcher.get_stats()["warmed"], ["a.mp3", "b.mp3"])
+        self.assertEqual(self.prefetcher.warmed_bytes, 2000)
+
+    def test_invalid_mode(self):
+        """Test an unknown mode is rejected."""
+        with self.assertRaises(ValueError):
+            Prefetcher(self.player, mode="mmap")
+
+
+    def test_watcher_follows_queue(self):
+        """Test the watcher reschedules on idle events from MPD and stops promptly."""
+        with FakeMPDServer() as server:
+            for name in ("a.mp3", "b.mp3", "c.mp3"):
+                server.add_song(name)
+            self.player.mpd_host, self.player.mpd_port = server.host, server.port
+            prefetcher = Prefetcher(self.player, count=2, mode="read")
+            prefetcher._work = lambda: None
+            prefetcher.start()
+
+            client = MPDClient()
+            client.connect(server.host, server.port)
+            client.add("a.mp3")
+            client.add("b.mp3")
+            client.add("c.mp3")
+            client.play(0)
+            client.disconnect()
+
+            deadline = time.time() + 2
+            while prefetcher._scheduled != ["b.mp3", "c.mp3"] and time.time() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(prefetcher._scheduled, ["b.mp3", "c.mp3"])
+
+            start = time.time()
+            prefetcher.stop()
+            self.assertLess(time.time() - start, 1.0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+"""
+Tests for the system probe.
+"""
+
+import os
+import sys
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
+
+# Import the module to test
+from amora_sdk.device.player.probe import (
+    AUDIO_DEVICES, MPD_STATUS, UEVENT_AVAILABLE, ManualEventSource, SystemProbe, UeventSource
+)
+
+
+class TestSystemProbe(unittest.TestCase):
+    """Test cases for the SystemProbe class."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.devices = [{"card": "0", "device": "0", "name": "Built-in", "id": "hw:0,0"}]
+        self.read_devices = MagicMock(side_effect=lambda: list(self.devices))
+        self.read_mpd = MagicMock(return_value=(True, "running"))
+        self.source = ManualEventSource()
+        self.probe = SystemProbe(
+            ttl=60.0,
+            event_source=self.source,
+            readers={AUDIO_DEVICES: self.read_devices, MPD_STATUS: self.read_mpd}
+        )
+
+    def tearDown(self):
+        """Clean up after tests."""
+        self.probe.stop()
+
+    def test_values_are_cached(self):
+        """Test repeated gets within the TTL read once."""
+        self.assertEqual(self.probe.get_audio_devices(), self.devices)
+        self.assertEqual(self.probe.get_audio_devices(), self.devices)
+        self.assertEqual(self.probe.get_mpd_status(), (True, "running"))
+
+        self.assertEqual(self.read_devices.call_count, 1)
+        self.assertEqual(self.read_mpd.call_count, 1)
+
+    def test_ttl_expiry(self):
+        """Test a value is read again once the TTL has passed."""
+        self.probe.get_audio_devices()
+        with patch("amora_sdk.device.player.probe.time.monotonic", return_value=time.monotonic() + 61):
+            self.probe.get_audio_devices()
+
+        self.assertEqual(self.read_devices.call_count, 2)
+
+    def test_invalidate(self):
+        """Test an invalidated value is read again."""
+        self.probe.get_mpd_status()
+        self.probe.invalidate(MPD_STATUS)
+        self.probe.get_mpd_status()
+
+        self.assertEqual(self.read_mpd.call_count, 2)
+
+    def test_event_refreshes_and_notifies(self):
+        """Test a hot-plug event refreshes the device list and notifies listeners."""
+        listener = MagicMock()
+        self.probe.add_listener(listener)
+        self.probe.get_audio_devices()
+        self.assertTrue(self.probe.start())
+
+        self.devices.append({"card": "1", "device": "0", "name": "USB DAC", "id": "hw:1,0"})
+        self.source.trigger(AUDIO_DEVICES)
+
+        deadline = time.monotonic() + 2.0
+        while not listener.called and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        listener.assert_called_once_with(AUDIO_DEVICES, self.devices)
+        self.assertEqual(self.probe.get_audio_devices(), self.devices)
+        self.assertEqual(self.read_devices.call_count, 2)
+
+    def test_expired_values_are_polled(self):
+        """Test the background thread re-reads expired values and notifies changes without events."""
+        listener = MagicMock()
+        probe = SystemProbe(
+            ttl=0.05,
+            event_source=self.source,
+            readers={AUDIO_DEVICES: self.read_devices, MPD_STATUS: self.read_mpd}
+        )
+        self.addCleanup(probe.stop)
+        probe.add_listener(listener)
+        self.assertTrue(probe.start())
+
+        deadline = time.monotonic() + 2.0
+        while self.read_mpd.call_count < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.read_mpd.return_value = (False, "inactive")
+        while not listener.called and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        listener.assert_called_with(MPD_STATUS, (False, "inactive"))
+
+    def test_polling_off(self):
+        """Test nothing is read in the background when polling is off."""
+        probe = SystemProbe(ttl=0.01, event_source=self.source, poll=False,
+                            readers={AUDIO_DEVICES: self.read_devices, MPD_STATUS: self.read_mpd})
+        self.addCleanup(probe.stop)
+        self.assertTrue(probe.start())
+        time.sleep(0.1)
+
+        self.read_mpd.assert_not_called()
+
+    def test_unchanged_refresh_does_not_notify(self):
+        """Test listeners are only called for real changes."""
+        listener = MagicMock()
+        self.probe.add_listener(listener)
+
+        self.probe.refresh(MPD_STATUS)
+        self.probe.refresh(MPD_STATUS)
+
+        listener.assert_not_called()
+
+    @unittest.skipUnless(UEVENT_AVAILABLE, "netlink not available")
+    def test_uevent_source(self):
+        """Test the uevent source opens and times out without events."""
+        source = UeventSource()
+        try:
+            source.start()
+        except OSError as e:
+            self.skipTest(f"cannot open netlink socket: {e}")
+        try:
+            self.assertIsInstance(source.read(0.01), list)
+        finally:
+            source.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+"""
+Tests for the queue diff engine.
+"""
+
+import os
+import sys
+import random
+import unittest
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
+
+# Import the module to test
+from amora_sdk.device.player.queue_diff import diff_queue
+from tests.mocks.mock_mpd import MockMPDClient
+
+
+class TestDiffQueue(unittest.TestCase):
+    """Test cases for the diff_queue function."""
+
+    def _apply(self, files, target, keep=None, rebuild_ratio=0.5):
+        """Apply the diff to a mock queue and return the client and the ops."""
+        client = MockMPDClient()
+        client.connect("localhost", 6600)
+        for file in files:
+            client.addid(file)
+
+        current = [(song["id"], song["file"]) for song in client.playlistinfo()]
+        keep_id = current[keep][0] if keep is not None else None
+        ops = diff_queue(current, target, keep_id=keep_id, rebuild_ratio=rebuild_ratio)
+        for op in ops:
+            getattr(client, op.command)(*op.args())
+
+        self.assertEqual(client.queue, list(target))
+        return client, ops
+
+    def test_identical_queue(self):
+        """Test an identical queue needs no edits."""
+        _, ops = self._apply(["a", "b", "c"], ["a", "b", "c"])
+        self.assertEqual(ops, [])
+
+    def test_rotation_is_one_move(self):
+        """Test moving one song only moves that song."""
+        _, ops = self._apply(["a", "b", "c", "d"], ["b", "c", "d", "a"])
+        self.assertEqual([op.command for op in ops], ["moveid"])
+
+    def test_add_and_delete(self):
+        """Test missing songs are added in place and extra songs deleted."""
+        _, ops = self._apply(["a", "x", "c"], ["a", "b", "c", "d"])
+        self.assertEqual(sorted(op.command for op in ops), ["addid", "addid", "deleteid"])
+
+    def test_keeps_current_song(self):
+        """Test the current song is kept when its file appears more than once."""
+        client, _ = self._apply(["a", "b", "a"], ["b", "a"], keep=2)
+        self.assertIn("3", client.queue_ids)
+
+    def test_random_queues(self):
+        """Test arbitrary queues are transformed into the target."""
+        rng = random.Random(42)
+        for _ in range(500):
+            files = [rng.choice("abcdef") for _ in range(rng.randint(0, 8))]
+            target = [rng.choice("abcdef") for _ in range(rng.randint(0, 8))]
+            keep = rng.randrange(len(files)) if files else None
+            self._apply(files, target, keep)
+            self._apply(files, target, keep, rebuild_ratio=1.0)
+            self._apply(files, target, keep, rebuild_ratio=0.0)
+
+    def test_heavy_reorder_rebuilds_around_current_song(self):
+        """Test a mostly reordered queue is rebuilt with range deletes, keeping the current song."""
+        files = [f"song{i}" for i in range(10)]
+        target = files[::-1]
+        client, ops = self._apply(files, target, keep=3)
+
+        self.assertEqual([op.command for op in ops[:2]], ["delete", "delete"])
+        self.assertNotIn("moveid", [op.command for op in ops])
+        self.assertEqual(client.queue_ids[target.index("song3")], "4")
+
+    def test_large_shuffle(self):
+        """Test a large queue with few moves is diffed in place."""
+        rng = random.Random(7)
+        files = [f"song{i}" for i in range(5000)]
+        target = list(files)
+        for _ in range(200):
+            i, j = rng.randrange(len(target)), rng.randrange(len(target))
+            target[i], target[j] = target[j], target[i]
+        target[100:200] = [f"new{i}" for i in range(100)]
+
+        _, ops = self._apply(files, target, keep=0)
+        self.assertLessEqual(sum(op.command == "moveid" for op in ops), 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
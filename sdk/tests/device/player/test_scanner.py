@@ -0,0 +1,90 @@
+"""
+Tests for the parallel directory scanner.
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
+
+# Import the module to test
+from amora_sdk.device.player import scanner, utils
+
+
+class TestScanner(unittest.TestCase):
+    """Test cases for the scanner module."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.music_dir = tempfile.mkdtemp()
+        self.expected = set()
+
+        for artist in range(3):
+            for album in range(3):
+                for track in range(4):
+                    rel_path = os.path.join(f"artist{artist}", f"album{album}", f"track{track}.mp3")
+                    self._write(rel_path)
+                    self.expected.add(rel_path)
+                self._write(os.path.join(f"artist{artist}", f"album{album}", "cover.jpg"))
+
+        self._write("single.FLAC")
+        self.expected.add("single.FLAC")
+
+    def tearDown(self):
+        """Clean up after tests."""
+        shutil.rmtree(self.music_dir)
+
+    def _write(self, rel_path):
+        path = os.path.join(self.music_dir, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(b"data")
+
+    def test_list_directory(self):
+        """Test list_directory returns music files and subdirectories."""
+        listing = scanner.list_directory(self.music_dir, "artist0/album0")
+
+        self.assertEqual(len(listing.files), 4)
+        self.assertEqual(listing.files["artist0/album0/track0.mp3"][0], 4)
+        self.assertEqual(listing.subdirs, [])
+
+    def test_list_directory_missing(self):
+        """Test list_directory with a missing directory."""
+        self.assertIsNone(scanner.list_directory(self.music_dir, "missing"))
+
+    def test_iter_music_files(self):
+        """Test the parallel walk finds every music file."""
+        result = set(scanner.iter_music_files(self.music_dir, max_workers=4, max_in_flight=2))
+
+        self.assertEqual(result, self.expected)
+
+    def test_iter_music_files_early_close(self):
+        """Test the stream can be abandoned before the walk finishes."""
+        stream = scanner.iter_music_files(self.music_dir, max_workers=2)
+        first = next(stream)
+        stream.close()
+
+        self.assertIn(first, self.expected)
+
+    def test_walk_directories_counts(self):
+        """Test walk_directories yields every directory once."""
+        listings = list(scanner.walk_directories(self.music_dir, max_workers=3))
+
+        self.assertEqual(len(listings), 1 + 3 + 9)
+        self.assertEqual(len({listing.rel_dir for listing in listings}), 13)
+
+    def test_scan_music_directory_parallel(self):
+        """Test scan_music_directory in parallel mode matches the sequential walk."""
+        sequential = utils.scan_music_directory(self.music_dir)
+        parallel = utils.scan_music_directory(self.music_dir, max_workers=4)
+
+        self.assertEqual(sorted(sequential), sorted(parallel))
+        self.assertEqual(set(parallel), self.expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
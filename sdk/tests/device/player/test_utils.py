@@ -4,6 +4,7 @@ Tests for the player utility functions.
 
 import os
 import sys
+import tempfile
 import unittest
 from unittest.mock import MagicMock, patch, call, mock_open
 
@@ -53,26 +54,23 @@ class TestPlayerUtils(unittest.TestCase):
 
     def test_create_playlist_file(self):
         """Test create_playlist_file function."""
-        # Mock file operations
-        with patch('os.makedirs') as mock_makedirs, \
-             patch('builtins.open', mock_open()) as mock_file:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            playlists_dir = os.path.join(tmp_dir, "playlists")
+
             # Call the function
             result = utils.create_playlist_file(
                 "test_playlist",
                 ["file1.mp3", "file2.mp3"],
-                "/playlists"
+                playlists_dir
             )
 
             # Verify the results
-            self.assertEqual(result, "/playlists/test_playlist.m3u")
-            mock_makedirs.assert_called_once_with("/playlists", exist_ok=True)
-            mock_file.assert_called_once_with("/playlists/test_playlist.m3u", "w")
-
-            # Check file content
-            handle = mock_file()
-            handle.write.assert_any_call("#EXTM3U\n")
-            handle.write.assert_any_call("file1.mp3\n")
-            handle.write.assert_any_call("file2.mp3\n")
+            self.assertEqual(result, os.path.join(playlists_dir, "test_playlist.m3u"))
+
+            # Check file content, and that no temporary file was left behind
+            with open(result) as f:
+                self.assertEqual(f.read(), "#EXTM3U\nfile1.mp3\nfile2.mp3\n")
+            self.assertEqual(os.listdir(playlists_dir), ["test_playlist.m3u"])
 
     def test_create_playlist_file_error(self):
         """Test create_playlist_file function with error."""
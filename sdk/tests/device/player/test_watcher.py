@@ -0,0 +1,204 @@
+"""
+Tests for the library watcher.
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+from unittest.mock import MagicMock, call
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
+
+# Import the module to test
+from amora_sdk.device.player import watcher
+from amora_sdk.device.player.watcher import LibraryWatcher, PollingEventSource, collapse_paths
+
+
+class FakeEventSource:
+    """Event source that returns queued batches of changed directories."""
+
+    def __init__(self):
+        self.batches = []
+        self.started = False
+        self.closed = False
+
+    def start(self):
+        self.started = True
+
+    def close(self):
+        self.closed = True
+
+    def read(self, timeout):
+        return self.batches.pop(0) if self.batches else []
+
+
+class TestCollapsePaths(unittest.TestCase):
+    """Test cases for collapse_paths."""
+
+    def test_collapse_nested(self):
+        """Test nested directories collapse to their ancestor."""
+        self.assertEqual(
+            collapse_paths(["a/b", "a", "a/b/c", "ab", "c/d"]),
+            ["a", "ab", "c/d"]
+        )
+
+    def test_collapse_root(self):
+        """Test the root covers everything."""
+        self.assertEqual(collapse_paths(["a", "", "b"]), [""])
+
+
+class TestLibraryWatcher(unittest.TestCase):
+    """Test cases for the LibraryWatcher class."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.player = MagicMock()
+        self.source = FakeEventSource()
+        self.on_update = MagicMock()
+        self.client = MagicMock()
+        self.watcher = LibraryWatcher(
+            self.player, "/music", event_source=self.source,
+            debounce=1.0, max_delay=5.0, max_paths=3, on_update=self.on_update,
+            client_factory=lambda: self.client
+        )
+
+    def test_debounce(self):
+        """Test updates wait for a quiet period."""
+        self.watcher.add_changes(["artist/album"], now=100.0)
+        self.watcher.add_changes(["artist/album/cd1"], now=100.5)
+
+        self.assertEqual(self.watcher.poll(now=101.0), [])
+        self.player.update_database.assert_not_called()
+
+        self.assertEqual(self.watcher.poll(now=101.6), ["artist/album"])
+        self.player.update_database.assert_called_once_with("artist/album", client=self.client)
+        self.client.connect.assert_called_once_with(self.player.mpd_host, self.player.mpd_port)
+        self.client.disconnect.assert_called_once_with()
+        self.on_update.assert_called_once_with(["artist/album"])
+
+    def test_max_delay(self):
+        """Test a continuous burst is flushed after max_delay."""
+        for i in range(12):
+            self.watcher.add_changes([f"dir{i % 2}"], now=100.0 + i * 0.5)
+
+        self.assertEqual(self.watcher.poll(now=105.5), ["dir0", "dir1"])
+        self.player.update_database.assert_has_calls([call("dir0", client=self.client),
+                                                      call("dir1", client=self.client)])
+
+    def test_full_update_when_too_many_paths(self):
+        """Test a full update is issued above max_paths."""
+        self.watcher.add_changes(["a", "b", "c", "d"], now=0.0)
+
+        self.assertEqual(self.watcher.flush(), [""])
+        self.player.update_database.assert_called_once_with(client=self.client)
+
+    def test_failed_update_is_retried(self):
+        """Test changes stay pending when MPD cannot be reached."""
+        self.client.connect.side_effect = ConnectionRefusedError()
+        self.watcher.add_changes(["a"], now=0.0)
+
+        self.assertEqual(self.watcher.flush(), [])
+        self.player.update_database.assert_not_called()
+
+        self.client.connect.side_effect = None
+        self.assertEqual(self.watcher.flush(), ["a"])
+        self.player.update_database.assert_called_once_with("a", client=self.client)
+
+    def test_no_changes(self):
+        """Test polling without changes does nothing."""
+        self.assertEqual(self.watcher.poll(now=100.0), [])
+        self.player.update_database.assert_not_called()
+
+    def test_start_stop(self):
+        """Test the background thread consumes events and flushes on stop."""
+        self.source.batches.append(["new"])
+
+        self.assertTrue(self.watcher.start())
+        self.watcher.stop()
+
+        self.assertTrue(self.source.started)
+        self.assertTrue(self.source.closed)
+        self.player.update_database.assert_called_once_with("new", client=self.client)
+
+
+class TestEventSources(unittest.TestCase):
+    """Test cases for the event sources."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.music_dir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.music_dir, "artist", "album"))
+
+    def tearDown(self):
+        """Clean up after tests."""
+        shutil.rmtree(self.music_dir)
+
+    def _write(self, rel_path):
+        with open(os.path.join(self.music_dir, rel_path), "wb") as f:
+            f.write(b"data")
+
+    def test_polling_source(self):
+        """Test the polling source reports directories with changed files."""
+        source = PollingEventSource(self.music_dir, interval=0)
+        source.start()
+
+        self._write("artist/album/track.mp3")
+        os.utime(os.path.join(self.music_dir, "artist", "album"), (0, 1))
+
+        self.assertEqual(source.read(timeout=0.1), ["artist/album"])
+        self.assertEqual(source.read(timeout=0.1), [])
+        source.close()
+
+    def test_polling_source_removed_directory(self):
+        """Test files removed with their directory are reported at the nearest directory left."""
+        self._write("artist/album/track.mp3")
+        source = PollingEventSource(self.music_dir, interval=0)
+        source.start()
+
+        shutil.rmtree(os.path.join(self.music_dir, "artist", "album"))
+        os.utime(os.path.join(self.music_dir, "artist"), (0, 1))
+
+        self.assertEqual(source.read(timeout=0.1), ["artist"])
+        source.close()
+
+    @unittest.skipUnless(watcher.INOTIFY_AVAILABLE, "inotify not available")
+    def test_inotify_source(self):
+        """Test the inotify source reports changes, including in new directories."""
+        source = watcher.InotifyEventSource(self.music_dir)
+        source.start()
+        try:
+            self._write("artist/album/track.mp3")
+            self.assertEqual(source.read(timeout=1.0), ["artist/album"])
+
+            os.makedirs(os.path.join(self.music_dir, "artist", "new"))
+            self.assertEqual(source.read(timeout=1.0), ["artist"])
+
+            self._write("artist/new/track.flac")
+            self.assertEqual(source.read(timeout=1.0), ["artist/new"])
+        finally:
+            source.close()
+
+    @unittest.skipUnless(watcher.INOTIFY_AVAILABLE, "inotify not available")
+    def test_inotify_source_directory_moved_away(self):
+        """Test a directory moved out of the tree is no longer watched."""
+        outside = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, outside)
+        source = watcher.InotifyEventSource(self.music_dir)
+        source.start()
+        try:
+            os.rename(os.path.join(self.music_dir, "artist"), os.path.join(outside, "artist"))
+            self.assertEqual(source.read(timeout=1.0), [""])
+            self.assertEqual(sorted(source._watches.values()), [""])
+
+            with open(os.path.join(outside, "artist", "album", "track.mp3"), "wb") as f:
+                f.write(b"data")
+            self.assertEqual(source.read(timeout=0.2), [])
+        finally:
+            source.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,924 @@
+"""
+Fake MPD server for tests and benchmarks.
+
+Speaks the MPD text protocol over TCP, so the real python-mpd2 client, the
+MPDClientWrapper reconnect logic and command lists can be exercised without
+MPD or audio hardware. The server keeps an in-memory library, queue, stored
+playlists and player state, supports idle/noidle, command lists and ACK
+errors, and can inject latency, errors and dropped connections.
+
+The server runs an asyncio event loop in a background thread::
+
+    with FakeMPDServer(latency=0.002) as server:
+        client = MPDClient()
+        client.connect(server.host, server.port)
+"""
+
+import asyncio
+import os
+import random
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+PROTOCOL_VERSION = "0.23.5"
+
+# ACK error codes (src/protocol/Ack.hxx in MPD)
+ACK_ERROR_NOT_LIST = 1
+ACK_ERROR_ARG = 2
+ACK_ERROR_UNKNOWN = 5
+ACK_ERROR_NO_EXIST = 50
+ACK_ERROR_SYSTEM = 52
+ACK_ERROR_EXIST = 56
+
+AUDIO_EXTENSIONS = {".mp3", ".flac", ".ogg", ".opus", ".wav", ".m4a", ".aac"}
+
+SUBSYSTEMS = {
+    "database", "update", "stored_playlist", "playlist", "player",
+    "mixer", "output", "options", "partition", "sticker", "subscription", "message"
+}
+
+
+class CommandError(Exception):
+    """Error answered to the client with an ACK line."""
+
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+class _DropConnection(Exception):
+    """Close the connection without answering."""
+
+
+def parse_command(line: str) -> Tuple[str, List[str]]:
+    """
+    Split a request line into the command and its arguments.
+
+    Arguments may be bare words or double-quoted strings with backslash
+    escapes, as sent by python-mpd2.
+
+    Args:
+        line: Request line without the newline
+
+    Returns:
+        Command name and arguments
+
+    Raises:
+        CommandError: If a quoted argument is not terminated
+    """
+    args: List[str] = []
+    i, length = 0, len(line)
+    while i < length:
+        if line[i] == ' ':
+            i += 1
+            continue
+        if line[i] == '"':
+            i += 1
+            chars = []
+            while i < length and line[i] != '"':
+                if line[i] == '\\' and i + 1 < length:
+                    i += 1
+                chars.append(line[i])
+                i += 1
+            if i >= length:
+                raise CommandError(ACK_ERROR_ARG, "Missing closing '\"'")
+            args.append("".join(chars))
+            i += 1
+        else:
+            start = i
+            while i < length and line[i] != ' ':
+                i += 1
+            args.append(line[start:i])
+    if not args:
+        return "", []
+    return args[0], args[1:]
+
+
+def _parse_range(arg: str, length: int) -> Tuple[int, int]:
+    """Parse a position or ``start:end`` range argument."""
+    try:
+        if ':' in arg:
+            start, end = arg.split(':', 1)
+            return int(start), int(end) if end else length
+        pos = int(arg)
+        return pos, pos + 1
+    except ValueError:
+        raise CommandError(ACK_ERROR_ARG, f"Integer or range expected: {arg}")
+
+
+def _parse_int(arg: str) -> int:
+    try:
+        return int(arg)
+    except ValueError:
+        raise CommandError(ACK_ERROR_ARG, f"Integer expected: {arg}")
+
+
+class _Connection:
+    """State of one client connection."""
+
+    def __init__(self, writer: asyncio.StreamWriter):
+        self.writer = writer
+        self.pending: Set[str] = set()
+        self.idle_filter: Optional[Set[str]] = None
+        self.idle_waiter: Optional[asyncio.Future] = None
+
+
+class FakeMPDServer:
+    """
+    In-process MPD server speaking the text protocol over TCP.
+
+    Fault injection:
+
+    * ``latency`` and ``jitter`` delay every response (one round trip, so a
+      command list pays it once),
+    * ``error_rate`` answers a command with a random ACK system error,
+    * ``drop_rate`` closes the connection instead of answering,
+    * ``fail_next()`` queues deterministic failures for specific commands,
+    * ``drop_connections()`` closes every client connection.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, music_directory: Optional[str] = None,
+                 latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 drop_rate: float = 0.0, seed: Optional[int] = None):
+        """
+        Initialize the server.
+
+        Args:
+            host: Address to listen on
+            port: Port to listen on, 0 picks a free port
+            music_directory: Directory scanned into the library at start and on update
+            latency: Seconds to wait before every response
+            jitter: Maximum extra random delay in seconds
+            error_rate: Probability that a command fails with an ACK
+            drop_rate: Probability that a request closes the connection unanswered
+            seed: Seed for the fault injection random generator
+        """
+        self.host = host
+        self.port = port
+        self.music_directory = music_directory
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.drop_rate = drop_rate
+        self.random = random.Random(seed)
+
+        # Statistics
+        self.command_counts: Dict[str, int] = {}
+        self.connections_total = 0
+
+        # Database and queue
+        self.library: Dict[str, Dict[str, str]] = {}
+        self.stored_playlists: Dict[str, List[str]] = {}
+        self.queue: List[Dict[str, str]] = []
+        self.next_song_id = 1
+        self.playlist_version = 1
+        self.update_job = 0
+
+        # Player
+        self.state = "stop"
+        self.current: Optional[int] = None
+        self.elapsed = 0.0
+        self.started_at = 0.0
+        self.volume = 50
+        self.options = {"repeat": 0, "random": 0, "single": 0, "consume": 0}
+
+        self._failures: List[Tuple[Optional[str], int, str, bool]] = []
+        self._connections: Set[_Connection] = set()
+        self._lock = threading.RLock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+        self._handlers = {
+            "ping": self._cmd_ping,
+            "status": self._cmd_status,
+            "stats": self._cmd_stats,
+            "currentsong": self._cmd_currentsong,
+            "play": self._cmd_play,
+            "playid": self._cmd_playid,
+            "pause": self._cmd_pause,
+            "stop": self._cmd_stop,
+            "next": self._cmd_next,
+            "previous": self._cmd_previous,
+            "seekcur": self._cmd_seekcur,
+            "setvol": self._cmd_setvol,
+            "repeat": self._cmd_option,
+            "random": self._cmd_option,
+            "single": self._cmd_option,
+            "consume": self._cmd_option,
+            "update": self._cmd_update,
+            "rescan": self._cmd_update,
+            "lsinfo": self._cmd_lsinfo,
+            "listall": self._cmd_listall,
+            "listallinfo": self._cmd_listallinfo,
+            "add": self._cmd_add,
+            "addid": self._cmd_addid,
+            "delete": self._cmd_delete,
+            "deleteid": self._cmd_deleteid,
+            "move": self._cmd_move,
+            "moveid": self._cmd_moveid,
+            "clear": self._cmd_clear,
+            "playlistinfo": self._cmd_playlistinfo,
+            "playlistid": self._cmd_playlistid,
+            "listplaylists": self._cmd_listplaylists,
+            "listplaylist": self._cmd_listplaylist,
+            "listplaylistinfo": self._cmd_listplaylistinfo,
+            "load": self._cmd_load,
+            "save": self._cmd_save,
+            "rm": self._cmd_rm,
+            "playlistadd": self._cmd_playlistadd,
+            "playlistclear": self._cmd_playlistclear,
+        }
+
+    # Lifecycle
+
+    def start(self) -> "FakeMPDServer":
+        """Start serving in a background thread and wait until the port is bound."""
+        if self.music_directory:
+            self.scan()
+
+        ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(ready,), name="fake-mpd", daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self
+
+    def stop(self) -> None:
+        """Close every connection and stop the server."""
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = None
+
+    def __enter__(self) -> "FakeMPDServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.stop()
+
+    def _run(self, ready: threading.Event) -> None:
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._server = self._loop.run_until_complete(
+            asyncio.start_server(self._handle_client, self.host, self.port)
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        ready.set()
+        self._loop.run_forever()
+
+    async def _shutdown(self) -> None:
+        self._server.close()
+        for connection in list(self._connections):
+            connection.writer.close()
+        await self._server.wait_closed()
+
+    # Library and fault injection
+
+    def add_song(self, file: str, **tags: Any) -> None:
+        """
+        Add a song to the library.
+
+        Args:
+            file: Song URI relative to the music directory
+            **tags: Tags such as Title, Artist, Album and duration (seconds)
+        """
+        song = {"file": file}
+        song.update({key: str(value) for key, value in tags.items()})
+        song.setdefault("duration", "180.000")
+        song["Time"] = str(int(float(song["duration"])))
+        with self._lock:
+            self.library[file] = song
+
+    def scan(self) -> int:
+        """
+        Rebuild the library from the music directory.
+
+        Returns:
+            Number of songs found
+        """
+        songs = {}
+        for root, _, files in os.walk(self.music_directory):
+            for name in files:
+                if os.path.splitext(name)[1].lower() in AUDIO_EXTENSIONS:
+                    path = os.path.join(root, name)
+                    uri = os.path.relpath(path, self.music_directory).replace(os.sep, "/")
+                    songs[uri] = {
+                        "file": uri,
+                        "Title": os.path.splitext(name)[0],
+                        "duration": "180.000",
+                        "Time": "180"
+                    }
+        with self._lock:
+            self.library = songs
+        return len(songs)
+
+    def fail_next(self, command: Optional[str] = None, count: int = 1,
+                  message: str = "Injected failure", drop: bool = False) -> None:
+        """
+        Make the next matching commands fail.
+
+        Args:
+            command: Command to fail, None for any command
+            count: Number of failures
+            message: ACK message
+            drop: Close the connection instead of answering with an ACK
+        """
+        with self._lock:
+            self._failures.extend([(command, ACK_ERROR_SYSTEM, message, drop)] * count)
+
+    def drop_connections(self) -> None:
+        """Close every client connection, as if MPD restarted."""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._close_connections)
+
+    def _close_connections(self) -> None:
+        for connection in list(self._connections):
+            connection.writer.close()
+
+    @property
+    def connection_count(self) -> int:
+        """Number of open client connections."""
+        return len(self._connections)
+
+    def _inject(self, command: str) -> None:
+        """Raise an injected failure for a command, if one is due."""
+        for i, (name, code, message, drop) in enumerate(self._failures):
+            if name is None or name == command:
+                del self._failures[i]
+                if drop:
+                    raise _DropConnection()
+                raise CommandError(code, message)
+        if self.drop_rate and self.random.random() < self.drop_rate:
+            raise _DropConnection()
+        if self.error_rate and self.random.random() < self.error_rate:
+            raise CommandError(ACK_ERROR_SYSTEM, "Injected failure")
+
+    async def _delay(self) -> None:
+        delay = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    # Idle notifications
+
+    def changed(self, *subsystems: str) -> None:
+        """
+        Report changed subsystems to idle clients.
+
+        Safe to call from any thread.
+
+        Args:
+            *subsystems: Changed subsystems
+        """
+        if self._loop is None:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._notify(subsystems)
+        else:
+            self._loop.call_soon_threadsafe(self._notify, subsystems)
+
+    def _notify(self, subsystems: Iterable[str]) -> None:
+        for connection in self._connections:
+            connection.pending.update(subsystems)
+            self._wake(connection)
+
+    @staticmethod
+    def _wake(connection: _Connection) -> None:
+        waiter = connection.idle_waiter
+        if waiter is None or waiter.done():
+            return
+        matching = connection.pending if not connection.idle_filter else connection.pending & connection.idle_filter
+        if matching:
+            waiter.set_result(None)
+
+    # Connection handling
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        connection = _Connection(writer)
+        self._connections.add(connection)
+        self.connections_total += 1
+        try:
+            writer.write(f"OK MPD {PROTOCOL_VERSION}\n".encode())
+            await writer.drain()
+
+            command_list: Optional[List[Tuple[str, List[str]]]] = None
+            list_ok = False
+
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                command, args = self._parse(line)
+
+                if command == "command_list_begin" or command == "command_list_ok_begin":
+                    command_list, list_ok = [], command == "command_list_ok_begin"
+                    continue
+                if command_list is not None:
+                    if command == "command_list_end":
+                        batch, command_list = command_list, None
+                        await self._delay()
+                        writer.write(self._execute_list(batch, list_ok))
+                        await writer.drain()
+                    else:
+                        command_list.append((command, args))
+                    continue
+
+                if command == "close":
+                    break
+                if command == "idle":
+                    if not await self._idle(connection, reader, args):
+                        break
+                    continue
+                if command == "noidle":
+                    # noidle outside idle is ignored
+                    continue
+
+                await self._delay()
+                writer.write(self._execute_list([(command, args)], False))
+                await writer.drain()
+        except _DropConnection:
+            pass
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._connections.discard(connection)
+            writer.close()
+
+    def _parse(self, line: bytes) -> Tuple[str, List[str]]:
+        try:
+            return parse_command(line.decode("utf-8").rstrip("\n"))
+        except CommandError:
+            return "", []
+
+    async def _idle(self, connection: _Connection, reader: asyncio.StreamReader, args: List[str]) -> bool:
+        """
+        Wait for changes or noidle.
+
+        Returns:
+            False if the connection should be closed
+        """
+        unknown = [name for name in args if name not in SUBSYSTEMS]
+        if unknown:
+            connection.writer.write(self._ack(ACK_ERROR_ARG, 0, "idle", f"Unrecognized idle event: {unknown[0]}"))
+            await connection.writer.drain()
+            return True
+
+        connection.idle_filter = set(args) or None
+        connection.idle_waiter = asyncio.get_running_loop().create_future()
+        self._wake(connection)
+
+        read = asyncio.ensure_future(reader.readline())
+        try:
+            await asyncio.wait({read, connection.idle_waiter}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            connection.idle_waiter = None
+
+        if read.done():
+            line = read.result()
+            if not line or self._parse(line)[0] != "noidle":
+                # MPD only accepts noidle while idle
+                return False
+        else:
+            read.cancel()
+            try:
+                await read
+            except asyncio.CancelledError:
+                pass
+
+        changed = connection.pending if not connection.idle_filter else connection.pending & connection.idle_filter
+        connection.pending -= changed
+        connection.writer.write("".join(f"changed: {name}\n" for name in sorted(changed)).encode() + b"OK\n")
+        await connection.writer.drain()
+        return True
+
+    def _execute_list(self, commands: List[Tuple[str, List[str]]], list_ok: bool) -> bytes:
+        """Run commands and build the response, stopping at the first error."""
+        output: List[str] = []
+        for index, (command, args) in enumerate(commands):
+            self.command_counts[command] = self.command_counts.get(command, 0) + 1
+            try:
+                with self._lock:
+                    self._inject(command)
+                    handler = self._handlers.get(command)
+                    if handler is None:
+                        raise CommandError(ACK_ERROR_UNKNOWN, f'unknown command "{command}"')
+                    lines = handler(command, args)
+            except CommandError as e:
+                return ("".join(output)).encode() + self._ack(e.code, index, command, e.message)
+            output.extend(f"{key}: {value}\n" for key, value in lines or ())
+            if list_ok:
+                output.append("list_OK\n")
+        output.append("OK\n")
+        return "".join(output).encode()
+
+    @staticmethod
+    def _ack(code: int, index: int, command: str, message: str) -> bytes:
+        return f"ACK [{code}@{index}] {{{command}}} {message}\n".encode()
+
+    # Helpers
+
+    @staticmethod
+    def _song_lines(song: Dict[str, str]) -> List[Tuple[str, str]]:
+        lines = [("file", song["file"])]
+        lines.extend((key, value) for key, value in song.items() if key != "file")
+        return lines
+
+    def _queue_lines(self, pos: int) -> List[Tuple[str, str]]:
+        song = self.queue[pos]
+        lines = self._song_lines(self.library.get(song["file"], {"file": song["file"]}))
+        lines.append(("Pos", str(pos)))
+        lines.append(("Id", song["Id"]))
+        return lines
+
+    def _find_id(self, song_id: str) -> int:
+        for pos, song in enumerate(self.queue):
+            if song["Id"] == song_id:
+                return pos
+        raise CommandError(ACK_ERROR_NO_EXIST, "No such song")
+
+    def _get_elapsed(self) -> float:
+        if self.state == "play":
+            return self.elapsed + time.monotonic() - self.started_at
+        return self.elapsed
+
+    def _set_playing(self, pos: Optional[int], state: str = "play") -> None:
+        self.current = pos
+        self.elapsed = 0.0
+        self.started_at = time.monotonic()
+        self.state = state if pos is not None else "stop"
+        self.changed("player")
+
+    def _queue_changed(self) -> None:
+        self.playlist_version += 1
+        self.changed("playlist")
+
+    def _resolve(self, uri: str) -> List[str]:
+        """Resolve a file or directory URI to library files."""
+        if uri in self.library:
+            return [uri]
+        prefix = uri.rstrip("/") + "/" if uri and uri != "/" else ""
+        files = sorted(file for file in self.library if file.startswith(prefix))
+        if not files:
+            raise CommandError(ACK_ERROR_NO_EXIST, "No such directory")
+        return files
+
+    def _enqueue(self, file: str, pos: Optional[int] = None) -> str:
+        song_id = str(self.next_song_id)
+        self.next_song_id += 1
+        entry = {"file": file, "Id": song_id}
+        if pos is None or pos >= len(self.queue):
+            self.queue.append(entry)
+        else:
+            self.queue.insert(pos, entry)
+            if self.current is not None and pos <= self.current:
+                self.current += 1
+        return song_id
+
+    def _remove(self, pos: int) -> None:
+        del self.queue[pos]
+        if self.current is not None:
+            if pos == self.current:
+                self.current = None
+                self.state = "stop"
+                self.changed("player")
+            elif pos < self.current:
+                self.current -= 1
+
+    def _move(self, source: int, target: int) -> None:
+        current_id = self.queue[self.current]["Id"] if self.current is not None else None
+        self.queue.insert(target, self.queue.pop(source))
+        if current_id is not None:
+            self.current = self._find_id(current_id)
+
+    def _playlist(self, name: str) -> List[str]:
+        if name not in self.stored_playlists:
+            raise CommandError(ACK_ERROR_NO_EXIST, "No such playlist")
+        return self.stored_playlists[name]
+
+    # Commands
+
+    def _cmd_ping(self, command, args):
+        return []
+
+    def _cmd_status(self, command, args):
+        lines = [
+            ("volume", str(self.volume)),
+            ("repeat", str(self.options["repeat"])),
+            ("random", str(self.options["random"])),
+            ("single", str(self.options["single"])),
+            ("consume", str(self.options["consume"])),
+            ("playlist", str(self.playlist_version)),
+            ("playlistlength", str(len(self.queue))),
+            ("mixrampdb", "0.000000"),
+            ("state", self.state),
+        ]
+        if self.current is not None:
+            song = self.library.get(self.queue[self.current]["file"], {})
+            duration = float(song.get("duration", 0))
+            elapsed = min(self._get_elapsed(), duration) if duration else self._get_elapsed()
+            lines.extend([
+                ("song", str(self.current)),
+                ("songid", self.queue[self.current]["Id"]),
+                ("time", f"{int(elapsed)}:{int(duration)}"),
+                ("elapsed", f"{elapsed:.3f}"),
+                ("duration", f"{duration:.3f}"),
+            ])
+            if self.current + 1 < len(self.queue):
+                lines.append(("nextsong", str(self.current + 1)))
+                lines.append(("nextsongid", self.queue[self.current + 1]["Id"]))
+        if self.update_job:
+            lines.append(("updating_db", str(self.update_job)))
+        return lines
+
+    def _cmd_stats(self, command, args):
+        artists = {song.get("Artist") for song in self.library.values() if song.get("Artist")}
+        albums = {song.get("Album") for song in self.library.values() if song.get("Album")}
+        return [
+            ("artists", str(len(artists))),
+            ("albums", str(len(albums))),
+            ("songs", str(len(self.library))),
+            ("uptime", "0"),
+            ("db_playtime", str(sum(int(song["Time"]) for song in self.library.values()))),
+            ("db_update", "0"),
+            ("playtime", "0"),
+        ]
+
+    def _cmd_currentsong(self, command, args):
+        if self.current is None:
+            return []
+        return self._queue_lines(self.current)
+
+    def _cmd_play(self, command, args):
+        if args:
+            pos = _parse_int(args[0])
+            if not 0 <= pos < len(self.queue):
+                raise CommandError(ACK_ERROR_ARG, "Bad song index")
+        elif self.current is not None:
+            if self.state == "pause":
+                self.started_at = time.monotonic()
+                self.state = "play"
+                self.changed("player")
+            return []
+        elif self.queue:
+            pos = 0
+        else:
+            return []
+        self._set_playing(pos)
+        return []
+
+    def _cmd_playid(self, command, args):
+        if not args:
+            return self._cmd_play(command, [])
+        self._set_playing(self._find_id(args[0]))
+        return []
+
+    def _cmd_pause(self, command, args):
+        if self.state == "stop":
+            return []
+        pause = _parse_int(args[0]) if args else int(self.state == "play")
+        if pause and self.state == "play":
+            self.elapsed = self._get_elapsed()
+            self.state = "pause"
+        elif not pause and self.state == "pause":
+            self.started_at = time.monotonic()
+            self.state = "play"
+        self.changed("player")
+        return []
+
+    def _cmd_stop(self, command, args):
+        if self.state != "stop":
+            self.state = "stop"
+            self.elapsed = 0.0
+            self.changed("player")
+        return []
+
+    def _cmd_next(self, command, args):
+        if self.current is None:
+            return []
+        if self.current + 1 < len(self.queue):
+            self._set_playing(self.current + 1, self.state)
+        elif self.options["repeat"]:
+            self._set_playing(0, self.state)
+        else:
+            self._set_playing(None)
+        return []
+
+    def _cmd_previous(self, command, args):
+        if self.current is None:
+            return []
+        self._set_playing(max(0, self.current - 1), self.state)
+        return []
+
+    def _cmd_seekcur(self, command, args):
+        if self.current is None:
+            raise CommandError(ACK_ERROR_NO_EXIST, "Not playing")
+        try:
+            self.elapsed = float(args[0])
+        except (IndexError, ValueError):
+            raise CommandError(ACK_ERROR_ARG, "Number expected")
+        self.started_at = time.monotonic()
+        self.changed("player")
+        return []
+
+    def _cmd_setvol(self, command, args):
+        volume = _parse_int(args[0]) if args else -1
+        if not 0 <= volume <= 100:
+            raise CommandError(ACK_ERROR_ARG, "Invalid volume value")
+        self.volume = volume
+        self.changed("mixer")
+        return []
+
+    def _cmd_option(self, command, args):
+        if not args or args[0] not in ("0", "1"):
+            raise CommandError(ACK_ERROR_ARG, "Boolean (0/1) expected")
+        self.options[command] = int(args[0])
+        self.changed("options")
+        return []
+
+    def _cmd_update(self, command, args):
+        if args and not any(file.startswith(args[0]) for file in self.library):
+            raise CommandError(ACK_ERROR_NO_EXIST, "Malformed path")
+        self.update_job += 1
+        job = self.update_job
+        if self.music_directory:
+            self.scan()
+        self.update_job = 0
+        self.changed("update", "database")
+        return [("updating_db", str(job))]
+
+    def _cmd_lsinfo(self, command, args):
+        uri = args[0].strip("/") if args else ""
+        if uri in self.library:
+            return self._song_lines(self.library[uri])
+
+        prefix = uri + "/" if uri else ""
+        directories = set()
+        files = []
+        for file in sorted(self.library):
+            if not file.startswith(prefix):
+                continue
+            rest = file[len(prefix):]
+            if "/" in rest:
+                directories.add(prefix + rest.split("/", 1)[0])
+            else:
+                files.append(file)
+        if uri and not directories and not files:
+            raise CommandError(ACK_ERROR_NO_EXIST, "Not found")
+
+        lines = [("directory", directory) for directory in sorted(directories)]
+        for file in files:
+            lines.extend(self._song_lines(self.library[file]))
+        if not uri:
+            lines.extend(("playlist", name) for name in sorted(self.stored_playlists))
+        return lines
+
+    def _cmd_listall(self, command, args):
+        return [("file", file) for file in self._resolve(args[0] if args else "")]
+
+    def _cmd_listallinfo(self, command, args):
+        lines = []
+        for file in self._resolve(args[0] if args else ""):
+            lines.extend(self._song_lines(self.library[file]))
+        return lines
+
+    def _cmd_add(self, command, args):
+        if not args:
+            raise CommandError(ACK_ERROR_ARG, "wrong number of arguments")
+        for file in self._resolve(args[0]):
+            self._enqueue(file)
+        self._queue_changed()
+        return []
+
+    def _cmd_addid(self, command, args):
+        if not args:
+            raise CommandError(ACK_ERROR_ARG, "wrong number of arguments")
+        if args[0] not in self.library:
+            raise CommandError(ACK_ERROR_NO_EXIST, "No such song")
+        pos = _parse_int(args[1]) if len(args) > 1 else None
+        if pos is not None and not 0 <= pos <= len(self.queue):
+            raise CommandError(ACK_ERROR_ARG, "Bad song index")
+        song_id = self._enqueue(args[0], pos)
+        self._queue_changed()
+        return [("Id", song_id)]
+
+    def _cmd_delete(self, command, args):
+        start, end = _parse_range(args[0] if args else "", len(self.queue))
+        if not 0 <= start < end <= len(self.queue):
+            raise CommandError(ACK_ERROR_ARG, "Bad song index")
+        for pos in reversed(range(start, end)):
+            self._remove(pos)
+        self._queue_changed()
+        return []
+
+    def _cmd_deleteid(self, command, args):
+        self._remove(self._find_id(args[0] if args else ""))
+        self._queue_changed()
+        return []
+
+    def _cmd_move(self, command, args):
+        if len(args) < 2:
+            raise CommandError(ACK_ERROR_ARG, "wrong number of arguments")
+        source, target = _parse_int(args[0]), _parse_int(args[1])
+        if not (0 <= source < len(self.queue) and 0 <= target < len(self.queue)):
+            raise CommandError(ACK_ERROR_ARG, "Bad song index")
+        self._move(source, target)
+        self._queue_changed()
+        return []
+
+    def _cmd_moveid(self, command, args):
+        if len(args) < 2:
+            raise CommandError(ACK_ERROR_ARG, "wrong number of arguments")
+        source, target = self._find_id(args[0]), _parse_int(args[1])
+        if not 0 <= target < len(self.queue):
+            raise CommandError(ACK_ERROR_ARG, "Bad song index")
+        self._move(source, target)
+        self._queue_changed()
+        return []
+
+    def _cmd_clear(self, command, args):
+        self.queue = []
+        if self.current is not None:
+            self._set_playing(None)
+        self._queue_changed()
+        return []
+
+    def _cmd_playlistinfo(self, command, args):
+        if args:
+            start, end = _parse_range(args[0], len(self.queue))
+            limit = len(self.queue) if ':' in args[0] else len(self.queue) - 1
+            if not 0 <= start <= limit:
+                raise CommandError(ACK_ERROR_ARG, "Bad song index")
+        else:
+            start, end = 0, len(self.queue)
+        lines = []
+        for pos in range(start, min(end, len(self.queue))):
+            lines.extend(self._queue_lines(pos))
+        return lines
+
+    def _cmd_playlistid(self, command, args):
+        if args:
+            return self._queue_lines(self._find_id(args[0]))
+        lines = []
+        for pos in range(len(self.queue)):
+            lines.extend(self._queue_lines(pos))
+        return lines
+
+    def _cmd_listplaylists(self, command, args):
+        lines = []
+        for name in sorted(self.stored_playlists):
+            lines.append(("playlist", name))
+            lines.append(("Last-Modified", "2024-01-01T00:00:00Z"))
+        return lines
+
+    def _cmd_listplaylist(self, command, args):
+        return [("file", file) for file in self._playlist(args[0] if args else "")]
+
+    def _cmd_listplaylistinfo(self, command, args):
+        lines = []
+        for file in self._playlist(args[0] if args else ""):
+            lines.extend(self._song_lines(self.library.get(file, {"file": file})))
+        return lines
+
+    def _cmd_load(self, command, args):
+        for file in self._playlist(args[0] if args else ""):
+            self._enqueue(file)
+        self._queue_changed()
+        return []
+
+    def _cmd_save(self, command, args):
+        if not args:
+            raise CommandError(ACK_ERROR_ARG, "wrong number of arguments")
+        if args[0] in self.stored_playlists:
+            raise CommandError(ACK_ERROR_EXIST, "Playlist already exists")
+        self.stored_playlists[args[0]] = [song["file"] for song in self.queue]
+        self.changed("stored_playlist")
+        return []
+
+    def _cmd_rm(self, command, args):
+        self._playlist(args[0] if args else "")
+        del self.stored_playlists[args[0]]
+        self.changed("stored_playlist")
+        return []
+
+    def _cmd_playlistadd(self, command, args):
+        if len(args) < 2:
+            raise CommandError(ACK_ERROR_ARG, "wrong number of arguments")
+        files = self._resolve(args[1])
+        self.stored_playlists.setdefault(args[0], []).extend(files)
+        self.changed("stored_playlist")
+        return []
+
+    def _cmd_playlistclear(self, command, args):
+        if not args:
+            raise CommandError(ACK_ERROR_ARG, "wrong number of arguments")
+        self.stored_playlists[args[0]] = []
+        self.changed("stored_playlist")
+        return []
@@ -0,0 +1,353 @@
+"""
+Fake MQTT broker for tests and benchmarks.
+
+Speaks enough MQTT 3.1.1 over TCP, optionally with TLS, for the real paho
+client and MQTTClient to connect, subscribe, publish and resume sessions:
+CONNECT with persistent sessions, SUBSCRIBE/UNSUBSCRIBE, PUBLISH at QoS 0-2
+with retained messages, PINGREQ and DISCONNECT. Deliveries to subscribers
+are capped at QoS 1.
+
+Network latency is injected by a relay in front of the broker that delays
+every chunk of data in both directions, so each round trip, including those
+of the TLS handshake, costs ``2 * latency``::
+
+    cert_file, key_file = create_self_signed_cert(directory)
+    with FakeMQTTServer(ssl_context=server_tls_context(cert_file, key_file), latency=0.05) as server:
+        client.connect("localhost", server.port)
+"""
+
+import asyncio
+import os
+import shutil
+import ssl
+import subprocess
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+
+from tests.mocks.inprocess_broker import topic_matches
+
+OPENSSL_AVAILABLE = shutil.which("openssl") is not None
+
+CONNECT, CONNACK, PUBLISH, PUBACK, PUBREC, PUBREL, PUBCOMP = 1, 2, 3, 4, 5, 6, 7
+SUBSCRIBE, SUBACK, UNSUBSCRIBE, UNSUBACK, PINGREQ, PINGRESP, DISCONNECT = 8, 9, 10, 11, 12, 13, 14
+
+
+def create_self_signed_cert(directory: str, hostname: str = "localhost") -> Tuple[str, str]:
+    """
+    Create a self-signed server certificate with the openssl command.
+
+    The certificate doubles as its own CA file for the client.
+
+    Args:
+        directory: Directory to write the files to
+        hostname: Host name the certificate is valid for (127.0.0.1 is always included)
+
+    Returns:
+        Paths of the certificate and the private key
+    """
+    cert_file = os.path.join(directory, "server.crt")
+    key_file = os.path.join(directory, "server.key")
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "ec", "-pkeyopt", "ec_paramgen_curve:prime256v1",
+         "-nodes", "-days", "2", "-subj", f"/CN={hostname}",
+         "-addext", f"subjectAltName=DNS:{hostname},IP:127.0.0.1",
+         "-keyout", key_file, "-out", cert_file],
+        check=True, capture_output=True
+    )
+    return cert_file, key_file
+
+
+def server_tls_context(cert_file: str, key_file: str) -> ssl.SSLContext:
+    """
+    Create a server TLS context.
+
+    Args:
+        cert_file: Server certificate
+        key_file: Private key of the certificate
+
+    Returns:
+        SSL context
+    """
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert_file, key_file)
+    return context
+
+
+def _encode_length(length: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte, length = length % 128, length // 128
+        out.append(byte | (0x80 if length else 0))
+        if not length:
+            return bytes(out)
+
+
+def _packet(first: int, body: bytes = b"") -> bytes:
+    return bytes([first]) + _encode_length(len(body)) + body
+
+
+def _string(value: bytes) -> bytes:
+    return len(value).to_bytes(2, "big") + value
+
+
+def _read_string(body: bytes, pos: int) -> Tuple[bytes, int]:
+    length = int.from_bytes(body[pos:pos + 2], "big")
+    return body[pos + 2:pos + 2 + length], pos + 2 + length
+
+
+class _Connection:
+    """State of one client connection."""
+
+    def __init__(self, writer: asyncio.StreamWriter):
+        self.writer = writer
+        self.client_id = ""
+        self.subscriptions: Dict[str, int] = {}
+        self.next_id = 0
+
+    def packet_id(self) -> int:
+        self.next_id = self.next_id % 65535 + 1
+        return self.next_id
+
+
+class FakeMQTTServer:
+    """In-process MQTT broker over TCP or TLS, with optional latency."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0,
+                 ssl_context: Optional[ssl.SSLContext] = None, latency: float = 0.0):
+        """
+        Initialize the server.
+
+        Args:
+            host: Address to listen on
+            port: Port to listen on, 0 picks a free port
+            ssl_context: Server TLS context, None for plain TCP
+            latency: One-way delay added to data in both directions, in seconds
+        """
+        self.host = host
+        self.port = port
+        self.ssl_context = ssl_context
+        self.latency = latency
+        self.sessions: Dict[str, Dict[str, int]] = {}
+        self.retained: Dict[str, Tuple[bytes, int]] = {}
+        self.messages: List[Tuple[str, bytes]] = []
+        self.connections_total = 0
+        self._connections: Set[_Connection] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._servers: List[asyncio.AbstractServer] = []
+        self._thread: Optional[threading.Thread] = None
+
+    # Lifecycle
+
+    def start(self) -> "FakeMQTTServer":
+        """Start serving in a background thread and wait until the port is bound."""
+        ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(ready,), name="fake-mqtt", daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self
+
+    def stop(self) -> None:
+        """Close every connection and stop the server."""
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = None
+
+    def __enter__(self) -> "FakeMQTTServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.stop()
+
+    def _run(self, ready: threading.Event) -> None:
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        broker = self._loop.run_until_complete(asyncio.start_server(
+            self._handle_client, self.host, 0 if self.latency else self.port, ssl=self.ssl_context
+        ))
+        self._servers.append(broker)
+        if self.latency:
+            broker_port = broker.sockets[0].getsockname()[1]
+            relay = self._loop.run_until_complete(asyncio.start_server(
+                lambda reader, writer: self._relay(reader, writer, broker_port), self.host, self.port
+            ))
+            self._servers.append(relay)
+        self.port = self._servers[-1].sockets[0].getsockname()[1]
+        ready.set()
+        self._loop.run_forever()
+
+    async def _shutdown(self) -> None:
+        for server in self._servers:
+            server.close()
+        self._close_connections()
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for server in self._servers:
+            await server.wait_closed()
+
+    def drop_connections(self) -> None:
+        """Close every client connection, as if the broker restarted (sessions are kept)."""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._close_connections)
+
+    def _close_connections(self) -> None:
+        for connection in list(self._connections):
+            connection.writer.close()
+
+    @property
+    def connection_count(self) -> int:
+        """Number of open client connections."""
+        return len(self._connections)
+
+    # Latency relay
+
+    async def _relay(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, broker_port: int) -> None:
+        try:
+            broker_reader, broker_writer = await asyncio.open_connection(self.host, broker_port)
+        except OSError:
+            writer.close()
+            return
+        try:
+            await asyncio.gather(self._pipe(reader, broker_writer), self._pipe(broker_reader, writer))
+        except asyncio.CancelledError:
+            pass
+
+    async def _pipe(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Forward data, delivering each chunk ``latency`` seconds after it arrived."""
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def send() -> None:
+            while True:
+                due, data = await queue.get()
+                delay = due - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                if not data:
+                    return
+                writer.write(data)
+                await writer.drain()
+
+        sender = asyncio.ensure_future(send())
+        try:
+            while True:
+                data = await reader.read(65536)
+                queue.put_nowait((loop.time() + self.latency, data))
+                if not data:
+                    break
+            await sender
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            sender.cancel()
+            writer.close()
+
+    # MQTT
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        connection = _Connection(writer)
+        self._connections.add(connection)
+        self.connections_total += 1
+        try:
+            while True:
+                first = (await reader.readexactly(1))[0]
+                length, multiplier = 0, 1
+                while True:
+                    byte = (await reader.readexactly(1))[0]
+                    length += (byte & 0x7F) * multiplier
+                    multiplier *= 128
+                    if not byte & 0x80:
+                        break
+                body = await reader.readexactly(length) if length else b""
+                if not self._handle_packet(connection, first, body):
+                    break
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, ssl.SSLError, asyncio.CancelledError):
+            pass
+        finally:
+            self._connections.discard(connection)
+            writer.close()
+
+    def _handle_packet(self, connection: _Connection, first: int, body: bytes) -> bool:
+        """Handle one packet; returns False to close the connection."""
+        packet_type = first >> 4
+        write = connection.writer.write
+
+        if packet_type == CONNECT:
+            _, pos = _read_string(body, 0)
+            flags = body[pos + 1]
+            client_id, _ = _read_string(body, pos + 4)
+            connection.client_id = client_id.decode("utf-8")
+            clean_session = bool(flags & 0x02) or not connection.client_id
+            session_present = not clean_session and connection.client_id in self.sessions
+            if clean_session:
+                self.sessions.pop(connection.client_id, None)
+            else:
+                connection.subscriptions = self.sessions.setdefault(connection.client_id, {})
+            write(_packet(CONNACK << 4, bytes([int(session_present), 0])))
+        elif packet_type == SUBSCRIBE:
+            packet_id, pos, granted = body[:2], 2, []
+            while pos < len(body):
+                topic, pos = _read_string(body, pos)
+                qos = min(body[pos] & 0x03, 1)
+                pos += 1
+                connection.subscriptions[topic.decode("utf-8")] = qos
+                granted.append(qos)
+            write(_packet(SUBACK << 4, packet_id + bytes(granted)))
+            for topic, (payload, qos) in list(self.retained.items()):
+                subscription_qos = self._subscription_qos(connection, topic)
+                if subscription_qos is not None:
+                    self._send(connection, topic, payload, min(qos, subscription_qos), retain=True)
+        elif packet_type == UNSUBSCRIBE:
+            pos = 2
+            while pos < len(body):
+                topic, pos = _read_string(body, pos)
+                connection.subscriptions.pop(topic.decode("utf-8"), None)
+            write(_packet(UNSUBACK << 4, body[:2]))
+        elif packet_type == PUBLISH:
+            qos, retain = (first >> 1) & 0x03, bool(first & 0x01)
+            topic_bytes, pos = _read_string(body, 0)
+            packet_id = body[pos:pos + 2] if qos else b""
+            payload = body[pos + len(packet_id):]
+            topic = topic_bytes.decode("utf-8")
+            if qos == 1:
+                write(_packet(PUBACK << 4, packet_id))
+            elif qos == 2:
+                write(_packet(PUBREC << 4, packet_id))
+            self._route(topic, payload, qos, retain)
+        elif packet_type == PUBREL:
+            write(_packet(PUBCOMP << 4, body[:2]))
+        elif packet_type == PINGREQ:
+            write(_packet(PINGRESP << 4))
+        elif packet_type == DISCONNECT:
+            return False
+        return True
+
+    def _route(self, topic: str, payload: bytes, qos: int, retain: bool) -> None:
+        self.messages.append((topic, payload))
+        if retain:
+            if payload:
+                self.retained[topic] = (payload, qos)
+            else:
+                self.retained.pop(topic, None)
+        for connection in list(self._connections):
+            subscription_qos = self._subscription_qos(connection, topic)
+            if subscription_qos is not None:
+                self._send(connection, topic, payload, min(qos, subscription_qos))
+
+    @staticmethod
+    def _subscription_qos(connection: _Connection, topic: str) -> Optional[int]:
+        granted = [qos for subscription, qos in connection.subscriptions.items() if topic_matches(subscription, topic)]
+        return max(granted) if granted else None
+
+    @staticmethod
+    def _send(connection: _Connection, topic: str, payload: bytes, qos: int, retain: bool = False) -> None:
+        body = _string(topic.encode("utf-8"))
+        if qos:
+            body += connection.packet_id().to_bytes(2, "big")
+        connection.writer.write(_packet((PUBLISH << 4) | (qos << 1) | int(retain), body + payload))
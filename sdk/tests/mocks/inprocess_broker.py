@@ -0,0 +1,322 @@
+"""
+In-process MQTT broker for tests and benchmarks.
+
+Routes messages between paho-compatible clients inside one process, with
+MQTT topic wildcards, retained messages, last wills and persistent sessions,
+so that several BrokerManager instances and a controller can talk to each
+other without a network broker.
+"""
+
+import queue
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def topic_matches(subscription: str, topic: str) -> bool:
+    """
+    Check whether a topic matches a subscription filter.
+
+    Args:
+        subscription: Subscription filter, may contain + and #
+        topic: Topic name
+
+    Returns:
+        True if the topic matches, False otherwise
+    """
+    sub_parts = subscription.split('/')
+    topic_parts = topic.split('/')
+
+    for i, part in enumerate(sub_parts):
+        if part == '#':
+            return True
+        if i >= len(topic_parts):
+            return False
+        if part != '+' and part != topic_parts[i]:
+            return False
+
+    return len(sub_parts) == len(topic_parts)
+
+
+class InProcessMessage:
+    """Message delivered to on_message, like paho's MQTTMessage."""
+
+    __slots__ = ("topic", "payload", "qos", "retain", "properties", "mid", "timestamp")
+
+    def __init__(self, topic, payload, qos=0, retain=False, properties=None):
+        self.topic = topic
+        self.payload = payload
+        self.qos = qos
+        self.retain = retain
+        self.properties = properties
+        self.mid = 0
+        self.timestamp = 0
+
+
+class InProcessMessageInfo:
+    """Result of publish, like paho's MQTTMessageInfo."""
+
+    __slots__ = ("rc", "mid", "is_published")
+
+    def __init__(self, rc=0, mid=0):
+        self.rc = rc
+        self.mid = mid
+        self.is_published = rc == 0
+
+    def wait_for_publish(self, timeout=None):
+        return True
+
+
+class InProcessBroker:
+    """
+    Broker routing messages between InProcessClient instances.
+
+    By default messages are delivered by a single dispatcher thread, so that
+    publishing returns immediately as with a network client. With
+    ``synchronous=True`` they are delivered in the publisher's thread.
+    """
+
+    def __init__(self, synchronous: bool = False):
+        """
+        Initialize the broker.
+
+        Args:
+            synchronous: Deliver messages in the publishing thread
+        """
+        self.synchronous = synchronous
+        self.delivered = 0
+        self._exact: Dict[str, Dict["InProcessClient", int]] = {}
+        self._wildcard: Dict[str, Dict["InProcessClient", int]] = {}
+        self._retained: Dict[str, InProcessMessage] = {}
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue[Optional[Tuple[str, bytes, int, bool, Any]]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._mid = 0
+
+    def start(self) -> None:
+        """Start the dispatcher thread."""
+        if not self.synchronous and self._thread is None:
+            self._thread = threading.Thread(target=self._dispatch, name="inprocess-broker", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the dispatcher thread after delivering queued messages."""
+        if self._thread:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def join(self) -> None:
+        """Wait until every queued message has been delivered."""
+        self._queue.join()
+
+    def client(self, client_id: str = "", clean_session: bool = True, **kwargs) -> "InProcessClient":
+        """
+        Create a client connected to this broker.
+
+        Args:
+            client_id: Client ID
+
+        Returns:
+            A paho-compatible client
+        """
+        return InProcessClient(self, client_id, clean_session)
+
+    def next_mid(self) -> int:
+        with self._lock:
+            self._mid += 1
+            return self._mid
+
+    def subscribe(self, client: "InProcessClient", topic: str, qos: int) -> None:
+        wildcard = '+' in topic or '#' in topic
+        table = self._wildcard if wildcard else self._exact
+        with self._lock:
+            table.setdefault(topic, {})[client] = qos
+            if wildcard:
+                retained = [msg for name, msg in self._retained.items() if topic_matches(topic, name)]
+            else:
+                retained = [self._retained[topic]] if topic in self._retained else []
+        for msg in retained:
+            client.deliver(msg)
+
+    def unsubscribe(self, client: "InProcessClient", topic: Optional[str] = None) -> None:
+        with self._lock:
+            for table in (self._exact, self._wildcard):
+                for name in [topic] if topic is not None else list(table):
+                    subscribers = table.get(name)
+                    if subscribers and client in subscribers:
+                        del subscribers[client]
+                        if not subscribers:
+                            del table[name]
+
+    def publish(self, topic: str, payload: bytes, qos: int = 0, retain: bool = False, properties=None) -> None:
+        """Route a message to every matching subscriber."""
+        if retain:
+            with self._lock:
+                if payload:
+                    self._retained[topic] = InProcessMessage(topic, payload, qos, True, properties)
+                else:
+                    self._retained.pop(topic, None)
+
+        if self.synchronous or self._thread is None:
+            self._route(topic, payload, qos, properties)
+        else:
+            self._queue.put((topic, payload, qos, retain, properties))
+
+    def _route(self, topic: str, payload: bytes, qos: int, properties) -> None:
+        with self._lock:
+            # Each client gets the message once, at the highest QoS of its matching subscriptions
+            targets: Dict[InProcessClient, int] = dict(self._exact.get(topic, {}))
+            for name, subscribers in self._wildcard.items():
+                if topic_matches(name, topic):
+                    for client, sub_qos in subscribers.items():
+                        targets[client] = max(sub_qos, targets.get(client, 0))
+
+        msg = InProcessMessage(topic, payload, qos, False, properties)
+        for client, sub_qos in targets.items():
+            client.deliver(msg, min(qos, sub_qos))
+            self.delivered += 1
+
+    def _dispatch(self) -> None:
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                topic, payload, qos, _, properties = item
+                self._route(topic, payload, qos, properties)
+            finally:
+                self._queue.task_done()
+
+
+class InProcessClient:
+    """
+    Paho-compatible client attached to an InProcessBroker.
+
+    With ``clean_session=False`` the broker keeps the client's session (its
+    subscriptions, and QoS 1/2 messages routed while it is disconnected)
+    across disconnects, and reports it in the connect flags, until
+    expire_session() is called.
+    """
+
+    def __init__(self, broker: InProcessBroker, client_id: str = "", clean_session: bool = True):
+        self.broker = broker
+        self.client_id = client_id
+        self.clean_session = clean_session
+        self.userdata = None
+        self.connected = False
+        self.last_will: Optional[Tuple[str, bytes, int, bool]] = None
+        self.subscriptions: Dict[str, int] = {}
+        self.session = False
+        self.pending: List[InProcessMessage] = []
+
+        self.on_connect = None
+        self.on_disconnect = None
+        self.on_message = None
+        self.on_publish = None
+        self.on_subscribe = None
+        self.on_unsubscribe = None
+
+    def connect(self, host="localhost", port=1883, keepalive=60, bind_address="", bind_port=0,
+                clean_start=None, properties=None):
+        session_present = int(self.session and not self.clean_session)
+        if not session_present:
+            self.expire_session()
+        self.session = True
+        self.connected = True
+        if self.on_connect:
+            self.on_connect(self, self.userdata, {"session present": session_present}, 0)
+
+        # Messages queued in the session while disconnected
+        pending, self.pending = self.pending, []
+        for msg in pending:
+            self.deliver(msg)
+        return 0
+
+    def reconnect(self):
+        return self.connect()
+
+    def _end_connection(self) -> None:
+        self.connected = False
+        if self.clean_session:
+            self.expire_session()
+
+    def expire_session(self) -> None:
+        """Drop the session kept by the broker, as after a broker restart."""
+        self.broker.unsubscribe(self)
+        self.subscriptions.clear()
+        self.pending.clear()
+        self.session = False
+
+    def disconnect(self):
+        self._end_connection()
+        if self.on_disconnect:
+            self.on_disconnect(self, self.userdata, 0)
+        return 0
+
+    def simulate_disconnect(self, rc=1):
+        """Drop the connection unexpectedly, publishing the last will."""
+        self._end_connection()
+        if self.last_will:
+            self.broker.publish(*self.last_will)
+        if self.on_disconnect:
+            self.on_disconnect(self, self.userdata, rc)
+
+    def loop_start(self):
+        pass
+
+    def loop_stop(self, force=False):
+        pass
+
+    def publish(self, topic, payload=None, qos=0, retain=False, properties=None):
+        if isinstance(payload, str):
+            payload = payload.encode('utf-8')
+        if not self.connected:
+            return InProcessMessageInfo(rc=4)
+        mid = self.broker.next_mid()
+        self.broker.publish(topic, payload or b"", qos, retain, properties)
+        if self.on_publish:
+            self.on_publish(self, self.userdata, mid)
+        return InProcessMessageInfo(mid=mid)
+
+    def subscribe(self, topic, qos=0, options=None, properties=None):
+        topics: List[Tuple[str, int]] = topic if isinstance(topic, list) else [(topic, qos)]
+        mid = self.broker.next_mid()
+        for name, topic_qos in topics:
+            self.subscriptions[name] = topic_qos
+            self.broker.subscribe(self, name, topic_qos)
+        if self.on_subscribe:
+            self.on_subscribe(self, self.userdata, mid, [topic_qos for _, topic_qos in topics])
+        return (0, mid)
+
+    def unsubscribe(self, topic, properties=None):
+        self.subscriptions.pop(topic, None)
+        self.broker.unsubscribe(self, topic)
+        mid = self.broker.next_mid()
+        if self.on_unsubscribe:
+            self.on_unsubscribe(self, self.userdata, mid)
+        return (0, mid)
+
+    def will_set(self, topic, payload=None, qos=0, retain=False, properties=None):
+        if isinstance(payload, str):
+            payload = payload.encode('utf-8')
+        self.last_will = (topic, payload or b"", qos, retain)
+
+    def username_pw_set(self, username, password=None):
+        pass
+
+    def tls_set(self, *args, **kwargs):
+        pass
+
+    def tls_set_context(self, context=None):
+        pass
+
+    def socket(self):
+        return None
+
+    def deliver(self, msg: InProcessMessage, qos: Optional[int] = None) -> None:
+        """Deliver a routed message to on_message, or queue it in the session while disconnected."""
+        if self.connected:
+            if self.on_message:
+                self.on_message(self, self.userdata, msg)
+        elif self.session and not self.clean_session and (msg.qos if qos is None else qos) > 0:
+            self.pending.append(msg)
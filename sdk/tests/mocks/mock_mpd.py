@@ -27,6 +27,10 @@ class MockMPDClient:
         self.current_song_data = {}
         self.playlists = []
         self.queue = []
+        self.queue_ids = []
+        self.stored_playlists = {}
+        self.next_song_id = 1
+        self.command_list = None
         
     def connect(self, host: str, port: int) -> None:
         """
@@ -169,12 +173,15 @@ class MockMPDClient:
         """
         if not self.connected:
             raise ConnectionError("Not connected")
+        for uri in self.stored_playlists.get(playlist_name, []):
+            self.addid(uri)
         
     def clear(self) -> None:
         """Clear the current playlist."""
         if not self.connected:
             raise ConnectionError("Not connected")
         self.queue = []
+        self.queue_ids = []
         
     def add(self, uri: str) -> None:
         """
@@ -185,7 +192,7 @@ class MockMPDClient:
         """
         if not self.connected:
             raise ConnectionError("Not connected")
-        self.queue.append(uri)
+        self.addid(uri)
         
     def save(self, playlist_name: str) -> None:
         """
@@ -197,6 +204,7 @@ class MockMPDClient:
         if not self.connected:
             raise ConnectionError("Not connected")
         self.playlists.append({"playlist": playlist_name})
+        self.stored_playlists[playlist_name] = list(self.queue)
         
     def rm(self, playlist_name: str) -> None:
         """
@@ -208,3 +216,166 @@ class MockMPDClient:
         if not self.connected:
             raise ConnectionError("Not connected")
         self.playlists = [p for p in self.playlists if p["playlist"] != playlist_name]
+        self.stored_playlists.pop(playlist_name, None)
+        
+    def _result(self, value: Any) -> Any:
+        """Collect a result while a command list is open."""
+        if self.command_list is not None:
+            self.command_list.append(value)
+            return None
+        return value
+        
+    def command_list_ok_begin(self) -> None:
+        """Start a command list."""
+        self.command_list = []
+        
+    def command_list_end(self) -> List[Any]:
+        """
+        End a command list.
+        
+        Returns:
+            List[Any]: Result of each command in the list
+        """
+        results, self.command_list = self.command_list, None
+        return results
+        
+    def playlistinfo(self) -> List[Dict[str, str]]:
+        """
+        Get the songs in the queue.
+        
+        Returns:
+            List[Dict[str, str]]: Song info with file, pos and id
+        """
+        if not self.connected:
+            raise ConnectionError("Not connected")
+        return self._result([
+            {"file": uri, "pos": str(pos), "id": song_id}
+            for pos, (uri, song_id) in enumerate(zip(self.queue, self.queue_ids))
+        ])
+        
+    def playlistid(self, song_id: str) -> List[Dict[str, str]]:
+        """
+        Get a song in the queue by id.
+        
+        Args:
+            song_id (str): Song id
+            
+        Returns:
+            List[Dict[str, str]]: Song info
+        """
+        if not self.connected:
+            raise ConnectionError("Not connected")
+        if song_id not in self.queue_ids:
+            raise Exception("No such song")
+        pos = self.queue_ids.index(song_id)
+        return self._result([{"file": self.queue[pos], "pos": str(pos), "id": song_id}])
+        
+    def addid(self, uri: str, pos: Optional[int] = None) -> str:
+        """
+        Add a song to the queue.
+        
+        Args:
+            uri (str): URI of the song
+            pos (Optional[int], optional): Position to insert at. Defaults to the end.
+            
+        Returns:
+            str: Id of the new song
+        """
+        if not self.connected:
+            raise ConnectionError("Not connected")
+        song_id = str(self.next_song_id)
+        self.next_song_id += 1
+        pos = len(self.queue) if pos is None else int(pos)
+        self.queue.insert(pos, uri)
+        self.queue_ids.insert(pos, song_id)
+        return self._result(song_id)
+        
+    def deleteid(self, song_id: str) -> None:
+        """
+        Delete a song from the queue.
+        
+        Args:
+            song_id (str): Song id
+        """
+        if not self.connected:
+            raise ConnectionError("Not connected")
+        pos = self.queue_ids.index(song_id)
+        del self.queue[pos]
+        del self.queue_ids[pos]
+        self._result(None)
+        
+    def delete(self, songrange: str) -> None:
+        """
+        Delete a range of songs from the queue.
+        
+        Args:
+            songrange (str): Range as "start:end"
+        """
+        if not self.connected:
+            raise ConnectionError("Not connected")
+        start, end = (int(pos) for pos in str(songrange).split(":"))
+        del self.queue[start:end]
+        del self.queue_ids[start:end]
+        self._result(None)
+        
+    def moveid(self, song_id: str, to: int) -> None:
+        """
+        Move a song in the queue.
+        
+        Args:
+            song_id (str): Song id
+            to (int): New position
+        """
+        if not self.connected:
+            raise ConnectionError("Not connected")
+        pos = self.queue_ids.index(song_id)
+        uri = self.queue.pop(pos)
+        self.queue_ids.pop(pos)
+        self.queue.insert(int(to), uri)
+        self.queue_ids.insert(int(to), song_id)
+        self._result(None)
+        
+    def listplaylist(self, playlist_name: str) -> List[str]:
+        """
+        Get the files in a stored playlist.
+        
+        Args:
+            playlist_name (str): Name of the playlist
+            
+        Returns:
+            List[str]: File paths
+        """
+        if not self.connected:
+            raise ConnectionError("Not connected")
+        if playlist_name not in self.stored_playlists:
+            raise Exception("No such playlist")
+        return self._result(list(self.stored_playlists[playlist_name]))
+        
+    def playlistclear(self, playlist_name: str) -> None:
+        """
+        Clear a stored playlist, creating it if needed.
+        
+        Args:
+            playlist_name (str): Name of the playlist
+        """
+        if not self.connected:
+            raise ConnectionError("Not connected")
+        if playlist_name not in self.stored_playlists:
+            self.playlists.append({"playlist": playlist_name})
+        self.stored_playlists[playlist_name] = []
+        self._result(None)
+        
+    def playlistadd(self, playlist_name: str, uri: str) -> None:
+        """
+        Add a song to a stored playlist.
+        
+        Args:
+            playlist_name (str): Name of the playlist
+            uri (str): URI of the song
+        """
+        if not self.connected:
+            raise ConnectionError("Not connected")
+        if playlist_name not in self.stored_playlists:
+            self.playlists.append({"playlist": playlist_name})
+        self.stored_playlists.setdefault(playlist_name, []).append(uri)
+        self._result(None)
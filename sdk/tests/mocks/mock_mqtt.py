@@ -36,8 +36,9 @@ class MockMQTTClient:
         
         # TLS
         self.tls_config = None
+        self.tls_context = None
     
-    def connect(self, host, port=1883, keepalive=60, bind_address=""):
+    def connect(self, host, port=1883, keepalive=60, bind_address="", bind_port=0, clean_start=None, properties=None):
         """Connect to the broker."""
         self.connected = True
         if self.on_connect:
@@ -93,14 +94,17 @@ class MockMQTTClient:
         return MockMQTTMessageInfo()
     
     def subscribe(self, topic, qos=0, options=None, properties=None):
-        """Subscribe to a topic."""
-        self.subscriptions[topic] = qos
+        """Subscribe to a topic, or to a list of (topic, qos) tuples."""
+        topics = topic if isinstance(topic, list) else [(topic, qos)]
+        for name, topic_qos in topics:
+            self.subscriptions[name] = topic_qos
+        granted_qos = [topic_qos for _, topic_qos in topics]
         
         # Call the on_subscribe callback
         if self.on_subscribe:
-            self.on_subscribe(self, self.userdata, 1, [qos])  # Use 1 as message ID
+            self.on_subscribe(self, self.userdata, 1, granted_qos)  # Use 1 as message ID
         
-        return (0, [qos])  # (MQTT_ERR_SUCCESS, granted_qos)
+        return (0, granted_qos)  # (MQTT_ERR_SUCCESS, granted_qos)
     
     def unsubscribe(self, topic, properties=None):
         """Unsubscribe from a topic."""
@@ -130,6 +134,14 @@ class MockMQTTClient:
             'ciphers': ciphers
         }
     
+    def tls_set_context(self, context=None):
+        """Set the TLS context."""
+        self.tls_context = context
+    
+    def socket(self):
+        """Get the network socket."""
+        return None
+    
     def will_set(self, topic, payload=None, qos=0, retain=False, properties=None):
         """Set the last will message."""
         if isinstance(payload, str):
@@ -0,0 +1,67 @@
+"""
+Tests for the memory module.
+"""
+
+import os
+import sys
+import tracemalloc
+import unittest
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Import the module to test
+from amora_sdk import memory
+
+
+class TestMemory(unittest.TestCase):
+    """Test cases for the memory helpers."""
+
+    def test_rss_bytes(self):
+        """Test the RSS is readable on this platform."""
+        rss = memory.rss_bytes()
+        self.assertIsNotNone(rss)
+        self.assertGreater(rss, 0)
+
+    def test_report_without_tracing(self):
+        """Test the report works while tracemalloc is off."""
+        report = memory.memory_report()
+        self.assertFalse(report["tracing"])
+        self.assertIn("counts", report["gc"])
+        self.assertNotIn("top", report)
+
+    def test_budget_report_lists_growth(self):
+        """Test the budget report lists the allocation sites grown since freeze."""
+        budget = memory.MemoryBudget(arena_max=0, trim_interval=0, trace=True)
+        budget.start()
+        try:
+            budget.freeze()
+            self.assertGreater(memory.memory_report()["gc"]["frozen"], 0)
+
+            retained = [bytearray(1024) for _ in range(200)]
+            report = budget.report(limit=3)
+
+            self.assertTrue(report["tracing"])
+            self.assertGreaterEqual(report["traced_bytes"], 200 * 1024)
+            self.assertEqual(len(report["top"]), 3)
+            self.assertIn(__file__, report["growth"][0]["location"])
+            self.assertGreaterEqual(report["growth"][0]["size_diff"], 200 * 1024)
+            self.assertIn("rss_growth_bytes", report)
+            del retained
+        finally:
+            budget.stop()
+        self.assertFalse(tracemalloc.is_tracing())
+        self.assertEqual(memory.memory_report()["gc"]["frozen"], 0)
+
+    def test_trim_if_due(self):
+        """Test heap trims follow the trim interval."""
+        budget = memory.MemoryBudget(trim_interval=10)
+        budget.last_trim = 100.0
+        self.assertFalse(budget.trim_if_due(now=105.0))
+        budget.trim_if_due(now=111.0)
+        self.assertEqual(budget.last_trim, 111.0)
+        self.assertFalse(memory.MemoryBudget(trim_interval=0).trim_if_due())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+"""
+Tests for the metrics module.
+"""
+
+import os
+import sys
+import unittest
+import urllib.request
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Import the module to test
+from amora_sdk.metrics import Histogram, MetricsRegistry, MetricsServer
+
+
+class TestMetrics(unittest.TestCase):
+    """Test cases for the metrics registry."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.registry = MetricsRegistry(enabled=True, const_labels={"device_id": "dev-1"})
+
+    def test_disabled_registry_records_nothing(self):
+        """Test a disabled registry ignores all recording calls."""
+        registry = MetricsRegistry()
+        counter = registry.counter("c")
+        histogram = registry.histogram("h")
+
+        counter.inc()
+        histogram.observe(0.1)
+        with histogram.time():
+            pass
+
+        self.assertEqual(counter.get(), 0)
+        self.assertIsNone(histogram.quantile(0.5))
+
+    def test_counter_and_gauge(self):
+        """Test counters and gauges keep values per label set."""
+        counter = self.registry.counter("commands_total")
+        gauge = self.registry.gauge("queue_length")
+
+        counter.inc(command="play")
+        counter.inc(2, command="play")
+        counter.inc(command="stop")
+        gauge.set(5)
+        gauge.inc(-2)
+
+        self.assertEqual(counter.get(command="play"), 3)
+        self.assertEqual(counter.get(command="stop"), 1)
+        self.assertEqual(gauge.get(), 3)
+
+    def test_histogram_buckets_round_trip(self):
+        """Test every value falls into the bucket whose bounds contain it."""
+        previous_upper = -1
+        for index in range(200):
+            upper = Histogram.bucket_upper_bound(index)
+            self.assertEqual(Histogram.bucket_index(previous_upper + 1), index)
+            self.assertEqual(Histogram.bucket_index(upper), index)
+            previous_upper = upper
+
+    def test_histogram_quantiles(self):
+        """Test quantiles are within the bucket resolution."""
+        histogram = self.registry.histogram("latency")
+        for ms in range(1, 101):
+            histogram.observe(ms / 1000, command="play")
+
+        p50 = histogram.quantile(0.5, command="play")
+        p99 = histogram.quantile(0.99, command="play")
+
+        self.assertAlmostEqual(p50, 0.050, delta=0.050 * 0.125)
+        self.assertAlmostEqual(p99, 0.099, delta=0.099 * 0.125)
+        self.assertLessEqual(histogram.quantile(1.0, command="play"), 0.1)
+
+    def test_same_name_different_type(self):
+        """Test a name cannot be reused for another metric type."""
+        self.registry.counter("x")
+        with self.assertRaises(ValueError):
+            self.registry.gauge("x")
+
+    def test_render_prometheus(self):
+        """Test the Prometheus text output."""
+        self.registry.counter("commands_total", "Commands").inc(command="play")
+        self.registry.histogram("latency").observe(0.002, command="play")
+
+        text = self.registry.render_prometheus()
+
+        self.assertIn("# HELP commands_total Commands", text)
+        self.assertIn("# TYPE commands_total counter", text)
+        self.assertIn('commands_total{device_id="dev-1",command="play"} 1.0', text)
+        self.assertIn('latency{device_id="dev-1",command="play",quantile="0.99"}', text)
+        self.assertIn('latency_count{device_id="dev-1",command="play"} 1.0', text)
+
+    def test_snapshot(self):
+        """Test the snapshot is plain data."""
+        self.registry.histogram("latency").observe(0.002)
+
+        snapshot = self.registry.snapshot()
+
+        self.assertEqual(snapshot["latency"]["type"], "summary")
+        self.assertEqual(snapshot["latency"]["values"][0]["count"], 1)
+
+    def test_metrics_server(self):
+        """Test the HTTP endpoint serves the registry."""
+        self.registry.counter("up").inc()
+        server = MetricsServer(self.registry, port=0)
+        self.assertTrue(server.start())
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{server.port}/metrics", timeout=5) as response:
+                body = response.read().decode()
+        finally:
+            server.stop()
+
+        self.assertIn('up{device_id="dev-1"} 1.0', body)
+
+
+if __name__ == "__main__":
+    unittest.main()
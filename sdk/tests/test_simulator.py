@@ -0,0 +1,130 @@
+"""
+Tests for the fleet simulator.
+"""
+
+import os
+import sys
+import logging
+import unittest
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from simulator import FleetConfig, SimulatedPlayer, create_catalog, parse_command_mix, run_fleet
+
+# Disable logging during tests
+logging.disable(logging.CRITICAL)
+
+
+class FakeClock:
+    """Manually advanced clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestSimulatedPlayer(unittest.TestCase):
+    """Test cases for the SimulatedPlayer class."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.clock = FakeClock()
+        self.catalog = {"Mix": [
+            {"title": "A", "file": "a.mp3", "duration": 100},
+            {"title": "B", "file": "b.mp3", "duration": 50},
+        ]}
+        self.player = SimulatedPlayer(self.catalog, clock=self.clock)
+
+    def test_position_follows_clock(self):
+        """Test the position advances only while playing."""
+        self.player.play()
+        self.clock.now = 30
+        self.assertEqual(self.player.get_status()["current_song"]["position"], 30)
+
+        self.player.pause()
+        self.clock.now = 60
+        status = self.player.get_status()
+        self.assertEqual(status["state"], "pause")
+        self.assertEqual(status["current_song"]["position"], 30)
+
+    def test_advances_to_next_track(self):
+        """Test playback moves on when a track ends."""
+        self.player.play()
+        self.clock.now = 120
+
+        song = self.player.get_status()["current_song"]
+        self.assertEqual(song["file"], "b.mp3")
+        self.assertEqual(song["position"], 20)
+
+    def test_stops_at_end_without_repeat(self):
+        """Test playback stops after the last track unless repeat is on."""
+        self.player.play()
+        self.clock.now = 200
+        self.assertEqual(self.player.get_status()["state"], "stop")
+
+        self.player.set_repeat(True)
+        self.player.play()
+        self.clock.now = 360
+        status = self.player.get_status()
+        self.assertEqual(status["state"], "play")
+        self.assertEqual(status["current_song"]["file"], "a.mp3")
+
+    def test_commands(self):
+        """Test the command methods update the state."""
+        self.assertFalse(self.player.set_volume(101))
+        self.assertTrue(self.player.set_volume(30))
+        self.assertFalse(self.player.play_playlist("Missing"))
+        self.assertTrue(self.player.play_playlist("Mix"))
+        self.assertTrue(self.player.next())
+
+        status = self.player.get_status()
+        self.assertEqual(status["volume"], 30)
+        self.assertEqual(status["playlist"], "Mix")
+        self.assertEqual(status["current_song"]["file"], "b.mp3")
+
+
+class TestFleetSimulator(unittest.TestCase):
+    """Test cases for the fleet simulator."""
+
+    def test_parse_command_mix(self):
+        """Test parsing command mixes."""
+        self.assertEqual(parse_command_mix("get_status=3, play"), {"get_status": 3.0, "play": 1.0})
+        with self.assertRaises(ValueError):
+            parse_command_mix("reboot=1")
+        with self.assertRaises(ValueError):
+            parse_command_mix("")
+
+    def test_create_catalog(self):
+        """Test the catalog has the requested size."""
+        catalog = create_catalog(num_playlists=3, tracks_per_playlist=4)
+        self.assertEqual(len(catalog), 3)
+        self.assertTrue(all(len(tracks) == 4 for tracks in catalog.values()))
+
+    def test_in_process_run(self):
+        """Test a short in-process run answers every command."""
+        report = run_fleet(FleetConfig(
+            devices=20,
+            duration=0.3,
+            command_rate=200,
+            state_interval=0.1,
+            position_interval=0,
+            connect_rate=1000,
+            drain=1.0,
+            trace_memory=False
+        ))
+
+        commands = report["commands"]
+        self.assertEqual(report["devices"], 20)
+        self.assertGreater(commands["sent"], 0)
+        self.assertEqual(commands["answered"], commands["sent"])
+        self.assertEqual(commands["lost"], 0)
+        self.assertIn("p50", commands["latency_ms"])
+        self.assertGreater(report["state"]["published"], 0)
+        self.assertEqual(report["state"]["received"], report["state"]["published"])
+
+
+if __name__ == "__main__":
+    unittest.main()
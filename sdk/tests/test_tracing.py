@@ -0,0 +1,53 @@
+"""
+Tests for the tracing module.
+"""
+
+import os
+import sys
+import time
+import unittest
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Import the module to test
+from amora_sdk import tracing
+
+
+class TestTracing(unittest.TestCase):
+    """Test cases for command traces."""
+
+    def test_span_without_trace_is_noop(self):
+        """Test spans outside a trace record nothing."""
+        self.assertIsNone(tracing.current_trace())
+        with tracing.span("mpd"):
+            pass
+
+    def test_spans_are_recorded_in_active_trace(self):
+        """Test spans go to the active trace and the trace is reset afterwards."""
+        trace = tracing.CommandTrace("cmd-1", sent_at=time.time() - 0.05)
+        token = tracing.start_trace(trace)
+        try:
+            with tracing.span("handler"):
+                with tracing.span("mpd"):
+                    time.sleep(0.001)
+        finally:
+            tracing.end_trace(token)
+
+        self.assertIsNone(tracing.current_trace())
+        data = trace.to_dict()
+        self.assertEqual([span["name"] for span in data["spans"]], ["mpd", "handler"])
+        self.assertGreaterEqual(data["spans"][0]["duration_ms"], 1.0)
+        self.assertGreaterEqual(data["network_ms"], 50.0)
+        self.assertGreaterEqual(data["total_ms"], data["spans"][1]["duration_ms"])
+
+    def test_millisecond_timestamps(self):
+        """Test millisecond sender timestamps are normalized to seconds."""
+        now = time.time()
+        trace = tracing.CommandTrace("cmd-2", sent_at=now * 1000, received_at=now)
+
+        self.assertAlmostEqual(trace.to_dict()["network_ms"], 0.0, delta=1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()